@@ -265,12 +265,25 @@ class ActionButtonsModule:
         return action_card
     
     def check_gpu_availability(self):
-        """GPU 사용 가능 여부 확인"""
-        try:
-            import torch
-            return torch.cuda.is_available()
-        except ImportError:
-            return False
+        """
+        GPU 사용 가능 여부 확인 (시작 시 torch를 import하지 않도록 CUDA 드라이버 라이브러리 로드로 판단).
+        torch가 이미 로드돼 있으면 torch 결과 사용. 실제 사용 가능 여부는 각 태거가 로드 시 다시 확인함
+        """
+        import sys
+        if "torch" in sys.modules:
+            try:
+                return sys.modules["torch"].cuda.is_available()
+            except Exception:
+                return False
+        import ctypes
+        driver_names = ["nvcuda.dll"] if sys.platform == "win32" else ["libcuda.so.1", "libcuda.so"]
+        for name in driver_names:
+            try:
+                ctypes.CDLL(name)
+                return True
+            except OSError:
+                continue
+        return False
     
     def setup_model_connections(self):
         """모델 관련 연결 설정"""
@@ -1805,6 +1805,14 @@ class AdvancedSearchWidget(QWidget):
         try:
             # 원본 이미지 목록 사용
             search_target = getattr(self.app_instance, 'original_image_files', self.app_instance.image_files)
+            
+            # all_tags 검색 색인(태그 어휘 n-gram 포함)으로 조건에 맞는 이미지를 먼저 구함 (이미지별 태그 순회 없음)
+            hits = self._search_by_tags_indexed(operator, value)
+            if hits is not None:
+                if operator == "!=":
+                    return [image_path for image_path in search_target if str(image_path) not in hits]
+                return [image_path for image_path in search_target if str(image_path) in hits]
+            
             for image_path in search_target:
                 if hasattr(self.app_instance, 'get_image_tags'):
                     tags = self.app_instance.get_image_tags(image_path)
@@ -1842,6 +1850,32 @@ class AdvancedSearchWidget(QWidget):
         
         return matches
     
+    def _search_by_tags_indexed(self, operator, value):
+        """search_by_tags 조건을 만족하는 이미지 경로(str) 집합 ("!=" 는 값 태그를 가진 이미지, 색인을 못 쓰면 None)"""
+        if not hasattr(self.app_instance, 'get_image_tags'):
+            return None
+        try:
+            from tag_search_index import MODE_ORDER, get_search_index
+            index = get_search_index(self.app_instance)
+        except Exception as e:
+            print(f"태그 검색 색인 사용 불가, 전체 순회로 검색: {e}")
+            return None
+        
+        value_lower = value.lower()
+        if operator in ("=", "!="):
+            return index.images_with_tag(value)
+        if operator == "Contains":
+            return index.images_with_tag_containing(value_lower)
+        if operator == "Starts with":
+            return index.images_with_tag_starting(value_lower)
+        if operator == "First tag":
+            return index.images_with_edge_containing(value_lower)
+        if operator == "Last tag":
+            return index.images_with_edge_containing(value_lower, last=True)
+        if operator == "Tag position":
+            return index.search(value_lower, MODE_ORDER)
+        return None
+    
     def _search_by_tag_position(self, tags, search_text):
         """태그 순서 기반 검색"""
         if not tags or not search_text:
@@ -2,24 +2,36 @@
 """
 All Tags 관리 공용 모듈
 모든 모듈에서 공통으로 사용하는 all_tags 추가/삭제/편집 로직을 담당
+all_tags 는 tag_store.TagStore (dict 겉모습 + 태그 역색인/이미지 수) 로 유지됨
 """
 
+from tag_store import TagStore
+
+
+def ensure_tag_store(app_instance, attr: str = 'all_tags') -> TagStore:
+    """app_instance.<attr> (all_tags/image_removed_tags) 가 TagStore 가 아니면 (일반 dict 대입 등) 변환해서 돌려줌"""
+    tags_by_image = getattr(app_instance, attr, None)
+    if isinstance(tags_by_image, TagStore):
+        return tags_by_image
+    store = TagStore(tags_by_image or {})
+    setattr(app_instance, attr, store)
+    return getattr(app_instance, attr, store)
+
+
 def add_tag_to_all_tags(app_instance, image_path: str, tag: str, is_trigger: bool = False):
     """all_tags에 태그 추가"""
     if not image_path or not tag:
         return
     
-    # all_tags 초기화
-    if not hasattr(app_instance, 'all_tags'):
-        app_instance.all_tags = {}
+    all_tags = ensure_tag_store(app_instance)
     
     # 이미지 경로가 없으면 빈 리스트로 초기화
-    if image_path not in app_instance.all_tags:
-        app_instance.all_tags[image_path] = []
+    if image_path not in all_tags:
+        all_tags[image_path] = []
     
-    # 태그가 이미 있으면 추가하지 않음
-    if tag not in app_instance.all_tags[image_path]:
-        app_instance.all_tags[image_path].append(tag)
+    # 태그가 이미 있으면 추가하지 않음 (이미지별 태그 인덱스로 O(1) 확인)
+    if tag not in all_tags[image_path]:
+        all_tags[image_path].append(tag)
         print(f"✅ All Tags Manager: 태그 추가 - {tag} (이미지: {image_path})")
 
 
@@ -67,12 +79,8 @@ def set_tags_for_image(app_instance, image_path: str, tags: list):
     if not image_path:
         return
     
-    # all_tags 초기화
-    if not hasattr(app_instance, 'all_tags'):
-        app_instance.all_tags = {}
-    
-    # 태그 리스트 설정
-    app_instance.all_tags[image_path] = list(tags) if tags else []
+    # 태그 리스트 설정 (기존 리스트와의 차이만 인덱스에 반영)
+    ensure_tag_store(app_instance)[image_path] = list(tags) if tags else []
     print(f"✅ All Tags Manager: 이미지 태그 설정 - {len(tags)}개 태그 (이미지: {image_path})")
 
 
@@ -81,7 +89,7 @@ def get_tags_for_image(app_instance, image_path: str) -> list:
     if not image_path or not hasattr(app_instance, 'all_tags') or not app_instance.all_tags:
         return []
     
-    return app_instance.all_tags.get(image_path, [])
+    return ensure_tag_store(app_instance).get(image_path, [])
 
 
 def remove_image_from_all_tags(app_instance, image_path: str):
@@ -99,11 +107,7 @@ def get_all_unique_tags(app_instance) -> set:
     if not hasattr(app_instance, 'all_tags') or not app_instance.all_tags:
         return set()
     
-    unique_tags = set()
-    for tags in app_instance.all_tags.values():
-        unique_tags.update(tags)
-    
-    return unique_tags
+    return ensure_tag_store(app_instance).unique_tags()
 
 
 def get_image_count_for_tag(app_instance, tag: str) -> int:
@@ -111,12 +115,23 @@ def get_image_count_for_tag(app_instance, tag: str) -> int:
     if not tag or not hasattr(app_instance, 'all_tags') or not app_instance.all_tags:
         return 0
     
-    count = 0
-    for tags in app_instance.all_tags.values():
-        if tag in tags:
-            count += 1
+    return ensure_tag_store(app_instance).image_count(tag)
+
+
+def get_images_for_tag(app_instance, tag: str) -> set:
+    """특정 태그를 사용하는 이미지 경로 집합 반환 (읽기 전용)"""
+    if not tag or not hasattr(app_instance, 'all_tags') or not app_instance.all_tags:
+        return set()
+    
+    return ensure_tag_store(app_instance).images_for_tag(tag)
+
+
+def get_tag_image_counts(app_instance) -> dict:
+    """모든 태그의 {태그: 이미지 수} 반환"""
+    if not hasattr(app_instance, 'all_tags') or not app_instance.all_tags:
+        return {}
     
-    return count
+    return ensure_tag_store(app_instance).tag_counts()
 
 
 def sync_current_tags_with_all_tags(app_instance):
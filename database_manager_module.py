@@ -330,9 +330,11 @@ class FolderManager:
         update_image_counter(self.app_instance, len(self.app_instance.image_files), len(self.app_instance.image_files))
         self.app_instance.statusBar().showMessage(f"Loaded {len(self.app_instance.image_files)} images from {folder_path}")
         
-        # 전체 태그 통계 초기화 및 업데이트
+        # 전체 태그 통계 초기화 후 all_tags 기준 전체 재계산 (폴더 로드 시 명시적 재계산)
         if hasattr(self.app_instance, 'global_tag_stats'):
             self.app_instance.global_tag_stats.clear()
+            from global_tag_manager import recalculate_global_tag_stats
+            recalculate_global_tag_stats(self.app_instance)
         if hasattr(self.app_instance, 'update_global_tag_stats'):
             self.app_instance.update_global_tag_stats()
         
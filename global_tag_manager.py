@@ -2,8 +2,263 @@
 """
 글로벌 태그 관리 플러그인
 모든 모듈에서 공통으로 사용하는 글로벌 태그 추가/삭제/편집 로직을 담당
+
+global_tag_stats (GlobalTagStats)
+- 항목 형태는 하나로 통일: {tag: {'image_count': int, 'category': str}}
+- image_count 는 all_tags(TagStore) 리스너로 증분 갱신 (태그가 이미지에 생기거나 사라질 때 ±1)
+  → 태그 추가/삭제/이름 변경 코드는 all_tags 만 바꾸면 되고, 통계 카운트를 직접 건드리지 않음
+- 전체 재계산은 recalculate_global_tag_stats() 를 명시적으로 호출할 때만 (폴더 로드/되돌리기 등 전체 교체 포함)
+- 디버그: 환경변수 AI_TAGGER_DEBUG_TAG_STATS=1 이면 UI 갱신마다 all_tags 와 일치하는지 검사
 """
 
+import os
+
+from all_tags_manager import ensure_tag_store
+
+DEBUG_ENV_FLAG = "AI_TAGGER_DEBUG_TAG_STATS"
+UNKNOWN_CATEGORY = 'unknown'
+
+
+def normalize_stat_entry(value) -> dict:
+    """정수/딕셔너리(추가 키 포함) 항목 → {'image_count': int, 'category': str}"""
+    if isinstance(value, dict):
+        count = value.get('image_count', 0)
+        category = value.get('category') or UNKNOWN_CATEGORY
+    else:
+        count = value
+        category = UNKNOWN_CATEGORY
+    try:
+        count = int(count or 0)
+    except (TypeError, ValueError):
+        count = 0
+    return {'image_count': count, 'category': category}
+
+
+def get_stat_count(value) -> int:
+    """통계 항목의 이미지 수 (정규화 전 값도 허용)"""
+    if isinstance(value, dict):
+        return value.get('image_count', 0)
+    return value or 0
+
+
+class GlobalTagStats(dict):
+    """
+    {tag: {'image_count', 'category'}} - all_tags(TagStore) 변경을 따라 증분 갱신되는 전체 태그 통계.
+    - 대입한 값은 정규화되고, 연결된 상태면 image_count 는 all_tags 기준 값으로 맞춰짐
+    - 항목이 사라져도 카테고리는 기억 (다시 생기거나 되돌리기 시 복원)
+    """
+
+    def __init__(self, mapping=None):
+        super().__init__()
+        self._store = None
+        self._categories = {}  # 태그 → 마지막으로 알려진 카테고리 (unknown 제외)
+        self.pending_categories = set()  # 카테고리 unknown 으로 새로 생긴 태그 (UI 갱신 시 분류)
+        self.version = 0  # 이미지 수/항목이 바뀔 때마다 증가
+        for tag, value in dict(mapping or {}).items():
+            self[tag] = value
+
+    # ────────────── all_tags 연결 ──────────────
+    def attach(self, store):
+        """TagStore 에 리스너 등록 후 한 번 전체 계산"""
+        if self._store is store:
+            return
+        if self._store is not None:
+            self._store.remove_listener(self._on_tags_changed)
+        self._store = store
+        store.add_listener(self._on_tags_changed)
+        self.rebuild()
+
+    def _on_tags_changed(self, path, gained, lost):
+        if path is None:
+            # all_tags 전체 교체 (되돌리기/프로젝트 로드)
+            self.rebuild()
+            return
+        for tag in gained:
+            entry = dict.get(self, tag)
+            if entry is None:
+                category = self._categories.get(tag, UNKNOWN_CATEGORY)
+                entry = {'image_count': 0, 'category': category}
+                dict.__setitem__(self, tag, entry)
+                if category == UNKNOWN_CATEGORY:
+                    self.pending_categories.add(tag)
+            entry['image_count'] += 1
+        for tag in lost:
+            entry = dict.get(self, tag)
+            if entry is None:
+                continue
+            entry['image_count'] -= 1
+            if entry['image_count'] <= 0:
+                dict.__delitem__(self, tag)
+                self.pending_categories.discard(tag)
+        if gained or lost:
+            self.version += 1
+
+    def rebuild(self):
+        """all_tags 기준 전체 재계산 (카테고리는 유지)"""
+        if self._store is None:
+            return
+        for tag, entry in dict.items(self):
+            self._remember(tag, entry.get('category'))
+        dict.clear(self)
+        self.pending_categories.clear()
+        for tag, count in self._store.tag_counts().items():
+            category = self._categories.get(tag, UNKNOWN_CATEGORY)
+            dict.__setitem__(self, tag, {'image_count': count, 'category': category})
+            if category == UNKNOWN_CATEGORY:
+                self.pending_categories.add(tag)
+        self.version += 1
+
+    def load(self, mapping):
+        """저장된 통계(스냅샷/프로젝트)에서 카테고리를 가져오고 이미지 수는 all_tags 기준으로 다시 계산"""
+        mapping = dict(mapping or {})
+        for tag, value in mapping.items():
+            self._remember(tag, normalize_stat_entry(value)['category'])
+        if self._store is not None:
+            self.rebuild()
+        else:
+            dict.clear(self)
+            for tag, value in mapping.items():
+                self[tag] = value
+
+    # ────────────── 카테고리 ──────────────
+    def _remember(self, tag, category):
+        if category and category != UNKNOWN_CATEGORY:
+            self._categories[tag] = category
+
+    def touch(self):
+        """카운트 외 분류 정보(manual_tag_info 등)가 바뀌었음을 표시 → 다음 UI 갱신에서 다시 그림"""
+        self.version += 1
+
+    def set_category(self, tag, category):
+        """태그 카테고리 기록 (항목이 아직 없어도 기억해 두었다가 생길 때 사용)"""
+        self._remember(tag, category)
+        entry = dict.get(self, tag)
+        if entry is not None and category:
+            if entry.get('category') != category:
+                entry['category'] = category
+                self.version += 1
+            if category != UNKNOWN_CATEGORY:
+                self.pending_categories.discard(tag)
+
+    def carry_category(self, old_tag, new_tag):
+        """이름 변경 시 기존 태그의 카테고리를 새 태그로 이어받음 (새 태그 카테고리가 없을 때만)"""
+        category = self._categories.get(old_tag)
+        if not category and isinstance(dict.get(self, old_tag), dict):
+            category = dict.get(self, old_tag).get('category')
+        if not category or category == UNKNOWN_CATEGORY:
+            return
+        entry = dict.get(self, new_tag)
+        if new_tag not in self._categories and (entry is None or entry.get('category') == UNKNOWN_CATEGORY):
+            self.set_category(new_tag, category)
+
+    # ────────────── dict 변경 메서드 (항목 정규화) ──────────────
+    def __setitem__(self, tag, value):
+        entry = normalize_stat_entry(value)
+        if self._store is not None:
+            entry['image_count'] = self._store.image_count(tag)
+        if entry['category'] == UNKNOWN_CATEGORY:
+            entry['category'] = self._categories.get(tag, UNKNOWN_CATEGORY)
+        else:
+            self._remember(tag, entry['category'])
+        dict.__setitem__(self, tag, entry)
+        self.version += 1
+
+    def __delitem__(self, tag):
+        dict.__delitem__(self, tag)
+        self.pending_categories.discard(tag)
+        self.version += 1
+
+    def pop(self, tag, *default):
+        if tag in self:
+            value = dict.pop(self, tag)
+            self.pending_categories.discard(tag)
+            self.version += 1
+            return value
+        if default:
+            return default[0]
+        raise KeyError(tag)
+
+    def setdefault(self, tag, default=None):
+        if tag not in self:
+            self[tag] = default if default is not None else 0
+        return dict.__getitem__(self, tag)
+
+    def update(self, *args, **kwargs):
+        for tag, value in dict(*args, **kwargs).items():
+            self[tag] = value
+
+    def clear(self):
+        """전체 비우기 (클리어올/프로젝트 초기화: 카테고리 기억도 지움)"""
+        dict.clear(self)
+        self._categories.clear()
+        self.pending_categories.clear()
+        self.version += 1
+
+    def copy(self) -> dict:
+        """일반 dict 복사본 (항목도 복사)"""
+        return {tag: dict(entry) for tag, entry in dict.items(self)}
+
+    def __reduce_ex__(self, protocol):
+        return dict, (self.copy(),)
+
+    # ────────────── 검사 ──────────────
+    def check_consistency(self) -> list:
+        """all_tags 에서 다시 센 이미지 수와 비교 (문제 목록 반환)"""
+        if self._store is None:
+            return ["all_tags 에 연결되지 않음"]
+        problems = []
+        expected = self._store.tag_counts()
+        for tag in set(expected) | set(dict.keys(self)):
+            entry = dict.get(self, tag)
+            actual = entry.get('image_count') if isinstance(entry, dict) else None
+            if actual != expected.get(tag):
+                problems.append(f"{tag}: 통계 {actual} ≠ all_tags {expected.get(tag)}")
+            if isinstance(entry, dict) and set(entry) != {'image_count', 'category'}:
+                problems.append(f"{tag}: 정규화되지 않은 항목 {sorted(entry)}")
+        return problems
+
+
+def ensure_global_tag_stats(app_instance) -> GlobalTagStats:
+    """app_instance.global_tag_stats 를 all_tags 에 연결된 GlobalTagStats 로 보장"""
+    store = ensure_tag_store(app_instance)
+    stats = getattr(app_instance, 'global_tag_stats', None)
+    if not isinstance(stats, GlobalTagStats):
+        app_instance.global_tag_stats = GlobalTagStats(stats or {})
+        stats = app_instance.global_tag_stats
+    stats.attach(store)
+    return stats
+
+
+def recalculate_global_tag_stats(app_instance) -> GlobalTagStats:
+    """global_tag_stats 전체 재계산 (명시적 요청 시에만 사용)"""
+    stats = ensure_global_tag_stats(app_instance)
+    stats.rebuild()
+    print(f"📊 global_tag_stats 전체 재계산 완료: {len(stats)}개 태그")
+    return stats
+
+
+def set_tag_category(app_instance, tag, category):
+    """global_tag_stats 에 태그 카테고리 기록 (이미지 수는 all_tags 가 결정)"""
+    if not tag:
+        return
+    ensure_global_tag_stats(app_instance).set_category(tag, category)
+
+
+def is_debug_check_enabled() -> bool:
+    return os.environ.get(DEBUG_ENV_FLAG, "").strip() not in ("", "0", "false", "False")
+
+
+def check_global_tag_stats(app_instance) -> list:
+    """global_tag_stats 와 all_tags 일치 검사 (불일치 출력 후 목록 반환)"""
+    stats = ensure_global_tag_stats(app_instance)
+    problems = stats.check_consistency() + stats._store.check_consistency()
+    if problems:
+        print(f"⚠️ global_tag_stats 불일치 {len(problems)}건:")
+        for problem in problems[:20]:
+            print(f"   - {problem}")
+    return problems
+
+
 def add_global_tag(app_instance, tag, is_trigger=False, **kwargs):
     """글로벌 태그 추가 (메타 보존 중심)
     - WD/LLaVA 등 AI 메타(tag_confidence/llava_tag_info)가 이미 있는 태그는 manual_tag_info를 건드리지 않는다.
@@ -12,23 +267,8 @@ def add_global_tag(app_instance, tag, is_trigger=False, **kwargs):
     if not tag:
         return
     
-    # 전체 태그 통계에 추가 (정수/딕셔너리 형태 모두 지원)
-    if tag in app_instance.global_tag_stats:
-        current_value = app_instance.global_tag_stats[tag]
-        if isinstance(current_value, dict):
-            # 딕셔너리 형태: {'image_count': count, 'category': 'unknown'}
-            app_instance.global_tag_stats[tag]['image_count'] += 1
-        else:
-            # 정수 형태: count
-            app_instance.global_tag_stats[tag] += 1
-    else:
-        # 새로운 태그 추가 시 기존 구조 확인
-        if app_instance.global_tag_stats and isinstance(next(iter(app_instance.global_tag_stats.values())), dict):
-            # 딕셔너리 형태로 초기화
-            app_instance.global_tag_stats[tag] = {'image_count': 1, 'category': 'unknown'}
-        else:
-            # 정수 형태로 초기화
-            app_instance.global_tag_stats[tag] = 1
+    # 이미지 수는 all_tags 변경을 따라 자동 갱신됨 (여기서는 통계 연결만 보장)
+    stats = ensure_global_tag_stats(app_instance)
 
     # ── 메타 보존 로직 ─────────────────────────────────────────────────────────
     # 현재 이미지 기준으로 해당 태그가 AI 메타를 보유하는지 확인
@@ -62,20 +302,17 @@ def add_global_tag(app_instance, tag, is_trigger=False, **kwargs):
         # AI 메타가 없는 태그: 이번 추가를 '수동'으로 간주하여 is_trigger 값 기록
         app_instance.manual_tag_info[tag] = bool(is_trigger)
 
+    # manual_tag_info 는 카테고리 분류에 쓰이므로 통계 UI 갱신 대상으로 표시
+    stats.touch()
+
 
 
 def remove_global_tag(app_instance, tag):
-    """글로벌 태그 제거 (카운터만 감소, 삭제는 하지 않음)"""
+    """글로벌 태그 제거 (이미지 수는 all_tags 에서 태그가 빠질 때 자동 감소)"""
     if not tag:
         return
     
-    # 전체 태그 통계에서 제거 (정수/딕셔너리 형태 모두 지원)
-    if tag in app_instance.global_tag_stats:
-        current_value = app_instance.global_tag_stats[tag]
-        if isinstance(current_value, dict):
-            app_instance.global_tag_stats[tag]['image_count'] -= 1
-        else:
-            app_instance.global_tag_stats[tag] -= 1
+    ensure_global_tag_stats(app_instance)
 
 
 def edit_global_tag(app_instance, old_tag, new_tag):
@@ -83,21 +320,10 @@ def edit_global_tag(app_instance, old_tag, new_tag):
     if not old_tag or not new_tag or old_tag == new_tag:
         return
     
-    # 기존 태그 정보 백업
-    old_value = None
-    if old_tag in app_instance.global_tag_stats:
-        old_value = app_instance.global_tag_stats[old_tag]
-        del app_instance.global_tag_stats[old_tag]
-    
-    # 새 태그로 추가
-    if old_value:
-        # 정수 형태인지 딕셔너리 형태인지 확인
-        if isinstance(old_value, dict):
-            # 딕셔너리 형태: {'image_count': count, 'category': 'unknown'}
-            app_instance.global_tag_stats[new_tag] = old_value.copy()
-        else:
-            # 정수 형태: count
-            app_instance.global_tag_stats[new_tag] = old_value
+    # 카테고리만 새 태그로 이어받음 (이미지 수는 all_tags 의 이름 변경을 따라 자동 갱신)
+    stats = ensure_global_tag_stats(app_instance)
+    stats.carry_category(old_tag, new_tag)
+    stats.touch()
     
     # manual_tag_info 업데이트 (수동 입력 태그인 경우)
     if hasattr(app_instance, 'manual_tag_info') and old_tag in app_instance.manual_tag_info:
@@ -210,8 +210,8 @@ def load_image(app_instance, image_path):
     if image_path in app_instance.image_removed_tags:
         app_instance.removed_tags = app_instance.image_removed_tags[image_path].copy()
     
-    # 전체 태그 통계 업데이트 (이미지 로드 시)
-    app_instance.update_global_tag_stats()
+    # 전체 태그 통계는 all_tags 변경을 따라 증분 갱신되므로 이미지 로드 시 재계산하지 않음
+    # (아래 update_tag_stats 에서 바뀐 것이 있을 때만 다시 그림)
     
     # 이미지 프리뷰 업데이트
     try:
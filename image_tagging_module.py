@@ -1704,6 +1704,29 @@ def create_tagging_section(app_instance, SectionCard):
     # 초기 1회 호출
     _update_active_label_with_tokens()
     
+    # LLaVA 생성 중 부분 태그 미리보기 줄 (읽기 전용 라벨, 평소에는 숨김)
+    app_instance.llava_preview_container = QWidget()
+    app_instance.llava_preview_container.setStyleSheet("""
+        QWidget {
+            background: rgba(139,92,246,0.08);
+            border: 1px dashed rgba(139,92,246,0.4);
+            border-radius: 4px;
+        }
+    """)
+    preview_box = QVBoxLayout(app_instance.llava_preview_container)
+    preview_box.setContentsMargins(6, 4, 6, 4)
+    preview_box.setSpacing(2)
+    app_instance.llava_preview_label = QLabel("⏳ LLaVA 생성 중 (미리보기)")
+    app_instance.llava_preview_label.setStyleSheet("color: #A78BFA; font-size: 10px; font-weight: 600; border: none; background: transparent;")
+    preview_box.addWidget(app_instance.llava_preview_label)
+    preview_tags_widget = QWidget()
+    preview_tags_widget.setStyleSheet("QWidget { border: none; background: transparent; }")
+    app_instance.llava_preview_layout = QFlowLayout(preview_tags_widget)
+    app_instance.llava_preview_layout.setContentsMargins(0, 0, 0, 0)
+    preview_box.addWidget(preview_tags_widget)
+    app_instance.llava_preview_container.hide()
+    active_tags_layout.addWidget(app_instance.llava_preview_container)
+    
     # Create scroll area for active tags
     app_instance.active_tags_scroll = QScrollArea()
     app_instance.active_tags_scroll.setWidgetResizable(True)  # True로 설정하여 상대사이즈
@@ -2001,6 +2024,48 @@ def update_current_tags_display(app_instance):
         _update_thumbnail_token_warnings(app_instance)
     except Exception:
         pass
+    
+    # 부분 태그 미리보기는 현재 이미지 기준으로 맞춤 (다른 이미지 미리보기가 남지 않게)
+    update_llava_partial_preview(app_instance)
+
+
+def update_llava_partial_preview(app_instance):
+    """
+    LLaVA 생성 중 부분 태그를 미리보기 줄에 표시 (현재 이미지에 부분 태그가 없으면 숨김).
+    편집 가능한 태그 버튼이 아닌 읽기 전용 라벨이라 클릭해도 태그 데이터(current_tags/리무버)는 바뀌지 않음.
+    """
+    container = getattr(app_instance, 'llava_preview_container', None)
+    if container is None:
+        return
+    layout = app_instance.llava_preview_layout
+    while layout.count():
+        child = layout.takeAt(0)
+        if child.widget():
+            child.widget().deleteLater()
+    
+    partial = (getattr(app_instance, 'llava_partial_tags', None) or {}).get(app_instance.current_image) or []
+    current = set(app_instance.current_tags or [])
+    new_tags = [tag for tag in partial if tag not in current]
+    if not new_tags:
+        container.hide()
+        return
+    for tag in new_tags:
+        chip = QLabel(tag)
+        chip.setStyleSheet("""
+            QLabel {
+                color: #C4B5FD;
+                font-size: 11px;
+                font-style: italic;
+                background: rgba(139,92,246,0.12);
+                border: 1px dashed rgba(139,92,246,0.5);
+                border-radius: 4px;
+                padding: 2px 6px;
+            }
+        """)
+        chip.setToolTip("생성 중인 태그 (완료되면 확정 태그로 표시)")
+        layout.addWidget(chip)
+    app_instance.llava_preview_label.setText(f"⏳ LLaVA 생성 중 (미리보기, {len(new_tags)}개)")
+    container.show()
 
 def _update_thumbnail_token_warnings(app_instance):
     """모든 이미지 썸네일에 대해 토큰 한도 초과 경고를 즉시 재계산/반영"""
@@ -2154,13 +2219,9 @@ def update_global_tags_list(app_instance):
     if hasattr(app_instance, 'tag_statistics_module'):
         app_instance.tag_statistics_module.update_filtered_tags()
     else:
-        # 폴백: 모든 태그 표시 (딕셔너리와 정수 형태 모두 지원)
-        def get_count(item):
-            count = item[1]
-            if isinstance(count, dict):
-                return count.get('image_count', 0)
-            return count
-        sorted_tags = sorted(app_instance.global_tag_stats.items(), key=get_count, reverse=True)
+        # 폴백: 모든 태그 표시
+        from global_tag_manager import get_stat_count
+        sorted_tags = sorted(app_instance.global_tag_stats.items(), key=lambda item: get_stat_count(item[1]), reverse=True)
         
         # 기존 태그들 제거
         while app_instance.global_tags_layout.count():
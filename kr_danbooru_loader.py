@@ -4,6 +4,8 @@ KR_danbooru_tags.csv 파일을 로드하고 관리하는 모듈
 """
 
 import csv
+import threading
+import time
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
@@ -32,6 +34,8 @@ class KRDanbooruLoader:
         self.tags: Dict[str, KRDanbooruTag] = {}
         self.category_to_tags: Dict[str, List[str]] = defaultdict(list)
         self.is_available = False
+        self._search_index = None  # 검색용 n-gram 색인 (첫 검색 때 백그라운드에서 생성)
+        self._search_index_thread: Optional[threading.Thread] = None
         
         if self.csv_path.exists():
             self._load_tags()
@@ -139,7 +143,15 @@ class KRDanbooruLoader:
         query_lower = query.lower()
         results = []
         
-        for name, tag in self.tags.items():
+        # n-gram 색인으로 태그명/카테고리/설명(키워드 포함) 어디에든 검색어가 들어갈 수 있는 태그만 확인
+        # (색인 준비 전이거나 검색어가 너무 짧으면 전체 확인)
+        index = self._get_search_index()
+        candidates = index.candidates((query_lower,)) if index is not None else None
+        if candidates is None:
+            candidates = self.tags.keys()
+        
+        for name in candidates:
+            tag = self.tags[name]
             priority = None
             match_type = ""
             
@@ -182,6 +194,27 @@ class KRDanbooruLoader:
         # 카운트 제거하고 반환
         return [(name, priority, match_type) for name, priority, match_type, _ in results]
     
+    def _get_search_index(self):
+        """검색용 n-gram 색인 (아직 없으면 백그라운드 생성을 시작하고 None 반환)"""
+        if self._search_index is None and self._search_index_thread is None and self.tags:
+            self._search_index_thread = threading.Thread(
+                target=self._build_search_index, name="kr-tag-ngram-index", daemon=True)
+            self._search_index_thread.start()
+        return self._search_index
+    
+    def _build_search_index(self):
+        """태그명 + 카테고리 + 설명 n-gram 색인 생성 (키워드는 설명에서 파싱되므로 설명 색인에 포함됨)"""
+        try:
+            from ngram_index import NgramIndex
+            start = time.time()
+            index = NgramIndex()
+            for name, tag in list(self.tags.items()):
+                index.add(name, "\n".join((name, tag.category, tag.description)))
+            self._search_index = index
+            print(f"KR 태그 검색 색인 생성 완료: {len(index)}개 태그 ({time.time() - start:.2f}초)")
+        except Exception as e:
+            print(f"KR 태그 검색 색인 생성 오류: {e}")
+    
     def get_autocomplete_list(self, query: str = "", limit: int = None) -> List[str]:
         """
         자동완성용 태그 목록 반환 (카운트 높은 순)
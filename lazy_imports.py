@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+무거운 모듈 지연 import (onnxruntime/huggingface_hub/requests 등)
+- lazy_module(name): 모듈 객체를 바로 돌려주되, 실제 초기화는 첫 속성 접근 시점에 수행
+  (importlib.util.LazyLoader) → 태그 편집만 하는 실행에서는 초기화 비용을 내지 않음
+- 설치되지 않은 모듈은 첫 속성 접근 시 ImportError (import 시점에는 오류 없음)
+"""
+
+import importlib.util
+import sys
+
+
+class _MissingModule:
+    """설치되지 않은 모듈 자리 표시 (사용 시점에 ImportError)"""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        raise ImportError(f"'{self._name}' 모듈이 설치되어 있지 않습니다 ({attr} 사용 시도)")
+
+
+def lazy_module(name: str):
+    """name 모듈을 지연 로드 (이미 로드돼 있으면 그대로 반환)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        return _MissingModule(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_loaded(name: str) -> bool:
+    """모듈이 실제로 초기화됐는지 (지연 로드 대기 중이면 False)"""
+    module = sys.modules.get(name)
+    if module is None:
+        return False
+    # 초기화 전에는 LazyLoader의 _LazyModule 클래스, 첫 접근 후 일반 모듈 클래스로 바뀜
+    return type(module).__name__ != "_LazyModule"
@@ -4,7 +4,9 @@ LLaVA Captioner Module - 다운로드 및 UI 표시만 구현
 """
 
 import os
-import torch
+import time
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional
 import logging
@@ -128,6 +130,7 @@ class LLaVACaptionerModule:
     
     def _get_device(self) -> str:
         """디바이스 설정"""
+        import torch
         if self.use_gpu and torch.cuda.is_available():
             return "cuda"
         elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
@@ -402,7 +405,17 @@ _unified_llava_model_manager = {
     "current_model": None,
     "current_model_id": None,
     "current_model_type": None,
-    "cached_models": {}  # {model_id: model_instance}
+    "cached_models": OrderedDict()  # {f"{model_id}_{use_gpu}": model_instance} (LRU 순서, 끝이 최근)
+}
+_unified_llava_model_lock = threading.RLock()
+
+# 상주 모델 풀 설정 (get_unified_llava_model)
+LLAVA_POOL_CONFIG_PATH = "models/llava_model_pool.json"
+LLAVA_POOL_DEFAULTS = {
+    "max_models": 3,
+    "vram_budget_gb": 0,   # 0 = 자동 (전체 VRAM의 85%)
+    "ram_budget_gb": 0,    # 0 = 자동 (전체 RAM의 50%)
+    "cpu_parking": True,
 }
 
 def get_global_llava_module(model_id: str = "llava-hf/llava-1.5-7b-hf", use_gpu: bool = True) -> LLaVACaptionerModule:
@@ -448,6 +461,7 @@ def unload_global_llava_tagger_model():
             
             # GPU 메모리 캐시 정리
             import gc
+            import torch
             gc.collect()
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
@@ -501,120 +515,246 @@ def unload_all_llava_models():
     
     _flush_print("[LLaVA] 모든 LLaVA 모델 타입 언로드 완료")
 
+def _load_pool_settings() -> dict:
+    """
+    상주 모델 풀 설정 (models/llava_model_pool.json, 없으면 기본값)
+    - max_models: 동시에 보관할 모델 인스턴스 수
+    - vram_budget_gb / ram_budget_gb: 0 = 자동 (전체 VRAM의 85% / 전체 RAM의 50%)
+    - cpu_parking: VRAM 예산 초과로 밀려나는 GPU 모델을 언로드 대신 CPU로 옮겨 보관
+    """
+    settings = dict(LLAVA_POOL_DEFAULTS)
+    try:
+        import json
+        if os.path.exists(LLAVA_POOL_CONFIG_PATH):
+            with open(LLAVA_POOL_CONFIG_PATH, 'r', encoding='utf-8') as f:
+                settings.update(json.load(f) or {})
+    except Exception as e:
+        _flush_print(f"[통합 매니저] 풀 설정 로드 실패, 기본값 사용: {e}")
+    return settings
+
+def _pool_budgets(settings: dict):
+    """(VRAM 예산, RAM 예산) 바이트"""
+    import torch
+    gb = 1024 ** 3
+    try:
+        vram_budget = int(float(settings.get("vram_budget_gb", 0) or 0) * gb)
+    except (TypeError, ValueError):
+        vram_budget = 0
+    if vram_budget <= 0:
+        try:
+            total = torch.cuda.get_device_properties(0).total_memory if torch.cuda.is_available() else 0
+        except Exception:
+            total = 0
+        vram_budget = int(total * 0.85)
+    try:
+        ram_budget = int(float(settings.get("ram_budget_gb", 0) or 0) * gb)
+    except (TypeError, ValueError):
+        ram_budget = 0
+    if ram_budget <= 0:
+        try:
+            import psutil
+            total = psutil.virtual_memory().total
+        except ImportError:
+            try:
+                total = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+            except (AttributeError, ValueError, OSError):
+                total = 16 * gb
+        ram_budget = int(total * 0.5)
+    return vram_budget, ram_budget
+
+def _estimate_model_bytes(instance) -> int:
+    """
+    모델 인스턴스의 메모리 크기.
+    로드된 모델은 실제 가중치(파라미터+버퍼) 합, 로드 전이면 가중치 파일 크기 × 양자화 비율로 추정.
+    """
+    model = getattr(instance, "model", None)
+    if model is not None:
+        try:
+            if hasattr(model, "get_memory_footprint"):
+                return int(model.get_memory_footprint())
+            return int(sum(p.numel() * p.element_size() for p in model.parameters()))
+        except Exception:
+            pass
+
+    model_dir = getattr(instance, "model_dir", None) or (Path("models") / instance.model_id.split('/')[-1])
+    try:
+        weight_bytes = sum(
+            f.stat().st_size for f in Path(model_dir).iterdir()
+            if f.suffix in (".safetensors", ".bin") and f.is_file()
+        )
+    except OSError:
+        weight_bytes = 0
+    if weight_bytes <= 0:
+        weight_bytes = 14 * 1024 ** 3  # 7B fp16 기준 추정
+    # 배포 가중치는 대부분 fp16/bf16 → 로드 시 정밀도에 따른 비율
+    quantization_type = (getattr(instance, "config", None) or {}).get("quantization_type", "none")
+    ratio = {"4bit": 0.3, "8bit": 0.55, "FP32": 2.0, "32bit": 2.0}.get(quantization_type, 1.0)
+    if not getattr(instance, "use_gpu", False) and quantization_type not in ("FP16", "BF16", "16bit"):
+        ratio = 2.0  # CPU 로드는 float32
+    return int(weight_bytes * ratio)
+
+def _is_on_gpu(instance) -> bool:
+    """VRAM을 점유하는 인스턴스인지 (GPU 모델이면서 CPU에 파킹되지 않은 경우)"""
+    return bool(getattr(instance, "use_gpu", False)) and not getattr(instance, "_parked_on_cpu", False)
+
+def _can_park_on_cpu(instance) -> bool:
+    """bnb 양자화/다중 디바이스 분산 모델은 .to()로 옮길 수 없어 파킹 불가"""
+    model = getattr(instance, "model", None)
+    if model is None:
+        return False
+    if getattr(model, "is_loaded_in_4bit", False) or getattr(model, "is_loaded_in_8bit", False):
+        return False
+    device_map = getattr(model, "hf_device_map", None)
+    if device_map and len(set(str(v) for v in device_map.values())) > 1:
+        return False
+    return True
+
+def _unload_model_instance(instance, context: str = "통합 매니저"):
+    """모델/프로세서 참조를 끊고 상태 플래그 리셋 (VRAM 누수 방지)"""
+    try:
+        # 모델과 프로세서의 참조를 완전히 끊기
+        if hasattr(instance, 'model') and instance.model is not None:
+            del instance.model
+            instance.model = None
+            _flush_print(f"[{context}] 모델 객체 참조 해제")
+        
+        if hasattr(instance, 'processor') and instance.processor is not None:
+            del instance.processor
+            instance.processor = None
+            _flush_print(f"[{context}] 프로세서 객체 참조 해제")
+        
+        # 상태 플래그 리셋
+        if hasattr(instance, '_is_loaded'):
+            instance._is_loaded = False
+        if hasattr(instance, '_cached_model_id'):
+            delattr(instance, '_cached_model_id')
+        instance._prefix_kv = None
+        instance._parked_on_cpu = False
+    except Exception as e:
+        _flush_print(f"[{context}] 모델 언로드 실패: {e}")
+
+def _park_model_on_cpu(instance) -> bool:
+    """GPU 모델을 CPU 메모리로 옮겨 보관 (다시 선택되면 _restore_parked_model로 복귀)"""
+    try:
+        start = time.time()
+        instance._prefix_kv = None  # GPU 텐서 참조 해제
+        instance.model.to("cpu")
+        instance._parked_on_cpu = True
+        _flush_print(f"[통합 매니저] CPU 파킹: {instance.model_id} ({time.time() - start:.2f}s)")
+        return True
+    except Exception as e:
+        _flush_print(f"[통합 매니저] CPU 파킹 실패, 언로드: {instance.model_id} ({e})")
+        return False
+
+def _restore_parked_model(instance):
+    """CPU에 파킹된 모델을 다시 GPU로 이동"""
+    import torch
+    start = time.time()
+    instance.model.to(torch.device("cuda", 0))
+    instance._parked_on_cpu = False
+    _flush_print(f"[통합 매니저] CPU 파킹 복귀: {instance.model_id} ({time.time() - start:.2f}s)")
+
+def _evict_from_pool(pool, incoming_key: str, incoming_bytes: int, to_gpu: bool, settings: dict):
+    """
+    새로 올릴(또는 복귀할) 모델이 들어갈 자리를 LRU 순서로 확보.
+    - 개수 상한(max_models) → VRAM 예산(GPU 모델) → RAM 예산(CPU 모델/파킹분) 순서로 검사
+    - VRAM에서 밀려나는 모델은 cpu_parking이 켜져 있고 RAM 예산이 허락하면 CPU로 파킹, 아니면 언로드
+    """
+    vram_budget, ram_budget = _pool_budgets(settings)
+    try:
+        max_models = max(1, int(settings.get("max_models", LLAVA_POOL_DEFAULTS["max_models"])))
+    except (TypeError, ValueError):
+        max_models = LLAVA_POOL_DEFAULTS["max_models"]
+    cpu_parking = bool(settings.get("cpu_parking", True))
+
+    def _others():
+        return [(k, inst) for k, inst in pool.items() if k != incoming_key]
+
+    def _used(on_gpu: bool) -> int:
+        return sum(_estimate_model_bytes(inst) for _, inst in _others() if _is_on_gpu(inst) == on_gpu)
+
+    def _drop(key):
+        inst = pool.pop(key)
+        _flush_print(f"[통합 매니저] LRU 언로드: {inst.model_id}")
+        _unload_model_instance(inst)
+
+    others = _others()
+    while len(others) + 1 > max_models:
+        _drop(others[0][0])
+        others = _others()
+
+    if to_gpu:
+        while _used(True) + incoming_bytes > vram_budget:
+            gpu_entries = [(k, inst) for k, inst in _others() if _is_on_gpu(inst)]
+            if not gpu_entries:
+                break
+            key, inst = gpu_entries[0]
+            size = _estimate_model_bytes(inst)
+            if (cpu_parking and _can_park_on_cpu(inst) and _used(False) + size <= ram_budget
+                    and _park_model_on_cpu(inst)):
+                pool.move_to_end(key, last=False)  # 파킹된 모델은 다음 축출 우선순위 유지
+                continue
+            _drop(key)
+    else:
+        while _used(False) + incoming_bytes > ram_budget:
+            cpu_entries = [k for k, inst in _others() if not _is_on_gpu(inst)]
+            if not cpu_entries:
+                break
+            _drop(cpu_entries[0])
+
+    # 해제된 메모리 반환
+    import gc
+    import torch
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
 def get_unified_llava_model(model_id: str, use_gpu: bool = True):
-    """통합 LLaVA 모델 매니저 - 모든 모델 타입을 통합 관리 (성능 최적화)"""
+    """
+    통합 LLaVA 모델 매니저 - 모든 모델 타입을 통합 관리 (성능 최적화)
+    - 여러 모델 인스턴스를 LRU 풀(cached_models)에 상주시켜 모델 전환 시 재로딩을 피함
+    - VRAM/RAM 예산·개수 상한은 models/llava_model_pool.json (_load_pool_settings)
+    """
     import torch  # torch import 명시적 추가 (첫 번째 실행 시 에러 방지)
     global _unified_llava_model_manager
     
     # 모델 타입 결정
     model_type = _determine_model_type(model_id)
-    
-    # 현재 모델과 동일한지 확인
-    if (_unified_llava_model_manager["current_model"] is not None and
-        _unified_llava_model_manager["current_model_id"] == model_id and
-        _unified_llava_model_manager["current_model_type"] == model_type):
-        _flush_print(f"[통합 매니저] 기존 모델 재사용: {model_id} ({model_type})")
-        return _unified_llava_model_manager["current_model"]
-    
-    # 캐시된 모델 확인 (CPU 모델만)
     cache_key = f"{model_id}_{use_gpu}"
-    if not use_gpu and cache_key in _unified_llava_model_manager["cached_models"]:
-        cached_model = _unified_llava_model_manager["cached_models"][cache_key]
-        if (hasattr(cached_model, '_is_loaded') and cached_model._is_loaded and
-            hasattr(cached_model, 'model') and cached_model.model is not None):
-            _flush_print(f"[통합 매니저] 캐시된 CPU 모델 재사용: {model_id} ({model_type})")
-            _unified_llava_model_manager["current_model"] = cached_model
-            _unified_llava_model_manager["current_model_id"] = model_id
-            _unified_llava_model_manager["current_model_type"] = model_type
-            return cached_model
-    elif use_gpu:
-        _flush_print(f"[통합 매니저] GPU 모델 캐시 확인 안함 (VRAM 누수 방지): {model_id}")
-    
-    # 새 모델 생성
-    _flush_print(f"[통합 매니저] 새 모델 생성: {model_id} ({model_type})")
+    pool = _unified_llava_model_manager["cached_models"]
     
-    # 기존 모델 정리 (VRAM 누수 방지를 위한 진짜 언로드)
-    if _unified_llava_model_manager["current_model"] is not None:
-        _flush_print(f"[통합 매니저] 기존 모델 정리: {_unified_llava_model_manager['current_model_id']}")
+    with _unified_llava_model_lock:
+        settings = _load_pool_settings()
+        to_gpu = bool(use_gpu and torch.cuda.is_available())
         
-        # VRAM 상태 로깅 (정리 전)
-        try:
-            import torch
-            if torch.cuda.is_available():
-                gpu_mem_before = torch.cuda.memory_allocated(0) / 1024**3
-                gpu_mem_reserved_before = torch.cuda.memory_reserved(0) / 1024**3
-                _flush_print(f"[통합 매니저] 정리 전 VRAM - 할당: {gpu_mem_before:.2f}GB, 예약: {gpu_mem_reserved_before:.2f}GB")
-        except Exception:
-            pass
-        
-        # 현재 모델의 실제 언로드 (VRAM 누수 방지)
-        try:
-            current_model = _unified_llava_model_manager["current_model"]
-            
-            # 모델과 프로세서의 참조를 완전히 끊기
-            if hasattr(current_model, 'model') and current_model.model is not None:
-                del current_model.model
-                current_model.model = None
-                _flush_print("[통합 매니저] 모델 객체 참조 해제")
-            
-            if hasattr(current_model, 'processor') and current_model.processor is not None:
-                del current_model.processor
-                current_model.processor = None
-                _flush_print("[통합 매니저] 프로세서 객체 참조 해제")
-            
-            # 상태 플래그 리셋
-            if hasattr(current_model, '_is_loaded'):
-                current_model._is_loaded = False
-            if hasattr(current_model, '_cached_model_id'):
-                delattr(current_model, '_cached_model_id')
-                
-        except Exception as e:
-            _flush_print(f"[통합 매니저] 모델 언로드 실패: {e}")
+        cached_model = pool.get(cache_key)
+        if cached_model is not None:
+            pool.move_to_end(cache_key)
+            if getattr(cached_model, "_parked_on_cpu", False):
+                # 파킹된 모델: 자리 확보 후 GPU로 복귀 (실패 시 언로드 → 다음 사용 때 재로딩)
+                _evict_from_pool(pool, cache_key, _estimate_model_bytes(cached_model), True, settings)
+                try:
+                    _restore_parked_model(cached_model)
+                except Exception as e:
+                    _flush_print(f"[통합 매니저] 파킹 복귀 실패, 재로딩 예정: {e}")
+                    _unload_model_instance(cached_model)
+            else:
+                _flush_print(f"[통합 매니저] 기존 모델 재사용: {model_id} ({model_type})")
+        else:
+            # 새 모델 생성 (가중치는 첫 추론 시 load_model에서 로드)
+            _flush_print(f"[통합 매니저] 새 모델 생성: {model_id} ({model_type})")
+            cached_model = _create_model_instance(model_type, model_id, use_gpu)
+            incoming = _estimate_model_bytes(cached_model)
+            _flush_print(f"[통합 매니저] 예상 크기: {incoming / 1024**3:.2f}GB ({'GPU' if to_gpu else 'CPU'})")
+            _evict_from_pool(pool, cache_key, incoming, to_gpu, settings)
+            pool[cache_key] = cached_model
         
-        # 강제 메모리 정리
-        try:
-            import gc
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-                torch.cuda.ipc_collect()  # IPC 메모리도 정리
-                _flush_print("[통합 매니저] 강제 메모리 정리 완료")
-                
-                # VRAM 상태 로깅 (정리 후)
-                gpu_mem_after = torch.cuda.memory_allocated(0) / 1024**3
-                gpu_mem_reserved_after = torch.cuda.memory_reserved(0) / 1024**3
-                _flush_print(f"[통합 매니저] 정리 후 VRAM - 할당: {gpu_mem_after:.2f}GB, 예약: {gpu_mem_reserved_after:.2f}GB")
-                
-                # VRAM 해제 확인
-                if gpu_mem_reserved_after < gpu_mem_reserved_before * 0.5:  # 50% 이상 해제
-                    _flush_print("✅ [통합 매니저] VRAM 대폭 해제 성공")
-                else:
-                    _flush_print("⚠️ [통합 매니저] VRAM 해제 부족 - 누수 가능성")
-                    
-        except Exception as e:
-            _flush_print(f"[통합 매니저] 메모리 정리 실패: {e}")
-    
-    # 모델 타입에 따른 인스턴스 생성
-    new_model = _create_model_instance(model_type, model_id, use_gpu)
-    
-    # 매니저 업데이트
-    _unified_llava_model_manager["current_model"] = new_model
-    _unified_llava_model_manager["current_model_id"] = model_id
-    _unified_llava_model_manager["current_model_type"] = model_type
-    
-    # VRAM 누수 방지를 위한 캐시 정책: GPU 모델은 캐시하지 않음
-    # (캐시하면 VRAM이 계속 점유되어 다음 모델이 CPU 오프로딩됨)
-    if use_gpu and torch.cuda.is_available():
-        _flush_print(f"[통합 매니저] GPU 모델 캐시 저장 안함 (VRAM 누수 방지): {model_id}")
-        # 기존 GPU 캐시도 정리
-        if cache_key in _unified_llava_model_manager["cached_models"]:
-            del _unified_llava_model_manager["cached_models"][cache_key]
-    else:
-        # CPU 모델만 캐시 저장
-        _unified_llava_model_manager["cached_models"][cache_key] = new_model
-        _flush_print(f"[통합 매니저] CPU 모델 캐시 저장: {model_id}")
-    
-    return new_model
+        # 매니저 업데이트
+        _unified_llava_model_manager["current_model"] = cached_model
+        _unified_llava_model_manager["current_model_id"] = model_id
+        _unified_llava_model_manager["current_model_type"] = model_type
+        _flush_print(f"[통합 매니저] 상주 모델: {[inst.model_id for inst in pool.values()]}")
+        return cached_model
 
 def _determine_model_type(model_id: str) -> str:
     """모델 ID로부터 모델 타입 결정"""
@@ -658,7 +798,11 @@ def clear_unified_model_cache():
     # 모든 모델 언로드
     unload_all_llava_models()
     
-    # 매니저 초기화
+    # 매니저 초기화 (상주 풀의 모델도 모두 언로드)
+    with _unified_llava_model_lock:
+        for instance in _unified_llava_model_manager["cached_models"].values():
+            _unload_model_instance(instance)
+        force_cleanup_gpu_memory()
     _unified_llava_model_manager["current_model"] = None
     _unified_llava_model_manager["current_model_id"] = None
     _unified_llava_model_manager["current_model_type"] = None
@@ -730,17 +874,211 @@ def aggressive_cleanup_gpu_memory():
 import re
 import sys
 import traceback
-import torch
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 from typing import List, Tuple
 from PySide6.QtCore import QObject, Signal, QThread
 
-try:
-    from transformers import AutoProcessor, LlavaForConditionalGeneration  # >=4.38.0
-    _TRANSFORMERS_OK = True
-except Exception as _e:
-    _TRANSFORMERS_OK = False
-    print(f"⚠️ transformers import failed for Llava: {_e}", flush=True)
+# torch/transformers는 모델 로드/추론 시점에 함수 안에서 import (앱 시작 시 초기화 비용 회피)
+
+# 배치 생성 (batch_predict)
+LLAVA_MAX_AUTO_BATCH = 8            # 자동 배치 크기 상한 (GPU)
+LLAVA_MAX_AUTO_BATCH_CPU = 4        # 자동 배치 크기 상한 (CPU: 배치 이득이 작고 RAM 압박이 큼)
+LLAVA_BATCH_MEMORY_FRACTION = 0.6   # 자동 배치 크기 계산 시 여유 메모리 중 사용할 비율
+LLAVA_PROMPT_TOKEN_ESTIMATE = 256   # 시스템/사용자 프롬프트 토큰 수 추정치
+LLAVA_PREFIX_CACHE_MIN_TOKENS = 8   # 이보다 짧은 prefix는 KV 캐시 재사용 이득이 없어 건너뜀
+LLAVA_PREFETCH_MAX_IMAGES = 8       # 미리 전처리해 둘 이미지 수 상한
+LLAVA_PREFETCH_MAX_WORKERS = 4      # 프리페치 워커 수 상한 (자동 모드)
+LLAVA_REPEAT_MIN_SPAN = 48          # 토큰 반복 루프 판정에 보는 마지막 토큰 수
+LLAVA_REPEAT_MAX_PERIOD = 16        # 반복 루프로 볼 최대 주기 (토큰) → 최소 3회 반복
+LLAVA_REPEAT_TAG_RUN = 8            # 이미 나온 태그가 연속 이만큼 나오면 반복으로 보고 종료
+LLAVA_STREAM_MIN_INTERVAL = 0.25    # 생성 중 부분 태그(tags_partial) 시그널 최소 간격 (초)
+LLAVA_PACK_MAX_IMAGES = 8           # 패킹 모드에서 한 프롬프트에 넣을 이미지 수 상한
+# 패킹 모드 응답의 이미지 번호 줄 ("Image 2: ...", "**Image 2** - ...", "2) ..." 등)
+LLAVA_PACKED_HEADER_RE = re.compile(r'^[\s*#>-]*(?:image|img|picture)?\s*#?\s*(\d{1,2})\s*\**\s*[:.)\-]\s*', re.IGNORECASE)
+# 결과 캐시 키에서 제외할 설정 (생성 결과에 영향 없음)
+LLAVA_RESULT_CACHE_IGNORED_KEYS = {
+    "batch_size", "prefetch_workers", "prefetch_max_images", "prefix_cache",
+    "offload_policy", "device_map", "max_memory",
+    "result_cache", "result_cache_bypass", "result_cache_max_entries", "result_cache_max_mb",
+    "stream_tags", "weight_cache", "weight_cache_upcast",
+}
+
+class TagBudgetStoppingCriteria:
+    """
+    generate 중 생성 텍스트를 보고 행(이미지)별로 조기 종료 (transformers StoppingCriteria 규약).
+    - 태그 예산: 구분자로 끝난(완결된) 태그 중 필터를 통과한 고유 태그가 max_tags개가 되면 종료
+    - 태그 반복: 완결된 태그가 LLAVA_REPEAT_TAG_RUN개 연속으로 이미 나온 태그면 종료
+    - 토큰 반복 루프: 마지막 LLAVA_REPEAT_MIN_SPAN 토큰이 주기 LLAVA_REPEAT_MAX_PERIOD 이하의 반복이면 종료
+    - 디코드는 새 토큰에 구분자가 나왔을 때만 수행 (매 스텝 전체 디코드 방지)
+    - section_re: 패킹 모드의 이미지 번호 줄 정규식 → 태그 예산/반복은 마지막 번호 줄 이후(현재 이미지)만 셈
+      (이미지끼리 겹치는 태그 "1girl, solo, ..." 를 반복으로 보지 않음)
+    """
+
+    def __init__(self, tokenizer, prompt_length: int, max_tags: int = 0, tag_filter=None,
+                 split_pattern: str = r'[,\n\r.]+', section_re=None):
+        self.tokenizer = tokenizer
+        self.prompt_length = int(prompt_length)
+        self.max_tags = int(max_tags or 0)
+        self.tag_filter = tag_filter or (lambda tag: tag.strip() or None)
+        self.split_re = re.compile(split_pattern)
+        self.section_re = section_re
+        self.done = []
+        self.reasons = {}  # 행 → 종료 사유 ("tags" / "repeat")
+
+    def _current_section(self, text: str) -> str:
+        """section_re 가 있으면 마지막 번호 줄 이후 텍스트 (번호 줄 머리 제외), 없으면 전체"""
+        if self.section_re is None:
+            return text
+        lines = text.split("\n")
+        for idx in range(len(lines) - 1, -1, -1):
+            match = self.section_re.match(lines[idx])
+            if match:
+                return "\n".join([lines[idx][match.end():]] + lines[idx + 1:])
+        return text
+
+    def _scan_tags(self, ids) -> Tuple[int, int]:
+        """생성 토큰 → (고유 태그 수, 끝에서부터 연속된 중복 태그 수) — 마지막 미완결 조각 제외"""
+        text = self._current_section(self.tokenizer.decode(ids, skip_special_tokens=True))
+        parts = self.split_re.split(text)
+        seen = set()
+        dup_run = 0
+        for part in parts[:-1]:
+            tag = self.tag_filter(part)
+            if not tag:
+                continue
+            if tag in seen:
+                dup_run += 1
+            else:
+                seen.add(tag)
+                dup_run = 0
+        return len(seen), dup_run
+
+    @staticmethod
+    def _is_token_loop(tail) -> bool:
+        if len(tail) < LLAVA_REPEAT_MIN_SPAN:
+            return False
+        for period in range(1, LLAVA_REPEAT_MAX_PERIOD + 1):
+            if all(tail[i] == tail[i - period] for i in range(period, len(tail))):
+                return True
+        return False
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        batch = input_ids.shape[0]
+        if len(self.done) != batch:
+            self.done = [False] * batch
+        generated = input_ids[:, self.prompt_length:]
+        if generated.shape[1] > 0:
+            for row in range(batch):
+                if self.done[row]:
+                    continue
+                if self._is_token_loop(generated[row, -LLAVA_REPEAT_MIN_SPAN:].tolist()):
+                    self.done[row] = True
+                    self.reasons[row] = "repeat"
+                    continue
+                last_piece = self.tokenizer.decode(generated[row, -1:], skip_special_tokens=True)
+                if not self.split_re.search(last_piece):
+                    continue
+                unique, dup_run = self._scan_tags(generated[row])
+                if self.max_tags and unique >= self.max_tags:
+                    self.done[row] = True
+                    self.reasons[row] = "tags"
+                elif dup_run >= LLAVA_REPEAT_TAG_RUN:
+                    self.done[row] = True
+                    self.reasons[row] = "repeat"
+        return torch.tensor(self.done, dtype=torch.bool, device=input_ids.device)
+
+class PartialTagStreamer:
+    """
+    generate 중 완결된 태그를 행(이미지)별로 콜백 (transformers BaseStreamer 규약: put/end).
+    - 첫 put은 프롬프트 → 무시, 이후 put마다 행별 새 토큰 1개씩 누적
+    - 새 토큰에 구분자가 나온 행만 전체 디코드 → 마지막 구분자까지의 태그 목록이 바뀌었으면 callback(path, tags)
+    - 콜백은 LLAVA_STREAM_MIN_INTERVAL 간격으로 제한 (최종 결과는 tag_generated로 따로 전달)
+    - 콜백 오류 시 스트리밍만 끄고 생성은 계속
+    """
+
+    def __init__(self, tokenizer, image_paths: List[str], callback, to_tags, split_pattern: str = r'[,\n\r.]+'):
+        self.tokenizer = tokenizer
+        self.image_paths = list(image_paths)
+        self.callback = callback
+        self.to_tags = to_tags
+        self.split_re = re.compile(split_pattern)
+        self.token_ids = [[] for _ in self.image_paths]
+        self._dirty = [False] * len(self.image_paths)
+        self._sent = [None] * len(self.image_paths)
+        self._prompt_seen = False
+        self._last_emit = 0.0
+        self._disabled = False
+
+    def put(self, value):
+        if not self._prompt_seen:
+            self._prompt_seen = True
+            return
+        if self._disabled:
+            return
+        rows = value.reshape(len(self.image_paths), -1).tolist()
+        for row, ids in enumerate(rows):
+            self.token_ids[row].extend(ids)
+            if not self._dirty[row] and self.split_re.search(self.tokenizer.decode(ids, skip_special_tokens=True)):
+                self._dirty[row] = True
+        if any(self._dirty) and time.time() - self._last_emit >= LLAVA_STREAM_MIN_INTERVAL:
+            self._emit_dirty()
+
+    def _emit_dirty(self):
+        self._last_emit = time.time()
+        for row, dirty in enumerate(self._dirty):
+            if not dirty:
+                continue
+            self._dirty[row] = False
+            text = self.tokenizer.decode(self.token_ids[row], skip_special_tokens=True)
+            cut = 0
+            for match in self.split_re.finditer(text):
+                cut = match.start()
+            tags = self.to_tags(text[:cut])
+            if tags == self._sent[row]:
+                continue
+            self._sent[row] = tags
+            try:
+                self.callback(self.image_paths[row], tags)
+            except Exception as e:
+                _flush_print(f"⚠️ [LLaVA] 부분 태그 전달 실패, 스트리밍 중단: {e}")
+                self._disabled = True
+                return
+
+    def end(self):
+        pass
+
+def parse_packed_answer(text: str, count: int) -> List[Optional[str]]:
+    """
+    패킹 모드 응답 → 이미지별 답변 목록 (길이 count, 파싱할 수 없는 항목은 None).
+    - "Image N:" 형식의 번호 줄부터 다음 번호 줄 전까지가 N번 이미지의 답변 (번호 줄 뒤 내용 포함)
+    - 범위를 벗어난 번호의 내용은 버림, 같은 번호가 두 번 나오면 그 이미지는 None (어느 쪽인지 알 수 없음)
+    - 첫 번호 줄 앞의 서두는 무시
+    """
+    sections = [None] * count
+    duplicated = set()
+    current = None
+    for line in (text or "").splitlines():
+        match = LLAVA_PACKED_HEADER_RE.match(line)
+        if match:
+            number = int(match.group(1))
+            if 1 <= number <= count:
+                current = number - 1
+                if sections[current] is not None:
+                    duplicated.add(current)
+                sections[current] = [line[match.end():]]
+            else:
+                current = None
+            continue
+        if current is not None:
+            sections[current].append(line)
+    answers = []
+    for idx, lines in enumerate(sections):
+        answer = "\n".join(lines).strip() if lines is not None else ""
+        answers.append(answer if answer and idx not in duplicated else None)
+    return answers
 
 def _flush_print(msg: str):
     print(msg, flush=True)
@@ -767,15 +1105,19 @@ def log_gpu_memory_status(context: str = ""):
         _flush_print(f"[GPU 메모리] 상태 확인 실패: {e}")
 
 class LLaVATaggerModel(QObject):
+    SUPPORTS_MULTI_IMAGE = False  # 한 프롬프트에 여러 이미지 입력 가능 (패킹 모드 사용 가능)
+
     progress_updated = Signal(int, int)       # current, total
     model_loading_progress = Signal(str, int)  # 모델 로딩 진행 시그널 (상태, 진행률)
     model_loading_finished = Signal()         # 모델 로딩 완료 시그널
     tag_generated   = Signal(str, list)       # image_path, List[(tag, score)]
+    tags_partial    = Signal(str, list)       # image_path, 생성 중인 List[(tag, score)] (tag_generated로 확정)
     finished        = Signal()
     error_occurred  = Signal(str)
 
 
     def __init__(self, model_id: str = "llava-hf/llava-1.5-7b-hf", use_gpu: bool = True):
+        import torch
         super().__init__()
         self.model_id   = model_id
         self.use_gpu    = bool(use_gpu and torch.cuda.is_available())
@@ -785,6 +1127,10 @@ class LLaVATaggerModel(QObject):
         self.config     = self._load_llava_config()
         self._is_loaded = False  # 모델 로드 상태 추적
         self.model_dir  = None   # 모델 디렉토리 경로
+        self._prefix_kv = None   # 공유 프롬프트 prefix KV 캐시 (_get_prefix_kv)
+        self._prefix_cache_failed = False
+        self._processor_lock = threading.Lock()  # 프리페치 워커 간 프로세서(토크나이저) 직렬화
+        self._parked_on_cpu = False  # 상주 풀에서 VRAM 확보를 위해 CPU로 옮겨 둔 상태
         
         # 디버그 출력
         print(f"[LLaVA] 설정 로드 완료:")
@@ -819,11 +1165,30 @@ class LLaVATaggerModel(QObject):
             "prompt_style": "detailed",
             "prompt_persona": "neutral",
             "custom_prompt": "",
-            "custom_persona": ""
+            "custom_persona": "",
+            "batch_size": 0,  # batch_predict 배치 크기 (0 = 여유 메모리 기준 자동)
+            "prefix_cache": True,  # 이미지 앞 프롬프트 prefix KV 재사용
+            "prompt_before_image": False,  # 프롬프트 텍스트를 이미지 앞에 배치 (prefix 캐시 범위 확대)
+            "prefetch_workers": 0,  # 이미지 전처리 프리페치 워커 수 (0 = 자동, 음수 = 끔)
+            "prefetch_max_images": 8,  # 미리 전처리해 둘 이미지 수 상한
+            "max_tags": 0,  # 이미지당 태그 수 상한 (0 = 무제한)
+            "early_stop": True,  # 태그 예산 도달/반복 루프 시 생성 조기 종료
+            "tag_blacklist": [],  # 결과에서 제외할 태그 (조기 종료 태그 수에도 미포함)
+            "result_cache": True,  # 캡션/태그 결과 디스크 캐시 사용
+            "result_cache_bypass": False,  # 캐시 조회 없이 새로 생성 (결과는 캐시에 갱신)
+            "result_cache_max_entries": 50000,
+            "result_cache_max_mb": 64
         }
 
-    def _generate_with_model(self, inputs):
-        """모델 생성 공통 함수 (중복 코드 제거)"""
+    def _generate_with_model(self, inputs, max_tags=None, tag_filter=None, split_pattern=r'[,\n\r.]+', streamer=None,
+                             max_new_tokens=None, section_re=None):
+        """
+        모델 생성 공통 함수 (중복 코드 제거) → (gen_ids, 생성 시간, 조기 종료 사유 {행: "tags"/"repeat"})
+        - max_tags/tag_filter/split_pattern: 조기 종료 기준 (None이면 설정 max_tags, 기본 태그 정규화)
+        - section_re: 패킹 모드 번호 줄 정규식 (조기 종료 기준을 이미지 구간별로 적용)
+        - streamer: 부분 태그 스트리머 (_build_partial_streamer, 빔서치/다중 후보 생성이면 사용 안 함)
+        - max_new_tokens: 생성 토큰 상한 (None이면 설정 max_tokens, 패킹 모드는 이미지 수만큼 늘림)
+        """
         import time
         import torch  # torch import 명시적 추가
         
@@ -844,7 +1209,7 @@ class LLaVATaggerModel(QObject):
             num_beams = self.config.get("num_beams", 1)  # 기본값 1 (그리디)
             
             gen_kwargs = {
-                "max_new_tokens": self.config.get("max_tokens", 500),
+                "max_new_tokens": max_new_tokens or self.config.get("max_tokens", 500),
                 "temperature": temperature,
                 "top_p": self.config.get("top_p", 0.9),
                 "num_beams": num_beams,
@@ -911,7 +1276,22 @@ class LLaVATaggerModel(QObject):
             if additional_params:
                 _flush_print(f"  - 추가 옵션: {', '.join(additional_params)}")
             
-            gen_ids = self.model.generate(**inputs, **gen_kwargs)
+            # 태그 예산/반복 루프 조기 종료
+            stopper = self._build_stopping_criteria(inputs, gen_kwargs, max_tags, tag_filter, split_pattern, section_re)
+            if stopper is not None:
+                from transformers import StoppingCriteriaList
+                gen_kwargs["stopping_criteria"] = StoppingCriteriaList([stopper])
+            
+            # 생성 중 부분 태그 스트리밍 (transformers는 빔서치 + streamer 조합을 지원하지 않음)
+            if streamer is not None and num_beams == 1 and int(gen_kwargs.get("num_return_sequences") or 1) == 1:
+                gen_kwargs["streamer"] = streamer
+            
+            # 공유 프롬프트 prefix는 캐시된 KV 재사용 (이미지 토큰부터만 prefill)
+            gen_inputs = self._prefill_shared_prefix(inputs, gen_kwargs)
+            gen_ids = self.model.generate(**gen_inputs, **gen_kwargs)
+            if stopper is not None and stopper.reasons:
+                reasons = list(stopper.reasons.values())
+                _flush_print(f"[LLaVA] 조기 종료: 태그 예산 {reasons.count('tags')}건, 반복 루프 {reasons.count('repeat')}건")
         
         generation_time = time.time() - generation_start
         _flush_print(f"[LLaVA] 생성 완료 ({generation_time:.3f}s)")
@@ -921,7 +1301,119 @@ class LLaVATaggerModel(QObject):
             gpu_mem_after = torch.cuda.memory_allocated(0) / 1024**3
             _flush_print(f"[LLaVA] 생성 후 GPU 메모리: {gpu_mem_after:.2f} GB")
         
-        return gen_ids, generation_time
+        stop_reasons = dict(stopper.reasons) if stopper is not None else {}
+        return gen_ids, generation_time, stop_reasons
+
+    # ────────────── 공유 프롬프트 prefix KV 캐시 ──────────────
+    def _image_token_id(self):
+        cfg = self.model.config
+        for attr in ("image_token_index", "image_token_id"):
+            value = getattr(cfg, attr, None)
+            if value is not None:
+                return int(value)
+        return None
+
+    @staticmethod
+    def _cache_to_layers(past) -> list:
+        """generate/forward가 반환한 KV 캐시 → [(key, value)] (transformers 버전별 형식 차이 흡수)"""
+        if hasattr(past, "layers"):
+            return [(layer.keys, layer.values) for layer in past.layers]
+        if hasattr(past, "key_cache"):
+            return list(zip(past.key_cache, past.value_cache))
+        if hasattr(past, "to_legacy_cache"):
+            return [tuple(layer[:2]) for layer in past.to_legacy_cache()]
+        return [tuple(layer[:2]) for layer in past]
+
+    def _get_prefix_kv(self, prefix_ids):
+        """
+        prefix 토큰(1차원)의 KV를 모델+토큰 조합당 한 번만 계산해 보관.
+        모델이 바뀌면(언로드/다른 모델 로드) weakref가 끊어져 다시 계산된다.
+        """
+        import time
+        import weakref
+        key = tuple(prefix_ids.tolist())
+        entry = self._prefix_kv
+        if entry is not None and entry["model"]() is self.model and entry["key"] == key:
+            return entry["layers"]
+
+        start = time.time()
+        out = self.model(input_ids=prefix_ids[None, :], use_cache=True)
+        layers = [(k.detach(), v.detach()) for k, v in self._cache_to_layers(out.past_key_values)]
+        del out
+        self._prefix_kv = {"model": weakref.ref(self.model), "key": key, "layers": layers}
+        _flush_print(f"[LLaVA] 프롬프트 prefix KV 캐시 생성: {len(key)} 토큰 ({time.time() - start:.3f}s)")
+        return layers
+
+    def _prefill_shared_prefix(self, inputs, gen_kwargs):
+        """
+        이미지 토큰 앞의 프롬프트 prefix는 캐시된 KV를 재사용하고,
+        이미지 토큰~답변 직전까지만 prefill한 캐시를 generate에 넘긴다.
+        조건이 맞지 않으면(빔서치/다중 후보/패딩된 배치/짧은 prefix/오류) 원래 inputs를 그대로 반환.
+        """
+        import torch
+        if not self.config.get("prefix_cache", True) or self._prefix_cache_failed:
+            return inputs
+        # 빔서치/다중 후보는 generate가 캐시를 확장하지 않으므로 제외
+        if gen_kwargs.get("num_beams", 1) > 1 or (gen_kwargs.get("num_return_sequences") or 1) > 1:
+            return inputs
+        input_ids = inputs.get("input_ids")
+        attention_mask = inputs.get("attention_mask")
+        image_token_id = self._image_token_id()
+        if input_ids is None or image_token_id is None:
+            return inputs
+        # 왼쪽 패딩이 있으면 행마다 prefix 위치가 달라지므로 제외
+        if attention_mask is not None and not bool(attention_mask.all()):
+            return inputs
+
+        image_positions = (input_ids[0] == image_token_id).nonzero()
+        if len(image_positions) == 0:
+            return inputs
+        prefix_len = int(image_positions[0])
+        if prefix_len < LLAVA_PREFIX_CACHE_MIN_TOKENS or prefix_len >= input_ids.shape[1] - 1:
+            return inputs
+        prefix_ids = input_ids[0, :prefix_len]
+        if not bool((input_ids[:, :prefix_len] == prefix_ids).all()):
+            return inputs
+
+        try:
+            from transformers import DynamicCache
+            import inspect
+
+            layers = self._get_prefix_kv(prefix_ids)
+            batch = input_ids.shape[0]
+            cache = DynamicCache()
+            for idx, (k, v) in enumerate(layers):
+                cache.update(k.expand(batch, -1, -1, -1).contiguous(), v.expand(batch, -1, -1, -1).contiguous(), idx)
+
+            # 이미지 토큰 ~ 마지막 직전 토큰까지 prefill (마지막 토큰은 generate 첫 스텝에서 처리)
+            seq_len = input_ids.shape[1]
+            forward_kwargs = {k: v for k, v in inputs.items() if k not in ("input_ids", "attention_mask")}
+            params = inspect.signature(self.model.forward).parameters
+            if "logits_to_keep" in params:
+                forward_kwargs["logits_to_keep"] = 1
+            elif "num_logits_to_keep" in params:
+                forward_kwargs["num_logits_to_keep"] = 1
+            self.model(
+                input_ids=input_ids[:, prefix_len:seq_len - 1],
+                attention_mask=torch.ones((batch, seq_len - 1), dtype=torch.long, device=input_ids.device),
+                past_key_values=cache,
+                cache_position=torch.arange(prefix_len, seq_len - 1, device=input_ids.device),
+                use_cache=True,
+                **forward_kwargs,
+            )
+        except Exception as e:
+            # 지원하지 않는 모델/버전: 이 인스턴스에서는 prefix 캐시를 끄고 일반 경로 사용
+            self._prefix_cache_failed = True
+            self._prefix_kv = None
+            _flush_print(f"⚠️ [LLaVA] prefix KV 캐시 사용 불가, 일반 생성으로 진행: {e}")
+            return inputs
+
+        # 픽셀 텐서는 이미 prefill에 반영됨 → 텍스트 입력 + 캐시만 전달
+        return {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids) if attention_mask is None else attention_mask,
+            "past_key_values": cache,
+        }
 
     def _build_prompt_messages(self):
         # 설정에서 프롬프트 스타일과 페르소나 가져오기
@@ -1038,23 +1530,73 @@ class LLaVATaggerModel(QObject):
                 prompt_text += f" Also reflect the following style/tone: {custom_persona.strip()}."
         
         # HF 권장 chat template 사용 (이미지가 먼저, 텍스트가 나중)
+        content = [
+            {"type": "image"},
+            {
+                "type": "text",
+                "text": prompt_text,
+            },
+        ]
+        if self.config.get("prompt_before_image", False):
+            # 텍스트를 이미지 앞에 두면 프롬프트 전체가 공유 prefix가 되어 KV 캐시로 재사용됨
+            content.reverse()
         return [
             {
                 "role": "user",
-                "content": [
-                    {"type": "image"},
-                    {
-                        "type": "text",
-                        "text": prompt_text,
-                    },
-                ],
+                "content": content,
             }
         ]
 
+    def _from_pretrained_cached(self, model_cls, local_model_path, load_kwargs: dict, progress_capture):
+        """
+        from_pretrained + 변환 가중치 디스크 캐시 (weight_cache 설정, llava_weight_cache 참고).
+        - 캐시 대상: 양자화 또는 가중치가 작아지는 dtype 변환 (업캐스트는 weight_cache_upcast 일 때만)
+        - 유효한 캐시가 있으면 캐시 폴더에서 로드 (양자화/dtype 변환 생략, safetensors 메모리 맵)
+        - 없으면 원본에서 로드하고 캐시로 저장 (다음 실행부터 사용)
+        - 캐시 확인/로드/저장 실패는 원본 로드로 대체
+        """
+        import time
+        if not self.config.get("weight_cache", True):
+            return progress_capture.capture_loading_progress(model_cls.from_pretrained, str(local_model_path), **load_kwargs)
+
+        import llava_weight_cache
+        settings = None
+        cached_dir = None
+        try:
+            settings = llava_weight_cache.conversion_settings(model_cls, load_kwargs)
+            if not llava_weight_cache.needs_conversion(
+                    local_model_path, settings, allow_upcast=self.config.get("weight_cache_upcast", False)):
+                settings = None  # 원본 그대로 읽는 것과 비슷하거나 원본보다 큰 사본 → 캐시 안 함
+            else:
+                cached_dir = llava_weight_cache.find_valid_cache(local_model_path, settings)
+        except Exception as e:
+            _flush_print(f"⚠️ [LLaVA] 가중치 캐시 확인 실패: {e}")
+            settings = None
+
+        if cached_dir is not None:
+            # 양자화 설정은 캐시 폴더의 config.json에 들어 있음
+            cached_kwargs = {k: v for k, v in load_kwargs.items() if k != "quantization_config"}
+            start = time.time()
+            try:
+                model = progress_capture.capture_loading_progress(model_cls.from_pretrained, str(cached_dir), **cached_kwargs)
+                _flush_print(f"[LLaVA] ✅ 변환 가중치 캐시에서 로드 ({time.time() - start:.1f}s): {cached_dir.name}")
+                return model
+            except Exception as e:
+                _flush_print(f"⚠️ [LLaVA] 가중치 캐시 로드 실패, 원본에서 다시 변환: {e}")
+                llava_weight_cache.invalidate(cached_dir)
+
+        model = progress_capture.capture_loading_progress(model_cls.from_pretrained, str(local_model_path), **load_kwargs)
+        if settings is not None:
+            _flush_print("[LLaVA] 변환 가중치 캐시 저장 중 (최초 1회)...")
+            llava_weight_cache.save_cache(model, local_model_path, settings)
+        return model
+
     def load_model(self):
         import torch  # torch import 명시적 추가
-        if not _TRANSFORMERS_OK:
-            raise RuntimeError("transformers>=4.38.0 필요 (멀티모달 chat template 지원)")
+        try:
+            from transformers import AutoProcessor, LlavaForConditionalGeneration  # >=4.38.0
+        except Exception as e:
+            raise RuntimeError(f"transformers>=4.38.0 필요 (멀티모달 chat template 지원): {e}")
 
         # 기존 모델 언로드 및 메모리 정리 (성능 최적화)
         # 통합 매니저를 통해 최적화된 정리만 수행
@@ -1236,11 +1778,7 @@ class LLaVATaggerModel(QObject):
             )
             # 모델 로드 시도 (진행률 캐치 적용)
             try:
-                self.model = progress_capture.capture_loading_progress(
-                    LlavaForConditionalGeneration.from_pretrained,
-                    str(local_model_path),
-                    **load_kwargs
-                )
+                self.model = self._from_pretrained_cached(LlavaForConditionalGeneration, local_model_path, load_kwargs, progress_capture)
             except Exception as e:
                 # 8bit 양자화 실패 시 4bit로 폴백 시도
                 if ("8bit" in str(e) and ("CPU or the disk" in str(e) or "memory" in str(e).lower())) or \
@@ -1260,11 +1798,7 @@ class LLaVATaggerModel(QObject):
                             load_kwargs["device_map"] = "auto"  # 4bit는 device_map 사용
                             _flush_print("[LLaVA] ✅ 4bit 양자화로 폴백 적용됨")
                             
-                            self.model = progress_capture.capture_loading_progress(
-                                LlavaForConditionalGeneration.from_pretrained,
-                                str(local_model_path),
-                                **load_kwargs
-                            )
+                            self.model = self._from_pretrained_cached(LlavaForConditionalGeneration, local_model_path, load_kwargs, progress_capture)
                         except Exception as fallback_e:
                             _flush_print(f"[LLaVA] 4bit 폴백도 실패: {fallback_e}")
                             raise e  # 원래 오류를 다시 발생
@@ -1348,6 +1882,284 @@ class LLaVATaggerModel(QObject):
         _flush_print("[LLaVA] 모델 로드 완료")
 
 
+    # ────────────── 입력 준비/디코드 공통 헬퍼 (단일/배치 경로 공용) ──────────────
+    def _apply_image_aspect_policy(self, image):
+        """image_aspect_policy 설정에 따른 이미지 전처리 (auto는 프로세서에 맡김)"""
+        image_aspect_policy = self.config.get("image_aspect_policy", "auto")
+        if image_aspect_policy != "auto":
+            # 이미지 전처리 정책에 따른 처리
+            if image_aspect_policy == "resize":
+                # 이미지를 정사각형으로 리사이즈
+                from PIL import ImageOps
+                image = ImageOps.fit(image, (336, 336), Image.Resampling.LANCZOS)
+                _flush_print(f"[LLaVA] 이미지 리사이즈 적용: {image_aspect_policy}")
+            elif image_aspect_policy == "crop":
+                # 이미지를 정사각형으로 크롭
+                from PIL import ImageOps
+                image = ImageOps.fit(image, (336, 336), Image.Resampling.LANCZOS)
+                _flush_print(f"[LLaVA] 이미지 크롭 적용: {image_aspect_policy}")
+            elif image_aspect_policy == "pad":
+                # 이미지에 패딩 추가 (기본 processor 동작)
+                _flush_print(f"[LLaVA] 이미지 패딩 적용: {image_aspect_policy}")
+        return image
+
+    def _resolve_input_dtype(self):
+        """픽셀 텐서 dtype (모델의 실제 dtype 우선, 없으면 설정 기반)"""
+        import torch
+        if hasattr(self.model, 'dtype'):
+            return self.model.dtype
+        # 모델 dtype을 가져올 수 없는 경우 첫 번째 파라미터의 dtype 사용
+        try:
+            return next(self.model.parameters()).dtype
+        except Exception:
+            # 최후의 수단: 설정 기반 dtype
+            quantization_type = self.config.get("quantization_type", "none")
+            if quantization_type == "BF16":
+                return torch.bfloat16
+            elif quantization_type in ["FP16", "4bit", "8bit"]:
+                return torch.float16
+            return torch.float32
+
+    def _resolve_input_device(self):
+        """입력 텐서 디바이스 (양자화 사용 시 device_map="auto"이므로 모델 디바이스에 맞춤)"""
+        if self.config.get("quantization_type", "none") in ["4bit", "8bit"]:
+            # 양자화 사용 시: 모델의 첫 번째 디바이스에 맞춤
+            try:
+                return next(self.model.parameters()).device
+            except Exception:
+                return 0 if self.use_gpu else "cpu"
+        # 일반 로드 시: 지정된 디바이스 사용
+        return 0 if self.use_gpu else "cpu"
+
+    def _move_inputs_to_device(self, inputs, dtype):
+        """프로세서 출력을 모델 디바이스로 이동 (픽셀 텐서만 dtype 캐스팅)"""
+        device = self._resolve_input_device()
+        # Fix: Only cast float tensors to dtype, keep integer tensors as integers
+        for k, v in inputs.items():
+            if hasattr(v, 'to'):
+                if k in ['pixel_values', 'image_grid_*'] or 'pixel' in k.lower():
+                    # Float tensors (image data) - cast to dtype
+                    inputs[k] = v.to(device, dtype=dtype)
+                else:
+                    # Integer tensors (input_ids, attention_mask) - only move to device
+                    inputs[k] = v.to(device)
+        return inputs
+
+    def _tag_blacklist(self) -> set:
+        """설정 tag_blacklist (리스트 또는 쉼표 구분 문자열) → 소문자 집합"""
+        raw = self.config.get("tag_blacklist") or []
+        if isinstance(raw, str):
+            raw = raw.split(",")
+        return {str(t).strip().lower() for t in raw if str(t).strip()}
+
+    def _normalize_tag(self, tag: str, blacklist=frozenset()) -> Optional[str]:
+        """분리된 조각 → 정리된 태그 (빈 조각/블랙리스트 태그는 None)"""
+        # 앞뒤 공백 제거
+        tag = tag.strip()
+        # 태그 내부의 불필요한 구분자들 제거
+        tag = re.sub(r'[,\n\r.]+$', '', tag)  # 끝에 있는 구분자 제거
+        tag = re.sub(r'^[,\n\r.]+', '', tag)  # 앞에 있는 구분자 제거
+        tag = tag.strip()  # 다시 공백 제거
+        if not tag or tag.lower() in blacklist:
+            return None
+        return tag
+
+    def _max_tags(self) -> int:
+        try:
+            return max(0, int(self.config.get("max_tags", 0) or 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def _build_stopping_criteria(self, inputs, gen_kwargs, max_tags=None, tag_filter=None, split_pattern=r'[,\n\r.]+',
+                                 section_re=None):
+        """조기 종료 기준 생성 (early_stop 꺼짐/빔서치면 None)"""
+        if not self.config.get("early_stop", True) or gen_kwargs.get("num_beams", 1) > 1:
+            return None
+        if max_tags is None:
+            max_tags = self._max_tags()
+        if tag_filter is None:
+            blacklist = self._tag_blacklist()
+            tag_filter = lambda tag: self._normalize_tag(tag, blacklist)
+        return TagBudgetStoppingCriteria(
+            self.processor.tokenizer,
+            prompt_length=inputs["input_ids"].shape[1],
+            max_tags=max_tags,
+            tag_filter=tag_filter,
+            split_pattern=split_pattern,
+            section_re=section_re,
+        )
+
+    def _build_partial_streamer(self, image_paths: List[str]) -> Optional[PartialTagStreamer]:
+        """생성 중 부분 태그를 tags_partial로 내보내는 스트리머 (stream_tags 꺼짐이면 None)"""
+        if not self.config.get("stream_tags", True):
+            return None
+        return PartialTagStreamer(
+            self.processor.tokenizer,
+            image_paths,
+            callback=self.tags_partial.emit,
+            to_tags=self._caption_to_tags,
+        )
+
+    def _caption_to_tags(self, caption: str) -> List[Tuple[str, float]]:
+        """
+        캡션 → [(태그, -1.0)] (쉼표/마침표/줄바꿈 기준 분리, 블랙리스트 제외)
+        max_tags > 0 이면 중복 제거 후 앞에서부터 max_tags개
+        """
+        if not caption:
+            return []
+        blacklist = self._tag_blacklist()
+        # 모든 스타일에서 쉼표, 마침표, 줄바꿈으로 분리하여 개별 태그로 처리
+        cleaned_tags = [t for t in (self._normalize_tag(tag, blacklist) for tag in re.split(r'[,\n\r.]+', caption)) if t]
+        max_tags = self._max_tags()
+        if max_tags:
+            cleaned_tags = list(dict.fromkeys(cleaned_tags))[:max_tags]
+        
+        # LLaVA 태그임을 표시하기 위해 -1.0 사용 (WD는 0.0~1.0)
+        return [(tag, -1.0) for tag in cleaned_tags]
+
+    # ────────────── 배치 생성 ──────────────
+    def _estimate_bytes_per_image(self) -> int:
+        """
+        이미지 1장을 배치에 추가할 때 늘어나는 메모리 추정치 (바이트).
+        KV 캐시(레이어×KV 차원×시퀀스 길이) + 활성값 여유분.
+        시퀀스 길이 = 이미지 토큰 + 프롬프트 추정 + max_tokens.
+        """
+        cfg = self.model.config
+        text_cfg = getattr(cfg, "text_config", None) or cfg
+        layers = int(getattr(text_cfg, "num_hidden_layers", 32) or 32)
+        hidden = int(getattr(text_cfg, "hidden_size", 4096) or 4096)
+        heads = int(getattr(text_cfg, "num_attention_heads", 32) or 32)
+        kv_heads = int(getattr(text_cfg, "num_key_value_heads", heads) or heads)
+        kv_dim = hidden * kv_heads // max(1, heads)
+
+        image_tokens = 576
+        vision_cfg = getattr(cfg, "vision_config", None)
+        if vision_cfg is not None:
+            image_size = int(getattr(vision_cfg, "image_size", 336) or 336)
+            patch_size = int(getattr(vision_cfg, "patch_size", 14) or 14)
+            image_tokens = (image_size // max(1, patch_size)) ** 2
+        if getattr(cfg, "image_grid_pinpoints", None):
+            # anyres(LLaVA-NeXT): 기본 타일 + 최대 4개 분할 타일
+            image_tokens *= 5
+
+        seq_len = image_tokens + LLAVA_PROMPT_TOKEN_ESTIMATE + int(self.config.get("max_tokens", 500) or 500)
+        try:
+            elem = self._resolve_input_dtype().itemsize
+        except Exception:
+            elem = 2
+        num_beams = max(1, int(self.config.get("num_beams", 1) or 1))
+        kv_cache = 2 * layers * kv_dim * seq_len * elem * num_beams
+        activations = 8 * hidden * seq_len * elem
+        return int(kv_cache + activations)
+
+    def _available_memory_bytes(self) -> Optional[int]:
+        """배치에 쓸 수 있는 여유 메모리 (GPU: 여유 VRAM, CPU: 가용 RAM, 알 수 없으면 None)"""
+        import torch
+        try:
+            if self.use_gpu and torch.cuda.is_available():
+                device = self._resolve_input_device()
+                index = device.index if hasattr(device, "index") and device.index is not None else (device if isinstance(device, int) else 0)
+                free, _total = torch.cuda.mem_get_info(index)
+                return int(free)
+        except Exception:
+            return None
+        try:
+            import psutil
+            return int(psutil.virtual_memory().available)
+        except ImportError:
+            pass
+        try:
+            return int(os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE"))
+        except (AttributeError, ValueError, OSError):
+            return None
+
+    def _resolve_batch_size(self, total: int) -> int:
+        """
+        배치 크기 결정. 설정 batch_size > 0 이면 그 값, 0(기본)이면 여유 메모리 기준 자동.
+        자동 모드 상한: GPU LLAVA_MAX_AUTO_BATCH, CPU LLAVA_MAX_AUTO_BATCH_CPU.
+        """
+        try:
+            configured = int(self.config.get("batch_size", 0) or 0)
+        except (TypeError, ValueError):
+            configured = 0
+        if configured > 0:
+            return max(1, min(configured, total))
+
+        upper = LLAVA_MAX_AUTO_BATCH if self.use_gpu else LLAVA_MAX_AUTO_BATCH_CPU
+        free = self._available_memory_bytes()
+        if free is None:
+            return max(1, min(2, total))
+        try:
+            per_image = max(1, self._estimate_bytes_per_image())
+        except Exception:
+            return 1
+        batch_size = int(free * LLAVA_BATCH_MEMORY_FRACTION // per_image)
+        _flush_print(f"[LLaVA] 배치 크기 자동 결정: 여유 {free / 1024**3:.2f}GB, 이미지당 ~{per_image / 1024**2:.0f}MB → {batch_size}")
+        return max(1, min(batch_size, upper, total))
+
+    @staticmethod
+    def _is_out_of_memory(error: Exception) -> bool:
+        import torch
+        oom_type = getattr(torch.cuda, "OutOfMemoryError", None)
+        if oom_type is not None and isinstance(error, oom_type):
+            return True
+        if isinstance(error, MemoryError):
+            return True
+        return isinstance(error, RuntimeError) and "out of memory" in str(error).lower()
+
+    # ────────────── 결과 캐시 ──────────────
+    def _result_cache(self):
+        """공유 결과 캐시 (설정 result_cache=False 이거나 열기 실패 시 None)"""
+        if not self.config.get("result_cache", True):
+            return None
+        try:
+            from llava_result_cache import get_result_cache
+            return get_result_cache(
+                self.config.get("result_cache_max_entries", 50000),
+                self.config.get("result_cache_max_mb", 64),
+            )
+        except Exception as e:
+            _flush_print(f"⚠️ [LLaVA] 결과 캐시 사용 불가: {e}")
+            return None
+
+    def _result_cache_key(self, cache, image_paths: List[str], prompt=None) -> str:
+        """
+        이미지 내용 해시 + model_id + 프롬프트 + 생성 설정 해시.
+        prompt를 주지 않으면 단일 이미지 프롬프트 메시지(_build_prompt_messages) 사용.
+        생성 결과에 영향이 없는 설정(배치/프리페치/캐시 관련)은 키에서 제외.
+        """
+        from llava_result_cache import make_key
+        if prompt is None:
+            prompt = self._build_prompt_messages()
+        gen_config = {k: v for k, v in self.config.items() if k not in LLAVA_RESULT_CACHE_IGNORED_KEYS}
+        gen_config["_model_class"] = type(self).__name__
+        return make_key([cache.content_key(p) for p in image_paths], self.model_id, prompt, gen_config)
+
+    def _lookup_result(self, image_paths: List[str], prompt=None):
+        """결과 캐시 조회 → (캐시 키 또는 None, 적중한 태그 또는 None). 우회 설정이면 조회하지 않음"""
+        cache = self._result_cache()
+        if cache is None:
+            return None, None
+        try:
+            key = self._result_cache_key(cache, image_paths, prompt)
+        except Exception as e:
+            _flush_print(f"⚠️ [LLaVA] 결과 캐시 키 계산 실패: {e}")
+            return None, None
+        if self.config.get("result_cache_bypass", False):
+            return key, None
+        hit = cache.get(key)
+        return key, (hit[1] if hit is not None else None)
+
+    def _store_result(self, key: Optional[str], caption: str, tags: List[Tuple[str, float]]):
+        if key is None:
+            return
+        cache = self._result_cache()
+        if cache is not None:
+            try:
+                cache.put(key, caption, tags)
+            except Exception as e:
+                _flush_print(f"⚠️ [LLaVA] 결과 캐시 저장 실패: {e}")
+
     def predict_tags(self, image_path: str) -> List[Tuple[str, float]]:
         import time
         import torch  # torch import 명시적 추가
@@ -1358,6 +2170,12 @@ class LLaVATaggerModel(QObject):
             self.config = self._load_llava_config()
             _flush_print(f"[LLaVA] 최신 설정 로드: temperature={self.config.get('temperature', 0.1)}, top_p={self.config.get('top_p', 0.9)}")
             
+            # 결과 캐시 우선 조회 (적중 시 모델 로드/생성 생략)
+            cache_key, cached_tags = self._lookup_result([image_path])
+            if cached_tags is not None:
+                _flush_print(f"[LLaVA] 결과 캐시 적중: {Path(image_path).name}")
+                return cached_tags
+            
             if not self._is_loaded or self.model is None or self.processor is None:
                 _flush_print("[LLaVA] 모델이 로드되지 않음, 로딩 시작...")
                 self.load_model()
@@ -1388,65 +2206,18 @@ class LLaVATaggerModel(QObject):
             tensor_start = time.time()
             
             # 모델의 실제 dtype 사용 (설정과 일관성 유지)
-            if hasattr(self.model, 'dtype'):
-                dtype = self.model.dtype
-            else:
-                # 모델 dtype을 가져올 수 없는 경우 첫 번째 파라미터의 dtype 사용
-                try:
-                    dtype = next(self.model.parameters()).dtype
-                except:
-                    # 최후의 수단: 설정 기반 dtype
-                    quantization_type = self.config.get("quantization_type", "none")
-                    if quantization_type == "BF16":
-                        dtype = torch.bfloat16
-                    elif quantization_type in ["FP16", "4bit", "8bit"]:
-                        dtype = torch.float16
-                    else:
-                        dtype = torch.float32
+            dtype = self._resolve_input_dtype()
             
             _flush_print(f"[LLaVA] 사용할 dtype: {dtype} (모델과 일관성 유지)")
             
             # image_aspect_policy 적용 (이미지 전처리 정책)
-            image_aspect_policy = self.config.get("image_aspect_policy", "auto")
-            if image_aspect_policy != "auto":
-                # 이미지 전처리 정책에 따른 처리
-                if image_aspect_policy == "resize":
-                    # 이미지를 정사각형으로 리사이즈
-                    from PIL import ImageOps
-                    image = ImageOps.fit(image, (336, 336), Image.Resampling.LANCZOS)
-                    _flush_print(f"[LLaVA] 이미지 리사이즈 적용: {image_aspect_policy}")
-                elif image_aspect_policy == "crop":
-                    # 이미지를 정사각형으로 크롭
-                    from PIL import ImageOps
-                    image = ImageOps.fit(image, (336, 336), Image.Resampling.LANCZOS)
-                    _flush_print(f"[LLaVA] 이미지 크롭 적용: {image_aspect_policy}")
-                elif image_aspect_policy == "pad":
-                    # 이미지에 패딩 추가 (기본 processor 동작)
-                    _flush_print(f"[LLaVA] 이미지 패딩 적용: {image_aspect_policy}")
+            image = self._apply_image_aspect_policy(image)
             
-            inputs = self.processor(images=image, text=prompt, return_tensors="pt")
+            with self._processor_lock:
+                inputs = self.processor(images=image, text=prompt, return_tensors="pt")
             
             # 디바이스 핸들링: 양자화 사용 시 device_map="auto"이므로 모델 디바이스에 맞춤
-            if self.config.get("quantization_type", "none") in ["4bit", "8bit"]:
-                # 양자화 사용 시: 모델의 첫 번째 디바이스에 맞춤
-                try:
-                    model_device = next(self.model.parameters()).device
-                    device = model_device
-                except:
-                    device = 0 if self.use_gpu else "cpu"
-            else:
-                # 일반 로드 시: 지정된 디바이스 사용
-                device = 0 if self.use_gpu else "cpu"
-            
-            # Fix: Only cast float tensors to dtype, keep integer tensors as integers
-            for k, v in inputs.items():
-                if hasattr(v, 'to'):
-                    if k in ['pixel_values', 'image_grid_*'] or 'pixel' in k.lower():
-                        # Float tensors (image data) - cast to dtype
-                        inputs[k] = v.to(device, dtype=dtype)
-                    else:
-                        # Integer tensors (input_ids, attention_mask) - only move to device
-                        inputs[k] = v.to(device)
+            self._move_inputs_to_device(inputs, dtype)
             tensor_time = time.time() - tensor_start
             _flush_print(f"[LLaVA] 텐서 처리 완료 ({tensor_time:.3f}s)")
             
@@ -1460,8 +2231,8 @@ class LLaVATaggerModel(QObject):
             except Exception:
                 pass
 
-            # 모델 생성 (공통 함수 사용)
-            gen_ids, generation_time = self._generate_with_model(inputs)
+            # 모델 생성 (공통 함수 사용, 생성 중 부분 태그 스트리밍)
+            gen_ids, generation_time, _ = self._generate_with_model(inputs, streamer=self._build_partial_streamer([image_path]))
 
             _flush_print("[LLaVA] 결과 디코드 중...")
             decode_start = time.time()
@@ -1494,32 +2265,9 @@ class LLaVATaggerModel(QObject):
             _flush_print(f"[LLaVA] 총 시간: {total_time:.3f}s")
 
             # 캡션을 태그 형태로 변환 (UI 호환성을 위해)
-            if caption:
-                # 모든 스타일에서 쉼표, 마침표, 줄바꿈으로 분리하여 개별 태그로 처리
-                import re
-                tags = re.split(r'[,\n\r.]+', caption)
-                # 각 태그에서 구분자 제거 및 공백 정리
-                cleaned_tags = []
-                for tag in tags:
-                    # 앞뒤 공백 제거
-                    tag = tag.strip()
-                    # 태그 내부의 불필요한 구분자들 제거
-                    tag = re.sub(r'[,\n\r.]+$', '', tag)  # 끝에 있는 구분자 제거
-                    tag = re.sub(r'^[,\n\r.]+', '', tag)  # 앞에 있는 구분자 제거
-                    tag = tag.strip()  # 다시 공백 제거
-                    if tag:  # 빈 태그가 아닌 경우만 추가
-                        cleaned_tags.append(tag)
-                
-                # LLaVA 태그들을 반환 (LLaVA 식별용 특별한 점수 사용)
-                # 태그명은 깔끔하게, 캡션 정보는 별도로 저장
-                result_tags = []
-                for tag in cleaned_tags:
-                    # LLaVA 태그임을 표시하기 위해 -1.0 사용 (WD는 0.0~1.0)
-                    result_tags.append((tag, -1.0))
-                
-                return result_tags
-            else:
-                return []
+            tags = self._caption_to_tags(caption)
+            self._store_result(cache_key, caption, tags)
+            return tags
 
         except Exception as e:
             tb = traceback.format_exc(limit=3)
@@ -1527,6 +2275,376 @@ class LLaVATaggerModel(QObject):
             raise
 
 
+    # ────────────── 백그라운드 전처리 (프리페치) ──────────────
+    def _prepare_image_inputs(self, image_path: str, prompt: str) -> dict:
+        """
+        (프리페치 워커) 이미지 로드 + 종횡비 정책 + 프로세서 전처리 → 배치 차원 1의 CPU 텐서 dict.
+        디코드/리사이즈는 워커끼리 병렬, 프로세서 호출은 토크나이저 상태 공유 때문에 lock으로 직렬화.
+        """
+        image = self._apply_image_aspect_policy(Image.open(image_path).convert("RGB"))
+        with self._processor_lock:
+            inputs = self.processor(images=image, text=prompt, return_tensors="pt")
+        return dict(inputs)
+
+    def _prefetch_workers(self) -> int:
+        """prefetch_workers 설정 → 워커 수 (0 = 자동: 코어 절반, 최대 LLAVA_PREFETCH_MAX_WORKERS / 음수 = 끔)"""
+        try:
+            workers = int(self.config.get("prefetch_workers", 0) or 0)
+        except (TypeError, ValueError):
+            workers = 0
+        if workers == 0:
+            workers = max(1, min(LLAVA_PREFETCH_MAX_WORKERS, (os.cpu_count() or 2) // 2))
+        return workers
+
+    def _load_images(self, image_paths: List[str]) -> list:
+        """이미지 여러 장을 RGB로 로드 (멀티이미지 프롬프트용, 프리페치 워커로 병렬 디코드, 입력 순서 유지)"""
+        workers = self._prefetch_workers()
+        if workers < 0 or len(image_paths) <= 1:
+            return [Image.open(p).convert("RGB") for p in image_paths]
+        with ThreadPoolExecutor(max_workers=min(workers, len(image_paths)), thread_name_prefix="llava-prefetch") as pool:
+            return list(pool.map(lambda p: Image.open(p).convert("RGB"), image_paths))
+
+    def _prefetch_inputs(self, image_paths: List[str], prompt: str):
+        """
+        전처리 프리페치 (생산자: 스레드 풀 / 소비자: generate 루프).
+        - 결과는 입력 순서대로 yield: (index, path, inputs or None, error or None)
+        - backpressure: 제출됐지만 소비되지 않은 이미지는 최대 prefetch_max_images 장
+          (소비자가 배치로 모아 둔 장수를 더해도 prefetch_max_images + 배치 크기 이하)
+        - prefetch_workers: 0 = 자동, 음수 = 프리페치 끔(동기 처리)
+        """
+        workers = self._prefetch_workers()
+        try:
+            max_images = max(1, int(self.config.get("prefetch_max_images", LLAVA_PREFETCH_MAX_IMAGES)))
+        except (TypeError, ValueError):
+            max_images = LLAVA_PREFETCH_MAX_IMAGES
+
+        if workers < 0:
+            # 프리페치 끔: 동기 처리 (디버깅용)
+            for i, p in enumerate(image_paths):
+                try:
+                    yield i, p, self._prepare_image_inputs(p, prompt), None
+                except Exception as e:
+                    yield i, p, None, e
+            return
+        window = max_images
+        total = len(image_paths)
+        futures = deque()
+        next_i = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llava-prefetch") as pool:
+            try:
+                while futures or next_i < total:
+                    while next_i < total and len(futures) < window:
+                        p = image_paths[next_i]
+                        futures.append((next_i, p, pool.submit(self._prepare_image_inputs, p, prompt)))
+                        next_i += 1
+                    i, p, fut = futures.popleft()
+                    try:
+                        prepared = fut.result()
+                    except Exception as e:
+                        yield i, p, None, e
+                        continue
+                    yield i, p, prepared, None
+            finally:
+                # 조기 종료 시 아직 시작하지 않은 작업은 취소
+                for _, _, fut in futures:
+                    fut.cancel()
+
+    def _collate_inputs(self, items: List[dict]) -> dict:
+        """
+        이미지별 전처리 결과(배치 1)를 하나의 배치로 합침.
+        - input_ids/attention_mask: 왼쪽 패딩 (디코더 전용 모델은 생성이 오른쪽 끝에서 이어지므로)
+        - 그 외 텐서(pixel_values 등): 크기가 다른 축은 뒤쪽을 0으로 채움
+          (LLaVA-NeXT anyres 패치 수 차이 → 프로세서의 배치 패딩과 동일)
+        """
+        import torch
+        if len(items) == 1:
+            return dict(items[0])
+        tokenizer = self.processor.tokenizer
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        batch = {}
+        for key, first in items[0].items():
+            if not torch.is_tensor(first):
+                batch[key] = first
+                continue
+            tensors = [item[key] for item in items]
+            if key in ("input_ids", "attention_mask"):
+                max_len = max(t.shape[1] for t in tensors)
+                fill = pad_id if key == "input_ids" else 0
+                tensors = [
+                    torch.cat([torch.full((t.shape[0], max_len - t.shape[1]), fill, dtype=t.dtype), t], dim=1)
+                    if t.shape[1] < max_len else t
+                    for t in tensors
+                ]
+            else:
+                max_shape = [max(t.shape[d] for t in tensors) for d in range(1, first.dim())]
+                padded = []
+                for t in tensors:
+                    if list(t.shape[1:]) != max_shape:
+                        out = t.new_zeros((t.shape[0], *max_shape))
+                        out[(slice(None),) + tuple(slice(0, s) for s in t.shape[1:])] = t
+                        t = out
+                    padded.append(t)
+                tensors = padded
+            batch[key] = torch.cat(tensors, dim=0)
+        return batch
+
+    def _predict_batch(self, prepared: List[dict], image_paths: List[str]) -> List[Tuple[str, List[Tuple[str, float]]]]:
+        """전처리된 이미지 K장을 한 번의 generate 호출로 캡션 생성 → [(캡션, 태그)]"""
+        import time
+
+        tensor_start = time.time()
+        inputs = self._collate_inputs(prepared)
+        self._move_inputs_to_device(inputs, self._resolve_input_dtype())
+        tensor_time = time.time() - tensor_start
+
+        gen_ids, generation_time, _ = self._generate_with_model(inputs, streamer=self._build_partial_streamer(image_paths))
+
+        # num_return_sequences > 1 이면 이미지별로 연속된 행이 생성됨 → 각 이미지의 첫 후보 사용
+        try:
+            num_return = max(1, int(self.config.get("num_return_sequences") or 1))
+        except (TypeError, ValueError):
+            num_return = 1
+        input_length = inputs['input_ids'].shape[1]
+        new_tokens = gen_ids[::num_return, input_length:]
+        captions = self.processor.tokenizer.batch_decode(new_tokens, skip_special_tokens=True, clean_up_tokenization_spaces=False)
+
+        _flush_print(f"[LLaVA] 배치 {len(prepared)}장: 텐서 처리 {tensor_time:.3f}s, 생성 {generation_time:.3f}s "
+                     f"({generation_time / max(1, len(prepared)):.3f}s/장)")
+        results = []
+        for path, caption in zip(image_paths, captions):
+            _flush_print(f"[LLaVA] {Path(path).name} — caption:\n{caption}\n")
+            results.append((caption, self._caption_to_tags(caption)))
+        return results
+
+    def _generate_pending(self, pending: list, batch_size: int):
+        """
+        모아 둔 [(path, inputs, error, cache_key)]를 batch_size장씩 생성 → ([(path, tags, error)], 새 batch_size).
+        - 메모리 부족(OOM) 시 배치 크기를 절반으로 줄여 같은 묶음을 다시 시도 (이후 배치에도 유지)
+        - 그 외 오류가 난 묶음은 이미지별 predict_tags로 재시도
+        - 성공한 결과는 결과 캐시에 저장 (cache_key가 있을 때)
+        """
+        import torch
+        results = [(p, None, err) for p, _inputs, err, _key in pending]
+        valid = [(idx, p, inputs, key) for idx, (p, inputs, err, key) in enumerate(pending) if err is None]
+        pos = 0
+        while pos < len(valid):
+            part = valid[pos:pos + batch_size]
+            try:
+                outputs = self._predict_batch([inputs for _, _, inputs, _ in part], [p for _, p, _, _ in part])
+                for (idx, p, _, key), (caption, tags) in zip(part, outputs):
+                    results[idx] = (p, tags, None)
+                    self._store_result(key, caption, tags)
+            except Exception as e:
+                if self._is_out_of_memory(e) and batch_size > 1:
+                    if self.use_gpu and torch.cuda.is_available():
+                        torch.cuda.empty_cache()
+                    batch_size = max(1, batch_size // 2)
+                    _flush_print(f"⚠️ [LLaVA] 배치 메모리 부족 → 배치 크기 {batch_size}로 재시도")
+                    continue
+                _flush_print(f"⚠️ [LLaVA] 배치 생성 실패, 이미지별 처리로 재시도: {e}")
+                for idx, p, _, _ in part:
+                    try:
+                        results[idx] = (p, self.predict_tags(p), None)
+                    except Exception as single_error:
+                        results[idx] = (p, None, single_error)
+            pos += len(part)
+        return results, batch_size
+
+    def iter_predict(self, image_paths: List[str]):
+        """
+        이미지별 (path, tags, error)를 입력 순서대로 yield (tags/error 중 하나는 None).
+        - 결과 캐시에 있는 이미지는 생성 없이 바로 반환 (전부 적중이면 모델도 로드하지 않음)
+        - 나머지는 _iter_generate: 프리페치 + K장 배치 generate
+        - 시그널은 발생시키지 않음 (batch_predict/각 TaggerThread가 담당)
+        """
+        total = len(image_paths)
+        if total == 0:
+            return
+
+        # 추론할 때마다 최신 설정 로드
+        self.config = self._load_llava_config()
+
+        keys = [None] * total
+        hits = {}
+        cache = self._result_cache()
+        if cache is not None:
+            bypass = bool(self.config.get("result_cache_bypass", False))
+            for i, p in enumerate(image_paths):
+                try:
+                    keys[i] = self._result_cache_key(cache, [p])
+                except Exception:
+                    continue  # 읽을 수 없는 파일: 전처리 단계에서 오류로 보고
+                if not bypass:
+                    hit = cache.get(keys[i])
+                    if hit is not None:
+                        hits[i] = hit[1]
+            _flush_print(f"[LLaVA] 결과 캐시: 적중 {len(hits)}/{total}" + (" (우회: 새로 생성)" if bypass else ""))
+
+        misses = [i for i in range(total) if i not in hits]
+        # 멀티이미지 모델 + pack_images > 1 이면 K장을 한 프롬프트로 묶어 생성
+        iter_generate = self._iter_generate_packed if self._pack_size() > 1 else self._iter_generate
+        generated = iter_generate([image_paths[i] for i in misses], [keys[i] for i in misses])
+        try:
+            for i, p in enumerate(image_paths):
+                if i in hits:
+                    yield p, hits[i], None
+                else:
+                    yield next(generated)
+        finally:
+            generated.close()
+            if cache is not None:
+                cache.flush()
+
+    def _iter_generate(self, image_paths: List[str], cache_keys: List[Optional[str]]):
+        """
+        캐시에 없는 이미지들을 생성해 (path, tags, error)를 입력 순서대로 yield.
+        - 이미지 로드/프로세서 전처리는 프리페치 워커가 다음 이미지들을 미리 준비 (generate와 겹침)
+        - K장씩(_resolve_batch_size) 모아 한 번의 generate로 처리
+        """
+        total = len(image_paths)
+        if total == 0:
+            return
+        if not self._is_loaded or self.model is None or self.processor is None:
+            _flush_print("[LLaVA] 모델이 로드되지 않음, 로딩 시작...")
+            self.load_model()
+        try:
+            batch_size = self._resolve_batch_size(total)
+        except Exception as e:
+            _flush_print(f"[LLaVA] 배치 크기 결정 실패, 1장씩 처리: {e}")
+            batch_size = 1
+        _flush_print(f"[LLaVA] 배치 크기: {batch_size}")
+
+        # 공유 토크나이저 설정은 바꾸지 않음: 전처리는 이미지별(배치 1)이고 배치 패딩은 _collate_inputs 가 직접 왼쪽에 채움
+        prompt = self.processor.apply_chat_template(self._build_prompt_messages(), add_generation_prompt=True)
+
+        # 배치로 모으는 중인 [(path, inputs, error, cache_key)] — 실패 항목도 순서 유지를 위해 함께 보관
+        pending = []
+        ready = 0
+        for i, p, inputs, err in self._prefetch_inputs(image_paths, prompt):
+            pending.append((p, inputs, err, cache_keys[i]))
+            if err is None:
+                ready += 1
+            if ready >= batch_size:
+                results, batch_size = self._generate_pending(pending, batch_size)
+                pending, ready = [], 0
+                yield from results
+        if pending:
+            results, _ = self._generate_pending(pending, batch_size)
+            yield from results
+
+    # ────────────── 멀티이미지 패킹 ──────────────
+    def _pack_size(self) -> int:
+        """pack_images 설정 → 한 프롬프트에 넣을 이미지 수 (멀티이미지 미지원 모델이거나 0/1이면 1)"""
+        if not self.SUPPORTS_MULTI_IMAGE:
+            return 1
+        try:
+            size = int(self.config.get("pack_images", 0) or 0)
+            limit = int(self.config.get("multi_image_max", LLAVA_PACK_MAX_IMAGES) or LLAVA_PACK_MAX_IMAGES)
+        except (TypeError, ValueError):
+            return 1
+        return max(1, min(size, limit, LLAVA_PACK_MAX_IMAGES))
+
+    def _build_packed_messages(self, count: int):
+        """
+        이미지 count장을 "Image N:" 라벨과 번갈아 넣고, 단일 이미지 프롬프트를 이미지별로 수행하도록 지시.
+        응답은 이미지마다 "Image N: ..." 한 줄 (parse_packed_answer로 분리)
+        """
+        base_text = "Describe this image."
+        for item in self._build_prompt_messages()[0]["content"]:
+            if item.get("type") == "text" and item.get("text"):
+                base_text = item["text"]
+        content = []
+        for number in range(1, count + 1):
+            content.append({"type": "text", "text": f"Image {number}:"})
+            content.append({"type": "image"})
+        content.append({
+            "type": "text",
+            "text": (
+                f"There are {count} images above, numbered 1 to {count}. "
+                f"Handle each image separately and independently: {base_text}\n"
+                f"Answer with exactly {count} lines in order, one per image, each starting with "
+                f"'Image N:' followed by the answer for that image only. Do not merge or skip images."
+            ),
+        })
+        return [{"role": "user", "content": content}]
+
+    def _predict_packed(self, image_paths: List[str]) -> List[Optional[Tuple[str, List[Tuple[str, float]]]]]:
+        """
+        K장을 한 프롬프트로 생성 → 이미지별 (답변, 태그) 또는 None (파싱/검증 실패 → 호출 측에서 단일 처리).
+        검증: 번호 줄이 있고, 번호가 중복되지 않고, 태그가 1개 이상이며, 토큰 상한/조기 종료로 잘린 마지막 항목이 아닐 것
+        조기 종료: 태그 반복/토큰 루프만 이미지 구간별로 판정 (태그 예산은 이미지별 결과에서 _caption_to_tags 가 자름)
+        """
+        import time
+
+        start = time.time()
+        count = len(image_paths)
+        images = [self._apply_image_aspect_policy(image) for image in self._load_images(image_paths)]
+        prompt = self.processor.apply_chat_template(self._build_packed_messages(count), add_generation_prompt=True)
+        with self._processor_lock:
+            inputs = self.processor(images=images, text=prompt, return_tensors="pt")
+        self._move_inputs_to_device(inputs, self._resolve_input_dtype())
+
+        max_new_tokens = int(self.config.get("max_tokens", 500)) * count
+        gen_ids, generation_time, stop_reasons = self._generate_with_model(
+            inputs, max_tags=0, max_new_tokens=max_new_tokens, section_re=LLAVA_PACKED_HEADER_RE,
+        )
+        new_tokens = gen_ids[0][inputs["input_ids"].shape[1]:]
+        answer = self.processor.tokenizer.decode(new_tokens, skip_special_tokens=True, clean_up_tokenization_spaces=False)
+        _flush_print(f"[LLaVA] 패킹 {count}장 응답:\n{answer}\n")
+
+        sections = parse_packed_answer(answer, count)
+        if len(new_tokens) >= max_new_tokens or stop_reasons:
+            # 토큰 상한/조기 종료로 잘림: 마지막으로 답한 이미지는 불완전할 수 있음
+            answered = [idx for idx, section in enumerate(sections) if section is not None]
+            if answered:
+                sections[answered[-1]] = None
+
+        results = []
+        for path, section in zip(image_paths, sections):
+            tags = self._caption_to_tags(section) if section else []
+            results.append((section, tags) if tags else None)
+        parsed = sum(1 for r in results if r is not None)
+        _flush_print(f"[LLaVA] 패킹 {count}장: 생성 {generation_time:.3f}s, 총 {time.time() - start:.3f}s, "
+                     f"파싱 성공 {parsed}/{count}")
+        return results
+
+    def _iter_generate_packed(self, image_paths: List[str], cache_keys: List[Optional[str]]):
+        """
+        캐시에 없는 이미지들을 pack_images장씩 한 프롬프트로 생성해 (path, tags, error)를 입력 순서대로 yield.
+        - 프롬프트/prefill 비용을 K장이 나눠 씀 (배치 패딩할 메모리가 없는 환경에서 처리량 향상)
+        - 파싱/검증에 실패한 이미지, 묶음 전체가 실패한 경우는 이미지별 predict_tags로 대체
+        """
+        import torch
+        total = len(image_paths)
+        if total == 0:
+            return
+        if not self._is_loaded or self.model is None or self.processor is None:
+            _flush_print("[LLaVA] 모델이 로드되지 않음, 로딩 시작...")
+            self.load_model()
+        pack = self._pack_size()
+        _flush_print(f"[LLaVA] 패킹 모드: 프롬프트당 {pack}장")
+
+        for pos in range(0, total, pack):
+            chunk = image_paths[pos:pos + pack]
+            keys = cache_keys[pos:pos + pack]
+            try:
+                outputs = self._predict_packed(chunk) if len(chunk) > 1 else [None]
+            except Exception as e:
+                if self._is_out_of_memory(e) and self.use_gpu and torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+                _flush_print(f"⚠️ [LLaVA] 패킹 생성 실패, 이미지별 처리로 대체: {e}")
+                outputs = [None] * len(chunk)
+            for p, key, output in zip(chunk, keys, outputs):
+                if output is None:
+                    try:
+                        yield p, self.predict_tags(p), None
+                    except Exception as single_error:
+                        yield p, None, single_error
+                    continue
+                caption, tags = output
+                self._store_result(key, caption, tags)
+                yield p, tags, None
+
     def batch_predict(self, image_paths: List[str]):
         total = len(image_paths)
         _flush_print(f"[LLaVA] 배치 예측 시작: {total}개 이미지")
@@ -1534,17 +2652,17 @@ class LLaVATaggerModel(QObject):
         # 태그 결과 수집
         tag_results = []
         
-        for i, p in enumerate(image_paths, start=1):
-            try:
-                _flush_print(f"[LLaVA] 이미지 {i}/{total} 처리 시작: {p}")
-                tags = self.predict_tags(p)
-                tag_results.append(tags)
-                self.tag_generated.emit(p, tags)
-            except Exception as e:
-                self.error_occurred.emit(f"LLaVA 태깅 실패: {e}")
-                tag_results.append([])  # 실패한 경우 빈 리스트
-            finally:
+        try:
+            for i, (p, tags, err) in enumerate(self.iter_predict(image_paths), start=1):
+                if err is not None:
+                    self.error_occurred.emit(f"LLaVA 태깅 실패: {err}")
+                    tag_results.append([])  # 실패한 경우 빈 리스트
+                else:
+                    tag_results.append(tags)
+                    self.tag_generated.emit(p, tags)
                 self.progress_updated.emit(i, total)
+        except Exception as e:
+            self.error_occurred.emit(f"LLaVA 태깅 실패: {e}")
         
         # 타임머신 로그 기록 (공통 함수 사용)
         try:
@@ -1561,6 +2679,7 @@ class LLaVATaggerThread(QThread):
     model_loading_progress = Signal(str, int)  # 모델 로딩 진행 시그널 (상태, 진행률)
     model_loading_finished = Signal()  # 모델 로딩 완료 시그널
     tag_generated   = Signal(str, list)
+    tags_partial    = Signal(str, list)  # 생성 중 부분 태그 (image_path, List[(tag, score)])
     finished        = Signal()
     error_occurred  = Signal(str)
 
@@ -1587,6 +2706,7 @@ class LLaVATaggerThread(QThread):
             self._tagger.model_loading_progress.connect(self.model_loading_progress)
             self._tagger.model_loading_finished.connect(self.model_loading_finished)
             self._tagger.tag_generated.connect(self.tag_generated)
+            self._tagger.tags_partial.connect(self.tags_partial)
             self._tagger.finished.connect(self.finished)
             self._tagger.error_occurred.connect(self.error_occurred)
             _flush_print("[LLaVA Thread] 시그널 연결 완료")
@@ -23,6 +23,8 @@ from transformers import (
 )
 
 class LLaVAInterleaveTagger(LLaVATaggerModel):
+    SUPPORTS_MULTI_IMAGE = True  # pack_images > 1 이면 iter_predict가 여러 장을 한 프롬프트로 묶음
+
     def __init__(self, model_id: str = "llava-hf/llava-interleave-qwen-7b-hf", use_gpu: bool = True):
         super().__init__(model_id=model_id, use_gpu=use_gpu)
         # model_dir 초기화
@@ -166,11 +168,7 @@ class LLaVAInterleaveTagger(LLaVATaggerModel):
             finished_callback=lambda: self.model_loading_finished.emit()
         )
         print(f"[DEBUG] LLaVA-Interleave 진행률 콜백 설정 완료: {hasattr(self, 'model_loading_progress')}")
-        self.model = progress_capture.capture_loading_progress(
-            LlavaNextForConditionalGeneration.from_pretrained,
-            str(local_model_path),
-            **load_kwargs
-        )
+        self.model = self._from_pretrained_cached(LlavaNextForConditionalGeneration, local_model_path, load_kwargs, progress_capture)
         self.processor = LlavaNextProcessor.from_pretrained(str(local_model_path), local_files_only=True)
 
         try:
@@ -240,14 +238,27 @@ class LLaVAInterleaveTagger(LLaVATaggerModel):
 
     # 단일 이미지 predict_tags는 공통 그대로 사용
 
+    def _clean_multi_tag(self, t: str, blacklist=frozenset()):
+        """멀티이미지 캡션 조각 → 태그 (콤마/특수기호 제거, 타국어/블랙리스트 태그는 None)"""
+        import re
+        t = re.sub(r',', '', t).strip()
+        t = re.sub(r"^[,\n\r.]+|[,\n\r.]+$", "", t)
+        
+        # 특수기호 제거: [,],',",&,$
+        t = re.sub(r'[\[\]\'\"&$]', '', t)
+        t = t.strip()
+        
+        # 타국어 태그 필터링 (한글, 일본어, 중국어 등)
+        if not t or self._contains_non_english(t) or t.lower() in blacklist:
+            return None
+        return t
+
     def predict_tags_multi(self, image_paths: List[str], max_tags: int = 40) -> List[Tuple[str, float]]:
         import time, re
         if not image_paths:
             return []
 
         self.config = self._load_llava_config()
-        if not self._is_loaded or self.model is None or self.processor is None:
-            self.load_model()
 
         # multi_image_max 설정 적용
         max_images = self.config.get("multi_image_max", 4)
@@ -255,7 +266,16 @@ class LLaVAInterleaveTagger(LLaVATaggerModel):
             _flush_print(f"[LLaVA-Interleave] 이미지 수 제한: {len(image_paths)} → {max_images}")
             image_paths = image_paths[:max_images]
         
-        images = [Image.open(p).convert("RGB") for p in image_paths]
+        # 결과 캐시 우선 조회 (멀티이미지: 이미지 순서 + max_tags까지 키에 포함, 적중 시 모델 로드 생략)
+        cache_key, cached_tags = self._lookup_result(image_paths, prompt={"multi_image": True, "max_tags": max_tags})
+        if cached_tags is not None:
+            _flush_print(f"[LLaVA-Interleave] 결과 캐시 적중: 멀티이미지 {len(image_paths)}장")
+            return cached_tags
+
+        if not self._is_loaded or self.model is None or self.processor is None:
+            self.load_model()
+        
+        images = self._load_images(image_paths)
         
         # 새로운 프롬프트 템플릿 사용
         prompt_style = self.config.get("prompt_style", "sentence_caption")
@@ -359,7 +379,12 @@ class LLaVAInterleaveTagger(LLaVATaggerModel):
                 else:
                     inputs[k] = v.to(device)
 
-        gen_ids, _ = self._generate_with_model(inputs)
+        # 아래 파싱 규칙(콤마 제거 후 구둣점 분리) 기준으로 max_tags개가 나오면 조기 종료
+        blacklist = self._tag_blacklist()
+        gen_ids, _, _ = self._generate_with_model(
+            inputs, max_tags=max_tags, tag_filter=lambda t: self._clean_multi_tag(t, blacklist),
+            split_pattern=r'[.\n\r]+',
+        )
         input_len = inputs["input_ids"].shape[1]
         new_tokens = gen_ids[0][input_len:]
         caption = self.processor.tokenizer.decode(new_tokens, skip_special_tokens=True, clean_up_tokenization_spaces=False)
@@ -370,24 +395,16 @@ class LLaVAInterleaveTagger(LLaVATaggerModel):
         
         cleaned = []
         for t in tags:
-            t = t.strip()
-            t = re.sub(r"^[,\n\r.]+|[,\n\r.]+$", "", t)
-            
-            # 특수기호 제거: [,],',",&,$
-            t = re.sub(r'[\[\]\'\"&$]', '', t)
-            t = t.strip()
-            
-            # 타국어 태그 필터링 (한글, 일본어, 중국어 등)
-            if self._contains_non_english(t):
-                continue  # 타국어 태그는 건너뛰기
-            
+            t = self._clean_multi_tag(t, blacklist)
             if t:
                 cleaned.append(t)
         
         # 완전 동일한 중복 제거 (대소문자 구분)
         cleaned = list(dict.fromkeys(cleaned))  # 순서 유지하면서 중복 제거
 
-        return [(t, -1.0) for t in cleaned[:max_tags]]
+        result = [(t, -1.0) for t in cleaned[:max_tags]]
+        self._store_result(cache_key, caption, result)
+        return result
     
     def check_model_files(self) -> bool:
         """LLaVA-Interleave 모델 파일들이 로컬에 있는지 확인"""
@@ -520,6 +537,7 @@ class LLaVAInterleaveTaggerThread(QThread):
     model_loading_progress = Signal(str, int)
     model_loading_finished = Signal()
     tag_generated = Signal(str, list)
+    tags_partial = Signal(str, list)  # 생성 중 부분 태그
     finished = Signal()
     error_occurred = Signal(str)
 
@@ -539,9 +557,31 @@ class LLaVAInterleaveTaggerThread(QThread):
             self._tagger.model_loading_progress.connect(self.model_loading_progress)
             self._tagger.model_loading_finished.connect(self.model_loading_finished)
             self._tagger.tag_generated.connect(self.tag_generated)
+            self._tagger.tags_partial.connect(self.tags_partial)
             self._tagger.finished.connect(self.finished)
             self._tagger.error_occurred.connect(self.error_occurred)
             
+            # 패킹 모드(pack_images > 1): K장씩 한 프롬프트로 묶고 이미지별 결과로 분리
+            self._tagger.config = self._tagger._load_llava_config()
+            if self._tagger._pack_size() > 1:
+                total = len(self.image_paths)
+                tag_results = []
+                for i, (p, tags, err) in enumerate(self._tagger.iter_predict(self.image_paths), 1):
+                    if err is not None:
+                        self.error_occurred.emit(f"LLaVA-Interleave 태깅 실패: {err}")
+                        tag_results.append([])
+                    else:
+                        tag_results.append(tags)
+                        self.tag_generated.emit(p, tags)
+                    self.progress_updated.emit(i, total)
+                try:
+                    from timemachine_log import log_ai_batch_tagging
+                    log_ai_batch_tagging("LLaVA-Interleave", self.model_id, self.image_paths, tag_results)
+                except Exception:
+                    pass
+                self.finished.emit()
+                return
+            
             # 멀티이미지 한 번에 처리 예시: 필요에 따라 묶음 전략 조정
             tags = self._tagger.predict_tags_multi(self.image_paths)
             for i, p in enumerate(self.image_paths, 1):
@@ -25,6 +25,8 @@ from transformers import (
 )
 
 class LLaVANextTagger(LLaVATaggerModel):
+    SUPPORTS_MULTI_IMAGE = True  # pack_images > 1 이면 iter_predict가 여러 장을 한 프롬프트로 묶음
+
     def __init__(self, model_id: str = "llava-hf/llava-v1.6-mistral-7b-hf", use_gpu: bool = True):
         super().__init__(model_id=model_id, use_gpu=use_gpu)
         # model_dir 초기화
@@ -210,11 +212,7 @@ class LLaVANextTagger(LLaVATaggerModel):
             finished_callback=lambda: self.model_loading_finished.emit()
         )
         print(f"[DEBUG] LLaVA-NeXT 진행률 콜백 설정 완료: {hasattr(self, 'model_loading_progress')}")
-        self.model = progress_capture.capture_loading_progress(
-            LlavaNextForConditionalGeneration.from_pretrained,
-            str(local_model_path),
-            **load_kwargs
-        )
+        self.model = self._from_pretrained_cached(LlavaNextForConditionalGeneration, local_model_path, load_kwargs, progress_capture)
         self.processor = LlavaNextProcessor.from_pretrained(str(local_model_path), local_files_only=True)
 
         # 권장 설정: 왼쪽 패딩
@@ -290,6 +288,20 @@ class LLaVANextTagger(LLaVATaggerModel):
 
     # 단일 이미지: 기본 predict_tags를 그대로 사용(프로세서/모델만 바뀜)
 
+    def _clean_multi_tag(self, t: str, blacklist=frozenset()):
+        """멀티이미지 캡션 조각 → 태그 (특수기호 제거, 타국어/블랙리스트 태그는 None)"""
+        import re
+        t = re.sub(r"^[,\n\r.]+|[,\n\r.]+$", "", t.strip())
+        
+        # 특수기호 제거: [,],',",&,$
+        t = re.sub(r'[\[\]\'\"&$]', '', t)
+        t = t.strip()
+        
+        # 타국어 태그 필터링 (한글, 일본어, 중국어 등)
+        if not t or self._contains_non_english(t) or t.lower() in blacklist:
+            return None
+        return t
+
     def predict_tags_multi(self, image_paths: List[str], max_tags: int = 40) -> List[Tuple[str, float]]:
         """
         LLaVA-NeXT의 멀티이미지(인터리브) 입력 포맷.
@@ -303,14 +315,16 @@ class LLaVANextTagger(LLaVATaggerModel):
 
         start = time.time()
         self.config = self._load_llava_config()
+        # 결과 캐시 우선 조회 (멀티이미지: 이미지 순서 + max_tags까지 키에 포함, 적중 시 모델 로드 생략)
+        cache_key, cached_tags = self._lookup_result(image_paths, prompt={"multi_image": True, "max_tags": max_tags})
+        if cached_tags is not None:
+            _flush_print(f"[LLaVA-NeXT] 결과 캐시 적중: 멀티이미지 {len(image_paths)}장")
+            return cached_tags
         if not self._is_loaded or self.model is None or self.processor is None:
             self.load_model()
 
-        # 이미지 로드
-        images = []
-        for p in image_paths:
-            img = Image.open(p).convert("RGB")
-            images.append(img)
+        # 이미지 로드 (병렬 디코드)
+        images = self._load_images(image_paths)
 
         # 프롬프트 메시지(간단 비교 프롬프트, 스타일은 공통 로직을 재사용하여 텍스트를 얻어도 무방)
         base_messages = self._build_prompt_messages()
@@ -371,8 +385,11 @@ class LLaVANextTagger(LLaVATaggerModel):
                 else:
                     inputs[k] = v.to(device)
 
-        # 생성 + 디코드(공통 함수 사용)
-        gen_ids, gen_t = self._generate_with_model(inputs)
+        # 생성 + 디코드(공통 함수 사용) — 아래 파싱 규칙 기준으로 max_tags개가 나오면 조기 종료
+        blacklist = self._tag_blacklist()
+        gen_ids, gen_t, _ = self._generate_with_model(
+            inputs, max_tags=max_tags, tag_filter=lambda t: self._clean_multi_tag(t, blacklist)
+        )
         input_len = inputs["input_ids"].shape[1]
         new_tokens = gen_ids[0][input_len:]
         caption = self.processor.tokenizer.decode(new_tokens, skip_special_tokens=True, clean_up_tokenization_spaces=False)
@@ -381,23 +398,16 @@ class LLaVANextTagger(LLaVATaggerModel):
         tags = re.split(r"[,\n\r.]+", caption or "")
         cleaned = []
         for t in tags:
-            t = re.sub(r"^[,\n\r.]+|[,\n\r.]+$", "", t.strip())
-            
-            # 특수기호 제거: [,],',",&,$
-            t = re.sub(r'[\[\]\'\"&$]', '', t)
-            t = t.strip()
-            
-            # 타국어 태그 필터링 (한글, 일본어, 중국어 등)
-            if self._contains_non_english(t):
-                continue  # 타국어 태그는 건너뛰기
-            
+            t = self._clean_multi_tag(t, blacklist)
             if t:
                 cleaned.append(t)
         
         # 완전 동일한 중복 제거 (대소문자 구분)
         cleaned = list(dict.fromkeys(cleaned))  # 순서 유지하면서 중복 제거
 
-        return [(t, -1.0) for t in cleaned[:max_tags]]
+        result = [(t, -1.0) for t in cleaned[:max_tags]]
+        self._store_result(cache_key, caption, result)
+        return result
     
     def check_model_files(self) -> bool:
         """LLaVA-NeXT 모델 파일들이 로컬에 있는지 확인"""
@@ -534,6 +544,7 @@ class LLaVANextTaggerThread(QThread):
     model_loading_progress = Signal(str, int)
     model_loading_finished = Signal()
     tag_generated = Signal(str, list)
+    tags_partial = Signal(str, list)  # 생성 중 부분 태그
     finished = Signal()
     error_occurred = Signal(str)
 
@@ -553,6 +564,7 @@ class LLaVANextTaggerThread(QThread):
             self._tagger.model_loading_progress.connect(self.model_loading_progress)
             self._tagger.model_loading_finished.connect(self.model_loading_finished)
             self._tagger.tag_generated.connect(self.tag_generated)
+            self._tagger.tags_partial.connect(self.tags_partial)
             self._tagger.finished.connect(self.finished)
             self._tagger.error_occurred.connect(self.error_occurred)
             
@@ -561,10 +573,14 @@ class LLaVANextTaggerThread(QThread):
             # 태그 결과 수집
             tag_results = []
             
-            for i, p in enumerate(self.image_paths, 1):
-                tags = self._tagger.predict_tags(p)
-                tag_results.append(tags)
-                self.tag_generated.emit(p, tags)
+            # 다음 이미지들의 로드/전처리는 백그라운드에서 진행, 결과는 입력 순서대로 전달
+            for i, (p, tags, err) in enumerate(self._tagger.iter_predict(self.image_paths), 1):
+                if err is not None:
+                    self.error_occurred.emit(f"LLaVA-NeXT 태깅 실패: {err}")
+                    tag_results.append([])
+                else:
+                    tag_results.append(tags)
+                    self.tag_generated.emit(p, tags)
                 self.progress_updated.emit(i, total)
             
             # 타임머신 로그 기록 (공통 함수 사용)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLaVA 캡션/태그 결과 캐시 (같은 이미지·모델·프롬프트·생성 설정이면 재생성 없이 재사용)
+- 키: 이미지 내용 해시 + model_id + 프롬프트 + 생성 설정 해시 (멀티이미지는 내용 해시 목록)
+- 경로: models/llava_result_cache/cache.jsonl (추가 전용 로그, 한 줄 = 레코드 하나)
+    * 첫 줄   : {"version"}
+    * put     : 키 → {caption, tags, size, used}
+    * del     : 크기 제한으로 제거된 키 목록
+    * path    : 경로 → (크기, mtime, 내용 해시) 메모 (같은 파일은 다시 해시하지 않음)
+    * used    : 조회 시각 (조회마다 쓰지 않고 flush() 때 한 줄로 모아 기록)
+  → put() 은 한 줄 append 만 함 (전체 파일을 다시 쓰지 않음)
+  → 로그가 살아있는 데이터보다 COMPACT_RATIO 배 이상 커지면 flush()/로드 때 현재 상태로 다시 씀
+  → 마지막 줄이 끊겨 있으면(쓰는 중 종료) 로드할 때 그 줄만 잘라냄
+- 크기 제한: 항목 수 / 저장 바이트 상한을 넘으면 오래 안 쓴 항목부터 제거 (LRU)
+- 이전 형식(cache.json)은 처음 열 때 로그로 옮기고 삭제
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from wd_score_cache import file_content_hash
+
+
+CACHE_DIRNAME = "llava_result_cache"
+LOG_FILENAME = "cache.jsonl"
+LEGACY_FILENAME = "cache.json"
+CACHE_VERSION = 1
+COMPACT_RATIO = 2.0  # 로그 크기 / 살아있는 항목 크기가 이 배수를 넘으면 다시 씀
+COMPACT_MIN_BYTES = 1024 * 1024  # 로그가 이보다 작으면 다시 쓰지 않음
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_MB = 64
+
+
+def _script_dir() -> Path:
+    return Path(__file__).resolve().parent
+
+
+def make_key(content_keys: List[str], model_id: str, prompt, gen_config: Dict) -> str:
+    """결과 캐시 키 (이미지 내용 해시 목록 + 모델 + 프롬프트 + 생성 설정)"""
+    payload = json.dumps(
+        {"images": list(content_keys), "model_id": model_id, "prompt": prompt, "config": gen_config},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class LlavaResultCache:
+    """
+    모든 LLaVA 모델이 공유하는 결과 캐시 (키에 model_id 포함).
+    - 프리페치 워커/태거 스레드에서 동시에 호출될 수 있음 (내부 lock)
+    - 변경 사항은 바로 로그에 한 줄씩 추가, 조회 시각은 flush() 때 모아서 기록
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = DEFAULT_MAX_ENTRIES, max_mb: float = DEFAULT_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.log_path = self.cache_dir / LOG_FILENAME
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(float(max_mb) * 1024 * 1024))
+
+        self._lock = threading.RLock()
+        self._entries: Dict[str, dict] = {}
+        self._paths: Dict[str, list] = {}  # 절대 경로 → [size, mtime_ns, 내용 해시]
+        self._bytes = 0
+        self._touched: Dict[str, float] = {}  # 마지막 flush 이후 조회된 키 → 조회 시각
+        self._log_bytes = 0
+
+        self._load()
+
+    # ────────────── 생성/로드 ──────────────
+    @classmethod
+    def default_dir(cls) -> Path:
+        return _script_dir() / "models" / CACHE_DIRNAME
+
+    def _load(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        legacy = self.cache_dir / LEGACY_FILENAME
+        try:
+            if self.log_path.is_file():
+                self._replay_log()
+            elif legacy.is_file():
+                with legacy.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self._entries = dict(data.get("entries", {}))
+                    self._paths = dict(data.get("paths", {}))
+                print(f"🔄 LLaVA 결과 캐시를 로그 형식으로 변환: {len(self._entries)}개 항목")
+        except Exception as e:
+            print(f"⚠️ LLaVA 결과 캐시 로드 실패, 초기화: {e}")
+            self._entries = {}
+            self._paths = {}
+        self._bytes = sum(int(e.get("size", 0)) for e in self._entries.values())
+        with self._lock:
+            self._enforce_limits()
+            if legacy.is_file() or not self.log_path.is_file() or self._should_compact():
+                self._compact()
+            if legacy.is_file() and self.log_path.is_file():
+                try:
+                    legacy.unlink()
+                except OSError:
+                    pass
+
+    def _replay_log(self):
+        """로그를 처음부터 적용 (형식이 다르면 비우고, 깨진 줄은 건너뜀)"""
+        with self.log_path.open("r", encoding="utf-8", newline="") as f:
+            header = f.readline()
+            try:
+                version = json.loads(header).get("version")
+            except ValueError:
+                version = None
+            if version != CACHE_VERSION:
+                print(f"⚠️ LLaVA 결과 캐시 형식 불일치, 초기화: {self.log_path}")
+                return
+            complete = len(header.encode("utf-8"))  # 줄바꿈으로 끝난 부분까지의 바이트 수
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # 쓰는 중 종료된 마지막 줄 → 아래에서 잘라냄 (다음 append 가 이어 붙지 않게)
+                complete += len(line.encode("utf-8"))
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                op = record.get("op")
+                if op == "put":
+                    self._entries[record["key"]] = record["entry"]
+                elif op == "del":
+                    for key in record.get("keys", []):
+                        self._entries.pop(key, None)
+                elif op == "path":
+                    self._paths[record["path"]] = record["memo"]
+                elif op == "used":
+                    for key, used in record.get("keys", {}).items():
+                        entry = self._entries.get(key)
+                        if entry is not None:
+                            entry["used"] = used
+        if self.log_path.stat().st_size > complete:
+            with self.log_path.open("r+b") as f:
+                f.truncate(complete)
+        self._log_bytes = complete
+
+    # ────────────── 키 ──────────────
+    def content_key(self, image_path: str) -> str:
+        """
+        이미지 내용 키. 경로의 (크기, mtime)이 그대로면 메모된 해시를 재사용하고,
+        바뀌었거나 처음 보는 파일이면 내용을 해시한다 (이름 변경/복사본도 적중).
+        """
+        abs_path = os.path.abspath(image_path)
+        st = os.stat(abs_path)
+        with self._lock:
+            memo = self._paths.get(abs_path)
+            if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+                return memo[2]
+        digest = file_content_hash(abs_path)
+        with self._lock:
+            memo = [st.st_size, st.st_mtime_ns, digest]
+            self._paths[abs_path] = memo
+            self._append([{"op": "path", "path": abs_path, "memo": memo}])
+        return digest
+
+    # ────────────── 조회/저장 ──────────────
+    def get(self, key: str) -> Optional[Tuple[str, List[Tuple[str, float]]]]:
+        """키 → (캡션, [(태그, 점수)]) 또는 None (조회 시각은 메모리에만 기록, flush() 때 저장)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["used"] = self._touched[key] = time.time()
+            return entry.get("caption", ""), [(t, float(s)) for t, s in entry.get("tags", [])]
+
+    def put(self, key: str, caption: str, tags: List[Tuple[str, float]]):
+        """결과 저장 (같은 키는 덮어씀 → 캐시 우회 실행의 새 결과로 갱신)"""
+        entry = {"caption": caption or "", "tags": [[t, float(s)] for t, s in tags], "used": time.time()}
+        entry["size"] = len(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= int(old.get("size", 0))
+            self._entries[key] = entry
+            self._bytes += entry["size"]
+            self._touched.pop(key, None)
+            self._append([{"op": "put", "key": key, "entry": entry}])
+            self._enforce_limits()
+
+    def _enforce_limits(self):
+        """항목 수/바이트 상한 초과 시 오래 안 쓴 항목부터 제거"""
+        if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        by_age = sorted(self._entries.items(), key=lambda kv: kv[1].get("used", 0))
+        removed = []
+        for key, entry in by_age:
+            if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+                break
+            del self._entries[key]
+            self._touched.pop(key, None)
+            self._bytes -= int(entry.get("size", 0))
+            removed.append(key)
+        # 더 이상 어떤 항목도 가리키지 않을 수 있는 경로 메모도 같은 상한으로 정리 (다음 다시 쓰기 때 반영)
+        if len(self._paths) > self.max_entries:
+            for path in list(self._paths)[:len(self._paths) - self.max_entries]:
+                del self._paths[path]
+        if removed:
+            self._append([{"op": "del", "keys": removed}])
+            print(f"🧹 LLaVA 결과 캐시 정리: {len(removed)}개 항목 제거 (남은 {len(self._entries)}개)")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ────────────── 로그 기록/정리 ──────────────
+    def _append(self, records: List[dict]):
+        lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        try:
+            with self.log_path.open("a", encoding="utf-8", newline="") as f:
+                f.write(lines)
+            self._log_bytes += len(lines.encode("utf-8"))
+        except Exception as e:
+            print(f"⚠️ LLaVA 결과 캐시 기록 실패: {e}")
+
+    def _should_compact(self) -> bool:
+        return self._log_bytes > max(COMPACT_MIN_BYTES, self._bytes * COMPACT_RATIO)
+
+    def _compact(self):
+        """현재 항목/경로 메모만으로 로그를 새로 씀 (덮어쓴 항목/제거 기록/조회 기록 정리)"""
+        tmp = self.log_path.with_suffix(".jsonl.tmp")
+        try:
+            with tmp.open("w", encoding="utf-8", newline="") as f:
+                f.write(json.dumps({"version": CACHE_VERSION}) + "\n")
+                for path, memo in self._paths.items():
+                    f.write(json.dumps({"op": "path", "path": path, "memo": memo}, ensure_ascii=False) + "\n")
+                for key, entry in self._entries.items():
+                    f.write(json.dumps({"op": "put", "key": key, "entry": entry}, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.log_path)
+            self._log_bytes = self.log_path.stat().st_size
+            self._touched.clear()
+        except Exception as e:
+            print(f"⚠️ LLaVA 결과 캐시 저장 실패: {e}")
+
+    def flush(self):
+        """조회 시각을 기록하고, 로그가 많이 커졌으면 다시 씀"""
+        with self._lock:
+            if self._should_compact():
+                self._compact()
+            elif self._touched:
+                self._append([{"op": "used", "keys": self._touched}])
+                self._touched = {}
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._entries = {}
+            self._paths = {}
+            self._bytes = 0
+            self._touched = {}
+            self._compact()
+        print(f"🗑️ LLaVA 결과 캐시 삭제: {self.cache_dir}")
+
+
+_shared_cache: Optional[LlavaResultCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_result_cache(max_entries: int = DEFAULT_MAX_ENTRIES, max_mb: float = DEFAULT_MAX_MB) -> LlavaResultCache:
+    """공유 결과 캐시 (크기 제한 설정이 바뀌면 새 상한 적용)"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = LlavaResultCache(LlavaResultCache.default_dir(), max_entries, max_mb)
+        else:
+            with _shared_cache._lock:
+                _shared_cache.max_entries = max(1, int(max_entries))
+                _shared_cache.max_bytes = max(1, int(float(max_mb) * 1024 * 1024))
+                _shared_cache._enforce_limits()
+        return _shared_cache
@@ -114,6 +114,17 @@ class LlavaSettingsModule:
             "torch_dtype": None,
             "max_memory": None,
             "offload_policy": "auto",
+            "batch_size": 0,  # 배치 캡션 생성 크기 (0 = 자동)
+            "prefix_cache": True,  # 공유 프롬프트 prefix KV 재사용
+            "prompt_before_image": False,  # 프롬프트를 이미지 앞에 배치 (prefix 캐시 범위 확대)
+            "max_tags": 0,  # 이미지당 태그 수 상한 (0 = 무제한)
+            "early_stop": True,  # 태그 예산 도달/반복 루프 시 생성 조기 종료
+            "tag_blacklist": [],  # 결과에서 제외할 태그
+            "result_cache": True,  # 캡션/태그 결과 디스크 캐시
+            "result_cache_bypass": False,  # 캐시 조회 없이 새로 생성 (새 샘플링)
+            "stream_tags": True,  # 생성 중 태그를 현재 태그 영역에 점진 표시
+            "weight_cache": True,  # 양자화/dtype 변환된 가중치를 디스크에 캐시 (재시작 시 로드 단축)
+            "weight_cache_upcast": False,  # 크기가 줄지 않는 dtype 변환도 캐시 (CPU float32 등, 원본보다 큰 사본)
             
             # 프롬프트 스타일/페르소나
             "prompt_style": "sentence_caption",
@@ -123,6 +134,7 @@ class LlavaSettingsModule:
             
             # 변종별 추가 옵션
             "multi_image_max": 4,
+            "pack_images": 0,  # 멀티이미지 모델: 한 프롬프트에 묶을 이미지 수 (0/1 = 끔)
             "image_aspect_policy": "auto"
         }
         
@@ -234,11 +246,13 @@ class LlavaSettingsModule:
                 # LLaVA-Interleave 전용 옵션 (멀티이미지 지원)
                 variant_fields = [
                     ("multi_image_max", "멀티 이미지 최대"),
+                    ("pack_images", "패킹 이미지 수 (0=끔)"),
                     ("image_aspect_policy", "이미지 정책"),
                 ]
             elif "next" in name or "1.6" in name:
-                # LLaVA-NeXT/1.6 전용 옵션 (이미지 정책만)
+                # LLaVA-NeXT/1.6 전용 옵션 (이미지 정책 + 멀티이미지 패킹)
                 variant_fields = [
+                    ("pack_images", "패킹 이미지 수 (0=끔)"),
                     ("image_aspect_policy", "이미지 정책"),
                 ]
             elif "vip" in name:
@@ -255,6 +269,17 @@ class LlavaSettingsModule:
             # 시스템 옵션 (모든 모델)
             system_fields = [
                 ("offload_policy", "오프로드 정책"),
+                ("batch_size", "배치 크기 (0=자동)"),
+                ("prefix_cache", "프롬프트 KV 캐시"),
+                ("prompt_before_image", "프롬프트 먼저"),
+                ("max_tags", "최대 태그 수 (0=무제한)"),
+                ("early_stop", "생성 조기 종료"),
+                ("tag_blacklist", "제외 태그"),
+                ("result_cache", "결과 캐시"),
+                ("result_cache_bypass", "캐시 우회"),
+                ("stream_tags", "생성 중 태그 표시"),
+                ("weight_cache", "변환 가중치 캐시"),
+                ("weight_cache_upcast", "업캐스트도 캐시"),
             ]
             
             return common_fields, advanced_fields, variant_fields, system_fields
@@ -515,7 +540,7 @@ class LlavaSettingsModule:
                             height: 0px;
                         }}
                     """)
-                elif field_key in ["use_flash_attention"]:
+                elif field_key in ["use_flash_attention", "prefix_cache", "prompt_before_image", "early_stop", "result_cache", "result_cache_bypass", "stream_tags", "weight_cache", "weight_cache_upcast"]:
                     # 커스텀 체크박스 클래스 정의
                     class CustomCheckBox(QCheckBox):
                         def __init__(self, parent=None):
@@ -572,7 +597,7 @@ class LlavaSettingsModule:
                     # 체크박스 필드
                     input_field = CustomCheckBox()
                     input_field.setChecked(bool(value))
-                elif field_key in ["top_k", "min_new_tokens", "no_repeat_ngram_size", "multi_image_max", "num_return_sequences", "seed"]:
+                elif field_key in ["top_k", "min_new_tokens", "no_repeat_ngram_size", "multi_image_max", "num_return_sequences", "seed", "max_tags", "pack_images"]:
                     # 정수 입력 필드
                     input_field = CustomSpinBox()
                     if field_key == "top_k":
@@ -593,6 +618,12 @@ class LlavaSettingsModule:
                     elif field_key == "seed":
                         input_field.setRange(-1, 2147483647)  # -1은 랜덤, 최대 int32
                         input_field.setValue(int(value) if value is not None else -1)
+                    elif field_key == "max_tags":
+                        input_field.setRange(0, 500)  # 0은 무제한
+                        input_field.setValue(int(value) if value is not None else 0)
+                    elif field_key == "pack_images":
+                        input_field.setRange(0, 8)  # 0/1은 끔
+                        input_field.setValue(int(value) if value is not None else 0)
                     input_field.setStyleSheet(f"""
                         QSpinBox {{
                             {common_input_style}
@@ -705,10 +736,14 @@ class LlavaSettingsModule:
                     else:
                         input_field.setCurrentText("auto")
                     input_field.setStyleSheet(common_combobox_style)
-                elif field_key in ["eos_token_id", "pad_token_id", "max_memory"]:
+                elif field_key in ["eos_token_id", "pad_token_id", "max_memory", "tag_blacklist"]:
                     # 토큰 ID나 메모리 설정 (텍스트 입력)
+                    if isinstance(value, list):
+                        value = ", ".join(str(v) for v in value)
                     input_field = QLineEdit(str(value) if value else "")
-                    if field_key == "max_memory":
+                    if field_key == "tag_blacklist":
+                        input_field.setPlaceholderText("쉼표로 구분 (예: text, watermark)")
+                    elif field_key == "max_memory":
                         input_field.setPlaceholderText("예: 8GB, 4096MB")
                     else:
                         input_field.setPlaceholderText("토큰 ID (숫자)")
@@ -783,12 +818,14 @@ class LlavaSettingsModule:
                 # 변종별 특수 필드
                 variant_keys = []
                 if "interleave" in name:
-                    variant_keys = ["multi_image_max", "image_aspect_policy"]
-                elif "next" in name or "1.6" in name or "vip" in name or "llama-3" in name or "llama3" in name:
+                    variant_keys = ["multi_image_max", "pack_images", "image_aspect_policy"]
+                elif "next" in name or "1.6" in name:
+                    variant_keys = ["pack_images", "image_aspect_policy"]
+                elif "vip" in name or "llama-3" in name or "llama3" in name:
                     variant_keys = ["image_aspect_policy"]
                 
                 # 시스템 필드
-                system_keys = ["offload_policy"]
+                system_keys = ["offload_policy", "batch_size", "prefix_cache", "prompt_before_image", "max_tags", "early_stop", "tag_blacklist", "result_cache", "result_cache_bypass", "stream_tags", "weight_cache", "weight_cache_upcast"]
                 
                 return common_keys + advanced_keys + variant_keys + system_keys
             
@@ -146,11 +146,7 @@ class VipLlavaTagger(LLaVATaggerModel):
             finished_callback=lambda: self.model_loading_finished.emit()
         )
         print(f"[DEBUG] ViP-LLaVA 진행률 콜백 설정 완료: {hasattr(self, 'model_loading_progress')}")
-        self.model = progress_capture.capture_loading_progress(
-            VipLlavaForConditionalGeneration.from_pretrained,
-            str(local_model_path),
-            **load_kwargs
-        )
+        self.model = self._from_pretrained_cached(VipLlavaForConditionalGeneration, local_model_path, load_kwargs, progress_capture)
         self.processor = AutoProcessor.from_pretrained(str(local_model_path), local_files_only=True)
 
         try:
@@ -373,6 +369,7 @@ class VipLlavaTaggerThread(QThread):
     model_loading_progress = Signal(str, int)
     model_loading_finished = Signal()
     tag_generated = Signal(str, list)
+    tags_partial = Signal(str, list)  # 생성 중 부분 태그
     finished = Signal()
     error_occurred = Signal(str)
 
@@ -392,6 +389,7 @@ class VipLlavaTaggerThread(QThread):
             self._tagger.model_loading_progress.connect(self.model_loading_progress)
             self._tagger.model_loading_finished.connect(self.model_loading_finished)
             self._tagger.tag_generated.connect(self.tag_generated)
+            self._tagger.tags_partial.connect(self.tags_partial)
             self._tagger.finished.connect(self.finished)
             self._tagger.error_occurred.connect(self.error_occurred)
             
@@ -400,10 +398,14 @@ class VipLlavaTaggerThread(QThread):
             # 태그 결과 수집
             tag_results = []
             
-            for i, p in enumerate(self.image_paths, 1):
-                tags = self._tagger.predict_tags(p)
-                tag_results.append(tags)
-                self.tag_generated.emit(p, tags)
+            # 다음 이미지들의 로드/전처리는 백그라운드에서 진행, 결과는 입력 순서대로 전달
+            for i, (p, tags, err) in enumerate(self._tagger.iter_predict(self.image_paths), 1):
+                if err is not None:
+                    self.error_occurred.emit(f"ViP-LLaVA 태깅 실패: {err}")
+                    tag_results.append([])
+                else:
+                    tag_results.append(tags)
+                    self.tag_generated.emit(p, tags)
                 self.progress_updated.emit(i, total)
             
             # 타임머신 로그 기록 (공통 함수 사용)
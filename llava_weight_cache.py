@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLaVA 변환 가중치 디스크 캐시 (앱 재시작마다 양자화/dtype 변환을 다시 하지 않음)
+- 경로: models/llava_weight_cache/<모델명>-<변환 설정 해시>/ (save_pretrained, safetensors)
+- manifest.json: 원본 지문(가중치/설정 파일 크기·mtime, config의 버전 정보) + 변환 설정 + 라이브러리 버전
+- 로드: manifest가 현재 원본/설정/라이브러리와 일치할 때만 캐시 폴더에서 from_pretrained
+  (safetensors는 메모리 맵으로 읽히고, bnb 양자화 가중치는 이미 양자화된 상태로 로드)
+- 저장: 변환이 실제로 일어난 경우만, 최초 로드 직후 임시 폴더에 저장 → manifest 기록 → 이름 변경
+- 자동 캐시 대상: 양자화, 또는 가중치가 작아지는 dtype 변환 (float32 → float16/bfloat16 등)
+  크기가 줄지 않는 변환(CPU 기본 float32 로 fp16/bf16 체크포인트 읽기 등)은 원본보다 큰 사본이 생기므로
+  allow_upcast(설정 weight_cache_upcast)일 때만 캐시
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+CACHE_DIRNAME = "llava_weight_cache"
+MANIFEST_FILENAME = "manifest.json"
+CACHE_VERSION = 1
+DISK_HEADROOM = 1.1  # 저장 전 여유 공간 확인 시 예상 크기에 곱할 배수
+SOURCE_PATTERNS = ("*.safetensors", "*.bin", "*.index.json", "config.json")
+DTYPE_BYTES = {
+    "float64": 8, "double": 8,
+    "float32": 4, "float": 4,
+    "float16": 2, "half": 2, "bfloat16": 2,
+    "int8": 1, "uint8": 1,
+}
+
+
+def _script_dir() -> Path:
+    return Path(__file__).resolve().parent
+
+
+def default_root() -> Path:
+    return _script_dir() / "models" / CACHE_DIRNAME
+
+
+def _dtype_name(dtype) -> Optional[str]:
+    if dtype is None:
+        return None
+    return str(dtype).replace("torch.", "")
+
+
+def conversion_settings(model_cls, load_kwargs: Dict) -> Dict:
+    """가중치 결과에 영향을 주는 로드 설정만 추림 (device_map/max_memory/attention 구현은 제외)"""
+    quant = load_kwargs.get("quantization_config")
+    if quant is not None and hasattr(quant, "to_dict"):
+        quant = quant.to_dict()
+    return {
+        "model_class": model_cls.__name__,
+        "torch_dtype": _dtype_name(load_kwargs.get("torch_dtype")),
+        "quantization_config": quant,
+    }
+
+
+def _library_versions() -> Dict:
+    """저장 형식에 영향을 주는 라이브러리 버전 (패키지 메타데이터만 읽음, import 하지 않음)"""
+    from importlib import metadata
+    versions = {}
+    for name in ("torch", "transformers", "bitsandbytes"):
+        try:
+            versions[name] = metadata.version(name)
+        except Exception:
+            versions[name] = None
+    return versions
+
+
+def source_fingerprint(source_dir: Path) -> Dict:
+    """원본 모델 폴더 지문: 가중치/설정 파일 (이름, 크기, mtime) + config.json의 버전 정보"""
+    source_dir = Path(source_dir)
+    files = {}
+    for pattern in SOURCE_PATTERNS:
+        for f in source_dir.glob(pattern):
+            if f.is_file():
+                st = f.stat()
+                files[f.name] = [st.st_size, st.st_mtime_ns]
+    revision = {}
+    try:
+        with (source_dir / "config.json").open("r", encoding="utf-8") as fp:
+            config = json.load(fp)
+        for key in ("_commit_hash", "_name_or_path", "transformers_version", "torch_dtype"):
+            if key in config:
+                revision[key] = config[key]
+    except Exception:
+        pass
+    return {"files": files, "revision": revision}
+
+
+def _source_dtype(source_dir: Path) -> Optional[str]:
+    try:
+        with (Path(source_dir) / "config.json").open("r", encoding="utf-8") as fp:
+            return json.load(fp).get("torch_dtype")
+    except Exception:
+        return None
+
+
+def needs_conversion(source_dir: Path, settings: Dict, allow_upcast: bool = False) -> bool:
+    """
+    캐시할 가치가 있는 변환인지: 양자화하거나 원본보다 작은 dtype으로 읽을 때.
+    원본과 다른 dtype이지만 크기가 줄지 않으면(업캐스트, 같은 크기, 원본 dtype 미상) allow_upcast 일 때만.
+    """
+    if settings.get("quantization_config"):
+        return True
+    target = settings.get("torch_dtype")
+    source = _source_dtype(source_dir)
+    if target is None or target == source:
+        return False
+    target_bytes = DTYPE_BYTES.get(target)
+    source_bytes = DTYPE_BYTES.get(source)
+    if target_bytes is not None and source_bytes is not None and target_bytes < source_bytes:
+        return True
+    return allow_upcast
+
+
+def cache_dir_for(source_dir: Path, settings: Dict, root: Optional[Path] = None) -> Path:
+    digest = hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+    return Path(root or default_root()) / f"{Path(source_dir).name}-{digest}"
+
+
+def _expected_manifest(source_dir: Path, settings: Dict) -> Dict:
+    return {
+        "version": CACHE_VERSION,
+        "source": source_fingerprint(source_dir),
+        "settings": json.loads(json.dumps(settings, default=str)),
+        "libraries": _library_versions(),
+    }
+
+
+def find_valid_cache(source_dir: Path, settings: Dict, root: Optional[Path] = None) -> Optional[Path]:
+    """현재 원본/설정/라이브러리와 일치하는 캐시 폴더 (없거나 오래됐으면 None, 오래된 캐시는 삭제)"""
+    target = cache_dir_for(source_dir, settings, root)
+    manifest_path = target / MANIFEST_FILENAME
+    if not manifest_path.is_file():
+        return None
+    try:
+        with manifest_path.open("r", encoding="utf-8") as fp:
+            manifest = json.load(fp)
+    except Exception as e:
+        print(f"⚠️ LLaVA 가중치 캐시 manifest 읽기 실패: {e}")
+        invalidate(target)
+        return None
+    expected = _expected_manifest(source_dir, settings)
+    stale = [key for key in ("version", "source", "settings", "libraries") if manifest.get(key) != expected[key]]
+    if stale:
+        print(f"🔄 LLaVA 가중치 캐시 무효 ({', '.join(stale)} 변경): {target.name}")
+        invalidate(target)
+        return None
+    return target
+
+
+def _model_bytes(model) -> int:
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def save_cache(model, source_dir: Path, settings: Dict, root: Optional[Path] = None) -> Optional[Path]:
+    """
+    변환된 모델을 캐시 폴더에 저장 (실패해도 모델 사용에는 영향 없음).
+    - 디스크/메타 디바이스로 오프로드된 모듈이 있으면 전체 가중치를 저장할 수 없어 건너뜀
+    - 여유 공간이 모델 크기 × DISK_HEADROOM 보다 적으면 건너뜀
+    """
+    target = cache_dir_for(source_dir, settings, root)
+    device_map = getattr(model, "hf_device_map", None) or {}
+    if any(str(device) in ("disk", "meta") for device in device_map.values()):
+        print("ℹ️ LLaVA 가중치 캐시 건너뜀: 디스크 오프로드된 모듈 있음")
+        return None
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        needed = int(_model_bytes(model) * DISK_HEADROOM)
+        free = shutil.disk_usage(target.parent).free
+        if free < needed:
+            print(f"⚠️ LLaVA 가중치 캐시 건너뜀: 디스크 여유 {free / 1024**3:.1f}GB < 필요 {needed / 1024**3:.1f}GB")
+            return None
+    except Exception:
+        pass
+
+    tmp = target.with_name(target.name + ".tmp")
+    start = time.time()
+    try:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+        model.save_pretrained(str(tmp), safe_serialization=True)
+        with (tmp / MANIFEST_FILENAME).open("w", encoding="utf-8") as fp:
+            json.dump(_expected_manifest(source_dir, settings), fp, ensure_ascii=False, indent=2)
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+    except Exception as e:
+        print(f"⚠️ LLaVA 가중치 캐시 저장 실패: {e}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        return None
+    print(f"💾 LLaVA 변환 가중치 캐시 저장 ({time.time() - start:.1f}s): {target}")
+    return target
+
+
+def invalidate(target: Path):
+    """캐시 폴더 삭제"""
+    shutil.rmtree(target, ignore_errors=True)
+
+
+def clear_cache(root: Optional[Path] = None):
+    """가중치 캐시 전체 삭제"""
+    root = Path(root or default_root())
+    shutil.rmtree(root, ignore_errors=True)
+    print(f"🗑️ LLaVA 가중치 캐시 삭제: {root}")
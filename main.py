@@ -11,6 +11,11 @@ import os
 import sys
 import traceback
 from pathlib import Path
+
+# 시작 시간 측정 (--startup-profile / AI_TAGGER_STARTUP_PROFILE=1 일 때만, 이후 import 비용 기록)
+import startup_profiler
+startup_profiler.enable_if_requested()
+
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
@@ -121,8 +126,11 @@ class CustomComboBox(QComboBox):
         painter.setPen(QPen(QColor("#E2E8F0")))
         painter.setFont(QFont("Segoe UI", 7, QFont.Bold))
         painter.drawText(arrow_rect, Qt.AlignCenter, "▼")
-from wd_tagger import WdTaggerThread, get_global_tagger, check_gpu_availability
-from llava_captioner_module import LLaVATaggerThread
+# wd_tagger/llava_captioner_module(onnxruntime, torch, transformers)은 태깅/모델 미리 로드 시점에 import
+
+# all_tags 저장소 (태그 역색인) / 증분 전체 태그 통계
+from tag_store import TagStore
+from global_tag_manager import GlobalTagStats
 
 # Danbooru 모듈 임포트 (선택적)
 try:
@@ -235,17 +243,59 @@ class ModernButton(QPushButton):
 
 
 class AIImageTagger(QMainWindow):
+    @property
+    def all_tags(self):
+        """{image_path: [tags]} - 태그 역색인을 유지하는 TagStore"""
+        return self._all_tags
+
+    @all_tags.setter
+    def all_tags(self, value):
+        # 일반 dict 대입(되돌리기/프로젝트 로드 등)도 같은 TagStore 의 내용 교체로 처리 → 인덱스와 리스너 유지
+        store = getattr(self, '_all_tags', None)
+        if store is None:
+            self._all_tags = value if isinstance(value, TagStore) else TagStore(value or {})
+        elif value is not store:
+            store.reset(value or {})
+
+    @property
+    def image_removed_tags(self):
+        """{image_path: [removed_tags]} - 리무버 태그도 TagStore (검색 색인이 변경을 따라감)"""
+        return self._image_removed_tags
+
+    @image_removed_tags.setter
+    def image_removed_tags(self, value):
+        store = getattr(self, '_image_removed_tags', None)
+        if store is None:
+            self._image_removed_tags = value if isinstance(value, TagStore) else TagStore(value or {})
+        elif value is not store:
+            store.reset(value or {})
+
+    @property
+    def global_tag_stats(self):
+        """{tag: {'image_count', 'category'}} - all_tags 변경을 따라 증분 갱신되는 GlobalTagStats"""
+        return self._global_tag_stats
+
+    @global_tag_stats.setter
+    def global_tag_stats(self, value):
+        # 스냅샷/프로젝트 대입은 카테고리만 가져오고 이미지 수는 all_tags 기준으로 다시 계산
+        stats = getattr(self, '_global_tag_stats', None)
+        if stats is None:
+            self._global_tag_stats = value if isinstance(value, GlobalTagStats) else GlobalTagStats(value or {})
+            self._global_tag_stats.attach(self.all_tags)
+        elif value is not stats:
+            stats.load(value)
+
     def __init__(self):
         super().__init__()
         self.current_image = None
         self.current_tags = []
         self.removed_tags = []  # 현재 이미지에서 취소된 태그들
-        self.all_tags = {}  # {image_path: [tags]}
-        self.image_removed_tags = {}  # {image_path: [removed_tags]} - 각 이미지별 취소된 태그
+        self.all_tags = TagStore()  # {image_path: [tags]}
+        self.image_removed_tags = TagStore()  # {image_path: [removed_tags]} - 각 이미지별 취소된 태그
         self.image_files = []
         self.current_folder = None
         self.wd_tagger_thread = None
-        self.global_tag_stats = {}  # {tag: count} - 전체 태그 통계
+        self.global_tag_stats = GlobalTagStats()  # {tag: {'image_count', 'category'}} - 전체 태그 통계
         self.tag_confidence = {}  # {image_path: [(tag, score), ...]} - 신뢰도 정보
         self.manual_tag_info = {}  # {tag: is_trigger} - 수동 입력 태그의 트리거 여부
         self.llava_tag_info = {}  # {tag: True} - LLaVA 태그 정보
@@ -1124,6 +1174,7 @@ class AIImageTagger(QMainWindow):
                 self.llava_tagger_thread.model_loading_progress.connect(self.on_llava_model_loading_progress)
                 self.llava_tagger_thread.model_loading_finished.connect(self.on_llava_model_loading_finished)
                 self.llava_tagger_thread.tag_generated.connect(self.on_ai_tag_generated)
+                self.llava_tagger_thread.tags_partial.connect(self.on_llava_tags_partial)
                 self.llava_tagger_thread.finished.connect(self.on_ai_finished)
                 self.llava_tagger_thread.error_occurred.connect(self.on_ai_error)
                 self.llava_tagger_thread.start()
@@ -1134,10 +1185,11 @@ class AIImageTagger(QMainWindow):
 # WD Tagger 모델인 경우
             print("WD Tagger 모델로 태깅 시작")
             self.statusBar().showMessage("WD Tagger 모델 로드 중...")
+            from wd_tagger import DEFAULT_EXCLUDE_TAGS, WdTaggerThread, get_tagger_config_value
             self.wd_tagger_thread = WdTaggerThread(
                 image_paths=image_paths,
                 model_id=self.current_model_id,
-                exclude_tags=["rating:general", "rating:sensitive", "rating:questionable", "rating:explicit"],
+                exclude_tags=get_tagger_config_value("exclude_tags", DEFAULT_EXCLUDE_TAGS),
                 use_gpu=self.use_gpu
             )
             
@@ -1200,11 +1252,39 @@ class AIImageTagger(QMainWindow):
         self.ai_progress_bar.setMaximum(total)  # 태깅 시에는 total 개수로 설정
         self.ai_progress_bar.setValue(current)
     
+    def on_llava_tags_partial(self, image_path, tags_with_scores):
+        """LLaVA 생성 중 부분 태그 (최신 값만 보관, 타이머로 묶어서 표시)"""
+        if not hasattr(self, 'llava_partial_tags'):
+            self.llava_partial_tags = {}
+        self.llava_partial_tags[image_path] = [tag for tag, score in tags_with_scores]
+        
+        # 시그널마다 다시 그리지 않고 200ms마다 한 번만 갱신 (이벤트 루프 범람 방지)
+        if not hasattr(self, 'llava_partial_timer'):
+            self.llava_partial_timer = QTimer(self)
+            self.llava_partial_timer.setSingleShot(True)
+            self.llava_partial_timer.setInterval(200)
+            self.llava_partial_timer.timeout.connect(self.flush_llava_partial_tags)
+        if not self.llava_partial_timer.isActive():
+            self.llava_partial_timer.start()
+    
+    def flush_llava_partial_tags(self):
+        """현재 이미지의 부분 태그를 미리보기 줄에 표시 (읽기 전용 라벨, 태그 버튼/데이터는 건드리지 않음)"""
+        partial = getattr(self, 'llava_partial_tags', {}).get(self.current_image)
+        if not partial:
+            return
+        from image_tagging_module import update_llava_partial_preview
+        update_llava_partial_preview(self)
+        self.statusBar().showMessage(f"LLaVA 생성 중: {Path(self.current_image).name} ({len(partial)}개 태그)")
+    
     def on_ai_tag_generated(self, image_path, tags_with_scores):
         """AI 태그 생성 완료 (신뢰도 포함)"""
         # tags_with_scores는 [(tag, score), (tag, score), ...] 형태
         print(f"AI 태그 생성 완료: {Path(image_path).name}, 태그 수: {len(tags_with_scores)}")
         
+        # 생성 중 부분 태그 미리보기 종료 (아래에서 확정 태그로 다시 표시)
+        if hasattr(self, 'llava_partial_tags'):
+            self.llava_partial_tags.pop(image_path, None)
+        
         # 디버깅: 함수 시작 시 기존 태그 상태 확인
         print("[DBG] BEFORE", len(self.all_tags.get(image_path, [])), self.all_tags.get(image_path, []))
         
@@ -1297,6 +1377,14 @@ class AIImageTagger(QMainWindow):
         self.ai_progress_label.hide()
         self.ai_progress_bar.hide()
         
+        # 남은 부분 태그 미리보기 정리 (오류로 확정되지 않은 이미지)
+        if hasattr(self, 'llava_partial_tags'):
+            had_current = self.current_image in self.llava_partial_tags
+            self.llava_partial_tags.clear()
+            if had_current:
+                from image_tagging_module import update_llava_partial_preview
+                update_llava_partial_preview(self)
+        
         # 일괄 태깅이 완료되면 필터를 한 번만 업데이트
         if self.batch_tagging_in_progress:
             print("일괄 태깅 완료, 필터 업데이트")
@@ -1347,6 +1435,7 @@ class AIImageTagger(QMainWindow):
         def load_model_async():
             try:
                 print("모델 미리 로드 시작...")
+                from wd_tagger import get_global_tagger
                 get_global_tagger(self.current_model_id, use_gpu=self.use_gpu)
                 print("모델 미리 로드 완료!")
                 self.statusBar().showMessage("AI 모델 로드 완료 - 태깅 준비됨")
@@ -1370,6 +1459,14 @@ class AIImageTagger(QMainWindow):
     
     def closeEvent(self, event):
         """프로그램 종료 시 호출되는 이벤트"""
+        # 진행 중인 WD 태깅 취소 (워커 프로세스 풀은 daemon 이라 함께 종료됨)
+        try:
+            if getattr(self, 'wd_tagger_thread', None) is not None and self.wd_tagger_thread.isRunning():
+                self.wd_tagger_thread.stop()
+                self.wd_tagger_thread.wait(5000)
+        except Exception as e:
+            print(f"⚠️ 프로그램 종료 시 WD 태깅 취소 실패: {e}")
+
         # plugins/ffmpeg/images 폴더 비우기
         try:
             if hasattr(self, 'video_frame_module') and self.video_frame_module:
@@ -1387,6 +1484,7 @@ class AIImageTagger(QMainWindow):
 
 
 def main():
+    startup_profiler.mark("모듈 import 완료")
     app = QApplication(sys.argv)
     app.setStyle("Windows")
     
@@ -1394,11 +1492,16 @@ def main():
     font = app.font()
     font.setFamily("Segoe UI")
     app.setFont(font)
+    startup_profiler.mark("QApplication 생성")
     
     window = AIImageTagger()
+    startup_profiler.mark("메인 창 생성")
+    startup_profiler.watch_first_paint(window)
     window.show()
     
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # WD 워커 프로세스(spawn) - 패키징된 실행 파일 대응
     main()
\ No newline at end of file
@@ -611,30 +611,21 @@ def apply_tags_to_multiple_images(miracle_input_widget, image_paths, add_tags, d
                 #     except Exception:
                 #         pass
                 
-                # global_tag_stats 업데이트 (추가된 태그만)
+                # global_tag_stats: 이미지 수는 위 set_tags_for_image 로 자동 갱신됨 → 새 태그의 카테고리만 기록
+                from global_tag_manager import set_tag_category
                 for tag in image_add_tags:
-                    if tag in miracle_input_widget.app_instance.global_tag_stats:
-                        current_value = miracle_input_widget.app_instance.global_tag_stats[tag]
-                        if isinstance(current_value, dict):
-                            miracle_input_widget.app_instance.global_tag_stats[tag]['image_count'] += 1
-                        else:
-                            miracle_input_widget.app_instance.global_tag_stats[tag] += 1
-                    else:
-                        # 새로운 태그 추가 시 카테고리 정보 가져오기
-                        if miracle_input_widget.app_instance.global_tag_stats and isinstance(next(iter(miracle_input_widget.app_instance.global_tag_stats.values())), dict):
-                            try:
-                                from danbooru_module import get_danbooru_category
-                                category = get_danbooru_category(tag)
-                                if category:
-                                    miracle_input_widget.app_instance.global_tag_stats[tag] = {'image_count': 1, 'category': category}
-                                    print(f"✨ Miracle Manager Batch: 태그 카테고리 설정 - {tag} → {category} (danbooru)")
-                                else:
-                                    miracle_input_widget.app_instance.global_tag_stats[tag] = {'image_count': 1, 'category': 'unknown'}
-                                    print(f"✨ Miracle Manager Batch: 태그 카테고리 설정 - {tag} → unknown")
-                            except ImportError:
-                                miracle_input_widget.app_instance.global_tag_stats[tag] = {'image_count': 1, 'category': 'unknown'}
-                        else:
-                            miracle_input_widget.app_instance.global_tag_stats[tag] = 1
+                    stat_entry = miracle_input_widget.app_instance.global_tag_stats.get(tag)
+                    if not isinstance(stat_entry, dict) or stat_entry.get('category', 'unknown') == 'unknown':
+                        try:
+                            from danbooru_module import get_danbooru_category
+                            category = get_danbooru_category(tag)
+                            if category:
+                                set_tag_category(miracle_input_widget.app_instance, tag, category)
+                                print(f"✨ Miracle Manager Batch: 태그 카테고리 설정 - {tag} → {category} (danbooru)")
+                            else:
+                                print(f"✨ Miracle Manager Batch: 태그 카테고리 설정 - {tag} → unknown")
+                        except ImportError:
+                            pass
                     
                     # manual_tag_info에 추가 (미라클로 추가된 태그는 used로 표시)
                     if not hasattr(miracle_input_widget.app_instance, 'manual_tag_info'):
@@ -654,14 +645,8 @@ def apply_tags_to_multiple_images(miracle_input_widget, image_paths, add_tags, d
                     
                     print(f"✨ Miracle Manager Batch: 태그 추가 - {tag} (이미지 {i})")
                 
-                # global_tag_stats 업데이트 (삭제된 태그만)
+                # 삭제된 태그의 이미지 수는 set_tags_for_image 로 자동 감소
                 for tag in image_dilet_tags:
-                    if tag in miracle_input_widget.app_instance.global_tag_stats:
-                        current_value = miracle_input_widget.app_instance.global_tag_stats[tag]
-                        if isinstance(current_value, dict):
-                            # 글로벌 태그 관리 플러그인 사용
-                            from global_tag_manager import remove_global_tag
-                            remove_global_tag(miracle_input_widget.app_instance, tag)
                     print(f"✨ Miracle Manager Batch: 태그 삭제 - {tag} (이미지 {i})")
                 
                 print(f"✨ Miracle Manager Batch: 이미지 {i} 태그 적용 완료 - add: {len(image_add_tags)}개, dilet: {len(image_dilet_tags)}개")
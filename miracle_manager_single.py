@@ -607,6 +607,7 @@ def apply_tag_moves(miracle_input_widget, tag_moves):
         
         # all_tags에 저장 (배치 모드와 동일)
         miracle_input_widget.app_instance.all_tags[actual_image_path] = current_tags
+        current_tags = miracle_input_widget.app_instance.all_tags[actual_image_path]
         print(f"✨ Miracle Manager Single: 태그 위치 조작 완료 - 새로운 순서: {current_tags}")
 
         # 타임머신 로그는 apply_miracle_tags_to_ui에서 통합 처리됨
@@ -1052,34 +1053,16 @@ def apply_miracle_tags_to_ui(miracle_input_widget, result):
                     current_tags.append(tag)
                     print(f"✨ Miracle Manager Single: 태그 추가 - {tag}")
                     
-                    # global_tag_stats 업데이트
+                    # global_tag_stats: 카테고리만 기록 (이미지 수는 all_tags 저장 시 자동 갱신)
                     if tag not in miracle_input_widget.app_instance.global_tag_stats:
                         try:
                             from danbooru_module import get_danbooru_category
+                            from global_tag_manager import set_tag_category
                             category = get_danbooru_category(tag)
                             if category:
-                                miracle_input_widget.app_instance.global_tag_stats[tag] = {
-                                    'image_count': 0,
-                                    'category': category
-                                }
-                            else:
-                                miracle_input_widget.app_instance.global_tag_stats[tag] = {
-                                    'image_count': 0,
-                                    'category': 'unknown'
-                                }
+                                set_tag_category(miracle_input_widget.app_instance, tag, category)
                         except ImportError:
-                            miracle_input_widget.app_instance.global_tag_stats[tag] = {
-                                'image_count': 0,
-                                'category': 'unknown'
-                            }
-                    
-                    # global_tag_stats 카운트 증가
-                    if isinstance(miracle_input_widget.app_instance.global_tag_stats.get(tag), dict):
-                        miracle_input_widget.app_instance.global_tag_stats[tag]['image_count'] += 1
-                    elif tag in miracle_input_widget.app_instance.global_tag_stats:
-                        miracle_input_widget.app_instance.global_tag_stats[tag] += 1
-                    else:
-                        miracle_input_widget.app_instance.global_tag_stats[tag] = 1
+                            pass
                     
                     # manual_tag_info 업데이트
                     if hasattr(miracle_input_widget.app_instance, 'manual_tag_info'):
@@ -1127,6 +1110,7 @@ def apply_miracle_tags_to_ui(miracle_input_widget, result):
                     miracle_input_widget.app_instance.current_tags = current_tags
             else:
                 miracle_input_widget.app_instance.image_removed_tags[actual_image_path] = removed_list
+                removed_list = miracle_input_widget.app_instance.image_removed_tags[actual_image_path]
                 # 현재 표시 이미지면 UI 반영
                 if actual_image_path == miracle_input_widget.app_instance.current_image:
                     miracle_input_widget.app_instance.removed_tags = removed_list
@@ -1221,44 +1205,24 @@ def apply_tags_to_single_image(miracle_input_widget, image_path, add_tags, dilet
         # 타임머신 로그는 apply_miracle_tags_to_ui에서 통합 처리됨
 
         for tag in add_tags:
-            # 태그 추가 전에 global_tag_stats에 카테고리 정보 설정
+            # 태그 추가 전에 global_tag_stats에 카테고리 정보 설정 (이미지 수는 all_tags 저장 시 자동 갱신)
             if tag not in miracle_input_widget.app_instance.global_tag_stats:
                 try:
                     from danbooru_module import get_danbooru_category
+                    from global_tag_manager import set_tag_category
                     category = get_danbooru_category(tag)
                     if category:
-                        # 카테고리 정보가 있으면 딕셔너리 형태로 저장 (danbooru 카테고리)
-                        miracle_input_widget.app_instance.global_tag_stats[tag] = {
-                            'image_count': 0,
-                            'category': category
-                        }
+                        set_tag_category(miracle_input_widget.app_instance, tag, category)
                         print(f"✨ Miracle Manager Single: 태그 카테고리 설정 - {tag} → {category} (danbooru)")
                     else:
-                        # 카테고리 정보가 없으면 unknown으로 설정
-                        miracle_input_widget.app_instance.global_tag_stats[tag] = {
-                            'image_count': 0,
-                            'category': 'unknown'
-                        }
                         print(f"✨ Miracle Manager Single: 태그 카테고리 설정 - {tag} → unknown")
                 except ImportError:
-                    # danbooru_module을 임포트할 수 없으면 unknown으로 설정
-                    miracle_input_widget.app_instance.global_tag_stats[tag] = {
-                        'image_count': 0,
-                        'category': 'unknown'
-                    }
+                    pass
             
             # all_tags에 직접 추가 (배치 로직과 동일)
             if tag not in current_tags:
                 current_tags.append(tag)
                 print(f"✨ Miracle Manager Single: 태그 추가 - {tag}")
-                
-                # global_tag_stats 업데이트
-                if isinstance(miracle_input_widget.app_instance.global_tag_stats.get(tag), dict):
-                    miracle_input_widget.app_instance.global_tag_stats[tag]['image_count'] += 1
-                elif tag in miracle_input_widget.app_instance.global_tag_stats:
-                    miracle_input_widget.app_instance.global_tag_stats[tag] += 1
-                else:
-                    miracle_input_widget.app_instance.global_tag_stats[tag] = 1
             
             # 태그 통계 모듈의 캐시 업데이트 (기존 캐시가 없는 경우에만 used로 설정)
             if hasattr(miracle_input_widget.app_instance, 'tag_statistics_module'):
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+n-gram(2/3-gram) 역색인: 부분 문자열/와일드카드 검색 후보 좁히기
+- 키(태그명 등)마다 텍스트를 casefold 한 뒤 2-gram, 3-gram 을 뽑아 gram → 키 id 목록(array) 으로 보관
+- 검색어의 리터럴 조각(wildcard_plugin CompiledQuery.fragments)을 같은 방식으로 쪼개 postings 교집합
+  → 후보는 항상 실제 일치 집합을 포함 (최종 판정은 호출하는 쪽의 정확 검사)
+- 한글: 코드 포인트 단위라 음절 하나가 한 글자 → 두 음절 검색어("머리")도 2-gram 으로 좁혀짐
+  비 ASCII 문자는 1-gram 도 색인 → 한 음절 검색어("머")도 후보를 좁힘 (ASCII 한 글자는 전체 확인)
+- fold 규칙: lower() → casefold() → _FOLD_FIXES (ı, İ → i, 결합 점 U+0307 삭제)
+  → 정규식 IGNORECASE 가 같게 보는 두 문자는 fold 후 같은 문자열 (ſ/s, ς/σ, K/k(켈빈) 는 casefold 가 합침)
+  → 규칙을 바꾸면 IGNORECASE 와 어긋나는 문자가 후보에서 빠질 수 있음 (누락 = 검색 결과 누락)
+- 키 id 는 한 번 부여되면 유지 (TagStore 태그 id 와 같은 방식), 사라진 키는 alive 에서만 빠짐
+  → 다시 나타난 키는 색인 비용 없음, postings 는 항상 id 오름차순으로 append 만 함
+"""
+
+from array import array
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+GRAM_SIZES = (2, 3)
+NARROW_ENOUGH = 32  # 후보가 이만큼 줄면 남은 postings 교집합은 생략 (정확 검사가 더 쌈)
+
+# casefold 로 합쳐지지 않지만 re.IGNORECASE 에서는 같은 문자 (i/ı/İ)
+# - ı 는 정규식에서 i 와 일치 → i 로 접음
+# - İ 는 lower() 후 i + U+0307(결합 점)이 되고 정규식의 İ 는 i 와 일치 → 결합 점은 지움
+# (양쪽에서 같은 문자를 바꾸거나 지우는 것이라 부분 문자열 관계는 유지됨)
+_FOLD_FIXES = {0x0131: 'i', 0x0130: 'i', 0x0307: None}
+
+
+def fold(text: str) -> str:
+    """색인/검색 공통 정규화 (소문자 검색 의미 + 정규식 IGNORECASE 가 같게 보는 문자 통일)"""
+    return text.lower().casefold().translate(_FOLD_FIXES)
+
+
+def _unigrams(text: str) -> Set[str]:
+    return {ch for ch in text if ord(ch) > 127}
+
+
+def text_grams(text: str, sizes: Tuple[int, ...] = GRAM_SIZES) -> Set[str]:
+    """텍스트(fold 된)에 들어 있는 모든 색인 gram"""
+    grams = _unigrams(text)
+    for n in sizes:
+        grams.update(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def query_grams(fragment: str, sizes: Tuple[int, ...] = GRAM_SIZES) -> Optional[Set[str]]:
+    """조각(fold 된)을 포함하는 텍스트라면 반드시 가진 gram (조각이 너무 짧아 못 좁히면 None)"""
+    fitting = [n for n in sizes if n <= len(fragment)]
+    if fitting:
+        n = max(fitting)
+        return {fragment[i:i + n] for i in range(len(fragment) - n + 1)}
+    if len(fragment) == 1 and ord(fragment) > 127:
+        return {fragment}
+    return None
+
+
+def query_fragments(query: str) -> Tuple[str, ...]:
+    """match_or_contains 검색어 → 일치 텍스트에 반드시 들어 있는 조각 (와일드카드 플러그인이 없으면 검색어 자체)"""
+    try:
+        import wildcard_plugin as _wc
+    except Exception:
+        _wc = None
+    if _wc is None:
+        q = (query or '').strip().lower()
+        return (q,) if q else ()
+    compiled = _wc.compile_query(query)
+    return compiled.fragments if compiled is not None else ()
+
+
+class NgramIndex:
+    """키 → 텍스트 n-gram 역색인 (키의 텍스트는 처음 추가할 때 고정)"""
+
+    def __init__(self, sizes: Tuple[int, ...] = GRAM_SIZES):
+        self.sizes = tuple(sizes)
+        self._ids: Dict[Hashable, int] = {}
+        self._keys: List[Hashable] = []
+        self._postings: Dict[str, array] = {}  # gram → 키 id 배열 (오름차순, 중복 없음)
+        self._alive: Set[int] = set()
+
+    def __len__(self):
+        return len(self._alive)
+
+    def __contains__(self, key):
+        kid = self._ids.get(key)
+        return kid is not None and kid in self._alive
+
+    def add(self, key, text: Optional[str] = None):
+        """key 추가 (text 생략 시 str(key) 를 색인)"""
+        kid = self._ids.get(key)
+        if kid is None:
+            kid = len(self._keys)
+            self._ids[key] = kid
+            self._keys.append(key)
+            postings = self._postings
+            for gram in text_grams(fold(str(key) if text is None else text), self.sizes):
+                ids = postings.get(gram)
+                if ids is None:
+                    postings[gram] = array('I', (kid,))
+                else:
+                    ids.append(kid)
+        self._alive.add(kid)
+
+    def update(self, keys: Iterable):
+        for key in keys:
+            self.add(key)
+
+    def discard(self, key):
+        kid = self._ids.get(key)
+        if kid is not None:
+            self._alive.discard(kid)
+
+    def clear(self):
+        self._ids.clear()
+        self._keys.clear()
+        self._postings.clear()
+        self._alive.clear()
+
+    def candidates(self, fragments: Iterable[str]) -> Optional[List]:
+        """모든 조각을 포함할 수 있는 살아있는 키 목록 (어떤 조각으로도 못 좁히면 None = 전체 확인)"""
+        grams: Set[str] = set()
+        for fragment in fragments:
+            found = query_grams(fold(fragment), self.sizes)
+            if found:
+                grams |= found
+        if not grams:
+            return None
+        postings = []
+        for gram in grams:
+            ids = self._postings.get(gram)
+            if ids is None:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            if len(result) <= NARROW_ENOUGH:
+                break
+            result.intersection_update(ids)
+            if not result:
+                return []
+        alive, keys = self._alive, self._keys
+        return [keys[kid] for kid in result if kid in alive]
+
+    def candidates_for_query(self, query: str) -> Optional[List]:
+        """match_or_contains 검색어의 후보 키 (None = 좁힐 수 없음)"""
+        return self.candidates(query_fragments(query))
+
@@ -26,40 +26,9 @@ except:
     CustomComboBox = QComboBox
 
 
-def _search_by_tag_position(tags, search_text):
-    """태그 순서 기반 검색"""
-    if not tags or not search_text:
-        return False
-    
-    # "1:solo" 형태의 검색 (N번째 태그)
-    if ':' in search_text:
-        try:
-            position_str, tag_name = search_text.split(':', 1)
-            position = int(position_str.strip()) - 1  # 1-based to 0-based
-            tag_name = tag_name.strip().lower()
-            
-            if 0 <= position < len(tags):
-                return tag_name in tags[position].lower()
-        except (ValueError, IndexError):
-            pass
-    
-    # "solo:pokemon" 형태의 검색 (태그 A가 태그 B보다 앞에 있는지)
-    if ':' in search_text:
-        try:
-            tag_a, tag_b = search_text.split(':', 1)
-            tag_a = tag_a.strip().lower()
-            tag_b = tag_b.strip().lower()
-            
-            # 두 태그 모두 존재하는지 확인
-            if tag_a in [tag.lower() for tag in tags] and tag_b in [tag.lower() for tag in tags]:
-                # 태그 A의 위치가 태그 B보다 앞에 있는지 확인
-                pos_a = next(i for i, tag in enumerate(tags) if tag.lower() == tag_a)
-                pos_b = next(i for i, tag in enumerate(tags) if tag.lower() == tag_b)
-                return pos_a < pos_b
-        except (ValueError, StopIteration):
-            pass
-    
-    return False
+# 태그 순서 검색 규칙은 검색 색인 모듈과 공유
+from tag_search_index import TAG_MODES, get_search_index, match_tag_position as _search_by_tag_position
+
 
 def create_search_widget(app_instance):
     """검색 위젯 생성 (검색창만)"""
@@ -345,128 +314,30 @@ def on_search_text_changed(app_instance, text):
             # 이미지 모드: 이미지 파일 목록 사용
             search_target = getattr(app_instance, 'original_image_files', app_instance.image_files)
         
+        # 태그 검색 모드: 증분 유지되는 역색인에서 고유 태그 어휘만 매칭해 경로 집합을 한 번에 구함
+        # (이미지마다 태그를 순회하지 않음, 비디오 모드는 태그 검색 없음)
+        tag_hits = set()
+        if not is_video_mode and (search_type == "전체" or search_type in TAG_MODES):
+            try:
+                index = get_search_index(app_instance)
+                tag_hits = index.search(search_lower, "활성 태그" if search_type == "전체" else search_type)
+            except Exception as e:
+                print(f"{search_type} 검색 중 오류: {e}")
+        
+        match_name = search_type in ("전체", "파일명")
+        name_query = _wc.compile_query(search_lower) if (_wc and match_name) else None  # 파일마다 다시 컴파일하지 않음
         for media_path in search_target:
             match_found = False
             
-            if search_type == "전체":
-                # 1. 파일명 검색
+            # 파일명 검색 ("전체"/"파일명")
+            if match_name:
                 media_name = media_path.name.lower()
-                if (_wc and _wc.match_or_contains(media_name, search_lower)) or (not _wc and search_lower in media_name):
+                if (name_query and name_query.matches(media_name)) or (not _wc and search_lower in media_name):
                     match_found = True
-                
-                # 2. 태그 검색 (이미지 모드에서만, 파일명에서 매칭되지 않은 경우에만)
-                if not match_found and not is_video_mode:
-                    try:
-                        media_key = str(media_path)
-                        from all_tags_manager import get_tags_for_image
-                        media_tags = get_tags_for_image(app_instance, media_key)
-                        if media_tags:
-                            for tag in media_tags:
-                                tag_l = tag.lower()
-                                if (_wc and _wc.match_or_contains(tag_l, search_lower)) or (not _wc and search_lower in tag_l):
-                                    match_found = True
-                                    break
-                    except Exception as e:
-                        print(f"태그 검색 중 오류: {e}")
-                        
-            elif search_type == "파일명":
-                # 파일명만 검색
-                media_name = media_path.name.lower()
-                if (_wc and _wc.match_or_contains(media_name, search_lower)) or (not _wc and search_lower in media_name):
-                    match_found = True
-                    
-            elif search_type == "전체 태그" and not is_video_mode:
-                # 해당 이미지의 모든 태그 검색 (활성 + 리무버 태그)
-                try:
-                    media_key = str(media_path)
-                    all_media_tags = []
-                    
-                    # 활성 태그 추가 - all_tags 관리 플러그인 사용
-                    from all_tags_manager import get_tags_for_image
-                    media_tags = get_tags_for_image(app_instance, media_key)
-                    if media_tags:
-                        all_media_tags.extend(media_tags)
-                    
-                    # 리무버 태그 추가
-                    if hasattr(app_instance, 'image_removed_tags') and media_key in app_instance.image_removed_tags:
-                        all_media_tags.extend(app_instance.image_removed_tags[media_key])
-                    
-                    # 모든 태그에서 검색
-                    for tag in all_media_tags:
-                        tag_l = tag.lower()
-                        if (_wc and _wc.match_or_contains(tag_l, search_lower)) or (not _wc and search_lower in tag_l):
-                            match_found = True
-                            break
-                except Exception as e:
-                    print(f"전체 태그 검색 중 오류: {e}")
-                    
-            elif search_type == "활성 태그" and not is_video_mode:
-                # 해당 이미지의 활성화된 태그만 검색 (all_tags에서)
-                try:
-                    media_key = str(media_path)
-                    from all_tags_manager import get_tags_for_image
-                    media_tags = get_tags_for_image(app_instance, media_key)
-                    if media_tags:
-                        for tag in media_tags:
-                            tag_l = tag.lower()
-                            if (_wc and _wc.match_or_contains(tag_l, search_lower)) or (not _wc and search_lower in tag_l):
-                                match_found = True
-                                break
-                except Exception as e:
-                    print(f"활성 태그 검색 중 오류: {e}")
-                    
-            elif search_type == "리무버 태그" and not is_video_mode:
-                # 해당 이미지의 비활성화된 태그만 검색 (image_removed_tags에서)
-                try:
-                    media_key = str(media_path)
-                    if hasattr(app_instance, 'image_removed_tags') and media_key in app_instance.image_removed_tags:
-                        removed_tags = app_instance.image_removed_tags[media_key]
-                        for tag in removed_tags:
-                            tag_l = tag.lower()
-                            if (_wc and _wc.match_or_contains(tag_l, search_lower)) or (not _wc and search_lower in tag_l):
-                                match_found = True
-                                break
-                except Exception as e:
-                    print(f"리무버 태그 검색 중 오류: {e}")
-                    
-            elif search_type == "첫 번째 태그" and not is_video_mode:
-                # 첫 번째 태그로 검색
-                try:
-                    media_key = str(media_path)
-                    from all_tags_manager import get_tags_for_image
-                    media_tags = get_tags_for_image(app_instance, media_key)
-                    if media_tags:
-                        first_tag = media_tags[0]
-                        first_l = first_tag.lower()
-                        if (_wc and _wc.match_or_contains(first_l, search_lower)) or (not _wc and search_lower in first_l):
-                            match_found = True
-                except Exception as e:
-                    print(f"첫 번째 태그 검색 중 오류: {e}")
-                    
-            elif search_type == "마지막 태그" and not is_video_mode:
-                # 마지막 태그로 검색
-                try:
-                    media_key = str(media_path)
-                    from all_tags_manager import get_tags_for_image
-                    media_tags = get_tags_for_image(app_instance, media_key)
-                    if media_tags:
-                        last_tag = media_tags[-1]
-                        last_l = last_tag.lower()
-                        if (_wc and _wc.match_or_contains(last_l, search_lower)) or (not _wc and search_lower in last_l):
-                            match_found = True
-                except Exception as e:
-                    print(f"마지막 태그 검색 중 오류: {e}")
-                    
-            elif search_type == "태그 순서" and not is_video_mode:
-                # 태그 순서 기반 검색 (예: "1:solo" 또는 "solo:pokemon")
-                try:
-                    media_key = str(media_path)
-                    from all_tags_manager import get_tags_for_image
-                    tags = get_tags_for_image(app_instance, media_key)
-                    if tags:
-                        match_found = _search_by_tag_position(tags, search_lower)
-                except Exception as e:
-                    print(f"태그 순서 검색 중 오류: {e}")
+            
+            # 태그 검색 결과 (파일명에서 매칭되지 않은 경우)
+            if not match_found and tag_hits and str(media_path) in tag_hits:
+                match_found = True
             
             if match_found:
                 filtered_paths.append(media_path)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+앱 시작 시간 측정 (요청 시에만 동작)
+- 켜기: 명령행 --startup-profile 또는 환경변수 AI_TAGGER_STARTUP_PROFILE=1
+- 모듈별 import 비용: sys.meta_path 맨 앞의 타이머가 모듈 실행 시간을 기록
+  (누적 = 하위 import 포함, 자체 = 하위 import 제외)
+- 구간 표시: mark("메인 창 생성") 등 → 시작 후 경과 시간
+- 첫 화면 그리기: watch_first_paint(window) → 첫 Paint 이벤트에서 기록하고 보고서 출력
+- print_report(): 언제든 현재까지의 보고서 출력
+꺼져 있으면 import 훅을 설치하지 않으므로 비용 없음
+"""
+
+import importlib.abc
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+ENV_FLAG = "AI_TAGGER_STARTUP_PROFILE"
+ARGV_FLAG = "--startup-profile"
+REPORT_TOP_MODULES = 25
+
+_start = time.perf_counter()
+_enabled = False
+_marks: List[Tuple[str, float]] = []
+_imports: Dict[str, List[float]] = {}  # 모듈 → [누적 초, 자체 초, 시작 시각(경과)]
+_stack: List[List[float]] = []  # 실행 중인 import의 [하위 import 누적 시간]
+_paint_filter = None
+
+
+class _TimedLoader:
+    """원래 로더를 감싸 exec_module 시간만 측정 (그 외 속성은 원래 로더로 위임)"""
+
+    def __init__(self, loader, fullname: str):
+        self._loader = loader
+        self._fullname = fullname
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # 모듈에는 원래 로더가 보이도록 되돌림 (importlib.resources 등 로더 타입 확인 대비)
+        module.__loader__ = self._loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._loader
+        started = time.perf_counter()
+        _stack.append([0.0])
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = _stack.pop()[0]
+            if _stack:
+                _stack[-1][0] += elapsed
+            _imports[self._fullname] = [elapsed, max(0.0, elapsed - children), started - _start]
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """다른 finder로 spec을 찾은 뒤 로더만 _TimedLoader로 감쌈"""
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, fullname)
+        return spec
+
+
+def is_requested(argv: Optional[List[str]] = None) -> bool:
+    argv = sys.argv if argv is None else argv
+    return ARGV_FLAG in argv or os.environ.get(ENV_FLAG, "").strip() not in ("", "0", "false", "False")
+
+
+def enable_if_requested(argv: Optional[List[str]] = None) -> bool:
+    """요청된 경우 import 타이머 설치 (가능한 한 이른 시점에 호출)"""
+    global _enabled
+    if _enabled or not is_requested(argv):
+        return _enabled
+    _enabled = True
+    sys.meta_path.insert(0, _ImportTimer())
+    mark("프로파일러 시작")
+    return True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def mark(label: str):
+    """시작 후 경과 시간 기록 (꺼져 있으면 무시)"""
+    if _enabled:
+        _marks.append((label, time.perf_counter() - _start))
+
+
+def watch_first_paint(widget):
+    """widget의 첫 Paint 이벤트 시점을 기록하고 보고서 출력 (꺼져 있으면 무시)"""
+    global _paint_filter
+    if not _enabled:
+        return
+    from PySide6.QtCore import QEvent, QObject
+
+    class _FirstPaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                obj.removeEventFilter(self)
+                mark("첫 화면 그리기")
+                print_report()
+            return False
+
+    _paint_filter = _FirstPaintFilter(widget)
+    widget.installEventFilter(_paint_filter)
+
+
+def _remove_import_timer():
+    sys.meta_path[:] = [finder for finder in sys.meta_path if not isinstance(finder, _ImportTimer)]
+
+
+def print_report(top: int = REPORT_TOP_MODULES):
+    """구간 경과 시간 + import 비용 상위 모듈 출력 (첫 보고 후 import 타이머는 제거)"""
+    if not _enabled:
+        print("ℹ️ 시작 시간 측정이 꺼져 있습니다 (--startup-profile 또는 AI_TAGGER_STARTUP_PROFILE=1)")
+        return
+    _remove_import_timer()
+    print("⏱️ ===== 시작 시간 보고서 =====")
+    for label, at in _marks:
+        print(f"  {at * 1000:8.1f} ms  {label}")
+
+    top_level = {name: rec for name, rec in _imports.items() if "." not in name}
+    total = sum(rec[1] for rec in _imports.values())
+    print(f"  import 합계(자체 시간): {total * 1000:.1f} ms, 모듈 {len(_imports)}개")
+    print(f"  ── 최상위 패키지 import 비용 (누적, 상위 {top}) ──")
+    for name, (cumulative, own, at) in sorted(top_level.items(), key=lambda kv: -kv[1][0])[:top]:
+        print(f"  {cumulative * 1000:8.1f} ms  (자체 {own * 1000:7.1f} ms, @{at * 1000:7.1f} ms)  {name}")
+
+    heavy = [name for name in ("torch", "transformers", "onnxruntime", "huggingface_hub") if name in top_level]
+    if heavy:
+        print(f"  ⚠️ 시작 중 무거운 ML 모듈 로드됨: {', '.join(heavy)}")
+    print("⏱️ ============================")
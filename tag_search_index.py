@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+태그 검색 역색인 (search_module 의 태그 검색 모드용)
+- 활성 태그(all_tags)/리무버 태그(image_removed_tags) 모두 TagStore 이므로 태그 → 이미지 목록(postings)은 저장소 역색인 사용
+- 이 모듈이 추가로 증분 유지하는 것 (TagStore 리스너):
+    * 소문자 어휘: 소문자 태그 → 실제 태그 집합 (검색은 대소문자 무시)
+    * 첫 번째/마지막 태그 맵: 이미지 → 소문자 첫/끝 태그, 소문자 태그 → 이미지 집합
+- 검색은 이미지가 아니라 고유 태그 어휘에 대해 한 번만 매칭한 뒤 postings 를 합침
+- "태그 순서" 는 postings 교집합/합집합으로 후보 이미지를 좁힌 뒤 후보만 순서 확인
+  (이미지별 위치 맵을 상주시키지 않음 → 대용량 폴더에서도 메모리 증가 없음)
+- 소문자 어휘마다 n-gram 색인(ngram_index)을 함께 유지 → 부분 문자열/와일드카드 검색은 후보 어휘만 정확 검사
+  (search_module, AdvancedSearchWidget 이 같은 색인을 공유)
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from ngram_index import NgramIndex
+from tag_store import TagStore
+
+MODE_ALL_TAGS = "전체 태그"
+MODE_ACTIVE = "활성 태그"
+MODE_REMOVED = "리무버 태그"
+MODE_FIRST = "첫 번째 태그"
+MODE_LAST = "마지막 태그"
+MODE_ORDER = "태그 순서"
+TAG_MODES = (MODE_ALL_TAGS, MODE_ACTIVE, MODE_REMOVED, MODE_FIRST, MODE_LAST, MODE_ORDER)
+
+MATCH_CACHE_SIZE = 64  # 어휘 매칭 결과 캐시 (같은 검색어로 모드만 바꿀 때 등)
+
+
+def match_tag_position(tags, search_text) -> bool:
+    """태그 순서 기반 검색 ("1:solo" = 1번째 태그에 solo 포함, "solo:pokemon" = solo 가 pokemon 보다 앞)"""
+    if not tags or not search_text:
+        return False
+
+    # "1:solo" 형태의 검색 (N번째 태그)
+    if ':' in search_text:
+        try:
+            position_str, tag_name = search_text.split(':', 1)
+            position = int(position_str.strip()) - 1  # 1-based to 0-based
+            tag_name = tag_name.strip().lower()
+
+            if 0 <= position < len(tags):
+                return tag_name in tags[position].lower()
+        except (ValueError, IndexError):
+            pass
+
+    # "solo:pokemon" 형태의 검색 (태그 A가 태그 B보다 앞에 있는지)
+    if ':' in search_text:
+        try:
+            tag_a, tag_b = search_text.split(':', 1)
+            tag_a = tag_a.strip().lower()
+            tag_b = tag_b.strip().lower()
+
+            # 두 태그 모두 존재하는지 확인
+            if tag_a in [tag.lower() for tag in tags] and tag_b in [tag.lower() for tag in tags]:
+                # 태그 A의 위치가 태그 B보다 앞에 있는지 확인
+                pos_a = next(i for i, tag in enumerate(tags) if tag.lower() == tag_a)
+                pos_b = next(i for i, tag in enumerate(tags) if tag.lower() == tag_b)
+                return pos_a < pos_b
+        except (ValueError, StopIteration):
+            pass
+
+    return False
+
+
+def _default_matcher(query: str) -> Callable[[str], bool]:
+    """검색어 → (소문자 태그 → 일치 여부) 함수 (와일드카드 플러그인이 없으면 부분 문자열)"""
+    try:
+        import wildcard_plugin as _wc
+    except Exception:
+        _wc = None
+    if _wc is None:
+        return lambda text: query in text
+    compiled = _wc.compile_query(query)  # 한 번 컴파일 후 어휘 전체에 재사용
+    if compiled is None:
+        return lambda text: False
+    return compiled.matches
+
+
+class _LowerVocabulary:
+    """TagStore 의 살아있는 태그를 소문자 기준으로 묶어 유지 (소문자 → 실제 태그 집합)"""
+
+    def __init__(self, store: TagStore):
+        self.store = store
+        self.by_lower: Dict[str, Set[str]] = {}
+        self.grams = NgramIndex()  # 소문자 어휘 n-gram 색인
+        self.version = 0  # 소문자 어휘가 바뀔 때만 증가 (매칭 캐시 무효화)
+
+    def rebuild(self):
+        self.by_lower = {}
+        for tag in self.store.unique_tags():
+            self.by_lower.setdefault(str(tag).lower(), set()).add(tag)
+        self.grams = NgramIndex()
+        self.grams.update(self.by_lower)
+        self.version += 1
+
+    def update(self, gained, lost):
+        changed = False
+        for tag in gained:
+            if self.store.image_count(tag) == 1:
+                lower = str(tag).lower()
+                tags = self.by_lower.get(lower)
+                if tags is None:
+                    tags = self.by_lower[lower] = set()
+                    self.grams.add(lower)
+                if tag not in tags:
+                    tags.add(tag)
+                    changed = True
+        for tag in lost:
+            if self.store.image_count(tag) == 0:
+                lower = str(tag).lower()
+                tags = self.by_lower.get(lower)
+                if tags is not None and tag in tags:
+                    tags.discard(tag)
+                    if not tags:
+                        del self.by_lower[lower]
+                        self.grams.discard(lower)
+                    changed = True
+        if changed:
+            self.version += 1
+
+    def containing(self, text: str) -> List[str]:
+        """text 를 부분 문자열로 포함하는 소문자 어휘 (와일드카드 해석 없음, n-gram 후보만 확인)"""
+        candidates = self.grams.candidates((text,))
+        if candidates is None:
+            candidates = self.by_lower
+        return [lower for lower in candidates if text in lower]
+
+    def postings(self, lowers: Iterable[str]) -> Set[str]:
+        """소문자 태그들 → 그 태그를 가진 이미지 경로 합집합"""
+        paths: Set[str] = set()
+        for lower in lowers:
+            for tag in self.by_lower.get(lower, ()):
+                paths.update(self.store.images_for_tag(tag))
+        return paths
+
+
+class TagSearchIndex:
+    """all_tags / image_removed_tags 에 연결되어 증분 유지되는 태그 검색 색인"""
+
+    def __init__(self, active: TagStore, removed: TagStore):
+        self.active = _LowerVocabulary(active)
+        self.removed = _LowerVocabulary(removed)
+        self._first: Dict[str, str] = {}  # 이미지 → 소문자 첫 태그
+        self._last: Dict[str, str] = {}  # 이미지 → 소문자 마지막 태그
+        self._first_index: Dict[str, Set[str]] = {}  # 소문자 첫 태그 → 이미지 집합
+        self._last_index: Dict[str, Set[str]] = {}
+        self._edge_version = 0  # 첫/마지막 태그 어휘가 바뀔 때 증가
+        self._match_cache: "OrderedDict[tuple, Set[str]]" = OrderedDict()
+        self.matcher_factory: Callable[[str], Callable[[str], bool]] = _default_matcher
+
+        self.active.rebuild()
+        self.removed.rebuild()
+        self._rebuild_edges()
+        active.add_listener(self._on_active_changed)
+        removed.add_listener(self._on_removed_changed)
+
+    def detach(self):
+        self.active.store.remove_listener(self._on_active_changed)
+        self.removed.store.remove_listener(self._on_removed_changed)
+
+    # ────────────── 증분 갱신 ──────────────
+    def _on_active_changed(self, path, gained, lost):
+        if path is None:
+            self.active.rebuild()
+            self._rebuild_edges()
+            return
+        self.active.update(gained, lost)
+        self._update_edges(path)
+
+    def _on_removed_changed(self, path, gained, lost):
+        if path is None:
+            self.removed.rebuild()
+            return
+        self.removed.update(gained, lost)
+
+    @staticmethod
+    def _move(index: Dict[str, Set[str]], path: str, old: Optional[str], new: Optional[str]) -> bool:
+        """edge 색인에서 path 를 old → new 로 옮김 (어휘 키가 생기거나 사라지면 True)"""
+        changed = False
+        if old is not None:
+            paths = index.get(old)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del index[old]
+                    changed = True
+        if new is not None:
+            if new not in index:
+                changed = True
+            index.setdefault(new, set()).add(path)
+        return changed
+
+    def _update_edges(self, path: str):
+        tags = dict.get(self.active.store, path)
+        first = str(tags[0]).lower() if tags else None
+        last = str(tags[-1]).lower() if tags else None
+        changed = False
+        old_first = self._first.get(path)
+        if old_first != first:
+            changed |= self._move(self._first_index, path, old_first, first)
+            if first is None:
+                self._first.pop(path, None)
+            else:
+                self._first[path] = first
+        old_last = self._last.get(path)
+        if old_last != last:
+            changed |= self._move(self._last_index, path, old_last, last)
+            if last is None:
+                self._last.pop(path, None)
+            else:
+                self._last[path] = last
+        if changed:
+            self._edge_version += 1
+
+    def _rebuild_edges(self):
+        self._first, self._last = {}, {}
+        self._first_index, self._last_index = {}, {}
+        for path, tags in dict.items(self.active.store):
+            if tags:
+                first, last = str(tags[0]).lower(), str(tags[-1]).lower()
+                self._first[path] = first
+                self._last[path] = last
+                self._first_index.setdefault(first, set()).add(path)
+                self._last_index.setdefault(last, set()).add(path)
+        self._edge_version += 1
+
+    # ────────────── 어휘 매칭 ──────────────
+    def _match(self, query: str, name: str, vocabulary, version, grams: NgramIndex) -> Set[str]:
+        """검색어와 일치하는 소문자 어휘 (어휘가 그대로면 캐시 재사용)
+        vocabulary 는 grams 에 색인된 어휘의 부분집합이어야 함 (첫/마지막 태그 어휘 ⊂ 활성 어휘)"""
+        key = (name, query, version)
+        hit = self._match_cache.get(key)
+        if hit is not None:
+            self._match_cache.move_to_end(key)
+            return hit
+        matcher = self.matcher_factory(query)
+        candidates = None
+        if self.matcher_factory is _default_matcher:  # 후보 좁히기는 기본 매칭 의미에서만 유효
+            candidates = grams.candidates_for_query(query)
+        if candidates is None:
+            result = {lower for lower in vocabulary if matcher(lower)}
+        else:
+            result = {lower for lower in candidates if lower in vocabulary and matcher(lower)}
+        self._match_cache[key] = result
+        if len(self._match_cache) > MATCH_CACHE_SIZE:
+            self._match_cache.popitem(last=False)
+        return result
+
+    def match_active(self, query: str) -> Set[str]:
+        return self._match(query, "active", self.active.by_lower, self.active.version, self.active.grams)
+
+    def match_removed(self, query: str) -> Set[str]:
+        return self._match(query, "removed", self.removed.by_lower, self.removed.version, self.removed.grams)
+
+    # ────────────── 검색 ──────────────
+    def search(self, query: str, mode: str) -> Set[str]:
+        """query(소문자, 공백 제거됨)와 mode 에 해당하는 이미지 경로(str) 집합"""
+        if not query:
+            return set()
+        if mode == MODE_ACTIVE:
+            return self.active.postings(self.match_active(query))
+        if mode == MODE_REMOVED:
+            return self.removed.postings(self.match_removed(query))
+        if mode == MODE_ALL_TAGS:
+            return self.active.postings(self.match_active(query)) | self.removed.postings(self.match_removed(query))
+        if mode == MODE_FIRST:
+            return self._edge_postings(self._first_index, query, "first")
+        if mode == MODE_LAST:
+            return self._edge_postings(self._last_index, query, "last")
+        if mode == MODE_ORDER:
+            return self._search_order(query)
+        return set()
+
+    def _edge_postings(self, index: Dict[str, Set[str]], query: str, name: str) -> Set[str]:
+        paths: Set[str] = set()
+        for lower in self._match(query, name, index, self._edge_version, self.active.grams):
+            paths.update(index.get(lower, ()))
+        return paths
+
+    # ────────────── 일반 부분 문자열 조회 (와일드카드 해석 없음, AdvancedSearchWidget 용) ──────────────
+    def images_with_tag(self, tag) -> Set[str]:
+        """태그(대소문자 구분, 정확 일치)를 가진 이미지"""
+        return set(self.active.store.images_for_tag(tag))
+
+    def images_with_tag_containing(self, text: str) -> Set[str]:
+        """소문자 text 를 포함하는 태그를 가진 이미지"""
+        return self.active.postings(self.active.containing(text))
+
+    def images_with_tag_starting(self, text: str) -> Set[str]:
+        """소문자 text 로 시작하는 태그를 가진 이미지"""
+        return self.active.postings(lower for lower in self.active.containing(text) if lower.startswith(text))
+
+    def images_with_edge_containing(self, text: str, last: bool = False) -> Set[str]:
+        """첫 번째(last=True 면 마지막) 태그가 소문자 text 를 포함하는 이미지"""
+        index = self._last_index if last else self._first_index
+        paths: Set[str] = set()
+        for lower in self.active.containing(text):
+            paths.update(index.get(lower, ()))
+        return paths
+
+    def _exact_postings(self, lower: str) -> Set[str]:
+        return self.active.postings((lower,)) if lower in self.active.by_lower else set()
+
+    def _search_order(self, query: str) -> Set[str]:
+        """태그 순서 검색: 후보 이미지를 색인으로 좁힌 뒤 match_tag_position 으로 확인 (의미 동일)"""
+        if ':' not in query:
+            return set()
+        left, right = query.split(':', 1)
+        tag_a, tag_b = left.strip().lower(), right.strip().lower()
+
+        # "A:B" 후보: 두 태그를 모두 가진 이미지
+        candidates = self._exact_postings(tag_a)
+        if candidates:
+            candidates = candidates & self._exact_postings(tag_b)
+
+        # "N:tag" 후보: tag 를 부분 문자열로 포함하는 태그를 가진 이미지
+        try:
+            int(left.strip())
+        except ValueError:
+            pass
+        else:
+            candidates = candidates | self.active.postings(self.active.containing(tag_b))
+
+        store = self.active.store
+        return {path for path in candidates if match_tag_position(dict.get(store, path), query)}
+
+
+def get_search_index(app_instance) -> TagSearchIndex:
+    """app_instance 의 검색 색인 (없거나 저장소가 바뀌었으면 새로 만듦)"""
+    from all_tags_manager import ensure_tag_store
+    active = ensure_tag_store(app_instance)
+    removed = ensure_tag_store(app_instance, 'image_removed_tags')
+    index = getattr(app_instance, 'tag_search_index', None)
+    if not isinstance(index, TagSearchIndex) or index.active.store is not active or index.removed.store is not removed:
+        if isinstance(index, TagSearchIndex):
+            index.detach()
+        index = TagSearchIndex(active, removed)
+        app_instance.tag_search_index = index
+    return index
@@ -4,6 +4,11 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QScrollArea, QSizePolicy, QFrame, QPushButton
 from PySide6.QtCore import Qt, Signal, QSize
 
+from global_tag_manager import (
+    check_global_tag_stats, ensure_global_tag_stats, get_stat_count, is_debug_check_enabled,
+    recalculate_global_tag_stats, set_tag_category,
+)
+
 
 # ---- soft-wrapping helper (adds zero‑width spaces to allow wrapping of long unbroken tokens) ----
 def insert_wrap_opportunities(s: str) -> str:
@@ -120,11 +125,7 @@ class TagListItem(QFrame):
         # 이미지 개수와 카테고리 정보 표시
         image_count = 0
         if self.app_instance and hasattr(self.app_instance, 'global_tag_stats'):
-            tag_stat = self.app_instance.global_tag_stats.get(text, 0)
-            if isinstance(tag_stat, dict):
-                image_count = tag_stat.get('image_count', 0)
-            else:
-                image_count = tag_stat
+            image_count = get_stat_count(self.app_instance.global_tag_stats.get(text, 0))
         
         # 카테고리 일관 분류 (중앙 집중 로직 사용)
         resolved_category = None
@@ -264,12 +265,11 @@ class TagListItem(QFrame):
         if not hasattr(self, 'meta_label'):
             return
         
-        # 실시간으로 이미지 개수 계산 (global_tag_stats 대신 all_tags에서 직접 계산)
+        # 실시간 이미지 개수 (all_tags 역색인에서 O(1) 조회)
         image_count = 0
         if self.app_instance and hasattr(self.app_instance, 'all_tags'):
-            for image_path, tags in self.app_instance.all_tags.items():
-                if self.tag_text in tags:
-                    image_count += 1
+            from all_tags_manager import get_image_count_for_tag
+            image_count = get_image_count_for_tag(self.app_instance, self.tag_text)
         
         # 카테고리 정보 가져오기 (중앙 집중 로직 사용)
         category = "unknown"
@@ -363,6 +363,8 @@ class TagStatisticsModule:
         self.last_displayed_tags = []
         # 카테고리 캐시 - {tag: category} 형태로 저장
         self._cached_categories = {}
+        # 마지막으로 그린 통계 상태 (바뀐 것이 없으면 이미지 전환 시 다시 그리지 않음)
+        self._rendered_signature = None
 
     def resolve_category(self, tag_text: str) -> str:
         """태그 카테고리 통합 분류: DB -> LLaVA -> manual -> WD -> Danbooru -> unknown
@@ -684,12 +686,7 @@ class TagStatisticsModule:
     def update_filtered_tags_list(self, selected_categories: list):
         """필터링된 태그 리스트 업데이트 (다중 선택 지원, 최적화된 버전, 페이지네이션 적용)"""
         # 태그를 빈도순으로 정렬 (딕셔너리와 정수 형태 모두 지원)
-        def get_count(item):
-            count = item[1]
-            if isinstance(count, dict):
-                return count.get('image_count', 0)
-            return count
-        sorted_tags = sorted(self.app_instance.global_tag_stats.items(), key=get_count, reverse=True)
+        sorted_tags = sorted(self.app_instance.global_tag_stats.items(), key=lambda item: get_stat_count(item[1]), reverse=True)
         
         # 중앙 분류 로직 사용 (wd_tagger 직접 참조 제거)
         
@@ -796,12 +793,7 @@ class TagStatisticsModule:
             selected_categories.append("unknown")
         
         # 필터링된 태그 수 계산
-        def get_count(item):
-            count = item[1]
-            if isinstance(count, dict):
-                return count.get('image_count', 0)
-            return count
-        sorted_tags = sorted(self.app_instance.global_tag_stats.items(), key=get_count, reverse=True)
+        sorted_tags = sorted(self.app_instance.global_tag_stats.items(), key=lambda item: get_stat_count(item[1]), reverse=True)
         
         filtered_count = 0
         for tag, count in sorted_tags:
@@ -861,19 +853,22 @@ class TagStatisticsModule:
         
         # 중앙 분류 로직 사용 (wd_tagger 직접 참조 제거)
         
-        # 각 이미지의 태그들을 확인하여 필터링된 카테고리에 해당하는 태그가 있는지 확인
-        for image_path in self.app_instance.image_files:
-            if str(image_path) in self.app_instance.all_tags:
-                image_tags = self.app_instance.all_tags[str(image_path)]
-                for tag in image_tags:
-                    try:
-                        tag_category = self.resolve_category(tag)
-                    except Exception:
-                        tag_category = "unknown"
-                    
-                    if tag_category in selected_categories:
-                        filtered_images.add(image_path)
-                        break
+        # 선택된 카테고리 태그들의 이미지 집합 합치기 (all_tags 역색인 사용, 이미지 순회 없음)
+        from all_tags_manager import get_images_for_tag
+        tagged_paths = set()
+        for tag in list(self.app_instance.global_tag_stats.keys()):
+            try:
+                tag_category = self.resolve_category(tag)
+            except Exception:
+                tag_category = "unknown"
+            if tag_category in selected_categories:
+                tagged_paths.update(get_images_for_tag(self.app_instance, tag))
+        
+        # 현재 목록(image_files)에 있는 이미지만 집계
+        if tagged_paths:
+            for image_path in self.app_instance.image_files:
+                if str(image_path) in tagged_paths:
+                    filtered_images.add(image_path)
         
         # 헤더 업데이트 (통계 정보를 제목에 표시)
         self.update_header_stats(len(filtered_images), filtered_tag_count)
@@ -887,8 +882,22 @@ class TagStatisticsModule:
             print("단체 태깅 중 - 태그 통계 업데이트 건너뛰기")
             return
         
-        # all_tags 기반으로 global_tag_stats 재계산
-        self.recalculate_global_tag_stats_from_all_tags()
+        # global_tag_stats 는 all_tags 변경을 따라 증분 갱신됨 (재계산 없음)
+        stats = ensure_global_tag_stats(self.app_instance)
+        self.resolve_pending_categories()
+        
+        if is_debug_check_enabled():
+            check_global_tag_stats(self.app_instance)
+        
+        # 통계/분류 정보가 마지막으로 그린 뒤 그대로면 다시 그리지 않음 (이미지 클릭 등)
+        signature = (
+            id(stats), stats.version, len(self.tag_card_cache),
+            len(getattr(self.app_instance, 'manual_tag_info', {}) or {}),
+            len(getattr(self.app_instance, 'llava_tag_info', {}) or {}),
+            len(getattr(self.app_instance, 'image_files', []) or []),
+        )
+        if signature == self._rendered_signature:
+            return
         
         # 카운터 0인 태그들 제거
         self.remove_zero_count_tags()
@@ -898,47 +907,31 @@ class TagStatisticsModule:
         
         # 현재 선택된 카테고리 기준으로 통계 업데이트
         self.update_filtered_tags()
+        self._rendered_signature = (
+            id(stats), stats.version, len(self.tag_card_cache),
+            signature[3], signature[4], signature[5],
+        )
+    
+    def resolve_pending_categories(self):
+        """새로 생긴 태그 중 카테고리가 unknown 인 것만 중앙 분류 로직으로 채움"""
+        stats = ensure_global_tag_stats(self.app_instance)
+        for tag in list(stats.pending_categories):
+            try:
+                category = self.resolve_category(tag)
+            except Exception:
+                category = 'unknown'
+            stats.pending_categories.discard(tag)
+            if category and category != 'unknown':
+                set_tag_category(self.app_instance, tag, category)
     
     def recalculate_global_tag_stats_from_all_tags(self):
-        """all_tags 기반으로 global_tag_stats 재계산"""
+        """all_tags 기반으로 global_tag_stats 전체 재계산 (명시적 요청 시에만 사용, 카테고리는 유지)"""
         if not hasattr(self.app_instance, 'all_tags'):
             return
         
-        print("📊 all_tags 기반으로 global_tag_stats 재계산 시작")
-        
-        # 기존 통계를 보존해서 DB에서 복원된 카테고리를 이어받기
-        old_stats = {}
-        try:
-            if hasattr(self.app_instance, 'global_tag_stats') and isinstance(self.app_instance.global_tag_stats, dict):
-                old_stats = self.app_instance.global_tag_stats.copy()
-        except Exception:
-            old_stats = {}
-
-        # global_tag_stats 초기화
-        self.app_instance.global_tag_stats = {}
-        
-        # all_tags를 순회하며 각 태그의 이미지 수 계산
-        for image_path, tags in self.app_instance.all_tags.items():
-            for tag in tags:
-                if tag not in self.app_instance.global_tag_stats:
-                    # 중앙 분류 로직 사용: DB 보존값 → LLaVA → manual → WD → Danbooru → unknown
-                    try:
-                        # 과거 DB 보존값이 있으면 우선 사용 (unknown은 무시)
-                        prev = old_stats.get(tag, {}) if isinstance(old_stats, dict) else {}
-                        category = prev.get('category') if isinstance(prev, dict) else None
-                        if not category or category == 'unknown':
-                            category = self.resolve_category(tag)
-                    except Exception:
-                        category = 'unknown'
-                    
-                    self.app_instance.global_tag_stats[tag] = {
-                        'image_count': 1,
-                        'category': category
-                    }
-                else:
-                    self.app_instance.global_tag_stats[tag]['image_count'] += 1
-        
-        print(f"📊 global_tag_stats 재계산 완료: {len(self.app_instance.global_tag_stats)}개 태그")
+        recalculate_global_tag_stats(self.app_instance)
+        self.resolve_pending_categories()
+        self._rendered_signature = None
     
     def remove_zero_count_tags(self):
         """카운터가 0인 태그들을 제거"""
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+인덱스가 있는 all_tags 저장소 (app_instance.all_tags 의 실제 구현)
+- 겉모습: 기존과 같은 dict {이미지 경로: [태그, ...]} (dict/list 하위 클래스라 기존 코드 그대로 동작)
+- 내부 인덱스 (모든 변경 시 즉시 갱신):
+    * 태그 id 인터닝: 태그 문자열 → 정수 id (id는 한 번 부여되면 유지)
+    * 이미지별 태그 배열: 값 리스트(_TagList) 자체가 순서를 유지하고, 이미지별 태그 id 개수(Counter)를 함께 보관
+    * 역색인: 태그 id → 그 태그를 가진 이미지 경로 집합 (집합 크기 = 태그별 이미지 수)
+- 값 리스트를 제자리에서 바꿔도 (append/remove/insert/[i]=/del/sort 등) 인덱스가 따라감
+- 리스너: add_listener(fn) → 변경마다 fn(path, gained, lost) 호출
+    * gained/lost: 그 이미지에서 새로 생기거나 완전히 사라진 태그 (순서만 바뀌면 둘 다 빈 리스트)
+    * path 가 None 이면 전체 교체(reset) → 리스너는 처음부터 다시 계산
+"""
+
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+class _TagList(list):
+    """저장소에 연결된 이미지별 태그 리스트 (변경 내용을 저장소 인덱스에 알림)"""
+
+    __slots__ = ("_store", "_path")
+
+    def __init__(self, iterable=(), store: "TagStore" = None, path: str = None):
+        super().__init__(iterable)
+        self._store = store
+        self._path = path
+
+    # ── 저장소 알림 ──
+    def _notify(self, removed, added):
+        if self._store is not None:
+            self._store._apply(self._path, removed, added)
+
+    def _detach(self):
+        self._store = None
+        self._path = None
+
+    # ── 조회 ──
+    def __contains__(self, tag):
+        if self._store is not None:
+            try:
+                return self._store._has(self._path, tag)
+            except TypeError:
+                pass
+        return list.__contains__(self, tag)
+
+    # ── 변경 ──
+    def append(self, tag):
+        list.append(self, tag)
+        self._notify((), (tag,))
+
+    def extend(self, iterable):
+        added = list(iterable)
+        list.extend(self, added)
+        self._notify((), added)
+
+    def insert(self, index, tag):
+        list.insert(self, index, tag)
+        self._notify((), (tag,))
+
+    def remove(self, tag):
+        list.remove(self, tag)
+        self._notify((tag,), ())
+
+    def pop(self, index=-1):
+        tag = list.pop(self, index)
+        self._notify((tag,), ())
+        return tag
+
+    def clear(self):
+        removed = list(self)
+        list.clear(self)
+        self._notify(removed, ())
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            removed = list.__getitem__(self, key)
+            added = list(value)
+            list.__setitem__(self, key, added)
+        else:
+            removed = (list.__getitem__(self, key),)
+            added = (value,)
+            list.__setitem__(self, key, value)
+        self._notify(removed, added)
+
+    def __delitem__(self, key):
+        removed = list.__getitem__(self, key)
+        list.__delitem__(self, key)
+        self._notify(removed if isinstance(key, slice) else (removed,), ())
+
+    def __iadd__(self, iterable):
+        self.extend(iterable)
+        return self
+
+    def __imul__(self, n):
+        if n <= 0:
+            self.clear()
+        else:
+            self.extend(list(self) * (n - 1))
+        return self
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self._notify((), ())
+
+    def reverse(self):
+        list.reverse(self)
+        self._notify((), ())
+
+    # ── 복사/직렬화: 저장소 연결 없는 일반 list ──
+    def copy(self):
+        return list(self)
+
+    def __reduce_ex__(self, protocol):
+        return list, (list(self),)
+
+
+class TagStore(dict):
+    """
+    {이미지 경로: [태그]} dict + 태그 인덱스.
+    값은 항상 _TagList 로 저장됨 (대입한 리스트는 복사되어 연결됨).
+    """
+
+    def __init__(self, mapping=None):
+        super().__init__()
+        self._tag_ids: Dict[object, int] = {}
+        self._tag_names: List[object] = []
+        self._images_by_tag: Dict[int, Set[str]] = {}  # 태그 id → 이미지 경로 집합 (비면 항목 삭제)
+        self._counts_by_image: Dict[str, Counter] = {}  # 이미지 경로 → Counter(태그 id → 리스트 안 개수)
+        self._listeners: List[Callable] = []
+        self.version = 0  # 변경마다 증가 (파생 캐시 무효화 확인용)
+        if mapping:
+            self.reset(mapping)
+
+    # ────────────── 인덱스 ──────────────
+    def tag_id(self, tag) -> int:
+        """태그 → 인터닝된 정수 id (처음 보는 태그면 새로 부여)"""
+        tid = self._tag_ids.get(tag)
+        if tid is None:
+            tid = len(self._tag_names)
+            self._tag_ids[tag] = tid
+            self._tag_names.append(tag)
+        return tid
+
+    def tag_name(self, tid: int):
+        return self._tag_names[tid]
+
+    def _has(self, path, tag) -> bool:
+        tid = self._tag_ids.get(tag)
+        return tid is not None and tid in self._counts_by_image.get(path, ())
+
+    def _apply(self, path, removed: Iterable, added: Iterable):
+        """path 의 리스트에서 removed 가 빠지고 added 가 들어감 → 인덱스 갱신 + 리스너 알림"""
+        counts = self._counts_by_image.setdefault(path, Counter())
+        lost = []
+        for tag in removed:
+            tid = self._tag_ids.get(tag)
+            if tid is None or counts[tid] <= 0:
+                continue
+            counts[tid] -= 1
+            if counts[tid] == 0:
+                del counts[tid]
+                lost.append(tag)
+        gained = []
+        for tag in added:
+            tid = self.tag_id(tag)
+            counts[tid] += 1
+            if counts[tid] == 1:
+                gained.append(tag)
+
+        # 같은 변경 안에서 빠졌다 다시 들어온 태그 (예: [i] = 같은 값)는 변화 없음
+        if lost and gained:
+            both = set(lost) & set(gained)
+            if both:
+                lost = [t for t in lost if t not in both]
+                gained = [t for t in gained if t not in both]
+        for tag in lost:
+            tid = self._tag_ids[tag]
+            paths = self._images_by_tag.get(tid)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self._images_by_tag[tid]
+        for tag in gained:
+            self._images_by_tag.setdefault(self._tag_ids[tag], set()).add(path)
+
+        self.version += 1
+        self._emit(path, gained, lost)
+
+    def _attach(self, path, tags) -> _TagList:
+        """새 값 리스트 연결 (기존 리스트는 분리)"""
+        old = dict.get(self, path)
+        if old is not None:
+            old._detach()
+        new = _TagList(tags, self, path)
+        dict.__setitem__(self, path, new)
+        return new
+
+    def _drop(self, path) -> Optional[_TagList]:
+        old = dict.pop(self, path, None)
+        if old is None:
+            return None
+        old._detach()
+        counts = self._counts_by_image.pop(path, Counter())
+        lost = []
+        for tid in counts:
+            lost.append(self._tag_names[tid])
+            paths = self._images_by_tag.get(tid)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self._images_by_tag[tid]
+        self.version += 1
+        self._emit(path, [], lost)
+        return old
+
+    # ────────────── 리스너 ──────────────
+    def add_listener(self, listener: Callable):
+        """listener(path, gained, lost) 등록 (path None = 전체 교체)"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, path, gained, lost):
+        for listener in list(self._listeners):
+            try:
+                listener(path, gained, lost)
+            except Exception as e:
+                print(f"⚠️ TagStore 리스너 오류: {e}")
+
+    # ────────────── dict 변경 메서드 ──────────────
+    def __setitem__(self, path, tags):
+        current = dict.get(self, path)
+        if current is tags:
+            return
+        if current is not None:
+            # 같은 키 재대입: 기존 리스트를 분리하고 차이만 인덱스에 반영
+            new_tags = list(tags) if tags else []
+            old_tags = list(current)
+            self._attach(path, new_tags)
+            self._apply(path, old_tags, new_tags)
+        else:
+            new_list = self._attach(path, ())
+            self._counts_by_image[path] = Counter()
+            new_list.extend(tags or ())  # 빈 리스트여도 _apply 가 리스너에 새 이미지를 알림
+
+    def __delitem__(self, path):
+        if path not in self:
+            raise KeyError(path)
+        self._drop(path)
+
+    def pop(self, path, *default):
+        if path in self:
+            return self._drop(path)
+        if default:
+            return default[0]
+        raise KeyError(path)
+
+    def popitem(self):
+        if not self:
+            raise KeyError("popitem(): TagStore is empty")
+        path = next(reversed(self.keys()))
+        return path, self.pop(path)
+
+    def setdefault(self, path, default=None):
+        if path not in self:
+            self[path] = default if default is not None else []
+        return dict.__getitem__(self, path)
+
+    def update(self, *args, **kwargs):
+        for path, tags in dict(*args, **kwargs).items():
+            self[path] = tags
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        self.reset({})
+
+    def reset(self, mapping):
+        """전체 교체 (리스너에는 path=None 한 번만 알림)"""
+        items = list(dict(mapping or {}).items())
+        for old in dict.values(self):
+            old._detach()
+        dict.clear(self)
+        self._images_by_tag.clear()
+        self._counts_by_image.clear()
+        listeners, self._listeners = self._listeners, []
+        try:
+            for path, tags in items:
+                self[path] = tags
+        finally:
+            self._listeners = listeners
+        self.version += 1
+        self._emit(None, [], [])
+
+    def copy(self) -> dict:
+        """일반 dict 복사본 (값 리스트도 복사)"""
+        return {path: list(tags) for path, tags in dict.items(self)}
+
+    def __reduce_ex__(self, protocol):
+        return dict, (self.copy(),)
+
+    # ────────────── 조회 ──────────────
+    def unique_tags(self) -> Set:
+        """한 이미지 이상에 붙은 태그 집합 (O(태그 수))"""
+        names = self._tag_names
+        return {names[tid] for tid in self._images_by_tag}
+
+    def image_count(self, tag) -> int:
+        """태그를 가진 이미지 수 (O(1))"""
+        tid = self._tag_ids.get(tag)
+        if tid is None:
+            return 0
+        return len(self._images_by_tag.get(tid, ()))
+
+    def images_for_tag(self, tag) -> Set[str]:
+        """태그를 가진 이미지 경로 집합 (읽기 전용으로 사용, O(1))"""
+        tid = self._tag_ids.get(tag)
+        if tid is None:
+            return frozenset()
+        return self._images_by_tag.get(tid, frozenset())
+
+    def tag_counts(self) -> Dict[object, int]:
+        """{태그: 이미지 수} (O(태그 수))"""
+        names = self._tag_names
+        return {names[tid]: len(paths) for tid, paths in self._images_by_tag.items()}
+
+    def check_consistency(self) -> List[str]:
+        """인덱스를 값 리스트에서 다시 계산해 비교 (디버그용, 문제 목록 반환)"""
+        problems = []
+        expected: Dict[object, Set[str]] = {}
+        for path, tags in dict.items(self):
+            if not isinstance(tags, _TagList) or tags._store is not self or tags._path != path:
+                problems.append(f"연결되지 않은 값 리스트: {path}")
+            if Counter(self._tag_ids.get(t) for t in tags) != self._counts_by_image.get(path, Counter()):
+                problems.append(f"이미지별 개수 불일치: {path}")
+            for tag in set(tags):
+                expected.setdefault(tag, set()).add(path)
+        actual = {self._tag_names[tid]: paths for tid, paths in self._images_by_tag.items()}
+        for tag in set(expected) | set(actual):
+            if expected.get(tag, set()) != actual.get(tag, set()):
+                problems.append(f"역색인 불일치: {tag}")
+        return problems
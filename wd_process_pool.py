@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+WD Tagger CPU 멀티프로세스 추론 풀
+- CPU 세션에서는 디코드/패딩/뷰 병합 같은 Python 코드가 GIL에 묶여 코어를 다 쓰지 못하므로,
+  워커 프로세스마다 자기 ONNX 세션(코어 일부)을 두고 이미지 경로 묶음을 나눠 처리한다
+- 워커 → 부모: 이미지별 병합 점수 (n, num_tags) float32 + 실패 메시지 (태그 이름/시그널은 부모에서)
+- 부모는 작업 순서대로 결과를 돌려준다 (입력 순서 유지)
+- 워커가 죽으면 다시 띄우고 그 작업을 한 번 재시도, 또 죽으면 해당 이미지만 실패 처리
+- 취소: 새 작업 배분을 멈추고 실행 중인 작업만 회수 (워커는 재사용 가능한 상태로 남음)
+설정 (wd_tagger_config.json):
+    process_pool_workers            : 0 = 끔, -1 = 자동 (NUMA 노드/소켓 수 기준), N = 워커 수
+    process_pool_threads_per_worker : 워커당 ONNX intra-op 스레드 수 (0 = 코어 수 / 워커 수)
+    process_pool_pin_cores          : 워커마다 겹치지 않는 코어 묶음에 고정 (Linux)
+"""
+
+import os
+import queue
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+READY_TIMEOUT_SEC = 300.0     # 워커 세션 로드 대기 상한 (최초 최적화 그래프 생성 포함)
+POLL_INTERVAL_SEC = 0.5       # 결과 대기 중 워커 생존 확인 주기
+MAX_TASK_ATTEMPTS = 2         # 작업당 실행 시도 횟수 (워커 비정상 종료 시 1회 재시도)
+MAX_SLOT_RESTARTS = 3         # 워커 슬롯별 재시작 상한 (초기화가 계속 실패하는 경우 대비)
+CRASH_MESSAGE = "워커 프로세스 비정상 종료"
+
+
+def _available_cores() -> List[int]:
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def _numa_node_count() -> int:
+    """NUMA 노드(≈ 소켓) 수 (Linux sysfs, 확인 불가 시 1)"""
+    try:
+        nodes = [n for n in os.listdir("/sys/devices/system/node") if n.startswith("node") and n[4:].isdigit()]
+        return max(1, len(nodes))
+    except OSError:
+        return 1
+
+
+def resolve_pool_settings(config: dict) -> Tuple[int, int, bool]:
+    """
+    config → (workers, threads_per_worker, pin_cores)  (workers == 0 이면 프로세스 풀 끔)
+    자동(-1): 소켓이 여럿이면 소켓당 워커 하나, 아니면 코어 4개당 하나 (최대 4)
+    """
+    cores = len(_available_cores())
+    try:
+        workers = int(config.get("process_pool_workers", 0))
+    except Exception:
+        workers = 0
+    if workers < 0:
+        nodes = _numa_node_count()
+        workers = min(cores, nodes if nodes > 1 else min(4, cores // 4))
+    workers = max(0, workers)
+    if workers == 0:
+        return 0, 0, False
+    try:
+        threads = int(config.get("process_pool_threads_per_worker", 0))
+    except Exception:
+        threads = 0
+    if threads <= 0:
+        threads = max(1, cores // workers)
+    return workers, threads, bool(config.get("process_pool_pin_cores", True))
+
+
+# ────────────── 워커 프로세스 ──────────────
+def _score_paths(model, paths: List[str], spec: dict, prepare_views, merge_views):
+    """이미지 경로 묶음 → ((n, num_tags) float32 점수(실패 행은 NaN), {묶음 내 위치: 오류 메시지})"""
+    model.pad_rgb = tuple(spec["pad_rgb"])
+    model.target_size = spec["target_size"]
+    scores = np.full((len(paths), len(model.tag_names)), np.nan, dtype=np.float32)
+    errors: Dict[int, str] = {}
+
+    views, positions = [], []
+    for k, p in enumerate(paths):
+        try:
+            views.append(prepare_views(model, p, spec["tta_views"]))
+            positions.append(k)
+        except Exception as e:
+            errors[k] = str(e)
+    if not views:
+        return scores, errors
+
+    try:
+        raw = model._run_batch(views)
+    except Exception as e:
+        errors.update({k: str(e) for k in positions})
+        return scores, errors
+
+    offset = 0
+    for k, v in zip(positions, views):
+        rows = slice(offset, offset + v.shape[0])
+        offset = rows.stop
+        try:
+            scores[k] = merge_views(raw[rows], spec["apply_sigmoid"], spec["tta_merge_mode"])
+        except Exception as e:
+            errors[k] = str(e)
+    return scores, errors
+
+
+def _worker_main(slot: int, init: dict, task_q, result_q):
+    """워커 진입점: 세션 한 번 로드 → (task_id, paths, spec) 반복 처리, None 이면 종료"""
+    try:
+        if init.get("cores") and hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, init["cores"])
+            except OSError:
+                pass
+        from pathlib import Path
+        from wd_tagger import WdTaggerModel, _enh_merge_views, _enh_prepare_views
+
+        model = WdTaggerModel(init["model_id"], use_gpu=False, precision=init["precision"])
+        model.model_dir = Path(init["model_dir"])
+        model.model_path = Path(init["model_path"])
+        model.tag_names = [""] * init["num_tags"]  # 점수 행렬 크기용 (이름은 부모에서 붙임)
+        model.session = model._create_session(
+            model.model_path, ["CPUExecutionProvider"], intra_op_threads=init["threads"]
+        )
+        model.is_loaded = True
+    except Exception as e:
+        result_q.put(("init_failed", slot, None, str(e)))
+        return
+
+    result_q.put(("ready", slot, None, os.getpid()))
+    while True:
+        msg = task_q.get()
+        if msg is None:
+            break
+        task_id, paths, spec = msg
+        result_q.put(("done", slot, task_id, _score_paths(model, paths, spec, _enh_prepare_views, _enh_merge_views)))
+
+
+# ────────────── 부모 프로세스 ──────────────
+class WdProcessPool:
+    """
+    WD 모델 하나에 대한 CPU 워커 프로세스 풀.
+    - init: model_id / model_dir / model_path / precision / num_tags (워커 세션 로드용, picklable)
+    - imap()은 한 번에 하나의 호출자만 사용 (WdTaggerModel 배치 드라이버)
+    """
+
+    def __init__(self, init: dict, workers: int, threads_per_worker: int, pin_cores: bool = True):
+        import multiprocessing as mp
+
+        # fork는 Qt/ONNX 스레드 상태를 복제하므로 spawn 사용 (Windows와 동작 동일)
+        self._ctx = mp.get_context("spawn")
+        self.init = dict(init)
+        self.workers = int(workers)
+        self.threads = int(threads_per_worker)
+        self.signature = (init["model_path"], self.workers, self.threads, bool(pin_cores))
+        self._result_q = self._ctx.Queue()
+        self._procs: List = [None] * self.workers
+        self._task_qs: List = [None] * self.workers
+        self._restarts = [0] * self.workers
+        self._broken = [False] * self.workers
+
+        cores = _available_cores()
+        self._cores: List[Optional[List[int]]] = [None] * self.workers
+        if pin_cores and len(cores) >= self.workers * self.threads:
+            for s in range(self.workers):
+                self._cores[s] = cores[s * self.threads:(s + 1) * self.threads]
+
+        for s in range(self.workers):
+            self._start_worker(s)
+
+    def _start_worker(self, slot: int):
+        init = dict(self.init, threads=self.threads, cores=self._cores[slot])
+        task_q = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main, args=(slot, init, task_q, self._result_q),
+            name=f"wd-worker-{slot}", daemon=True,
+        )
+        proc.start()
+        self._procs[slot] = proc
+        self._task_qs[slot] = task_q
+
+    def _restart_worker(self, slot: int) -> bool:
+        proc = self._procs[slot]
+        if proc is not None:
+            proc.join(timeout=1.0)
+        if self._restarts[slot] >= MAX_SLOT_RESTARTS:
+            self._broken[slot] = True
+            print(f"❌ WD 워커 {slot} 재시작 한도 초과, 사용 중지")
+            return False
+        self._restarts[slot] += 1
+        print(f"🔁 WD 워커 {slot} 재시작 ({self._restarts[slot]}/{MAX_SLOT_RESTARTS})")
+        self._start_worker(slot)
+        return True
+
+    def wait_ready(self, timeout: float = READY_TIMEOUT_SEC) -> int:
+        """모든 워커의 세션 로드 완료(또는 실패)를 기다림 → 준비된 워커 수"""
+        pending = set(range(self.workers))
+        ready = 0
+        deadline = time.time() + timeout
+        while pending and time.time() < deadline:
+            try:
+                kind, slot, _, payload = self._result_q.get(timeout=POLL_INTERVAL_SEC)
+            except queue.Empty:
+                for s in list(pending):
+                    if not self._procs[s].is_alive():
+                        print(f"⚠️ WD 워커 {s} 시작 중 종료 (exitcode={self._procs[s].exitcode})")
+                        self._broken[s] = True
+                        pending.discard(s)
+                continue
+            if kind == "ready":
+                ready += 1
+            elif kind == "init_failed":
+                print(f"⚠️ WD 워커 {slot} 세션 로드 실패: {payload}")
+                self._broken[slot] = True
+            pending.discard(slot)
+        for s in pending:
+            self._broken[s] = True
+        return ready
+
+    def alive_workers(self) -> int:
+        return sum(1 for b in self._broken if not b)
+
+    def imap(self, items: Iterable[Tuple[object, List[str]]], spec: dict, cancel_event=None):
+        """
+        items: (meta, 경로 목록) 이터러블 → (meta, scores, errors) 를 items 순서대로 yield
+          scores: (len(경로), num_tags) float32 (실패 행은 NaN), errors: {경로 위치: 메시지}
+        - 워커 수 × 2 작업까지만 미리 배분 (부모 메모리/결과 재정렬 버퍼 상한)
+        - cancel_event 가 설정되면 새 배분을 멈추고 실행 중인 작업만 회수한 뒤 종료
+        """
+        items = iter(items)
+        num_tags = int(self.init["num_tags"])
+        order = deque()                      # (task_id, meta) 제출 순서
+        results: Dict[int, tuple] = {}       # task_id → (scores, errors)
+        queued = deque()                     # 배분 대기: (task_id, paths, attempts)
+        inflight: Dict[int, tuple] = {}      # slot → (task_id, paths, attempts)
+        idle = deque(s for s in range(self.workers) if not self._broken[s])
+        max_ahead = max(2, self.workers * 2)
+        next_id = 0
+        exhausted = False
+
+        def _fail(task_id, paths, message):
+            results[task_id] = (
+                np.full((len(paths), num_tags), np.nan, dtype=np.float32),
+                {k: message for k in range(len(paths))},
+            )
+
+        def _on_crash(slot):
+            task = inflight.pop(slot, None)
+            print(f"⚠️ WD 워커 {slot} 비정상 종료 (exitcode={self._procs[slot].exitcode})")
+            if self._restart_worker(slot):
+                idle.append(slot)
+            if task is None:
+                return
+            task_id, paths, attempts = task
+            if attempts + 1 < MAX_TASK_ATTEMPTS:
+                queued.appendleft((task_id, paths, attempts + 1))
+            else:
+                _fail(task_id, paths, CRASH_MESSAGE)
+
+        while True:
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if cancelled:
+                queued.clear()
+                if not inflight:
+                    return
+            else:
+                while not exhausted and len(order) < max_ahead:
+                    try:
+                        meta, paths = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    task_id = next_id
+                    next_id += 1
+                    order.append((task_id, meta))
+                    if paths:
+                        queued.append((task_id, list(paths), 0))
+                    else:
+                        results[task_id] = (np.zeros((0, num_tags), dtype=np.float32), {})
+
+                if queued and not idle and not inflight:
+                    # 살아 있는 워커가 없음 → 남은 작업은 실패 처리
+                    while queued:
+                        task_id, paths, _ = queued.popleft()
+                        _fail(task_id, paths, CRASH_MESSAGE)
+                while queued and idle:
+                    slot = idle.popleft()
+                    task = queued.popleft()
+                    self._task_qs[slot].put((task[0], task[1], spec))
+                    inflight[slot] = task
+
+                while order and order[0][0] in results:
+                    task_id, meta = order.popleft()
+                    scores, errors = results.pop(task_id)
+                    yield meta, scores, errors
+                if exhausted and not order:
+                    return
+
+            try:
+                kind, slot, task_id, payload = self._result_q.get(timeout=POLL_INTERVAL_SEC)
+            except queue.Empty:
+                for slot in list(inflight):
+                    if not self._procs[slot].is_alive():
+                        _on_crash(slot)
+                continue
+
+            if kind == "done":
+                task = inflight.get(slot)
+                if task is None or task[0] != task_id:
+                    continue  # 재시작 전에 늦게 도착한 결과
+                inflight.pop(slot)
+                idle.append(slot)
+                self._restarts[slot] = 0  # 재시작 상한은 연속 실패 기준
+                results[task_id] = payload
+            elif kind == "init_failed":
+                print(f"⚠️ WD 워커 {slot} 세션 로드 실패: {payload}")
+
+    def shutdown(self, timeout: float = 5.0):
+        """종료 신호 → timeout 안에 끝나지 않는 워커는 terminate"""
+        for s, task_q in enumerate(self._task_qs):
+            if task_q is not None and self._procs[s] is not None and self._procs[s].is_alive():
+                try:
+                    task_q.put(None)
+                except Exception:
+                    pass
+        deadline = time.time() + timeout
+        for proc in self._procs:
+            if proc is None:
+                continue
+            proc.join(timeout=max(0.0, deadline - time.time()))
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(timeout=1.0)
+        self._procs = [None] * self.workers
+        self._task_qs = [None] * self.workers
+        print("🛑 WD 워커 프로세스 풀 종료")
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+WD Tagger INT8 양자화 도구 (CPU 태깅용)
+- models/<모델명>/model.onnx → 같은 폴더에 model.int8.onnx 생성
+- dynamic: 가중치만 INT8 (MatMul/Gemm), 보정 데이터 불필요 — ViT/SwinV2/EVA 계열 CPU 추론에 효과적
+- static : 사용자 이미지로 활성값 범위를 보정한 QDQ 모델 (MatMul/Gemm/Conv)
+- compare_precision(): 사용자 이미지 샘플로 FP32 vs INT8 태그 일치도/속도 리포트
+- 사용: wd_tagger_config.json 의 "precision": "int8"
+
+명령행: python wd_quantize.py <model_id> [--static] [--images <폴더>] [--samples 32] [--no-report]
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image as PILImage
+
+from wd_tagger import (
+    INT8_MODEL_FILENAME,
+    MODEL_FILENAME,
+    WdTaggerModel,
+    get_tagger_config_value,
+)
+
+
+REPORT_FILENAME = "int8_report.json"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif")
+
+
+def _model_dir(model_id: str) -> Path:
+    return Path(__file__).resolve().parent / "models" / model_id.split('/')[-1]
+
+
+def _sample_evenly(items: List[str], count: int) -> List[str]:
+    """목록 전체에서 고르게 count 개 선택 (재현 가능하도록 무작위 아님)"""
+    if count <= 0 or len(items) <= count:
+        return list(items)
+    idx = np.linspace(0, len(items) - 1, count).round().astype(int)
+    return [items[i] for i in sorted(set(idx.tolist()))]
+
+
+def list_images(folder: str) -> List[str]:
+    """폴더 안의 이미지 경로 (하위 폴더 포함, 이름순)"""
+    found = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                found.append(os.path.join(root, name))
+    return sorted(found)
+
+
+# ────────────── 양자화 ──────────────
+def _prepare_calibration_tensors(model_id: str, image_paths: List[str]) -> List[np.ndarray]:
+    """정적 양자화 보정용 입력 (태깅과 같은 전처리)"""
+    labels_model = WdTaggerModel(model_id=model_id, use_gpu=False)
+    labels_model.load_labels_only()
+    tensors = []
+    for path in image_paths:
+        try:
+            tensors.append(labels_model._prepare_tensor_reference(PILImage.open(path)))
+        except Exception as e:
+            print(f"⚠️ 보정 이미지 건너뜀: {path} ({e})")
+    return tensors
+
+
+def quantize_model(
+    model_id: str,
+    mode: str = "dynamic",
+    calibration_images: Optional[List[str]] = None,
+    max_calibration: int = 64,
+) -> Optional[Path]:
+    """
+    다운로드된 WD 모델의 INT8 사본 생성 → models/<모델명>/model.int8.onnx
+    mode: "dynamic" (가중치만) / "static" (calibration_images 필요)
+    실패 시 None (원본은 건드리지 않음)
+    """
+    try:
+        from onnxruntime.quantization import (
+            CalibrationDataReader,
+            QuantFormat,
+            QuantType,
+            quantize_dynamic,
+            quantize_static,
+        )
+    except ImportError as e:
+        print(f"❌ onnxruntime.quantization 을 불러올 수 없습니다 (pip install onnx 필요): {e}")
+        return None
+
+    model_dir = _model_dir(model_id)
+    src = model_dir / MODEL_FILENAME
+    dst = model_dir / INT8_MODEL_FILENAME
+    if not src.is_file():
+        print(f"❌ 원본 모델 없음 (먼저 다운로드 필요): {src}")
+        return None
+    if mode == "static" and not calibration_images:
+        print("❌ 정적 양자화에는 보정용 이미지가 필요합니다.")
+        return None
+
+    prep = model_dir / "model.quant_prep.onnx"
+    tmp = model_dir / (INT8_MODEL_FILENAME + ".tmp")
+    start = time.time()
+    print(f"🔢 INT8 양자화 시작 ({mode}): {src}")
+    try:
+        # 형상 추론/그래프 정리 (실패해도 원본으로 진행)
+        quant_src = src
+        try:
+            from onnxruntime.quantization.shape_inference import quant_pre_process
+            quant_pre_process(str(src), str(prep), skip_symbolic_shape=True)
+            quant_src = prep
+        except Exception as e:
+            print(f"⚠️ 양자화 전처리 생략: {e}")
+
+        if mode == "static":
+            import onnx
+            input_name = onnx.load(str(quant_src), load_external_data=False).graph.input[0].name
+            tensors = _prepare_calibration_tensors(model_id, _sample_evenly(calibration_images, max_calibration))
+            if not tensors:
+                print("❌ 사용할 수 있는 보정 이미지가 없습니다.")
+                return None
+
+            class _Reader(CalibrationDataReader):
+                def __init__(self):
+                    self._it = iter(tensors)
+
+                def get_next(self):
+                    t = next(self._it, None)
+                    return None if t is None else {input_name: t}
+
+            quantize_static(
+                str(quant_src),
+                str(tmp),
+                _Reader(),
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                op_types_to_quantize=["MatMul", "Gemm", "Conv"],
+                per_channel=True,
+            )
+        else:
+            quantize_dynamic(
+                str(quant_src),
+                str(tmp),
+                weight_type=QuantType.QInt8,
+                op_types_to_quantize=["MatMul", "Gemm"],
+            )
+
+        os.replace(tmp, dst)
+        src_mb = src.stat().st_size / (1024 * 1024)
+        dst_mb = dst.stat().st_size / (1024 * 1024)
+        print(f"✅ INT8 모델 생성 완료: {dst} ({src_mb:.0f}MB → {dst_mb:.0f}MB, {time.time() - start:.1f}초)")
+        return dst
+    except Exception as e:
+        print(f"❌ INT8 양자화 실패: {e}")
+        return None
+    finally:
+        for p in (prep, tmp):
+            try:
+                if p.exists():
+                    p.unlink()
+            except OSError:
+                pass
+
+
+# ────────────── FP32 vs INT8 비교 ──────────────
+def _timed_scores(model: WdTaggerModel, tensors: List[np.ndarray]) -> Tuple[np.ndarray, float]:
+    """(N, num_tags) 점수와 이미지당 추론 시간(초) — 첫 배치로 워밍업 후 측정"""
+    model._run_batch(tensors[:1])
+    start = time.perf_counter()
+    scores = model._run_batch(tensors)
+    return scores, (time.perf_counter() - start) / max(1, len(tensors))
+
+
+def compare_precision(
+    model_id: str,
+    image_paths: List[str],
+    sample_size: int = 32,
+    use_gpu: bool = False,
+    save_report: bool = True,
+) -> Optional[Dict]:
+    """
+    사용자 이미지 샘플에서 FP32 / INT8 모델의 태그 집합과 속도 비교.
+    태그 선택은 현재 WD 설정(임계값/MCut/max_tags)을 그대로 사용.
+    """
+    sample = _sample_evenly(image_paths, sample_size)
+    if not sample:
+        print("❌ 비교할 이미지가 없습니다.")
+        return None
+    if not (_model_dir(model_id) / INT8_MODEL_FILENAME).is_file():
+        print("❌ INT8 모델이 없습니다. 먼저 quantize_model() 을 실행하세요.")
+        return None
+
+    fp32 = WdTaggerModel(model_id=model_id, use_gpu=use_gpu, precision="fp32")
+    fp32.load_model()
+    int8 = WdTaggerModel(model_id=model_id, use_gpu=use_gpu, precision="int8")
+    int8.load_model()
+    if int8.active_precision != "int8":
+        print("❌ INT8 모델을 로드하지 못했습니다.")
+        return None
+
+    tensors, used = [], []
+    for path in sample:
+        try:
+            tensors.append(fp32._prepare_tensor_reference(PILImage.open(path)))
+            used.append(path)
+        except Exception as e:
+            print(f"⚠️ 비교 이미지 건너뜀: {path} ({e})")
+    if not tensors:
+        return None
+
+    fp32_scores, fp32_sec = _timed_scores(fp32, tensors)
+    int8_scores, int8_sec = _timed_scores(int8, tensors)
+
+    general_mcut_min = None
+    if get_tagger_config_value("general_mcut_min_enabled", False):
+        general_mcut_min = get_tagger_config_value("general_mcut_min", 0.15)
+    character_mcut_min = None
+    if get_tagger_config_value("character_mcut_min_enabled", False):
+        character_mcut_min = get_tagger_config_value("character_mcut_min", 0.15)
+    select_kwargs = dict(
+        general_mcut_enabled=get_tagger_config_value("general_mcut_enabled", False),
+        character_mcut_enabled=get_tagger_config_value("character_mcut_enabled", False),
+        max_tags=get_tagger_config_value("max_tags", 30),
+        general_mcut_min=general_mcut_min,
+        character_mcut_min=character_mcut_min,
+    )
+    fp32_tags = fp32._select_tags_batch(fp32_scores, **select_kwargs)
+    int8_tags = int8._select_tags_batch(int8_scores, **select_kwargs)
+
+    jaccards, missing, extra, exact = [], 0, 0, 0
+    for a, b in zip(fp32_tags, int8_tags):
+        sa, sb = {t for t, _ in a}, {t for t, _ in b}
+        union = sa | sb
+        jaccards.append(len(sa & sb) / len(union) if union else 1.0)
+        missing += len(sa - sb)
+        extra += len(sb - sa)
+        exact += int(sa == sb)
+
+    diff = np.abs(fp32_scores.astype(np.float32) - int8_scores.astype(np.float32))
+    n = len(used)
+    report = {
+        "model_id": model_id,
+        "images": n,
+        "provider": "GPU" if use_gpu else "CPU",
+        "fp32_ms_per_image": round(fp32_sec * 1000, 2),
+        "int8_ms_per_image": round(int8_sec * 1000, 2),
+        "speedup": round(fp32_sec / int8_sec, 2) if int8_sec > 0 else None,
+        "fp32_size_mb": round(fp32.model_path.stat().st_size / (1024 * 1024), 1),
+        "int8_size_mb": round(int8.model_path.stat().st_size / (1024 * 1024), 1),
+        "mean_jaccard": round(float(np.mean(jaccards)), 4),
+        "min_jaccard": round(float(np.min(jaccards)), 4),
+        "exact_match_ratio": round(exact / n, 4),
+        "missing_tags_per_image": round(missing / n, 2),
+        "extra_tags_per_image": round(extra / n, 2),
+        "mean_abs_score_diff": round(float(diff.mean()), 5),
+        "max_abs_score_diff": round(float(diff.max()), 5),
+    }
+
+    print("📊 FP32 vs INT8 비교 리포트")
+    print(f"   - 이미지: {n}장 ({report['provider']})")
+    print(f"   - 속도: {report['fp32_ms_per_image']}ms → {report['int8_ms_per_image']}ms/장 (x{report['speedup']})")
+    print(f"   - 크기: {report['fp32_size_mb']}MB → {report['int8_size_mb']}MB")
+    print(f"   - 태그 일치도(Jaccard): 평균 {report['mean_jaccard']}, 최소 {report['min_jaccard']}, 완전 일치 {report['exact_match_ratio']:.0%}")
+    print(f"   - 이미지당 누락 {report['missing_tags_per_image']}개 / 추가 {report['extra_tags_per_image']}개")
+    print(f"   - 점수 차이: 평균 {report['mean_abs_score_diff']}, 최대 {report['max_abs_score_diff']}")
+
+    if save_report:
+        report_path = _model_dir(model_id) / REPORT_FILENAME
+        try:
+            with report_path.open("w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"💾 리포트 저장: {report_path}")
+        except Exception as e:
+            print(f"⚠️ 리포트 저장 실패: {e}")
+    return report
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0].startswith("--"):
+        print(__doc__)
+        sys.exit(1)
+
+    def _opt(name, default=None):
+        if name in args:
+            i = args.index(name)
+            if i + 1 < len(args):
+                return args[i + 1]
+        return default
+
+    target_model = args[0]
+    images_dir = _opt("--images")
+    images = list_images(images_dir) if images_dir else []
+    samples = int(_opt("--samples", 32))
+
+    result = quantize_model(
+        target_model,
+        mode="static" if "--static" in args else "dynamic",
+        calibration_images=images,
+    )
+    if result is not None and images and "--no-report" not in args:
+        compare_precision(target_model, images, sample_size=samples)
@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+WD Tagger 데이터셋 전체 재임계값 적용 (재추론 없음)
+- 배치 태깅 때 저장된 원시 점수 캐시(wd_score_cache)에 새 임계값/MCut/max_tags/exclude_tags 를 일괄 적용
+- 점수 행렬은 memmap 에서 행 묶음(CHUNK_ROWS) 단위로 읽어 벡터화 처리 (전체 dense 행렬을 만들지 않음)
+- preview(): 추가/제거될 태그 수만 집계 → WD 설정 화면 슬라이더 실시간 미리보기
+- apply(): all_tags_manager + 타임머신 한 트랜잭션으로 이미지별 변경 반영 (되돌리기 가능)
+- 백그라운드 사용: capture_state()(GUI 스레드) → prepare(state)/preview()/plan_changes()(작업 스레드)
+  → commit_changes()(GUI 스레드). needs_prepare() 는 태그/점수 캐시가 바뀌었는지 확인 (버전 비교)
+
+제거 규칙(보수적): 이전 WD 결과(tag_confidence 의 score >= 0 항목)에 있던 태그만 제거 대상.
+수동 태그/LLaVA 태그는 건드리지 않고, 리무버(image_removed_tags)에 있는 태그는 다시 추가하지 않는다.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from wd_tagger import DEFAULT_EXCLUDE_TAGS, get_tagger_config_value
+
+
+CHUNK_ROWS = 1024  # memmap 에서 한 번에 읽는 이미지 수
+DEFAULT_MODEL_ID = "SmilingWolf/wd-vit-large-tagger-v3"
+
+
+def resolve_rethreshold_settings(overrides: Optional[Dict] = None) -> Dict:
+    """현재 WD 설정 + 덮어쓸 값 → 재임계값 설정 dict"""
+    settings = {
+        "general_threshold": get_tagger_config_value("general_threshold", 0.35),
+        "character_threshold": get_tagger_config_value("character_threshold", 0.85),
+        "general_mcut_enabled": get_tagger_config_value("general_mcut_enabled", False),
+        "character_mcut_enabled": get_tagger_config_value("character_mcut_enabled", False),
+        "general_mcut_min_enabled": get_tagger_config_value("general_mcut_min_enabled", False),
+        "general_mcut_min": get_tagger_config_value("general_mcut_min", 0.15),
+        "character_mcut_min_enabled": get_tagger_config_value("character_mcut_min_enabled", False),
+        "character_mcut_min": get_tagger_config_value("character_mcut_min", 0.15),
+        "max_tags": get_tagger_config_value("max_tags", 30),
+        "exclude_tags": get_tagger_config_value("exclude_tags", DEFAULT_EXCLUDE_TAGS),
+    }
+    if overrides:
+        settings.update({k: v for k, v in overrides.items() if v is not None})
+    return settings
+
+
+def _selection_kwargs(settings: Dict) -> Dict:
+    """재임계값 설정 → WdScoreSelector.select_mask 인자 (MCut 최소값은 활성화된 경우만)"""
+    return {
+        "general_threshold": float(settings["general_threshold"]),
+        "character_threshold": float(settings["character_threshold"]),
+        "general_mcut_enabled": bool(settings["general_mcut_enabled"]),
+        "character_mcut_enabled": bool(settings["character_mcut_enabled"]),
+        "max_tags": int(settings["max_tags"] or 0),
+        "exclude_tags": settings.get("exclude_tags"),
+        "general_mcut_min": float(settings["general_mcut_min"]) if settings.get("general_mcut_min_enabled") else None,
+        "character_mcut_min": float(settings["character_mcut_min"]) if settings.get("character_mcut_min_enabled") else None,
+    }
+
+
+class WdRethresholdEngine:
+    """캐시된 WD 점수로 all_tags 전체에 새 임계값을 적용하는 엔진"""
+
+    def __init__(self, app_instance, model_id: Optional[str] = None):
+        self.app = app_instance
+        self.model_id = model_id or getattr(app_instance, 'current_model_id', None) or DEFAULT_MODEL_ID
+        self.model = None
+        self.cache = None
+        self.paths: List[str] = []
+        self.keys: List[str] = []
+        self.is_prepared = False
+        self._signature = None  # prepare() 당시 (태그 상태 버전, 점수 캐시 generation)
+
+        # 후보 열(general → character) 기준 정보
+        self._cand_names: Optional[np.ndarray] = None
+        self._name_to_col: Dict[str, int] = {}
+        self._dup_groups: List[Tuple[int, np.ndarray]] = []
+
+        # 이미지별 태그 상태 (행 오름차순 COO: rows, cols)
+        self._cur = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self._old = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self._blocked = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+    # ────────────── 준비 ──────────────
+    def _labels_model(self):
+        """이미 로드된 전역 태거를 재사용, 없으면 라벨만 로드한 모델"""
+        import wd_tagger
+        tagger = wd_tagger._global_tagger
+        if (tagger is not None and tagger.model_id == self.model_id and tagger.selector is not None
+                and tagger.precision == wd_tagger._resolve_precision()):
+            return tagger
+        model = wd_tagger.WdTaggerModel(model_id=self.model_id, use_gpu=False)
+        return model if model.load_labels_only() else None
+
+    def _candidate_variants(self) -> List[Dict]:
+        """
+        배치 태깅이 저장했을 수 있는 캐시 설정 조합
+        (현재 설정 → 추가 뷰 생략(perf_tier=speed 대량 배치) → TTA 없음 → 기본 순)
+        """
+        import wd_tagger
+        apply_sigmoid = bool(get_tagger_config_value("apply_sigmoid", False))
+        tta_enabled = bool(get_tagger_config_value("tta_enabled", False))
+        tta_flip = bool(get_tagger_config_value("tta_horizontal_flip", True))
+        merge_mode = str(get_tagger_config_value("tta_merge_mode", "mean"))
+        variants = []
+        for v in (
+            self.model._score_cache_variant(
+                apply_sigmoid=apply_sigmoid, tta_merge_mode=merge_mode,
+                tta_views=wd_tagger._enh_tta_views(tta_enabled, tta_flip)),
+            self.model._score_cache_variant(
+                apply_sigmoid=apply_sigmoid, tta_merge_mode=merge_mode,
+                tta_views=wd_tagger._enh_tta_views(tta_enabled, tta_flip, extra_views=False)),
+            self.model._score_cache_variant(apply_sigmoid=apply_sigmoid),
+            self.model._score_cache_variant(),
+        ):
+            if v not in variants:
+                variants.append(v)
+        return variants
+
+    def _state_signature(self):
+        app = self.app
+        signature = []
+        for name in ('all_tags', 'image_removed_tags'):
+            store = getattr(app, name, None)
+            signature.append((id(store), getattr(store, 'version', None)))
+        return tuple(signature)
+
+    def capture_state(self) -> Dict:
+        """
+        prepare() 에 넘길 태그 상태 복사본 (GUI 스레드에서 호출).
+        작업 스레드는 이 복사본만 읽으므로 그동안 태그를 편집해도 안전하다.
+        """
+        app = self.app
+        return {
+            "all_tags": {str(p): list(tags) for p, tags in (getattr(app, 'all_tags', None) or {}).items()},
+            "tag_confidence": {p: list(v) for p, v in (getattr(app, 'tag_confidence', None) or {}).items()},
+            "image_removed_tags": {p: list(v) for p, v in (getattr(app, 'image_removed_tags', None) or {}).items()},
+            "signature": self._state_signature(),
+        }
+
+    def needs_prepare(self) -> bool:
+        """준비 전이거나, 준비 이후 태그 상태/점수 캐시가 바뀌었으면 True"""
+        if not self.is_prepared or self._signature is None:
+            return True
+        state_signature, generation = self._signature
+        if state_signature != self._state_signature():
+            return True
+        return self.cache is not None and self.cache.generation != generation
+
+    def prepare(self, state: Optional[Dict] = None) -> int:
+        """
+        all_tags 의 이미지 중 캐시된 점수가 있는 것만 모으고 현재 태그 상태를 스냅샷.
+        state: capture_state() 결과 (작업 스레드에서 준비할 때), None 이면 앱 상태를 바로 읽음
+        반환: 재임계값 대상 이미지 수
+        """
+        from wd_score_cache import WdScoreCache
+
+        if state is None:
+            state = self.capture_state()
+        self.is_prepared = False
+        self._signature = None
+        self.paths, self.keys, self.cache = [], [], None
+        if not get_tagger_config_value("score_cache_enabled", True):
+            print("⚠️ 점수 캐시가 꺼져 있어 재임계값을 적용할 수 없습니다.")
+            return 0
+
+        self.model = self._labels_model()
+        if self.model is None or self.model.selector is None:
+            return 0
+
+        image_paths = list(state["all_tags"].keys())
+
+        # 캐시 적중이 가장 많은 설정 조합 선택 (존재하는 캐시 폴더만 연다)
+        best = (0, None, [], [])
+        for variant in self._candidate_variants():
+            if not WdScoreCache.dir_for_model(self.model_id, variant).is_dir():
+                continue
+            cache = self.model._open_score_cache(variant)
+            if cache is None or len(cache) == 0:
+                continue
+            paths, keys = [], []
+            for p in image_paths:
+                key = cache.known_key(p)
+                if key is not None:
+                    paths.append(p)
+                    keys.append(key)
+            if len(paths) > best[0]:
+                best = (len(paths), cache, paths, keys)
+        _, self.cache, self.paths, self.keys = best
+        if self.cache is None:
+            print("⚠️ 재임계값 대상 없음 (캐시된 WD 점수가 있는 이미지가 없습니다)")
+            return 0
+
+        self._build_columns()
+        self._snapshot_tags(state)
+        self._signature = (state["signature"], self.cache.generation)
+        self.is_prepared = True
+        print(f"📦 재임계값 준비 완료: {len(self.paths)}/{len(image_paths)}장 (캐시: {self.cache.cache_dir.name})")
+        return len(self.paths)
+
+    def _build_columns(self):
+        selector = self.model.selector
+        self._cand_names = selector.tag_names[selector.candidate_idx]
+        self._name_to_col = {}
+        groups: Dict[int, List[int]] = {}
+        for col, name in enumerate(self._cand_names.tolist()):
+            first = self._name_to_col.setdefault(name, col)
+            if first != col:
+                groups.setdefault(first, []).append(col)
+        self._dup_groups = [(first, np.asarray(cols, dtype=np.int64)) for first, cols in groups.items()]
+
+    def _to_coo(self, per_image: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        rows: List[int] = []
+        cols: List[int] = []
+        for r, names in enumerate(per_image):
+            for name in names:
+                col = self._name_to_col.get(name)
+                if col is not None:
+                    rows.append(r)
+                    cols.append(col)
+        return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+
+    def _snapshot_tags(self, state: Dict):
+        all_tags = state["all_tags"]
+        confidence = state["tag_confidence"]
+        removed = state["image_removed_tags"]
+        self._cur = self._to_coo([all_tags.get(p, []) for p in self.paths])
+        self._old = self._to_coo([
+            [t for t, s in confidence.get(p, []) if s is not None and s >= 0]
+            for p in self.paths
+        ])
+        self._blocked = self._to_coo([removed.get(p, []) for p in self.paths])
+
+    # ────────────── 벡터화 계산 ──────────────
+    @staticmethod
+    def _dense(coo: Tuple[np.ndarray, np.ndarray], start: int, stop: int, width: int) -> np.ndarray:
+        rows, cols = coo
+        a, b = np.searchsorted(rows, [start, stop])
+        out = np.zeros((stop - start, width), dtype=bool)
+        out[rows[a:b] - start, cols[a:b]] = True
+        return out
+
+    def _iter_chunks(self, settings: Dict):
+        """(start, 후보 점수, 새 선택, 현재, 이전 WD, 리무버) 를 행 묶음 단위로 생성"""
+        kwargs = _selection_kwargs(settings)
+        width = len(self._cand_names)
+        for start in range(0, len(self.keys), CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, len(self.keys))
+            scores = self.cache.get_many(self.keys[start:stop])
+            candidates, new = self.model.selector.select_mask(scores, **kwargs)
+            # 같은 이름의 중복 열은 첫 열 하나로 접어서 이름 단위로 비교
+            for first, others in self._dup_groups:
+                new[:, first] |= new[:, others].any(axis=1)
+                new[:, others] = False
+            yield (
+                start,
+                candidates,
+                new,
+                self._dense(self._cur, start, stop, width),
+                self._dense(self._old, start, stop, width),
+                self._dense(self._blocked, start, stop, width),
+            )
+
+    def preview(self, settings: Optional[Dict] = None, cancelled=None) -> Optional[Dict]:
+        """
+        설정 적용 시 데이터셋 전체 변경량 (all_tags 는 수정하지 않음)
+        cancelled: 행 묶음마다 확인하는 콜백 (True 면 중단하고 None 반환 → 더 새 미리보기가 대기 중)
+        """
+        if not self.is_prepared:
+            self.prepare()
+        result = {"images": len(self.paths), "changed_images": 0, "added": 0, "removed": 0}
+        if not self.is_prepared or not self.paths:
+            return result
+        settings = resolve_rethreshold_settings(settings)
+        for _, _, new, cur, old, blocked in self._iter_chunks(settings):
+            if cancelled is not None and cancelled():
+                return None
+            added = new & ~cur & ~blocked
+            removed = old & cur & ~new
+            result["added"] += int(added.sum())
+            result["removed"] += int(removed.sum())
+            result["changed_images"] += int((added | removed).any(axis=1).sum())
+        return result
+
+    # ────────────── 적용 ──────────────
+    def _ordered_pairs(self, candidates_row: np.ndarray, mask_row: np.ndarray) -> List[Tuple[str, float]]:
+        cols = np.flatnonzero(mask_row)
+        cols = cols[np.argsort(-candidates_row[cols], kind="stable")]
+        return list(zip(self._cand_names[cols].tolist(), candidates_row[cols].tolist()))
+
+    def apply(self, settings: Optional[Dict] = None) -> Dict:
+        """
+        새 설정으로 all_tags 전체 갱신 (타임머신 한 트랜잭션).
+        최신 태그 상태로 다시 스냅샷한 뒤 계산한다.
+        """
+        self.prepare()
+        return self.commit_changes(self.plan_changes(settings))
+
+    def plan_changes(self, settings: Optional[Dict] = None, cancelled=None) -> Optional[Dict]:
+        """
+        적용할 변경 계산 (all_tags 는 건드리지 않음 → 작업 스레드에서 호출 가능).
+        반환: {"result", "changes": [(path, 제거할 태그 집합, 추가할 태그 목록)], "confidences", "settings"}
+        cancelled 가 True 를 반환하면 None
+        """
+        result = {"images": len(self.paths), "changed_images": 0, "added": 0, "removed": 0}
+        plan = {"result": result, "changes": [], "confidences": {}, "settings": {}}
+        if not self.is_prepared or not self.paths:
+            return plan
+        settings = resolve_rethreshold_settings(settings)
+        plan["settings"] = settings
+
+        changes = plan["changes"]
+        confidences = plan["confidences"]  # path → 새 WD [(tag, score)]
+        for start, candidates, new, cur, old, blocked in self._iter_chunks(settings):
+            if cancelled is not None and cancelled():
+                return None
+            added = new & ~cur & ~blocked
+            removed = old & cur & ~new
+            present = new & (cur | ~blocked)
+            changed_rows = np.flatnonzero((added | removed).any(axis=1))
+            conf_rows = np.flatnonzero((present != old).any(axis=1))
+
+            for r in conf_rows:
+                confidences[self.paths[start + r]] = self._ordered_pairs(candidates[r], present[r])
+            for r in changed_rows:
+                removed_names = set(self._cand_names[removed[r]].tolist())
+                added_names = [tag for tag, _ in self._ordered_pairs(candidates[r], added[r])]
+                changes.append((self.paths[start + r], removed_names, added_names))
+                result["added"] += int(added[r].sum())
+                result["removed"] += int(removed[r].sum())
+        result["changed_images"] = len(changes)
+        return plan
+
+    def commit_changes(self, plan: Dict) -> Dict:
+        """
+        plan_changes() 결과를 all_tags 에 반영 (GUI 스레드).
+        계산 이후 편집된 태그도 보존되도록 이미지별 현재 태그에 제거/추가만 적용한다.
+        """
+        from all_tags_manager import get_tags_for_image, set_tags_for_image
+        from global_tag_manager import add_global_tag, remove_global_tag
+
+        result = plan["result"]
+        settings = plan["settings"]
+        confidences = plan["confidences"]
+        changes = []        # (path, before, after)
+        for path, removed_names, added_names in plan["changes"]:
+            before = list(get_tags_for_image(self.app, path))
+            after = [t for t in before if t not in removed_names]
+            for tag in added_names:
+                if tag not in after:
+                    after.append(tag)
+            changes.append((path, before, after))
+
+        if not changes and not confidences:
+            print("ℹ️ 재임계값 적용: 변경 없음")
+            return result
+
+        # 2) 신뢰도 정보 갱신 (LLaVA 항목은 보존)
+        if not hasattr(self.app, 'tag_confidence'):
+            self.app.tag_confidence = {}
+        for path, pairs in confidences.items():
+            llava_pairs = [(t, s) for t, s in self.app.tag_confidence.get(path, []) if s == -1.0]
+            self.app.tag_confidence[path] = llava_pairs + pairs
+
+        # 3) 태그 반영 + 타임머신 기록 (한 트랜잭션)
+        TM = None
+        try:
+            from timemachine_log import TM as _TM
+            TM = _TM
+        except Exception:
+            TM = None
+        if TM is not None and changes:
+            TM.begin("wd: rethreshold dataset", context={
+                "source": "wd_rethreshold",
+                "model_id": self.model_id,
+                "settings": {k: v for k, v in settings.items() if k != "exclude_tags"},
+            })
+        try:
+            for path, before, after in changes:
+                set_tags_for_image(self.app, path, after)
+                before_set, after_set = set(before), set(after)
+                for tag in after:
+                    if tag not in before_set:
+                        add_global_tag(self.app, tag, False)
+                for tag in before:
+                    if tag not in after_set:
+                        remove_global_tag(self.app, tag)
+                if TM is not None:
+                    try:
+                        TM.log_change({
+                            "type": "batch_apply_per_image",
+                            "image": path,
+                            "before": before,
+                            "after": after,
+                        })
+                    except Exception:
+                        pass
+            if TM is not None and changes:
+                TM.commit()
+        except Exception as e:
+            print(f"❌ 재임계값 적용 실패: {e}")
+            if TM is not None and changes:
+                try:
+                    TM.abort()
+                except Exception:
+                    pass
+            raise
+
+        self.is_prepared = False  # 이후 미리보기는 적용된 상태로 다시 준비
+        print(f"✅ 재임계값 적용: +{result['added']} / -{result['removed']} ({result['changed_images']}장)")
+        self._refresh_ui({path for path, _, _ in changes})
+        return result
+
+    def _refresh_ui(self, changed_paths):
+        app = self.app
+        try:
+            current = getattr(app, 'current_image', None)
+            if current in changed_paths:
+                from all_tags_manager import get_tags_for_image
+                app.current_tags = list(get_tags_for_image(app, current))
+                if hasattr(app, 'update_current_tags_display'):
+                    app.update_current_tags_display()
+                if hasattr(app, 'update_tag_tree'):
+                    app.update_tag_tree()
+            if hasattr(app, 'update_global_tag_stats'):
+                app.update_global_tag_stats()
+            if hasattr(app, 'tag_stylesheet_editor') and app.tag_stylesheet_editor:
+                app.tag_stylesheet_editor.schedule_update()
+        except Exception as e:
+            print(f"⚠️ 재임계값 UI 갱신 실패: {e}")
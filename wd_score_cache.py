@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+WD Tagger 원시 점수 캐시 (재추론 없이 재임계값 적용용)
+- 이미지별 (num_tags,) 점수 벡터를 디스크에 float16 행렬로 보관 (memmap으로 읽기)
+- 키: 이미지 내용 해시 + model_id + 점수에 영향을 주는 설정(sigmoid/TTA/패딩/입력 크기)
+- 경로: models/<모델명>/score_cache/<설정 해시>/
+    * scores.f16  : (rows, num_tags) float16 행렬 (행 단위 append)
+    * index.json  : 내용 해시 → 행 번호/마지막 사용 시각, 경로 → (크기, mtime, 내용 해시) 메모
+- 임계값/MCut/max_tags/exclude_tags 는 키에 포함하지 않음 (캐시된 점수에 다시 적용)
+- 정밀도: 저장은 float16 → 캐시 적중 점수는 새로 추론한 점수와 최대 ~0.0005 차이
+  (새 추론 결과는 반올림하지 않고 그대로 후처리, 임계값에 아주 가까운 태그만 적중 여부에 따라 달라질 수 있음)
+- 크기 제한: 행 수 / 파일 크기 상한을 넘으면 오래 안 쓴 행부터 제거하고 파일을 다시 씀 (상한의 90%까지 줄임)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+SCORES_FILENAME = "scores.f16"
+STORAGE_DTYPE = "<f2"
+INDEX_FILENAME = "index.json"
+INDEX_VERSION = 1
+SAVE_INTERVAL_SEC = 30.0  # 인덱스 주기 저장 간격 (대량 배치 중 크래시 대비)
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_MAX_MB = 2048
+EVICT_TO_RATIO = 0.9  # 정리 시 상한의 이 비율까지 줄임 (append 마다 파일을 다시 쓰지 않도록)
+
+
+def _script_dir() -> Path:
+    return Path(__file__).resolve().parent
+
+
+def file_content_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """이미지 파일 내용 해시 (blake2b 128bit)"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def variant_key(variant: Dict) -> str:
+    """점수에 영향을 주는 설정 dict → 디렉터리 이름용 짧은 해시"""
+    payload = json.dumps(variant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class WdScoreCache:
+    """
+    모델+설정 조합 하나에 대한 원시 점수 캐시.
+    - lookup()은 프리페치 워커 스레드에서 동시에 호출될 수 있음 (내부 lock)
+    - put_many()는 추론 스레드에서 배치 단위로 호출, 인덱스는 주기적으로/flush()에서 저장
+    - 조회 시각(used)은 메모리에서만 갱신하고 다른 변경과 함께 저장 (조회만으로 인덱스를 다시 쓰지 않음)
+    - generation 은 행 추가/정리/삭제 때마다 증가 (재임계값 엔진이 캐시 변경을 알아채는 용도)
+    """
+
+    def __init__(self, cache_dir: Path, num_tags: int, variant: Optional[Dict] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_mb: float = DEFAULT_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.num_tags = int(num_tags)
+        self.variant = dict(variant or {})
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(float(max_mb) * 1024 * 1024))
+        self.generation = 0
+        self.scores_path = self.cache_dir / SCORES_FILENAME
+        self.index_path = self.cache_dir / INDEX_FILENAME
+
+        self._lock = threading.RLock()
+        self._content: Dict[str, int] = {}       # 내용 해시 → 행
+        self._used: Dict[str, float] = {}        # 내용 해시 → 마지막 추가/조회 시각
+        self._paths: Dict[str, list] = {}        # 절대 경로 → [size, mtime_ns, 내용 해시]
+        self._rows = 0
+        self._mm: Optional[np.memmap] = None
+        self._mm_rows = 0
+        self._dirty = False
+        self._last_save = time.time()
+
+        self._load()
+
+    # ────────────── 생성/로드 ──────────────
+    @staticmethod
+    def dir_for_model(model_id: str, variant: Dict) -> Path:
+        """models/<모델명>/score_cache/<설정 해시>/ 경로 (생성하지 않음)"""
+        model_name = model_id.split('/')[-1]
+        full_variant = {"model_id": model_id, **variant}
+        return _script_dir() / "models" / model_name / "score_cache" / variant_key(full_variant)
+
+    @classmethod
+    def for_model(cls, model_id: str, num_tags: int, variant: Dict,
+                  max_entries: int = DEFAULT_MAX_ENTRIES, max_mb: float = DEFAULT_MAX_MB) -> "WdScoreCache":
+        """models/<모델명>/score_cache/<설정 해시>/ 캐시 열기"""
+        full_variant = {"model_id": model_id, **variant}
+        return cls(cls.dir_for_model(model_id, variant), num_tags, full_variant, max_entries, max_mb)
+
+    def set_limits(self, max_entries: int, max_mb: float):
+        """크기 상한 변경 (넘으면 바로 정리)"""
+        with self._lock:
+            self.max_entries = max(1, int(max_entries))
+            self.max_bytes = max(1, int(float(max_mb) * 1024 * 1024))
+            self._enforce_limits()
+
+    def _load(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            if self.index_path.is_file():
+                with self.index_path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != INDEX_VERSION or int(data.get("num_tags", -1)) != self.num_tags:
+                    print(f"⚠️ 점수 캐시 형식 불일치, 초기화: {self.cache_dir}")
+                    self._reset_files()
+                    return
+                self._content = {k: int(v) for k, v in data.get("content", {}).items()}
+                used = data.get("used", {})
+                self._used = {k: float(used.get(k, 0)) for k in self._content}
+                self._paths = dict(data.get("paths", {}))
+                self._rows = int(data.get("rows", 0))
+        except Exception as e:
+            print(f"⚠️ 점수 캐시 인덱스 로드 실패, 초기화: {e}")
+            self._reset_files()
+            return
+
+        # 인덱스에 기록되지 않은 꼬리 행(저장 전 종료 등)은 잘라낸다
+        row_bytes = self.num_tags * 2
+        expected = self._rows * row_bytes
+        try:
+            actual = self.scores_path.stat().st_size if self.scores_path.is_file() else 0
+        except OSError:
+            actual = 0
+        if actual < expected:
+            print(f"⚠️ 점수 캐시 파일 손상(크기 부족), 초기화: {self.scores_path}")
+            self._reset_files()
+        elif actual > expected:
+            with open(self.scores_path, "r+b") as f:
+                f.truncate(expected)
+        with self._lock:
+            self._enforce_limits()
+
+    def _reset_files(self):
+        self._content = {}
+        self._used = {}
+        self._paths = {}
+        self._rows = 0
+        self._close_memmap()
+        for p in (self.scores_path, self.index_path):
+            try:
+                if p.exists():
+                    p.unlink()
+            except OSError:
+                pass
+        self._dirty = False
+        self.generation += 1
+
+    def _close_memmap(self):
+        self._mm = None
+        self._mm_rows = 0
+
+    # ────────────── 키 ──────────────
+    def content_key(self, image_path: str) -> str:
+        """
+        이미지 내용 키. 경로의 (크기, mtime)이 그대로면 메모된 해시를 재사용하고,
+        바뀌었거나 처음 보는 파일이면 내용을 해시한다 (이름 변경/복사본도 적중).
+        """
+        abs_path = os.path.abspath(image_path)
+        st = os.stat(abs_path)
+        with self._lock:
+            memo = self._paths.get(abs_path)
+            if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+                return memo[2]
+        digest = file_content_hash(abs_path)
+        with self._lock:
+            self._paths[abs_path] = [st.st_size, st.st_mtime_ns, digest]
+            self._dirty = True
+        return digest
+
+    def known_key(self, image_path: str) -> Optional[str]:
+        """
+        해시 계산 없이 메모된 내용 키만 반환 (처음 보는 경로이거나 크기/mtime이 바뀌면 None).
+        데이터셋 전체 재임계값처럼 캐시에 이미 있는 이미지만 다룰 때 사용.
+        """
+        abs_path = os.path.abspath(image_path)
+        with self._lock:
+            memo = self._paths.get(abs_path)
+        if not memo:
+            return None
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            return None
+        if memo[0] != st.st_size or memo[1] != st.st_mtime_ns:
+            return None
+        with self._lock:
+            return memo[2] if memo[2] in self._content else None
+
+    # ────────────── 조회/저장 ──────────────
+    def _row_view(self) -> Optional[np.memmap]:
+        if self._rows == 0:
+            return None
+        if self._mm is None or self._mm_rows != self._rows:
+            self._mm = np.memmap(self.scores_path, dtype=STORAGE_DTYPE, mode="r", shape=(self._rows, self.num_tags))
+            self._mm_rows = self._rows
+        return self._mm
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """내용 키 → (num_tags,) float32 점수 (없으면 None)"""
+        with self._lock:
+            row = self._content.get(key)
+            if row is None:
+                return None
+            mm = self._row_view()
+            if mm is None or row >= self._mm_rows:
+                return None
+            self._used[key] = time.time()
+            return np.asarray(mm[row], dtype=np.float32)
+
+    def lookup(self, image_path: str) -> Tuple[str, Optional[np.ndarray]]:
+        """이미지 경로 → (내용 키, 캐시된 점수 또는 None)"""
+        key = self.content_key(image_path)
+        return key, self.get(key)
+
+    def get_many(self, keys: List[str]) -> np.ndarray:
+        """내용 키 목록 → (len(keys), num_tags) float32 (없는 키는 NaN 행)"""
+        out = np.full((len(keys), self.num_tags), np.nan, dtype=np.float32)
+        with self._lock:
+            mm = self._row_view()
+            if mm is None:
+                return out
+            rows = [self._content.get(k, -1) for k in keys]
+            valid = [i for i, r in enumerate(rows) if 0 <= r < self._mm_rows]
+            if valid:
+                out[valid] = mm[[rows[i] for i in valid]]
+                now = time.time()
+                for i in valid:
+                    self._used[keys[i]] = now
+        return out
+
+    def put_many(self, keys: List[str], scores: np.ndarray):
+        """(len(keys), num_tags) 점수를 캐시에 추가 (이미 있는 키는 건너뜀)"""
+        scores = np.asarray(scores, dtype=np.float32)
+        if scores.ndim == 1:
+            scores = scores[None, :]
+        with self._lock:
+            new_rows = []
+            new_keys = []
+            seen = set()
+            for k, row in zip(keys, scores):
+                if k in self._content or k in seen:
+                    continue
+                seen.add(k)
+                new_keys.append(k)
+                new_rows.append(row)
+            if not new_rows:
+                return
+            block = np.stack(new_rows, axis=0).astype(STORAGE_DTYPE)
+            with open(self.scores_path, "ab") as f:
+                f.write(block.tobytes())
+            now = time.time()
+            for k in new_keys:
+                self._content[k] = self._rows
+                self._used[k] = now
+                self._rows += 1
+            self._dirty = True
+            self.generation += 1
+            self._enforce_limits()
+            if self._dirty and time.time() - self._last_save >= SAVE_INTERVAL_SEC:
+                self._save_index()
+
+    def _enforce_limits(self):
+        """행 수/파일 크기 상한 초과 시 오래 안 쓴 행부터 제거 (남길 행만 새 파일로 복사)"""
+        row_bytes = self.num_tags * 2
+        if self._rows <= self.max_entries and self._rows * row_bytes <= self.max_bytes:
+            return
+        limit = min(self.max_entries, self.max_bytes // row_bytes)
+        keep_count = int(limit * EVICT_TO_RATIO)
+        by_recent = sorted(self._content, key=lambda k: self._used.get(k, 0), reverse=True)
+        keep = sorted(by_recent[:keep_count], key=self._content.get)  # 기존 행 순서대로 읽기
+        removed = len(self._content) - len(keep)
+
+        mm = self._row_view()
+        tmp = self.scores_path.with_suffix(".f16.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                for start in range(0, len(keep), 1024):
+                    rows = [self._content[k] for k in keep[start:start + 1024]]
+                    f.write(np.ascontiguousarray(mm[rows]).tobytes())
+            self._close_memmap()
+            mm = None
+            os.replace(tmp, self.scores_path)
+        except Exception as e:
+            print(f"⚠️ 점수 캐시 정리 실패: {e}")
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return
+
+        self._content = {k: row for row, k in enumerate(keep)}
+        self._used = {k: self._used.get(k, 0) for k in keep}
+        self._rows = len(keep)
+        # 더 이상 어떤 행도 가리키지 않을 수 있는 경로 메모도 같은 상한으로 정리
+        if len(self._paths) > self.max_entries:
+            for path in list(self._paths)[:len(self._paths) - self.max_entries]:
+                del self._paths[path]
+        self.generation += 1
+        self._save_index()  # 파일과 인덱스의 행 번호가 바로 맞아야 함
+        print(f"🧹 점수 캐시 정리: {removed}개 행 제거 (남은 {self._rows}개)")
+
+    def __len__(self) -> int:
+        return len(self._content)
+
+    # ────────────── 인덱스 저장/정리 ──────────────
+    def _save_index(self):
+        data = {
+            "version": INDEX_VERSION,
+            "num_tags": self.num_tags,
+            "rows": self._rows,
+            "variant": self.variant,
+            "content": self._content,
+            "used": self._used,
+            "paths": self._paths,
+        }
+        tmp = self.index_path.with_suffix(".json.tmp")
+        try:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.index_path)
+            self._dirty = False
+            self._last_save = time.time()
+        except Exception as e:
+            print(f"⚠️ 점수 캐시 인덱스 저장 실패: {e}")
+
+    def flush(self):
+        """변경 사항이 있으면 인덱스 저장"""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._reset_files()
+        print(f"🗑️ 점수 캐시 삭제: {self.cache_dir}")
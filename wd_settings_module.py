@@ -29,10 +29,52 @@ except:
 
 # WD Tagger 설정 함수들 import
 try:
-    from wd_tagger import get_tagger_config_value
+    from wd_tagger import DEFAULT_EXCLUDE_TAGS, get_tagger_config_value
     TAGGER_AVAILABLE = True
 except ImportError:
     TAGGER_AVAILABLE = False
+    DEFAULT_EXCLUDE_TAGS = ["rating:general", "rating:sensitive", "rating:questionable", "rating:explicit"]
+
+
+def _parse_tag_list(text):
+    """쉼표 구분 태그 입력 → 태그 목록 (빈 항목 제외)"""
+    return [t.strip() for t in str(text).split(",") if t.strip()]
+
+
+class RethresholdWorker(QThread):
+    """재임계값 준비/미리보기/변경 계산을 GUI 스레드 밖에서 실행 (all_tags 반영은 GUI 스레드에서)"""
+    result_ready = Signal(str, object)  # mode("preview"/"apply"), 결과 (엔진 준비 실패 시 None)
+    error = Signal(str, str)  # mode, 오류 메시지
+    
+    def __init__(self, engine, mode, settings, state=None):
+        super().__init__()
+        self.engine = engine
+        self.mode = mode
+        self.settings = settings
+        self.state = state  # capture_state() 결과 (None 이면 기존 준비 상태 재사용)
+        self._cancelled = False
+    
+    def cancel(self):
+        """더 새 요청이 생겨 결과가 필요 없어짐 (다음 행 묶음에서 중단)"""
+        self._cancelled = True
+    
+    def is_cancelled(self):
+        return self._cancelled
+    
+    def run(self):
+        try:
+            if self.state is not None:
+                self.engine.prepare(self.state)
+            if not self.engine.is_prepared:
+                result = None
+            elif self.mode == "apply":
+                result = self.engine.plan_changes(self.settings, self.is_cancelled)
+            else:
+                result = self.engine.preview(self.settings, self.is_cancelled)
+            if not self._cancelled:
+                self.result_ready.emit(self.mode, result)
+        except Exception as e:
+            self.error.emit(self.mode, str(e))
 
 
 class WdSettingsModule:
@@ -76,6 +118,7 @@ class WdSettingsModule:
             "character_threshold": 0.85,
             "character_mcut_min": 0.15,
             "max_tags": 30,
+            "exclude_tags": list(DEFAULT_EXCLUDE_TAGS),  # 배치 태깅/재임계값에서 제외할 태그
             "general_mcut_enabled": False,
             "character_mcut_enabled": False,
             "general_mcut_min_enabled": False,
@@ -85,7 +128,31 @@ class WdSettingsModule:
             "tta_enabled": False,
             "tta_horizontal_flip": True,
             "tta_merge_mode": "mean",
-            "perf_tier": "balanced"  # "speed", "balanced", "quality"
+            "tta_center_crop": False,  # TTA 추가 뷰 (준비된 텐서에서 만들어 같은 배치로 추론)
+            "tta_crop_ratio": 0.875,
+            "tta_multiscale": False,
+            "tta_scales": [0.75],
+            "perf_tier": "balanced",  # "speed", "balanced", "quality"
+            "batch_size": 8,  # session.run 한 번에 추론할 이미지 수
+            "prefetch_workers": 0,  # 디코드/패딩 스레드 수 (0 = 자동, 음수 = 끔)
+            "prefetch_max_images": 64,
+            "prefetch_max_mb": 512,
+            "score_cache_enabled": True,  # 원시 점수 캐시 (임계값만 바꾼 재태깅은 추론 생략)
+            "score_cache_max_entries": 100000,  # 설정 조합별 캐시 이미지 수 상한 (LRU 제거)
+            "score_cache_max_mb": 2048,
+            "session_pool_max_models": 2,  # 메모리에 유지할 WD 모델 수 (모델 전환 시 재로드 없음)
+            "session_pool_max_mb": 4096,
+            "ort_intra_op_threads": 0,  # 0 = ONNX Runtime 기본값
+            "ort_inter_op_threads": 0,
+            "ort_execution_mode": "sequential",  # "sequential", "parallel"
+            "ort_graph_optimization": "all",  # "disabled", "basic", "extended", "all"
+            "ort_enable_mem_pattern": True,
+            "ort_enable_cpu_mem_arena": True,
+            "ort_optimized_model_cache": True,  # 최적화 그래프 저장 후 재사용 (시작 시간 단축)
+            "precision": "fp32",  # "fp32", "int8" (wd_quantize.py 로 만든 INT8 사본 사용)
+            "process_pool_workers": 0,  # CPU 전용: 워커 프로세스 수 (0 = 끔, -1 = 자동)
+            "process_pool_threads_per_worker": 0,  # 0 = 코어 수 / 워커 수
+            "process_pool_pin_cores": True  # 워커마다 겹치지 않는 코어에 고정 (Linux)
         }
         
     def create_wd_settings_section(self, layout, model_name):
@@ -115,6 +182,7 @@ class WdSettingsModule:
             ("general_threshold", "일반 태그 임계값"),
             ("character_threshold", "캐릭터 태그 임계값"),
             ("max_tags", "최대 태그 수"),
+            ("exclude_tags", "제외 태그"),
             
             # 일반 MCut 설정
             ("general_mcut_enabled", "일반 MCut 활성화"),
@@ -130,6 +198,8 @@ class WdSettingsModule:
             ("apply_sigmoid", "Sigmoid 적용"),
             ("tta_enabled", "TTA 활성화"),
             ("tta_horizontal_flip", "TTA 수평 뒤집기"),
+            ("tta_center_crop", "TTA 중앙 크롭"),
+            ("tta_multiscale", "TTA 멀티스케일"),
             ("tta_merge_mode", "TTA 병합 모드")
         ]
         
@@ -155,9 +225,11 @@ class WdSettingsModule:
             
             # 입력 필드 생성
             value = wd_config.get(field_key, self._get_default_value(field_key))
+            if field_key == "exclude_tags" and isinstance(value, list):
+                value = ", ".join(value)
             
             # 체크박스 필드들
-            if field_key in ["general_mcut_enabled", "character_mcut_enabled", "general_mcut_min_enabled", "character_mcut_min_enabled", "apply_sigmoid", "tta_enabled", "tta_horizontal_flip"]:
+            if field_key in ["general_mcut_enabled", "character_mcut_enabled", "general_mcut_min_enabled", "character_mcut_min_enabled", "apply_sigmoid", "tta_enabled", "tta_horizontal_flip", "tta_center_crop", "tta_multiscale"]:
                 # 커스텀 체크박스 클래스 정의
                 class CustomCheckBox(QCheckBox):
                     def __init__(self, parent=None):
@@ -308,15 +380,213 @@ class WdSettingsModule:
         # 초기 상태 설정
         self._set_initial_field_states()
         
-        # 빈 공간 채우기 (13개 필드이므로 1개 더 추가)
+        # 빈 공간 채우기 (16개 필드이므로 1개 더 추가)
         for _ in range(1):
             row_layout.addWidget(QWidget())
         
         layout.addLayout(row_layout)
         
+        # 캐시된 점수 기반 재임계값 미리보기/적용
+        self._create_rethreshold_section(layout)
+        
         # JSON 기반 모델별 설정 필드들 추가
         self.create_config_fields(layout, model_name)
     
+    def _create_rethreshold_section(self, layout):
+        """임계값 슬라이더 + 데이터셋 전체 변경량 미리보기 + 적용 버튼 (재추론 없음)"""
+        self._rethreshold_engine = None
+        self._rethreshold_worker = None
+        self._rethreshold_pending = None  # 작업 중 들어온 다음 요청 (mode, settings)
+        
+        row_layout = QHBoxLayout()
+        row_layout.setSpacing(8)
+        
+        slider_style = """
+            QSlider::groove:horizontal {
+                background: rgba(255, 255, 255, 0.3);
+                height: 4px;
+                border-radius: 2px;
+            }
+            QSlider::handle:horizontal {
+                background: #3B82F6;
+                width: 12px;
+                height: 12px;
+                border-radius: 6px;
+                margin: -4px 0;
+            }
+            QSlider::sub-page:horizontal {
+                background: #3B82F6;
+                border-radius: 2px;
+            }
+        """
+        label_style = """
+            font-size: 11px;
+            font-weight: 500;
+            color: #9CA3AF;
+        """
+        
+        # 일반/캐릭터 임계값 슬라이더 (입력 필드와 양방향 동기화)
+        for field_key, field_label in (("general_threshold", "일반"), ("character_threshold", "캐릭터")):
+            input_field = getattr(self, f"{field_key}_input", None)
+            if input_field is None:
+                continue
+            label = QLabel(f"{field_label}:")
+            label.setStyleSheet(label_style)
+            row_layout.addWidget(label)
+            
+            slider = QSlider(Qt.Horizontal)
+            slider.setRange(0, 100)
+            slider.setMinimumWidth(120)
+            slider.setStyleSheet(slider_style)
+            self._sync_threshold_slider(slider, input_field.text())
+            slider.valueChanged.connect(lambda v, f=input_field: f.setText(f"{v / 100:.2f}"))
+            input_field.textEdited.connect(lambda text, s=slider: self._sync_threshold_slider(s, text))
+            setattr(self, f"{field_key}_slider", slider)
+            row_layout.addWidget(slider)
+        
+        # 미리보기 라벨
+        self.rethreshold_preview_label = QLabel("재임계값 미리보기: -")
+        self.rethreshold_preview_label.setStyleSheet(label_style)
+        row_layout.addWidget(self.rethreshold_preview_label, 1)
+        
+        # 적용 버튼
+        apply_button = QPushButton("데이터셋에 적용")
+        apply_button.setStyleSheet("""
+            font-size: 12px;
+            font-weight: 600;
+        """)
+        apply_button.clicked.connect(lambda: self._start_rethreshold_job("apply"))
+        self.rethreshold_apply_button = apply_button
+        row_layout.addWidget(apply_button)
+        
+        layout.addLayout(row_layout)
+        
+        # 슬라이더 이동 중 과도한 재계산 방지 (디바운스)
+        self._rethreshold_timer = QTimer()
+        self._rethreshold_timer.setSingleShot(True)
+        self._rethreshold_timer.setInterval(150)
+        self._rethreshold_timer.timeout.connect(lambda: self._start_rethreshold_job("preview"))
+        
+        for attr in ("general_threshold_input", "character_threshold_input", "max_tags_input",
+                     "exclude_tags_input", "general_mcut_min_input", "character_mcut_min_input"):
+            if hasattr(self, attr):
+                getattr(self, attr).textChanged.connect(lambda _=None: self._rethreshold_timer.start())
+        for attr in ("general_mcut_enabled_input", "character_mcut_enabled_input",
+                     "general_mcut_min_enabled_input", "character_mcut_min_enabled_input"):
+            if hasattr(self, attr):
+                getattr(self, attr).toggled.connect(lambda _=None: self._rethreshold_timer.start())
+        self._rethreshold_timer.start()
+    
+    def _sync_threshold_slider(self, slider, text):
+        """입력 필드 값 → 슬라이더 위치 (valueChanged 재진입 방지)"""
+        try:
+            value = float(str(text).strip())
+        except ValueError:
+            return
+        slider.blockSignals(True)
+        slider.setValue(max(0, min(100, int(round(value * 100)))))
+        slider.blockSignals(False)
+    
+    def _collect_rethreshold_settings(self):
+        """현재 입력값 → 재임계값 설정 (잘못된 값은 저장된 설정 사용)"""
+        settings = {}
+        for key, cast in (("general_threshold", float), ("character_threshold", float),
+                          ("max_tags", int), ("general_mcut_min", float), ("character_mcut_min", float)):
+            field = getattr(self, f"{key}_input", None)
+            if field is None:
+                continue
+            try:
+                settings[key] = cast(field.text().strip())
+            except ValueError:
+                pass
+        if getattr(self, "exclude_tags_input", None) is not None:
+            settings["exclude_tags"] = _parse_tag_list(self.exclude_tags_input.text())
+        for key in ("general_mcut_enabled", "character_mcut_enabled",
+                    "general_mcut_min_enabled", "character_mcut_min_enabled"):
+            field = getattr(self, f"{key}_input", None)
+            if field is not None:
+                settings[key] = field.isEnabled() and field.isChecked()
+        return settings
+    
+    def _get_rethreshold_engine(self):
+        if self._rethreshold_engine is None:
+            try:
+                from wd_rethreshold import WdRethresholdEngine
+                self._rethreshold_engine = WdRethresholdEngine(self.app_instance)
+            except Exception as e:
+                print(f"⚠️ 재임계값 엔진 준비 실패: {str(e)}")
+                return None
+        return self._rethreshold_engine
+    
+    def _start_rethreshold_job(self, mode):
+        """
+        미리보기("preview")/적용("apply") 작업을 작업 스레드에서 시작.
+        작업은 한 번에 하나만 실행: 진행 중인 미리보기는 취소하고, 새 요청은 끝난 뒤 이어서 실행
+        (대기 중인 적용은 미리보기 요청으로 덮어쓰지 않음).
+        """
+        job = (mode, self._collect_rethreshold_settings())
+        worker = self._rethreshold_worker
+        if worker is not None:
+            if worker.mode == "preview":
+                worker.cancel()
+            if not (mode == "preview" and self._rethreshold_pending and self._rethreshold_pending[0] == "apply"):
+                self._rethreshold_pending = job
+            return
+        
+        engine = self._get_rethreshold_engine()
+        if engine is None:
+            return
+        try:
+            # 태그 편집/새 배치 태깅으로 캐시가 바뀌었으면 현재 상태로 다시 준비
+            state = engine.capture_state() if engine.needs_prepare() else None
+        except Exception as e:
+            print(f"⚠️ 재임계값 상태 수집 실패: {str(e)}")
+            return
+        
+        worker = RethresholdWorker(engine, mode, job[1], state)
+        worker.result_ready.connect(self._on_rethreshold_result)
+        worker.error.connect(self._on_rethreshold_error)
+        worker.finished.connect(self._on_rethreshold_worker_finished)
+        self._rethreshold_worker = worker
+        if mode == "apply":
+            self.rethreshold_apply_button.setEnabled(False)
+            self.rethreshold_preview_label.setText("재임계값 계산 중...")
+        worker.start()
+    
+    def _on_rethreshold_worker_finished(self):
+        self._rethreshold_worker = None
+        self.rethreshold_apply_button.setEnabled(True)
+        pending, self._rethreshold_pending = self._rethreshold_pending, None
+        if pending is not None:
+            self._start_rethreshold_job(pending[0])
+    
+    def _on_rethreshold_result(self, mode, result):
+        """작업 스레드 결과 → 미리보기 라벨 / 적용 (all_tags 반영은 여기서, GUI 스레드)"""
+        if result is None:
+            self.rethreshold_preview_label.setText("재임계값 미리보기: 캐시된 WD 점수 없음")
+            return
+        if mode == "preview":
+            self.rethreshold_preview_label.setText(
+                f"재임계값 미리보기: +{result['added']} / -{result['removed']} "
+                f"({result['changed_images']}/{result['images']}장)"
+            )
+            return
+        try:
+            applied = self._rethreshold_engine.commit_changes(result)
+            self.rethreshold_preview_label.setText(
+                f"적용 완료: +{applied['added']} / -{applied['removed']} ({applied['changed_images']}장)"
+            )
+        except Exception as e:
+            print(f"❌ 재임계값 적용 실패: {str(e)}")
+            self.rethreshold_preview_label.setText("재임계값 적용 실패")
+    
+    def _on_rethreshold_error(self, mode, message):
+        if mode == "apply":
+            print(f"❌ 재임계값 적용 실패: {message}")
+            self.rethreshold_preview_label.setText("재임계값 적용 실패")
+        else:
+            print(f"⚠️ 재임계값 미리보기 실패: {message}")
+    
     def create_config_fields(self, layout, model_name):
         """Config 필드들을 생성 (모델별 개별 설정)"""
         config_data = self.load_model_config_data(model_name)
@@ -583,6 +853,14 @@ class WdSettingsModule:
                 self.tta_enabled_input.toggled.connect(
                     lambda checked: self.tta_horizontal_flip_input.setEnabled(checked)
                 )
+            if hasattr(self, 'tta_center_crop_input'):
+                self.tta_enabled_input.toggled.connect(
+                    lambda checked: self.tta_center_crop_input.setEnabled(checked)
+                )
+            if hasattr(self, 'tta_multiscale_input'):
+                self.tta_enabled_input.toggled.connect(
+                    lambda checked: self.tta_multiscale_input.setEnabled(checked)
+                )
             if hasattr(self, 'tta_merge_mode_input'):
                 self.tta_enabled_input.toggled.connect(
                     lambda checked: self.tta_merge_mode_input.setEnabled(checked)
@@ -611,6 +889,10 @@ class WdSettingsModule:
             tta_enabled = self.tta_enabled_input.isChecked()
             if hasattr(self, 'tta_horizontal_flip_input'):
                 self.tta_horizontal_flip_input.setEnabled(tta_enabled)
+            if hasattr(self, 'tta_center_crop_input'):
+                self.tta_center_crop_input.setEnabled(tta_enabled)
+            if hasattr(self, 'tta_multiscale_input'):
+                self.tta_multiscale_input.setEnabled(tta_enabled)
             if hasattr(self, 'tta_merge_mode_input'):
                 self.tta_merge_mode_input.setEnabled(tta_enabled)
     
@@ -621,6 +903,7 @@ class WdSettingsModule:
             "character_threshold": 0.85,
             "character_mcut_min": 0.15,
             "max_tags": 30,
+            "exclude_tags": ", ".join(DEFAULT_EXCLUDE_TAGS),
             "general_mcut_enabled": False,
             "character_mcut_enabled": False,
             "general_mcut_min_enabled": False,
@@ -629,6 +912,8 @@ class WdSettingsModule:
             "apply_sigmoid": False,
             "tta_enabled": False,
             "tta_horizontal_flip": True,
+            "tta_center_crop": False,
+            "tta_multiscale": False,
             "tta_merge_mode": "mean"
         }
         return defaults.get(field_key, "")
@@ -640,6 +925,7 @@ class WdSettingsModule:
             "character_threshold": "character_threshold_input",
             "character_mcut_min": "character_mcut_min_input",
             "max_tags": "max_tags_input",
+            "exclude_tags": "exclude_tags_input",
             "general_mcut_enabled": "general_mcut_enabled_input",
             "character_mcut_enabled": "character_mcut_enabled_input",
             "general_mcut_min_enabled": "general_mcut_min_enabled_input",
@@ -648,6 +934,8 @@ class WdSettingsModule:
             "apply_sigmoid": "apply_sigmoid_input",
             "tta_enabled": "tta_enabled_input",
             "tta_horizontal_flip": "tta_horizontal_flip_input",
+            "tta_center_crop": "tta_center_crop_input",
+            "tta_multiscale": "tta_multiscale_input",
             "tta_merge_mode": "tta_merge_mode_input"
         }
         
@@ -687,6 +975,8 @@ class WdSettingsModule:
                         field_values["max_tags"] = int(self.max_tags_input.text().strip())
                     else:
                         field_values["max_tags"] = 30  # 기본값
+                if hasattr(self, 'exclude_tags_input'):
+                    field_values["exclude_tags"] = _parse_tag_list(self.exclude_tags_input.text())
                 if hasattr(self, 'general_mcut_min_input'):
                     if self.general_mcut_min_input.isEnabled():
                         field_values["general_mcut_min"] = float(self.general_mcut_min_input.text().strip())
@@ -734,6 +1024,16 @@ class WdSettingsModule:
                         field_values["tta_horizontal_flip"] = self.tta_horizontal_flip_input.isChecked()
                     else:
                         field_values["tta_horizontal_flip"] = False  # 기본값
+                if hasattr(self, 'tta_center_crop_input'):
+                    if self.tta_center_crop_input.isEnabled():
+                        field_values["tta_center_crop"] = self.tta_center_crop_input.isChecked()
+                    else:
+                        field_values["tta_center_crop"] = False  # 기본값
+                if hasattr(self, 'tta_multiscale_input'):
+                    if self.tta_multiscale_input.isEnabled():
+                        field_values["tta_multiscale"] = self.tta_multiscale_input.isChecked()
+                    else:
+                        field_values["tta_multiscale"] = False  # 기본값
                 
                 # 설정 업데이트
                 wd_config.update(field_values)
@@ -15,20 +15,29 @@ WD Tagger - Reference-style pipeline (config.json: size only, everything else sa
 """
 
 import csv
+import hashlib
 import json
 import os
 import shutil
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Tuple, Optional, Dict
 
 import numpy as np
 from PIL import Image as PILImage
-import onnxruntime as ort
 import os
-import huggingface_hub
-import requests
 from PySide6.QtCore import QObject, Signal, QThread
 
+# onnxruntime/huggingface_hub/requests는 첫 사용 시점에 초기화 (태그 편집만 할 때 시작 비용 회피)
+from lazy_imports import lazy_module
+ort = lazy_module("onnxruntime")
+huggingface_hub = lazy_module("huggingface_hub")
+requests = lazy_module("requests")
+
+from wd_score_cache import DEFAULT_MAX_ENTRIES, DEFAULT_MAX_MB, WdScoreCache, variant_key
+
 # ▼ 추가: pip 경로 정확 탐색 + DLL 검색 경로 주입용
 import sys
 import importlib.util
@@ -60,9 +69,11 @@ def check_gpu_availability():
 
 
 MODEL_FILENAME = "model.onnx"
+INT8_MODEL_FILENAME = "model.int8.onnx"  # wd_quantize.py 로 만든 INT8 사본
 LABEL_FILENAME = "selected_tags.csv"  # 모델 다운로드용
 CONFIG_CANDIDATES = ["config.json", "preprocessor_config.json"]
 TAGGER_CONFIG_FILE = "models/wd_tagger_config.json"  # WD 전용 설정 파일
+DEFAULT_EXCLUDE_TAGS = ["rating:general", "rating:sensitive", "rating:questionable", "rating:explicit"]
 
 # 카테고리 정의(레퍼런스와 동일)
 RATING_CAT = 9
@@ -308,6 +319,7 @@ def load_tagger_config():
         "character_threshold": 0.85,
         "character_mcut_min": 0.15,
         "max_tags": 30,
+        "exclude_tags": list(DEFAULT_EXCLUDE_TAGS),  # 배치 태깅/재임계값에서 제외할 태그
         "general_mcut_enabled": False,
         "character_mcut_enabled": False,
         "general_mcut_min_enabled": False,
@@ -316,7 +328,31 @@ def load_tagger_config():
         "apply_sigmoid": False,
         "tta_enabled": False,
         "tta_horizontal_flip": True,
-        "tta_merge_mode": "mean"
+        "tta_merge_mode": "mean",
+        "tta_center_crop": False,  # TTA 추가 뷰: 중앙 크롭 (tta_crop_ratio 만큼 잘라 확대)
+        "tta_crop_ratio": 0.875,
+        "tta_multiscale": False,  # TTA 추가 뷰: 축소 후 패딩 (tta_scales 배율마다 한 뷰)
+        "tta_scales": [0.75],
+        "batch_size": 8,
+        "prefetch_workers": 0,  # 0 = 자동 (CPU 코어 수 기준)
+        "prefetch_max_images": 64,
+        "prefetch_max_mb": 512,
+        "score_cache_enabled": True,
+        "score_cache_max_entries": 100000,  # 설정 조합별 점수 캐시 상한 (넘으면 오래 안 쓴 이미지부터 제거)
+        "score_cache_max_mb": 2048,
+        "session_pool_max_models": 2,  # 동시에 메모리에 올려둘 WD 모델 수 (LRU)
+        "session_pool_max_mb": 4096,
+        "ort_intra_op_threads": 0,  # 0 = ONNX Runtime 기본값 (물리 코어 수)
+        "ort_inter_op_threads": 0,
+        "ort_execution_mode": "sequential",  # "sequential", "parallel"
+        "ort_graph_optimization": "all",  # "disabled", "basic", "extended", "all"
+        "ort_enable_mem_pattern": True,
+        "ort_enable_cpu_mem_arena": True,
+        "ort_optimized_model_cache": True,  # 최적화된 그래프를 디스크에 저장해 다음 시작 시 재사용
+        "precision": "fp32",  # "fp32", "int8" (INT8 사본이 없으면 fp32 사용)
+        "process_pool_workers": 0,  # CPU 멀티프로세스 추론: 0 = 끔, -1 = 자동 (소켓 수 기준)
+        "process_pool_threads_per_worker": 0,  # 0 = 코어 수 / 워커 수
+        "process_pool_pin_cores": True
     }
     
     try:
@@ -354,6 +390,319 @@ def get_tagger_config_value(key, default_value=None):
     return config.get(key, default_value)
 
 
+def _resolve_batch_size() -> int:
+    """배치 추론 크기 (wd_tagger_config.json의 batch_size, 최소 1)"""
+    try:
+        return max(1, int(get_tagger_config_value("batch_size", 8)))
+    except Exception:
+        return 1
+
+
+def _resolve_prefetch_settings() -> Tuple[int, int, int]:
+    """
+    디코드/패딩 프리페치 설정 (workers, max_images, max_bytes)
+    - prefetch_workers: 0 = 자동 (코어 수 기준 최대 8), 음수 = 프리페치 끔(동기 처리)
+    - prefetch_max_images / prefetch_max_mb: 미리 준비해 둘 이미지 수 / 텐서 메모리 상한
+    """
+    config = load_tagger_config()
+    try:
+        workers = int(config.get("prefetch_workers", 0))
+    except Exception:
+        workers = 0
+    if workers == 0:
+        workers = max(1, min(8, (os.cpu_count() or 2) - 1))
+    try:
+        max_images = max(1, int(config.get("prefetch_max_images", 64)))
+    except Exception:
+        max_images = 64
+    try:
+        max_bytes = max(1, int(float(config.get("prefetch_max_mb", 512)) * 1024 * 1024))
+    except Exception:
+        max_bytes = 512 * 1024 * 1024
+    return workers, max_images, max_bytes
+
+
+def _resolve_session_pool_limits() -> Tuple[int, int]:
+    """세션 풀 상한 (max_models, max_bytes) — 모델 크기는 model.onnx 파일 크기로 추정"""
+    config = load_tagger_config()
+    try:
+        max_models = max(1, int(config.get("session_pool_max_models", 2)))
+    except Exception:
+        max_models = 2
+    try:
+        max_bytes = max(1, int(float(config.get("session_pool_max_mb", 4096)) * 1024 * 1024))
+    except Exception:
+        max_bytes = 4096 * 1024 * 1024
+    return max_models, max_bytes
+
+
+def _resolve_precision(precision: Optional[str] = None) -> str:
+    """모델 정밀도 ("fp32" / "int8"), None이면 wd_tagger_config.json 의 precision"""
+    if precision is None:
+        precision = get_tagger_config_value("precision", "fp32")
+    precision = str(precision).lower()
+    return precision if precision in ("fp32", "int8") else "fp32"
+
+
+# 값은 onnxruntime 열거형 멤버 이름 (onnxruntime 지연 로드를 위해 사용 시점에 getattr)
+_ORT_OPT_LEVELS = {
+    "disabled": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+_ORT_EXEC_MODES = {
+    "sequential": "ORT_SEQUENTIAL",
+    "parallel": "ORT_PARALLEL",
+}
+
+
+def _resolve_session_options() -> Tuple[dict, "ort.SessionOptions"]:
+    """
+    wd_tagger_config.json 의 ort_* 값 → (정규화된 설정 dict, SessionOptions)
+    잘못된 값은 기본값으로 대체한다.
+    """
+    config = load_tagger_config()
+
+    def _int(key):
+        try:
+            return max(0, int(config.get(key, 0)))
+        except Exception:
+            return 0
+
+    settings = {
+        "intra_op_threads": _int("ort_intra_op_threads"),
+        "inter_op_threads": _int("ort_inter_op_threads"),
+        "execution_mode": str(config.get("ort_execution_mode", "sequential")).lower(),
+        "graph_optimization": str(config.get("ort_graph_optimization", "all")).lower(),
+        "enable_mem_pattern": bool(config.get("ort_enable_mem_pattern", True)),
+        "enable_cpu_mem_arena": bool(config.get("ort_enable_cpu_mem_arena", True)),
+    }
+    if settings["execution_mode"] not in _ORT_EXEC_MODES:
+        settings["execution_mode"] = "sequential"
+    if settings["graph_optimization"] not in _ORT_OPT_LEVELS:
+        settings["graph_optimization"] = "all"
+
+    so = ort.SessionOptions()
+    if settings["intra_op_threads"]:
+        so.intra_op_num_threads = settings["intra_op_threads"]
+    if settings["inter_op_threads"]:
+        so.inter_op_num_threads = settings["inter_op_threads"]
+    so.execution_mode = getattr(ort.ExecutionMode, _ORT_EXEC_MODES[settings["execution_mode"]])
+    so.graph_optimization_level = getattr(ort.GraphOptimizationLevel, _ORT_OPT_LEVELS[settings["graph_optimization"]])
+    so.enable_mem_pattern = settings["enable_mem_pattern"]
+    so.enable_cpu_mem_arena = settings["enable_cpu_mem_arena"]
+    return settings, so
+
+
+# 레퍼런스 후처리의 `np.float32 점수 > 파이썬 float 임계값` 스칼라 비교 정밀도
+# (NumPy 2: float32, NumPy 1.x: float64) — 벡터화 비교도 같은 dtype으로 맞춘다
+_SCALAR_CMP_DTYPE = (np.float32(0) + 0.0).dtype
+
+
+class WdScoreSelector:
+    """
+    (N, num_tags) 점수 행렬 → 이미지별 태그 목록 (벡터화 후처리 엔진).
+    - 카테고리 인덱스/태그 이름은 로드 시 numpy 배열로 한 번만 준비
+    - 임계값/MCut은 행렬 전체에 boolean mask로 적용 (비교 정밀도도 레퍼런스와 동일)
+    - max_tags는 np.partition 기반 top-k (동점은 레퍼런스 순서 유지)
+    - 태그 이름은 최종 선택된 인덱스에만 붙인다
+    결과는 predict_tags / v1 / v2의 기존 Python 후처리와 동일.
+    """
+
+    def __init__(self, tag_names: List[str], general_indexes: List[int], character_indexes: List[int]):
+        self.tag_names = np.asarray(tag_names, dtype=object)
+        self.general_idx = np.asarray(general_indexes, dtype=np.intp)
+        self.character_idx = np.asarray(character_indexes, dtype=np.intp)
+        # general → character 순으로 이어 붙인 후보 열 (dict 병합 순서와 동일)
+        self.candidate_idx = np.concatenate([self.general_idx, self.character_idx])
+        self._name_to_idx: Dict[str, List[int]] = {}
+        for i, name in enumerate(tag_names):
+            self._name_to_idx.setdefault(name, []).append(i)
+        # 후보 안에 같은 이름이 두 번 이상 있으면 dict 병합 규칙(뒤 점수, 앞 위치)을 따라야 함
+        cand_names = [tag_names[i] for i in self.candidate_idx]
+        self.has_duplicate_names = len(set(cand_names)) != len(cand_names)
+
+    @staticmethod
+    def mcut_thresholds(probs: np.ndarray) -> np.ndarray:
+        """행별 MCut 임계값 (N,) — _mcut_threshold 와 동일 (내림차순 정렬 후 최대 간격 중점)"""
+        sorted_probs = -np.sort(-probs, axis=1)
+        difs = sorted_probs[:, :-1] - sorted_probs[:, 1:]
+        t = np.argmax(difs, axis=1)
+        rows = np.arange(probs.shape[0])
+        return ((sorted_probs[rows, t] + sorted_probs[rows, t + 1]) / 2.0).astype(np.float64)
+
+    def _thresholds(self, probs, base, mcut_enabled, mcut_min) -> np.ndarray:
+        """카테고리 임계값 (N,) — 스칼라 비교와 같은 정밀도(_SCALAR_CMP_DTYPE)로 맞춘다"""
+        n = probs.shape[0]
+        if mcut_enabled and probs.shape[1] >= 2:
+            thresh = self.mcut_thresholds(probs)
+            if mcut_min is not None:
+                thresh = np.maximum(thresh, float(mcut_min))
+        else:
+            thresh = np.full(n, float(base), dtype=np.float64)
+        return thresh.astype(_SCALAR_CMP_DTYPE)
+
+    def exclude_mask(self, exclude_tags: Optional[List[str]]) -> np.ndarray:
+        """후보 열 기준 제외 마스크 (len(candidate_idx),)"""
+        excluded = np.zeros(len(self.tag_names), dtype=bool)
+        for name in set(exclude_tags or []):
+            for i in self._name_to_idx.get(name, ()):
+                excluded[i] = True
+        return excluded[self.candidate_idx]
+
+    @staticmethod
+    def _top_k_order(scores: np.ndarray, k: int) -> np.ndarray:
+        """점수 내림차순 안정 정렬 후 앞 k개와 같은 위치 배열 (np.partition 으로 후보를 먼저 줄임)"""
+        if k <= 0 or scores.shape[0] <= k:
+            return np.argsort(-scores, kind="stable")
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - above.shape[0]]
+        keep = np.sort(np.concatenate([above, ties]))
+        return keep[np.argsort(-scores[keep], kind="stable")]
+
+    def _threshold_mask(
+        self,
+        scores: np.ndarray,
+        general_threshold: float,
+        character_threshold: float,
+        general_mcut_enabled: bool,
+        character_mcut_enabled: bool,
+        exclude_tags: Optional[List[str]],
+        general_mcut_min: Optional[float],
+        character_mcut_min: Optional[float],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(후보 점수 (N, C), 임계값/제외 통과 마스크 (N, C)) — C = len(candidate_idx)"""
+        general = scores[:, self.general_idx]
+        character = scores[:, self.character_idx]
+        g_thresh = self._thresholds(general, general_threshold, general_mcut_enabled, general_mcut_min)
+        c_thresh = self._thresholds(character, character_threshold, character_mcut_enabled, character_mcut_min)
+
+        candidates = np.concatenate([general, character], axis=1)
+        mask = np.concatenate([
+            general.astype(_SCALAR_CMP_DTYPE, copy=False) > g_thresh[:, None],
+            character.astype(_SCALAR_CMP_DTYPE, copy=False) > c_thresh[:, None],
+        ], axis=1)
+        mask &= ~self.exclude_mask(exclude_tags)[None, :]
+        return candidates, mask
+
+    def select_mask(
+        self,
+        scores: np.ndarray,
+        general_threshold: float,
+        character_threshold: float,
+        general_mcut_enabled: bool = False,
+        character_mcut_enabled: bool = False,
+        max_tags: int = 0,
+        exclude_tags: Optional[List[str]] = None,
+        general_mcut_min: Optional[float] = None,
+        character_mcut_min: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        최종 선택을 후보 열 마스크로 반환: (후보 점수 (N, C), 선택 마스크 (N, C)).
+        max_tags 컷도 행렬 단위로 처리 (np.partition 으로 행별 k번째 점수 → 동점은 앞 열 우선).
+        태그 이름이 필요 없는 집계(재임계값 미리보기 등)는 이 마스크만으로 계산한다.
+        """
+        scores = np.asarray(scores, dtype=np.float32)
+        if scores.ndim == 1:
+            scores = scores[None, :]
+        candidates, mask = self._threshold_mask(
+            scores, general_threshold, character_threshold,
+            general_mcut_enabled, character_mcut_enabled,
+            exclude_tags, general_mcut_min, character_mcut_min,
+        )
+
+        if self.has_duplicate_names:
+            # 같은 이름 병합 규칙은 행별로 처리
+            for r in range(mask.shape[0]):
+                cols = self._dedupe_columns(np.flatnonzero(mask[r]))
+                order = self._top_k_order(candidates[r, cols], max_tags)
+                if max_tags > 0:
+                    order = order[:max_tags]
+                mask[r] = False
+                mask[r, cols[order]] = True
+            return candidates, mask
+
+        if max_tags > 0:
+            over = np.flatnonzero(mask.sum(axis=1) > max_tags)
+            if over.size:
+                sub_scores = candidates[over]
+                sub_mask = mask[over]
+                masked = np.where(sub_mask, sub_scores, np.float32(-np.inf))
+                kth = -np.partition(-masked, max_tags - 1, axis=1)[:, max_tags - 1]
+                above = sub_mask & (sub_scores > kth[:, None])
+                ties = sub_mask & (sub_scores == kth[:, None])
+                need = max_tags - above.sum(axis=1)
+                ties &= np.cumsum(ties, axis=1) <= need[:, None]
+                mask[over] = above | ties
+        return candidates, mask
+
+    def select(
+        self,
+        scores: np.ndarray,
+        general_threshold: float,
+        character_threshold: float,
+        general_mcut_enabled: bool = False,
+        character_mcut_enabled: bool = False,
+        max_tags: int = 0,
+        exclude_tags: Optional[List[str]] = None,
+        general_mcut_min: Optional[float] = None,
+        character_mcut_min: Optional[float] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """scores: (N, num_tags) 또는 (num_tags,) → 이미지별 [(tag, score)] 점수순"""
+        scores = np.asarray(scores, dtype=np.float32)
+        if scores.ndim == 1:
+            scores = scores[None, :]
+
+        if self.has_duplicate_names:
+            candidates, mask = self._threshold_mask(
+                scores, general_threshold, character_threshold,
+                general_mcut_enabled, character_mcut_enabled,
+                exclude_tags, general_mcut_min, character_mcut_min,
+            )
+            results: List[List[Tuple[str, float]]] = []
+            for r in range(scores.shape[0]):
+                cols = self._dedupe_columns(np.flatnonzero(mask[r]))
+                order = self._top_k_order(candidates[r, cols], max_tags)
+                if max_tags > 0:
+                    order = order[:max_tags]
+                picked_cols = cols[order]
+                names = self.tag_names[self.candidate_idx[picked_cols]]
+                results.append(list(zip(names.tolist(), candidates[r, picked_cols].tolist())))
+            return results
+
+        candidates, mask = self.select_mask(
+            scores, general_threshold, character_threshold,
+            general_mcut_enabled, character_mcut_enabled,
+            max_tags, exclude_tags, general_mcut_min, character_mcut_min,
+        )
+        results = []
+        for r in range(scores.shape[0]):
+            cols = np.flatnonzero(mask[r])
+            picked_cols = cols[np.argsort(-candidates[r, cols], kind="stable")]
+            names = self.tag_names[self.candidate_idx[picked_cols]]
+            results.append(list(zip(names.tolist(), candidates[r, picked_cols].tolist())))
+        return results
+
+    def _dedupe_columns(self, cols: np.ndarray) -> np.ndarray:
+        """
+        {**general_res, **character_res} 병합 규칙 재현:
+        같은 이름은 처음 나온 위치를 유지하되 점수는 마지막 선택 열의 값을 쓴다.
+        (제외는 이름 단위라 병합 전/후 어느 쪽에서 걸러도 결과가 같다)
+        """
+        first_pos: Dict[str, int] = {}
+        order: List[int] = []
+        for c in cols.tolist():
+            name = self.tag_names[self.candidate_idx[c]]
+            if name in first_pos:
+                order[first_pos[name]] = c
+            else:
+                first_pos[name] = len(order)
+                order.append(c)
+        return np.asarray(order, dtype=np.intp)
+
+
 class WdTaggerModel(QObject):
     progress_updated = Signal(int, int)
     tag_generated = Signal(str, list)    # image_path, List[(tag, score)]
@@ -367,6 +716,7 @@ class WdTaggerModel(QObject):
         character_threshold: float = None,
         pad_rgb=(255, 255, 255),
         use_gpu: bool = True,
+        precision: str = None,
     ):
         super().__init__()
         self.model_id = model_id
@@ -375,6 +725,9 @@ class WdTaggerModel(QObject):
         self.character_threshold = character_threshold if character_threshold is not None else get_tagger_config_value("character_threshold", 0.85)
         self.pad_rgb = pad_rgb
         self.use_gpu = use_gpu
+        self.precision = _resolve_precision(precision)
+        self.active_precision = "fp32"  # 실제로 로드한 모델 파일 기준
+        self.model_path: Optional[Path] = None
 
         self.session: Optional[ort.InferenceSession] = None
         self.is_loaded = False
@@ -384,6 +737,10 @@ class WdTaggerModel(QObject):
         self.rating_indexes: List[int] = []
         self.general_indexes: List[int] = []
         self.character_indexes: List[int] = []
+        self.selector: Optional[WdScoreSelector] = None
+        self._score_caches: Dict[str, object] = {}  # 설정 해시 → WdScoreCache
+        self._process_pool = None  # CPU 멀티프로세스 추론 풀 (wd_process_pool.WdProcessPool)
+        self._cancel_event = threading.Event()
 
         # config에서 읽을 값(크기만 반영)
         self.target_size = 448  # 기본값
@@ -540,6 +897,9 @@ class WdTaggerModel(QObject):
                     # 다른 카테고리는 general로 취급하지 않음 (레퍼런스와 동일 분류)
                     pass
 
+        # 벡터화 후처리용 인덱스 배열
+        self.selector = WdScoreSelector(self.tag_names, self.general_indexes, self.character_indexes)
+
     def _maybe_read_config_for_size(self, cfg_path: Optional[Path]):
         """
         config.json에서 input_size를 읽어 target_size만 반영.
@@ -561,6 +921,30 @@ class WdTaggerModel(QObject):
         except Exception:
             pass
 
+    def load_labels_only(self) -> bool:
+        """
+        ONNX 세션 없이 로컬 라벨/크기 설정만 로드 (다운로드 안 함).
+        캐시된 원시 점수에 임계값만 다시 적용할 때 사용.
+        """
+        model_name = self.model_id.split('/')[-1]
+        self.model_dir = _script_dir() / "models" / model_name
+        labels_path = self.model_dir / LABEL_FILENAME
+        if not labels_path.is_file():
+            print(f"⚠️ 라벨 파일 없음: {labels_path}")
+            return False
+        try:
+            self._load_tags(labels_path)
+            self.model_path = self._resolve_precision_model(self.model_dir / MODEL_FILENAME)
+            for name in CONFIG_CANDIDATES:
+                cfg_path = self.model_dir / name
+                if cfg_path.is_file():
+                    self._maybe_read_config_for_size(cfg_path)
+                    break
+            return True
+        except Exception as e:
+            print(f"⚠️ 라벨 로드 실패: {e}")
+            return False
+
     # ▼ 추가: DLL 검색 경로 주입 유틸
     def _add_dll_dir(self, p: str):
         try:
@@ -648,6 +1032,102 @@ class WdTaggerModel(QObject):
                     return True
         return False
 
+    def _resolve_precision_model(self, model_path: Path) -> Path:
+        """precision=int8 이고 INT8 사본이 있으면 그 경로, 아니면 원본 (active_precision 갱신)"""
+        self.active_precision = "fp32"
+        if self.precision == "int8":
+            int8_path = model_path.parent / INT8_MODEL_FILENAME
+            if int8_path.is_file():
+                self.active_precision = "int8"
+                print(f"🔢 INT8 모델 사용: {int8_path}")
+                return int8_path
+            print(f"⚠️ INT8 모델 없음, FP32 사용 (wd_quantize.py 로 생성): {int8_path}")
+        return model_path
+
+    def _optimized_model_path(self, model_path: Path, providers: List[str], settings: dict) -> Path:
+        """
+        최적화 그래프 캐시 경로: models/<모델명>/<원본 이름>.optimized.<provider>.<키>.onnx
+        키 = 원본 모델 크기/mtime + ORT 버전 + 최적화 수준 + CPU 종류
+        (ENABLE_ALL 그래프는 하드웨어 전용 노드를 포함할 수 있고, provider별로 노드 구성이 달라 분리)
+        """
+        import platform
+        st = model_path.stat()
+        provider_tag = "cuda" if "CUDAExecutionProvider" in providers else "cpu"
+        payload = json.dumps([
+            st.st_size, st.st_mtime_ns, ort.__version__, providers, settings["graph_optimization"],
+            platform.machine(), platform.processor(),
+        ])
+        key = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+        return model_path.parent / f"{model_path.stem}.optimized.{provider_tag}.{key}.onnx"
+
+    def _create_session(
+        self, model_path: Path, providers: List[str], intra_op_threads: Optional[int] = None
+    ) -> "ort.InferenceSession":
+        """
+        SessionOptions(스레드/실행 모드/최적화 수준/메모리 패턴·아레나)를 적용해 세션 생성.
+        ort_optimized_model_cache 가 켜져 있으면 최적화된 그래프를 저장해 두고 다음부터
+        그래프 최적화를 건너뛰고 바로 로드한다.
+        intra_op_threads: 설정값 대신 쓸 intra-op 스레드 수 (프로세스 풀 워커의 코어 몫)
+        """
+        def _options():
+            settings, so = _resolve_session_options()
+            if intra_op_threads:
+                settings["intra_op_threads"] = int(intra_op_threads)
+                so.intra_op_num_threads = int(intra_op_threads)
+            return settings, so
+
+        settings, so = _options()
+        print(f"⚙️ ONNX 세션 옵션: {settings}")
+        if not get_tagger_config_value("ort_optimized_model_cache", True) or settings["graph_optimization"] == "disabled":
+            return ort.InferenceSession(str(model_path), sess_options=so, providers=providers)
+
+        try:
+            opt_path = self._optimized_model_path(model_path, providers, settings)
+        except OSError:
+            return ort.InferenceSession(str(model_path), sess_options=so, providers=providers)
+
+        # 1) 저장된 최적화 그래프 재사용 (이미 최적화됐으므로 추가 최적화 생략)
+        if opt_path.is_file():
+            try:
+                cached_so = _options()[1]
+                cached_so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+                session = ort.InferenceSession(str(opt_path), sess_options=cached_so, providers=providers)
+                print(f"⚡ 최적화 모델 캐시 사용: {opt_path.name}")
+                return session
+            except Exception as e:
+                print(f"⚠️ 최적화 모델 캐시 로드 실패, 다시 생성: {e}")
+                try:
+                    opt_path.unlink()
+                except OSError:
+                    pass
+
+        # 2) 원본 모델로 세션 생성하면서 최적화 그래프 저장 (임시 파일 → 성공 시 교체)
+        tmp_path = opt_path.with_name(f"{opt_path.name}.{os.getpid()}.tmp")  # 워커 프로세스 동시 생성 대비
+        so.optimized_model_filepath = str(tmp_path)
+        try:
+            session = ort.InferenceSession(str(model_path), sess_options=so, providers=providers)
+        except Exception as e:
+            print(f"⚠️ 최적화 모델 저장 실패, 저장 없이 세션 생성: {e}")
+            try:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+            except OSError:
+                pass
+            return ort.InferenceSession(str(model_path), sess_options=_options()[1], providers=providers)
+
+        try:
+            if tmp_path.is_file():
+                os.replace(tmp_path, opt_path)
+                # 같은 provider의 이전 캐시 정리
+                prefix = opt_path.name.rsplit(".", 2)[0]  # <원본 이름>.optimized.<provider>
+                for old in model_path.parent.glob(f"{prefix}.*.onnx"):
+                    if old != opt_path:
+                        old.unlink()
+                print(f"💾 최적화 모델 캐시 저장: {opt_path.name}")
+        except OSError as e:
+            print(f"⚠️ 최적화 모델 캐시 정리 실패: {e}")
+        return session
+
     def load_model(self):
         try:
             # 기존 모델 파일들 마이그레이션 (한 번만 실행)
@@ -662,6 +1142,8 @@ class WdTaggerModel(QObject):
             labels_path = _ensure_local_from_hub(self.model_id, LABEL_FILENAME, LABEL_FILENAME)
             model_path  = _ensure_local_from_hub(self.model_id, MODEL_FILENAME, MODEL_FILENAME)
             cfg_path    = _maybe_local_config(self.model_id)  # optional
+            model_path  = self._resolve_precision_model(model_path)
+            self.model_path = model_path
 
             # 태그 로드
             self._load_tags(labels_path)
@@ -702,7 +1184,7 @@ class WdTaggerModel(QObject):
                 providers = ['CUDAExecutionProvider', 'CPUExecutionProvider']
                 print(f"🚀 GPU 모드로 세션 생성 시도: {providers}")
                 try:
-                    self.session = ort.InferenceSession(str(model_path), providers=providers)
+                    self.session = self._create_session(model_path, providers)
                     # 실제 사용된 provider 확인
                     actual_providers = self.session.get_providers()
                     print(f"GPU 모드로 모델 로드 완료 - 사용된 providers: {actual_providers}")
@@ -713,12 +1195,12 @@ class WdTaggerModel(QObject):
                 except Exception as e:
                     # GPU 사용 실패 시 CPU로 fallback
                     print(f"❌ GPU 사용 실패, CPU로 fallback: {e}")
-                    self.session = ort.InferenceSession(str(model_path), providers=['CPUExecutionProvider'])
+                    self.session = self._create_session(model_path, ['CPUExecutionProvider'])
                     actual_providers = self.session.get_providers()
                     print(f"CPU 모드로 모델 로드 완료 - 사용된 providers: {actual_providers}")
             else:
                 print(f"🖥️ CPU 모드로 세션 생성")
-                self.session = ort.InferenceSession(str(model_path), providers=['CPUExecutionProvider'])
+                self.session = self._create_session(model_path, ['CPUExecutionProvider'])
                 actual_providers = self.session.get_providers()
                 print(f"CPU 모드로 모델 로드 완료 - 사용된 providers: {actual_providers}")
 
@@ -746,16 +1228,17 @@ class WdTaggerModel(QObject):
             return PILImage.alpha_composite(bg, image).convert("RGB")
         return image.convert("RGB")
 
-    def _prepare_tensor_reference(self, pil_img: PILImage.Image) -> np.ndarray:
+    def _prepare_tensor_reference(self, pil_img: PILImage.Image, pad_rgb=None) -> np.ndarray:
         """
-        레퍼런스 파이프라인:
+        레퍼런스 파이프라인 (pad_rgb: 호출별 배경/패딩색, None 이면 인스턴스 기본값):
           - RGBA → 흰색 합성
           - 비율 유지 패딩(정사각) → target_size 리사이즈
           - RGB → BGR
           - float32 (0~255), 정규화/스케일링 없음
           - NHWC (1,H,W,3)
         """
-        img = self._alpha_composite_rgb(pil_img, bg_rgb=self.pad_rgb)
+        pad_rgb = tuple(self.pad_rgb if pad_rgb is None else pad_rgb)
+        img = self._alpha_composite_rgb(pil_img, bg_rgb=pad_rgb)
 
         target = int(self.target_size) if self.target_size else 448
         w, h = img.size
@@ -763,7 +1246,7 @@ class WdTaggerModel(QObject):
         pad_left = (max_dim - w) // 2
         pad_top = (max_dim - h) // 2
 
-        padded = PILImage.new("RGB", (max_dim, max_dim), self.pad_rgb)
+        padded = PILImage.new("RGB", (max_dim, max_dim), pad_rgb)
         padded.paste(img, (pad_left, pad_top))
 
         if max_dim != target:
@@ -782,6 +1265,442 @@ class WdTaggerModel(QObject):
         t = np.argmax(difs)
         return float((sorted_probs[t] + sorted_probs[t + 1]) / 2.0)
 
+    def _select_tags_batch(
+        self,
+        scores: np.ndarray,
+        general_mcut_enabled: bool,
+        character_mcut_enabled: bool,
+        max_tags: int,
+        exclude_tags: Optional[List[str]] = None,
+        general_mcut_min: Optional[float] = None,
+        character_mcut_min: Optional[float] = None,
+        general_threshold: Optional[float] = None,
+        character_threshold: Optional[float] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        (N, num_tags) 점수 행렬 → 이미지별 general+character 태그 (점수순).
+        *_mcut_min 이 None이면 MCut 하한 없음 (레퍼런스 임계값 절차 동일).
+        *_threshold 가 None이면 인스턴스 기본값 사용 (풀에서 공유되는 모델이라 호출별 값이 우선).
+        """
+        if self.selector is None:
+            self.selector = WdScoreSelector(self.tag_names, self.general_indexes, self.character_indexes)
+        return self.selector.select(
+            scores,
+            general_threshold=self.general_threshold if general_threshold is None else general_threshold,
+            character_threshold=self.character_threshold if character_threshold is None else character_threshold,
+            general_mcut_enabled=general_mcut_enabled,
+            character_mcut_enabled=character_mcut_enabled,
+            max_tags=max_tags,
+            exclude_tags=exclude_tags,
+            general_mcut_min=general_mcut_min,
+            character_mcut_min=character_mcut_min,
+        )
+
+    def _select_tags(
+        self,
+        scores: np.ndarray,
+        general_mcut_enabled: bool,
+        character_mcut_enabled: bool,
+        max_tags: int,
+        exclude_tags: Optional[List[str]] = None,
+        general_mcut_min: Optional[float] = None,
+        character_mcut_min: Optional[float] = None,
+        general_threshold: Optional[float] = None,
+        character_threshold: Optional[float] = None,
+    ) -> List[Tuple[str, float]]:
+        """1D 점수 벡터 (num_tags,) → 태그 목록 (_select_tags_batch 의 단일 이미지 버전)"""
+        return self._select_tags_batch(
+            np.asarray(scores)[None, :],
+            general_mcut_enabled=general_mcut_enabled,
+            character_mcut_enabled=character_mcut_enabled,
+            max_tags=max_tags,
+            exclude_tags=exclude_tags,
+            general_mcut_min=general_mcut_min,
+            character_mcut_min=character_mcut_min,
+            general_threshold=general_threshold,
+            character_threshold=character_threshold,
+        )[0]
+
+    # ────────────── 배치 추론 ──────────────
+    def _fixed_session_batch(self) -> Optional[int]:
+        """입력 batch 축이 고정(int)이면 그 크기, 동적(심볼/None)이면 None"""
+        try:
+            dim = self.session.get_inputs()[0].shape[0]
+            if isinstance(dim, int) and dim > 0:
+                return dim
+        except Exception:
+            pass
+        return None
+
+    def _run_batch(self, tensors: List[np.ndarray]) -> np.ndarray:
+        """
+        (V,H,W,3) 텐서들을 (N,H,W,3) 하나로 쌓아 session.run 한 번에 추론.
+        반환: (N, num_tags) float32 (입력 순서 그대로)
+        - 입력 batch 축이 고정된 모델은 그 크기로 나눠 실행
+        - 배치 실행이 실패하면(메모리 부족 등) 한 장씩 실행으로 폴백
+        """
+        if not tensors:
+            return np.zeros((0, len(self.tag_names)), dtype=np.float32)
+
+        input_name = self.session.get_inputs()[0].name
+        out_name = self.session.get_outputs()[0].name
+
+        batch = np.concatenate(tensors, axis=0)
+        step = self._fixed_session_batch() or batch.shape[0]
+
+        outputs = []
+        for start in range(0, batch.shape[0], step):
+            chunk = batch[start:start + step]
+            try:
+                outputs.append(self.session.run([out_name], {input_name: chunk})[0])
+            except Exception as e:
+                if chunk.shape[0] == 1:
+                    raise
+                print(f"⚠️ 배치 추론 실패 ({chunk.shape[0]}장), 한 장씩 추론으로 폴백: {e}")
+                for k in range(chunk.shape[0]):
+                    outputs.append(self.session.run([out_name], {input_name: chunk[k:k + 1]})[0])
+        return np.concatenate(outputs, axis=0).astype(np.float32)
+
+    def _prefetch_views(self, image_paths: List[str], prepare, held: int):
+        """
+        디코드/패딩 프리페치 (생산자: 스레드 풀 / 소비자: 호출자의 추론 단계).
+        - prepare(path) -> (cache_key, cached_scores, views)
+        - 결과는 입력 순서대로 yield: (index, path, prepared or None, error or None)
+        - backpressure: 아직 소비되지 않은 작업은 최대 window 장까지만 제출
+        - window = min(prefetch_max_images, prefetch_max_mb / 뷰 텐서 크기) - held
+          (held: 소비자가 배치를 모으느라 들고 있는 장수 → 총 in-flight 메모리 상한 유지)
+        """
+        workers, max_images, max_bytes = _resolve_prefetch_settings()
+        total = len(image_paths)
+
+        if workers < 0:
+            # 프리페치 끔: 동기 처리 (디버깅용)
+            for i, p in enumerate(image_paths):
+                try:
+                    yield i, p, prepare(p), None
+                except Exception as e:
+                    yield i, p, None, e
+            return
+
+        # 뷰 텐서 크기 추정 (1뷰 기준) → 실제 결과를 보고 갱신
+        target = int(self.target_size) if self.target_size else 448
+        per_image = target * target * 3 * 4
+
+        def _window() -> int:
+            cap = min(max_images, max(1, max_bytes // per_image))
+            return max(1, cap - held)
+
+        futures = deque()
+        next_i = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wd-prefetch") as pool:
+            try:
+                while futures or next_i < total:
+                    while next_i < total and len(futures) < _window():
+                        p = image_paths[next_i]
+                        futures.append((next_i, p, pool.submit(prepare, p)))
+                        next_i += 1
+                    i, p, fut = futures.popleft()
+                    try:
+                        prepared = fut.result()
+                    except Exception as e:
+                        yield i, p, None, e
+                        continue
+                    if prepared[2] is not None:
+                        per_image = max(per_image, int(prepared[2].nbytes))
+                    yield i, p, prepared, None
+            finally:
+                # 조기 종료 시 아직 시작하지 않은 작업은 취소
+                for _, _, fut in futures:
+                    fut.cancel()
+
+    def _score_cache_variant(self, apply_sigmoid: bool = False, tta_views=(), tta_merge_mode: str = "mean", pad_rgb=None) -> dict:
+        """원시 점수 캐시 키에 들어가는 설정 (점수 값에 영향을 주는 것만, 임계값류 제외)"""
+        views = list(tta_views)
+        model_file = (self.model_dir / MODEL_FILENAME) if self.model_dir else None
+        try:
+            model_size = model_file.stat().st_size if model_file else 0
+        except OSError:
+            model_size = 0
+        variant = {
+            "apply_sigmoid": bool(apply_sigmoid),
+            "tta_views": views,
+            "tta_merge_mode": tta_merge_mode if views else None,
+            "pad_rgb": list(self.pad_rgb if pad_rgb is None else pad_rgb),
+            "target_size": int(self.target_size or 448),
+            "model_size": model_size,
+        }
+        # INT8 점수는 FP32와 다르므로 별도 캐시 (FP32 키는 기존과 동일하게 유지)
+        if self.active_precision != "fp32":
+            variant["precision"] = self.active_precision
+        return variant
+
+    def _open_score_cache(self, variant: Optional[dict]):
+        """설정 조합별 원시 점수 캐시 (score_cache_enabled=false 이거나 실패 시 None)"""
+        if variant is None or not get_tagger_config_value("score_cache_enabled", True):
+            return None
+        try:
+            max_entries = get_tagger_config_value("score_cache_max_entries", DEFAULT_MAX_ENTRIES)
+            max_mb = get_tagger_config_value("score_cache_max_mb", DEFAULT_MAX_MB)
+            key = variant_key({"model_id": self.model_id, **variant})
+            cache = self._score_caches.get(key)
+            if cache is None or cache.num_tags != len(self.tag_names):
+                cache = WdScoreCache.for_model(self.model_id, len(self.tag_names), variant, max_entries, max_mb)
+                self._score_caches[key] = cache
+            else:
+                cache.set_limits(max_entries, max_mb)
+            return cache
+        except Exception as e:
+            print(f"⚠️ 점수 캐시 열기 실패 (캐시 없이 진행): {e}")
+            return None
+
+    def _get_process_pool(self):
+        """
+        CPU 세션이고 process_pool_workers 가 켜져 있으면 워커 프로세스 풀 (설정이 바뀌면 다시 생성).
+        GPU 세션이거나 꺼져 있거나 워커를 띄우지 못하면 None (프로세스 내 배치 추론 사용)
+        """
+        try:
+            from wd_process_pool import WdProcessPool, resolve_pool_settings
+            workers, threads, pin_cores = resolve_pool_settings(load_tagger_config())
+            if workers == 0 or self.session is None or "CUDAExecutionProvider" in self.session.get_providers():
+                self.close_process_pool()
+                return None
+            signature = (str(self.model_path), workers, threads, pin_cores)
+            if self._process_pool is not None:
+                if self._process_pool.signature == signature and self._process_pool.alive_workers() > 0:
+                    return self._process_pool
+                self.close_process_pool()
+
+            print(f"🧵 WD 워커 프로세스 풀 시작: 워커 {workers}개 × 스레드 {threads}개")
+            pool = WdProcessPool(
+                {
+                    "model_id": self.model_id,
+                    "model_dir": str(self.model_dir),
+                    "model_path": str(self.model_path),
+                    "precision": self.precision,
+                    "num_tags": len(self.tag_names),
+                },
+                workers, threads, pin_cores,
+            )
+            ready = pool.wait_ready()
+            if ready == 0:
+                print("⚠️ WD 워커 프로세스를 시작하지 못함, 프로세스 내 추론 사용")
+                pool.shutdown()
+                return None
+            print(f"✅ WD 워커 준비: {ready}/{workers}")
+            self._process_pool = pool
+            return pool
+        except Exception as e:
+            print(f"⚠️ WD 워커 프로세스 풀 사용 불가 (프로세스 내 추론 사용): {e}")
+            return None
+
+    def close_process_pool(self):
+        """워커 프로세스 풀 종료 (모델 해제/설정 변경 시)"""
+        pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            try:
+                pool.shutdown()
+            except Exception as e:
+                print(f"⚠️ WD 워커 프로세스 풀 종료 실패: {e}")
+
+    def request_cancel(self):
+        """진행 중인 배치 추론 취소 요청 (현재 배치까지만 처리하고 중단)"""
+        self._cancel_event.set()
+
+    def _score_in_processes(self, pool, image_paths: List[str], view_spec: dict, cache, batch_size: int):
+        """
+        워커 프로세스 풀로 점수 계산 (캐시 조회는 부모에서, 미스만 워커로 보냄).
+        batch_size 장 단위로 [(index, path, cache_key, scores, from_cache, error)] 를 입력 순서대로 yield
+        """
+        total = len(image_paths)
+
+        def _chunks():
+            for start in range(0, total, batch_size):
+                entries, miss_paths = [], []
+                for i in range(start, min(total, start + batch_size)):
+                    p = image_paths[i]
+                    key, cached = None, None
+                    if cache is not None:
+                        try:
+                            key, cached = cache.lookup(p)
+                        except Exception:
+                            key, cached = None, None
+                    entries.append((i, p, key, cached))
+                    if cached is None:
+                        miss_paths.append(p)
+                yield entries, miss_paths
+
+        for entries, scores, errors in pool.imap(_chunks(), view_spec, self._cancel_event):
+            scored = []
+            k = 0
+            for i, p, key, cached in entries:
+                if cached is not None:
+                    scored.append((i, p, key, cached, True, None))
+                    continue
+                err = RuntimeError(errors[k]) if k in errors else None
+                scored.append((i, p, key, scores[k], False, err))
+                k += 1
+            yield scored
+
+    def _predict_batched(
+        self,
+        image_paths: List[str],
+        prepare_views,
+        merge_views,
+        select,
+        error_fmt: str = "이미지 {path} 처리 실패: {error}",
+        cache_variant: Optional[dict] = None,
+        view_spec: Optional[dict] = None,
+        pad_rgb=None,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        공통 배치 드라이버: 디코드/패딩은 프리페치 스레드 풀에서 미리 진행하고,
+        batch_size 장씩 묶어 session.run 한 번으로 추론한 뒤
+        입력 순서대로 tag_generated / progress_updated 를 emit.
+          prepare_views(path) -> (V,H,W,3)  (V=1 원본, TTA면 원본+변형 뷰)
+          merge_views(raw)    -> (num_tags,) (raw: 해당 이미지의 (V,num_tags) 출력)
+          select(matrix)      -> 이미지별 [(tag, score)] (matrix: (M, num_tags))
+          error_fmt           -> error_occurred 메시지 ({path}, {error})
+          cache_variant       -> 원시 점수 캐시 설정 (None이면 캐시 안 씀)
+          view_spec           -> 워커 프로세스용 뷰 설정 (apply_sigmoid/tta_*, prepare/merge와 같은 의미)
+                                 CPU 프로세스 풀이 켜져 있으면 추론을 워커 프로세스에서 진행
+          pad_rgb             -> 이번 호출의 배경/패딩색 (prepare_views 에 넘긴 값과 같아야 함, None = 인스턴스 기본값)
+        원시 점수 캐시 적중 이미지는 디코드/추론 없이 캐시 점수로 바로 후처리한다.
+        request_cancel() 시 진행 중인 배치까지만 처리하고 중단한다.
+        반환: 이미지별 태그 목록 (실패한 이미지는 빈 리스트)
+        """
+        total = len(image_paths)
+        batch_size = _resolve_batch_size()
+        tag_results: List[List[Tuple[str, float]]] = []
+        cache = self._open_score_cache(cache_variant)
+        stats = {"hits": 0, "misses": 0}
+        self._cancel_event.clear()
+
+        def _emit(scored):
+            # scored: [(index, path, cache_key, scores, from_cache, error)] (입력 순서)
+            # 새 점수는 캐시에 저장 → (M, num_tags) 행렬 → 후처리 한 번 (벡터화) → 입력 순서대로 emit
+            errors: Dict[int, Exception] = {}
+            merged: List[np.ndarray] = []
+            merged_pos: Dict[int, int] = {}
+            new_keys: List[str] = []
+            new_scores: List[np.ndarray] = []
+            for i, p, key, scores, from_cache, err in scored:
+                if err is not None:
+                    errors[i] = err
+                    continue
+                if from_cache:
+                    stats["hits"] += 1
+                else:
+                    # 새 점수는 전체 정밀도로 후처리 (캐시에는 float16 으로 저장, wd_score_cache 정밀도 설명 참고)
+                    stats["misses"] += 1
+                    if key is not None:
+                        new_keys.append(key)
+                        new_scores.append(scores)
+                merged_pos[i] = len(merged)
+                merged.append(scores)
+
+            if cache is not None and new_keys:
+                try:
+                    cache.put_many(new_keys, np.stack(new_scores, axis=0))
+                except Exception as e:
+                    print(f"⚠️ 점수 캐시 저장 실패: {e}")
+
+            selected: List[List[Tuple[str, float]]] = []
+            if merged:
+                try:
+                    selected = select(np.stack(merged, axis=0))
+                except Exception as e:
+                    errors.update({i: e for i in merged_pos})
+                    merged_pos = {}
+
+            for i, p, _, _, _, _ in scored:
+                try:
+                    if i in errors:
+                        raise errors[i]
+                    tags = selected[merged_pos[i]]
+                    tag_results.append(tags)
+                    self.tag_generated.emit(p, tags)
+                except Exception as e:
+                    self.error_occurred.emit(error_fmt.format(path=p, error=e))
+                    tag_results.append([])  # 실패한 경우 빈 리스트
+                finally:
+                    self.progress_updated.emit(i + 1, total)
+
+        def _prepare(p):
+            key, cached = None, None
+            if cache is not None:
+                try:
+                    key, cached = cache.lookup(p)
+                except Exception:
+                    key, cached = None, None  # 캐시 문제는 추론으로 대체 (파일 오류는 아래에서 보고)
+            if cached is not None:
+                return key, cached, None
+            return key, None, prepare_views(p)
+
+        def _flush(pending):
+            # 캐시 미스만 배치 한 번 추론 (전처리 실패 이미지는 제외) → 이미지별 뷰 병합
+            misses = [prep for (_, _, prep, err) in pending if err is None and prep[2] is not None]
+            raw, batch_error = None, None
+            try:
+                raw = self._run_batch([prep[2] for prep in misses])
+            except Exception as e:
+                batch_error = e
+
+            scored = []
+            offset = 0
+            for i, p, prep, err in pending:
+                if err is not None:
+                    scored.append((i, p, None, None, False, err))
+                    continue
+                key, cached, views = prep
+                if views is None:
+                    scored.append((i, p, key, cached, True, None))
+                    continue
+                rows = slice(offset, offset + views.shape[0])
+                offset = rows.stop
+                if batch_error is not None:
+                    scored.append((i, p, key, None, False, batch_error))
+                    continue
+                try:
+                    scored.append((i, p, key, merge_views(raw[rows]), False, None))
+                except Exception as e:
+                    scored.append((i, p, key, None, False, e))
+            _emit(scored)
+
+        pool = self._get_process_pool() if view_spec is not None else None
+        try:
+            if pool is not None:
+                # 워커 프로세스가 디코드/추론/뷰 병합, 부모는 캐시/후처리/시그널만
+                spec = dict(view_spec, pad_rgb=list(self.pad_rgb if pad_rgb is None else pad_rgb),
+                            target_size=int(self.target_size or 448))
+                for scored in self._score_in_processes(pool, image_paths, spec, cache, batch_size):
+                    _emit(scored)
+            else:
+                # 프리페치 → 배치 단위 추론 (추론 중에도 다음 이미지 디코드가 진행됨)
+                # 캐시 적중분은 추론이 필요 없으므로 미스가 batch_size 장 모일 때까지 함께 모은다
+                max_pending = max(batch_size * 4, 64)
+                pending = []
+                pending_misses = 0
+                for item in self._prefetch_views(image_paths, _prepare, held=batch_size):
+                    if self._cancel_event.is_set():
+                        break
+                    pending.append(item)
+                    if item[3] is None and item[2][2] is not None:
+                        pending_misses += 1
+                    if pending_misses >= batch_size or len(pending) >= max_pending:
+                        _flush(pending)
+                        pending = []
+                        pending_misses = 0
+                if pending and not self._cancel_event.is_set():
+                    _flush(pending)
+            if self._cancel_event.is_set():
+                print(f"⏹️ WD 태깅 취소됨 ({len(tag_results)}/{total}장 처리)")
+        finally:
+            if cache is not None:
+                cache.flush()
+                print(f"💾 점수 캐시: 적중 {stats['hits']} / 추론 {stats['misses']} (저장 {len(cache)}개)")
+
+        return tag_results
+
     def predict_tags(
         self,
         image_path: str,
@@ -789,6 +1708,8 @@ class WdTaggerModel(QObject):
         character_mcut_enabled: bool = None,
         max_tags: int = None,
         exclude_tags: Optional[List[str]] = None,
+        general_threshold: float = None,
+        character_threshold: float = None,
     ) -> List[Tuple[str, float]]:
         """
         레퍼런스 로직으로 태그 선택 후 (general+character) 합쳐 점수순 반환.
@@ -828,44 +1749,23 @@ class WdTaggerModel(QObject):
             print(f"🔍 추론 시간: {inference_time:.3f}초 ({provider_info} 모드)")
 
             # (이 부분은 레퍼런스의 grouping/threshold 절차와 동일)
-            labels = list(zip(self.tag_names, scores))
-
-            rating_names = [labels[i] for i in self.rating_indexes]  # dict로 쓰는 경우가 많음
-            rating_dict: Dict[str, float] = dict(rating_names)       # 필요시 사용
-
-            general_names = [labels[i] for i in self.general_indexes]
-            if general_mcut_enabled and len(general_names) >= 2:
-                general_probs = np.array([x[1] for x in general_names], dtype=np.float32)
-                general_mcut_min_enabled = get_tagger_config_value("general_mcut_min_enabled", False)
-                if general_mcut_min_enabled:
-                    general_mcut_min = get_tagger_config_value("general_mcut_min", 0.15)
-                    general_thresh = max(general_mcut_min, self._mcut_threshold(general_probs))
-                else:
-                    general_thresh = self._mcut_threshold(general_probs)
-            else:
-                general_thresh = self.general_threshold
-            general_res = {t: float(s) for (t, s) in general_names if s > general_thresh}
-
-            character_names = [labels[i] for i in self.character_indexes]
-            if character_mcut_enabled and len(character_names) >= 2:
-                character_probs = np.array([x[1] for x in character_names], dtype=np.float32)
-                character_mcut_min_enabled = get_tagger_config_value("character_mcut_min_enabled", False)
-                if character_mcut_min_enabled:
-                    character_mcut_min = get_tagger_config_value("character_mcut_min", 0.15)
-                    character_thresh = max(character_mcut_min, self._mcut_threshold(character_probs))
-                else:
-                    character_thresh = self._mcut_threshold(character_probs)
-            else:
-                character_thresh = self.character_threshold
-            character_res = {t: float(s) for (t, s) in character_names if s > character_thresh}
-
-            # 반환 형식: general+character를 합쳐 점수순 리스트 (기존 시그널 호환)
-            ex = set(exclude_tags or [])
-            picked = [(t, sc) for (t, sc) in {**general_res, **character_res}.items() if t not in ex]
-            picked.sort(key=lambda x: x[1], reverse=True)
-            if max_tags > 0:
-                picked = picked[:max_tags]
-            return picked
+            general_mcut_min = None
+            if get_tagger_config_value("general_mcut_min_enabled", False):
+                general_mcut_min = get_tagger_config_value("general_mcut_min", 0.15)
+            character_mcut_min = None
+            if get_tagger_config_value("character_mcut_min_enabled", False):
+                character_mcut_min = get_tagger_config_value("character_mcut_min", 0.15)
+            return self._select_tags(
+                scores,
+                general_mcut_enabled=general_mcut_enabled,
+                character_mcut_enabled=character_mcut_enabled,
+                max_tags=max_tags,
+                exclude_tags=exclude_tags,
+                general_mcut_min=general_mcut_min,
+                character_mcut_min=character_mcut_min,
+                general_threshold=general_threshold,
+                character_threshold=character_threshold,
+            )
 
         except Exception as e:
             raise RuntimeError(f"태그 예측 실패: {e}")
@@ -877,6 +1777,9 @@ class WdTaggerModel(QObject):
         character_mcut_enabled: bool = None,
         max_tags: int = None,
         exclude_tags: Optional[List[str]] = None,
+        general_threshold: float = None,
+        character_threshold: float = None,
+        pad_rgb=None,
     ):
         if not self.is_loaded:
             self.load_model()
@@ -889,27 +1792,33 @@ class WdTaggerModel(QObject):
         if character_mcut_enabled is None:
             character_mcut_enabled = get_tagger_config_value("character_mcut_enabled", False)
             
-        total = len(image_paths)
-        
-        # 태그 결과 수집
-        tag_results = []
-        
-        for i, p in enumerate(image_paths):
-            try:
-                tags = self.predict_tags(
-                    p,
-                    general_mcut_enabled=general_mcut_enabled,
-                    character_mcut_enabled=character_mcut_enabled,
-                    max_tags=max_tags,
-                    exclude_tags=exclude_tags,
-                )
-                tag_results.append(tags)
-                self.tag_generated.emit(p, tags)
-            except Exception as e:
-                self.error_occurred.emit(f"이미지 {p} 처리 실패: {e}")
-                tag_results.append([])  # 실패한 경우 빈 리스트
-            finally:
-                self.progress_updated.emit(i + 1, total)
+        general_mcut_min = None
+        if get_tagger_config_value("general_mcut_min_enabled", False):
+            general_mcut_min = get_tagger_config_value("general_mcut_min", 0.15)
+        character_mcut_min = None
+        if get_tagger_config_value("character_mcut_min_enabled", False):
+            character_mcut_min = get_tagger_config_value("character_mcut_min", 0.15)
+
+        # 배치 추론 (batch_size 장씩 session.run 한 번)
+        tag_results = self._predict_batched(
+            image_paths,
+            prepare_views=lambda p: self._prepare_tensor_reference(PILImage.open(p), pad_rgb),
+            merge_views=lambda raw: raw[0],
+            select=lambda scores: self._select_tags_batch(
+                scores,
+                general_mcut_enabled=general_mcut_enabled,
+                character_mcut_enabled=character_mcut_enabled,
+                max_tags=max_tags,
+                exclude_tags=exclude_tags,
+                general_mcut_min=general_mcut_min,
+                character_mcut_min=character_mcut_min,
+                general_threshold=general_threshold,
+                character_threshold=character_threshold,
+            ),
+            cache_variant=self._score_cache_variant(pad_rgb=pad_rgb),
+            view_spec={"apply_sigmoid": False, "tta_views": [], "tta_merge_mode": "mean"},
+            pad_rgb=pad_rgb,
+        )
         
         # 타임머신 로그 기록 (공통 함수 사용)
         try:
@@ -928,6 +1837,9 @@ class WdTaggerModel(QObject):
         character_mcut_enabled: bool = None,
         max_tags: int = None,
         exclude_tags: Optional[List[str]] = None,
+        general_threshold: float = None,
+        character_threshold: float = None,
+        pad_rgb=None,
     ):
         """
         통합 배치 예측 엔트리포인트 (WdTaggerModel용)
@@ -935,6 +1847,7 @@ class WdTaggerModel(QObject):
         - mode="v0": 기본 메서드 사용
         - mode="v1": Enhanced V1 사용 (Sigmoid + TTA)
         - mode="v2": Enhanced V2 사용 (V1 + 일반 MCut min)
+        임계값/pad_rgb 는 호출별 값 (풀에서 공유되는 모델 인스턴스는 바꾸지 않음, None = 인스턴스 기본값)
         """
         if not self.is_loaded:
             self.load_model()
@@ -947,14 +1860,13 @@ class WdTaggerModel(QObject):
         if character_mcut_enabled is None:
             character_mcut_enabled = get_tagger_config_value("character_mcut_enabled", False)
         
-        # 성능 가드레일: 대량 배치 시 TTA 비활성화
+        # 성능 가드레일: TTA 뷰는 원본과 같은 배치로 추론되므로 끄지 않고,
+        # 대량 배치에서는 추가 뷰(중앙 크롭/멀티스케일)만 생략하고 뒤집기 뷰는 유지
         perf_tier = get_tagger_config_value("perf_tier", "balanced")  # "speed", "balanced", "quality"
-        if perf_tier == "speed" and len(image_paths) > 10:
-            print("⚠️ 성능 우선 모드: 대량 배치로 인해 TTA 비활성화")
-            # TTA 강제 비활성화를 위한 임시 설정 오버라이드
-            tta_enabled = False
-        else:
-            tta_enabled = get_tagger_config_value("tta_enabled", False)
+        tta_enabled = get_tagger_config_value("tta_enabled", False)
+        tta_extra_views = not (perf_tier == "speed" and len(image_paths) > 10)
+        if tta_enabled and not tta_extra_views:
+            print("⚠️ 성능 우선 모드: 대량 배치로 인해 TTA 추가 뷰(크롭/멀티스케일) 생략")
         
         # auto 모드에서 버전 자동 선택
         if mode == "auto":
@@ -989,6 +1901,10 @@ class WdTaggerModel(QObject):
                 character_mcut_enabled=character_mcut_enabled,
                 max_tags=max_tags,
                 exclude_tags=exclude_tags,
+                general_threshold=general_threshold,
+                character_threshold=character_threshold,
+                tta_extra_views=tta_extra_views,
+                pad_rgb=pad_rgb,
             )
         elif mode == "v1" and hasattr(self, 'batch_predict_enhanced'):
             print("✅ V1 Enhanced methods 사용")
@@ -1000,6 +1916,10 @@ class WdTaggerModel(QObject):
                 character_mcut_enabled=character_mcut_enabled,
                 max_tags=max_tags,
                 exclude_tags=exclude_tags,
+                general_threshold=general_threshold,
+                character_threshold=character_threshold,
+                tta_extra_views=tta_extra_views,
+                pad_rgb=pad_rgb,
             )
         else:
             print("✅ 기본 methods 사용")
@@ -1011,14 +1931,82 @@ class WdTaggerModel(QObject):
                 character_mcut_enabled=character_mcut_enabled,
                 max_tags=max_tags,
                 exclude_tags=exclude_tags,
+                general_threshold=general_threshold,
+                character_threshold=character_threshold,
+                pad_rgb=pad_rgb,
             )
         
         # 최종 로깅 정보 출력
         print(f"📊 배치 예측 완료: {log_info}")
 
 
+class WdSessionPool:
+    """
+    로드된 WD 모델(ONNX 세션) LRU 풀
+    - 키: (model_id, GPU/CPU, 정밀도) — 임계값/pad_rgb 같은 후처리 값은 세션과 무관하므로 키에 넣지 않음
+    - session_pool_max_models / session_pool_max_mb 를 넘으면 가장 오래 안 쓴 모델부터 풀에서 뺀다
+      (실행 중인 스레드가 참조 중이면 그 작업이 끝날 때 해제됨)
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Tuple[str, str, str], WdTaggerModel]" = OrderedDict()
+
+    @staticmethod
+    def _key(model_id: str, use_gpu: bool, precision: str) -> Tuple[str, str, str]:
+        return (model_id, "gpu" if use_gpu else "cpu", precision)
+
+    @staticmethod
+    def _footprint(tagger: "WdTaggerModel") -> int:
+        try:
+            return tagger.model_path.stat().st_size if tagger.model_path else 0
+        except OSError:
+            return 0
+
+    def get(self, model_id: str, use_gpu: bool = True, precision: str = None) -> "WdTaggerModel":
+        """풀에 있으면 재사용, 없으면 로드 후 등록 (같은 모델 동시 로드 방지를 위해 lock 안에서 로드)"""
+        precision = _resolve_precision(precision)
+        key = self._key(model_id, use_gpu, precision)
+        with self._lock:
+            tagger = self._entries.get(key)
+            if tagger is not None and tagger.is_loaded:
+                self._entries.move_to_end(key)
+                print(f"♻️ 기존 모델 재사용: GPU={tagger.use_gpu}, Model={tagger.model_id}")
+                return tagger
+
+            print(f"🔄 모델 새로 로드: GPU={use_gpu}, Model={model_id}, Precision={precision}")
+            tagger = WdTaggerModel(model_id=model_id, use_gpu=use_gpu, precision=precision)
+            tagger.load_model()
+            self._entries[key] = tagger
+            self._evict()
+            return tagger
+
+    def _evict(self):
+        max_models, max_bytes = _resolve_session_pool_limits()
+        # 방금 쓴 모델(맨 뒤)은 항상 남긴다
+        while len(self._entries) > 1:
+            total = sum(self._footprint(t) for t in self._entries.values())
+            if len(self._entries) <= max_models and total <= max_bytes:
+                break
+            key, tagger = self._entries.popitem(last=False)
+            tagger.close_process_pool()
+            print(f"🗑️ WD 모델 풀에서 해제 (LRU): GPU={key[1]}, Model={key[0]}, Precision={key[2]}")
+
+    def loaded_models(self) -> List[Tuple[str, str, str]]:
+        """풀에 있는 (model_id, provider, precision) 목록 (오래된 순)"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def clear(self):
+        with self._lock:
+            for tagger in self._entries.values():
+                tagger.close_process_pool()
+            self._entries.clear()
+
+
 # 전역 인스턴스
-_global_tagger = None
+_session_pool = WdSessionPool()
+_global_tagger = None  # 가장 최근에 사용한 모델 (get_tag_category 등 호환용)
 
 def get_global_tagger(
     model_id: str = "SmilingWolf/wd-vit-large-tagger-v3",
@@ -1026,34 +2014,18 @@ def get_global_tagger(
     character_threshold: float = None,
     pad_rgb=(255, 255, 255),
     use_gpu: bool = True,
+    precision: str = None,
 ):
+    """
+    세션 풀에서 모델을 가져온다. 풀의 모델은 여러 스레드가 공유하므로 인스턴스 값은 바꾸지 않는다
+    → 임계값/pad_rgb 는 예측 메서드(batch_predict_unified 등)의 호출별 인자로 넘길 것.
+    (general_threshold/character_threshold/pad_rgb 인자는 기존 호출 호환용으로만 남아 있음)
+    """
     global _global_tagger
     
-    # 설정 파일에서 기본값 로드
-    if general_threshold is None:
-        general_threshold = get_tagger_config_value("general_threshold", 0.35)
-    if character_threshold is None:
-        character_threshold = get_tagger_config_value("character_threshold", 0.85)
-    
-    # 파라미터가 바뀌면 새로 생성
-    if (_global_tagger is None or
-        _global_tagger.model_id != model_id or
-        _global_tagger.general_threshold != general_threshold or
-        _global_tagger.character_threshold != character_threshold or
-        _global_tagger.pad_rgb != pad_rgb or
-        _global_tagger.use_gpu != use_gpu):
-        print(f"🔄 모델 새로 로드: GPU={use_gpu}, Model={model_id}")
-        _global_tagger = WdTaggerModel(
-            model_id=model_id,
-            general_threshold=general_threshold,
-            character_threshold=character_threshold,
-            pad_rgb=pad_rgb,
-            use_gpu=use_gpu,
-        )
-        _global_tagger.load_model()
-    else:
-        print(f"♻️ 기존 모델 재사용: GPU={_global_tagger.use_gpu}, Model={_global_tagger.model_id}")
-    return _global_tagger
+    tagger = _session_pool.get(model_id, use_gpu, precision)
+    _global_tagger = tagger
+    return tagger
 
 
 def get_tag_category(tag_name: str) -> str:
@@ -1115,6 +2087,11 @@ class WdTaggerThread(QThread):
         self.use_gpu = use_gpu
         self.tagger = None
 
+    def stop(self):
+        """진행 중인 태깅 취소 (현재 배치까지 처리 후 finished)"""
+        if self.tagger is not None:
+            self.tagger.request_cancel()
+
     def run(self):
         try:
             # 설정 파일에서 기본값 로드
@@ -1124,13 +2101,7 @@ class WdTaggerThread(QThread):
             general_mcut_enabled = self.general_mcut_enabled if self.general_mcut_enabled is not None else get_tagger_config_value("general_mcut_enabled", False)
             character_mcut_enabled = self.character_mcut_enabled if self.character_mcut_enabled is not None else get_tagger_config_value("character_mcut_enabled", False)
             
-            self.tagger = get_global_tagger(
-                model_id=self.model_id,
-                general_threshold=general_threshold,
-                character_threshold=character_threshold,
-                pad_rgb=self.pad_rgb,
-                use_gpu=self.use_gpu,
-            )
+            self.tagger = get_global_tagger(model_id=self.model_id, use_gpu=self.use_gpu)
             self.tagger.progress_updated.connect(self.progress_updated)
             self.tagger.tag_generated.connect(self.tag_generated)
             self.tagger.finished.connect(self.finished)
@@ -1143,6 +2114,9 @@ class WdTaggerThread(QThread):
                 character_mcut_enabled=character_mcut_enabled,
                 max_tags=max_tags,
                 exclude_tags=self.exclude_tags,
+                general_threshold=general_threshold,
+                character_threshold=character_threshold,
+                pad_rgb=self.pad_rgb,
             )
         except Exception as e:
             self.error_occurred.emit(f"WD Tagger 스레드 오류: {e}")
@@ -1156,6 +2130,9 @@ class WdTaggerThread(QThread):
         character_mcut_enabled: bool = None,
         max_tags: int = None,
         exclude_tags: Optional[List[str]] = None,
+        general_threshold: float = None,
+        character_threshold: float = None,
+        pad_rgb=None,
     ):
         """
         통합 배치 예측 엔트리포인트
@@ -1163,6 +2140,7 @@ class WdTaggerThread(QThread):
         - mode="v0": 기본 메서드 사용
         - mode="v1": Enhanced V1 사용 (Sigmoid + TTA)
         - mode="v2": Enhanced V2 사용 (V1 + 일반 MCut min)
+        임계값/pad_rgb 는 호출별 값 (풀에서 공유되는 모델 인스턴스는 바꾸지 않음, None = 인스턴스 기본값)
         """
         if not self.is_loaded:
             self.load_model()
@@ -1175,14 +2153,13 @@ class WdTaggerThread(QThread):
         if character_mcut_enabled is None:
             character_mcut_enabled = get_tagger_config_value("character_mcut_enabled", False)
         
-        # 성능 가드레일: 대량 배치 시 TTA 비활성화
+        # 성능 가드레일: TTA 뷰는 원본과 같은 배치로 추론되므로 끄지 않고,
+        # 대량 배치에서는 추가 뷰(중앙 크롭/멀티스케일)만 생략하고 뒤집기 뷰는 유지
         perf_tier = get_tagger_config_value("perf_tier", "balanced")  # "speed", "balanced", "quality"
-        if perf_tier == "speed" and len(image_paths) > 10:
-            print("⚠️ 성능 우선 모드: 대량 배치로 인해 TTA 비활성화")
-            # TTA 강제 비활성화를 위한 임시 설정 오버라이드
-            tta_enabled = False
-        else:
-            tta_enabled = get_tagger_config_value("tta_enabled", False)
+        tta_enabled = get_tagger_config_value("tta_enabled", False)
+        tta_extra_views = not (perf_tier == "speed" and len(image_paths) > 10)
+        if tta_enabled and not tta_extra_views:
+            print("⚠️ 성능 우선 모드: 대량 배치로 인해 TTA 추가 뷰(크롭/멀티스케일) 생략")
         
         # auto 모드에서 버전 자동 선택
         if mode == "auto":
@@ -1225,6 +2202,10 @@ class WdTaggerThread(QThread):
                 character_mcut_enabled=character_mcut_enabled,
                 max_tags=max_tags,
                 exclude_tags=exclude_tags,
+                general_threshold=general_threshold,
+                character_threshold=character_threshold,
+                tta_extra_views=tta_extra_views,
+                pad_rgb=pad_rgb,
             )
         elif mode == "v1" and hasattr(self, 'batch_predict_enhanced'):
             print("✅ V1 Enhanced methods 사용")
@@ -1236,6 +2217,10 @@ class WdTaggerThread(QThread):
                 character_mcut_enabled=character_mcut_enabled,
                 max_tags=max_tags,
                 exclude_tags=exclude_tags,
+                general_threshold=general_threshold,
+                character_threshold=character_threshold,
+                tta_extra_views=tta_extra_views,
+                pad_rgb=pad_rgb,
             )
         else:
             print("✅ 기본 methods 사용")
@@ -1247,6 +2232,9 @@ class WdTaggerThread(QThread):
                 character_mcut_enabled=character_mcut_enabled,
                 max_tags=max_tags,
                 exclude_tags=exclude_tags,
+                general_threshold=general_threshold,
+                character_threshold=character_threshold,
+                pad_rgb=pad_rgb,
             )
         
         # 최종 로깅 정보 출력
@@ -1270,7 +2258,11 @@ def _enh_default_config():
         "apply_sigmoid": False,
         "tta_enabled": False,
         "tta_horizontal_flip": True,
-        "tta_merge_mode": "mean"  # "mean" or "max"
+        "tta_merge_mode": "mean",  # "mean" or "max"
+        "tta_center_crop": False,
+        "tta_crop_ratio": 0.875,
+        "tta_multiscale": False,
+        "tta_scales": [0.75]
     }
 
 def _load_enh_config_with_defaults():
@@ -1345,11 +2337,8 @@ def _predict_scores_single_pass(self, pil_img, apply_sigmoid=False):
         scores = _safe_sigmoid(scores)
     return scores  # 1D (num_tags,)
 
-def predict_tags_enhanced(
-    self,
-    image_path: str,
+def _resolve_enh_options(
     use_config: bool = True,
-    # Explicit overrides; if None, values come from JSON
     general_mcut_enabled: bool = None,
     character_mcut_enabled: bool = None,
     apply_sigmoid: bool = None,
@@ -1357,19 +2346,12 @@ def predict_tags_enhanced(
     tta_horizontal_flip: bool = None,
     tta_merge_mode: str = None,
     max_tags: int = None,
-    exclude_tags: list = None,
-):
+    tta_extra_views: bool = True,
+) -> dict:
     """
-    Enhanced prediction:
-    - Optional sigmoid on raw outputs.
-    - Optional TTA (currently: horizontal flip) with mean/max merge.
-    - Thresholding identical to reference (including MCut when enabled).
-    NOTE: This is an additive API; existing methods remain untouched.
+    Resolve enhancement toggles once (explicit overrides win, else JSON).
+    tta_extra_views=False keeps only the flip view (perf_tier="speed" on large batches).
     """
-    if not self.is_loaded:
-        self.load_model()
-
-    # Resolve defaults
     cfg = _load_enh_config_with_defaults() if use_config else _enh_default_config()
     if general_mcut_enabled is None:
         general_mcut_enabled = bool(cfg.get("general_mcut_enabled", False))
@@ -1385,55 +2367,141 @@ def predict_tags_enhanced(
         tta_merge_mode = str(cfg.get("tta_merge_mode", "mean"))
     if max_tags is None:
         max_tags = get_tagger_config_value("max_tags", 30)
+    return {
+        "general_mcut_enabled": general_mcut_enabled,
+        "character_mcut_enabled": character_mcut_enabled,
+        "apply_sigmoid": apply_sigmoid,
+        "tta_enabled": tta_enabled,
+        "tta_horizontal_flip": tta_horizontal_flip,
+        "tta_merge_mode": tta_merge_mode,
+        "tta_views": _enh_tta_views(tta_enabled, tta_horizontal_flip, cfg, tta_extra_views),
+        "max_tags": max_tags,
+    }
 
-    # Load image
-    pil = _PILImage.open(image_path)
-
-    # Inference (single or TTA)
+def _enh_tta_views(tta_enabled, tta_horizontal_flip=True, cfg=None, extra_views=True):
+    """
+    TTA view names (besides the original), e.g. ["flip", "crop:0.875", "scale:0.75"].
+    The names also go into the score-cache key, so the same list always means the same views.
+    """
     if not tta_enabled:
-        scores = _predict_scores_single_pass(self, pil, apply_sigmoid=apply_sigmoid)
-    else:
-        _scores = []
-        # original
-        _scores.append(_predict_scores_single_pass(self, pil, apply_sigmoid=apply_sigmoid))
-        # horizontal flip (optional)
-        if tta_horizontal_flip:
-            pil_flip = _pil_horizontal_flip(pil)
-            _scores.append(_predict_scores_single_pass(self, pil_flip, apply_sigmoid=apply_sigmoid))
-        scores = _merge_scores(_np.stack(_scores, axis=0), mode=tta_merge_mode).astype(_np.float32)
-
-    # Thresholding (exactly as in reference predict_tags)
-    labels = list(zip(self.tag_names, scores))
-
-    # rating kept for internal parity; not returned
-    rating_names = [labels[i] for i in self.rating_indexes]
-    _ = dict(rating_names)
-
-    # general
-    general_names = [labels[i] for i in self.general_indexes]
-    if general_mcut_enabled and len(general_names) >= 2:
-        general_probs = _np.array([x[1] for x in general_names], dtype=_np.float32)
-        general_thresh = self._mcut_threshold(general_probs)
-    else:
-        general_thresh = self.general_threshold
-    general_res = {t: float(s) for (t, s) in general_names if s > general_thresh}
-
-    # character (with floor via character_mcut_min when MCut is used)
-    character_names = [labels[i] for i in self.character_indexes]
-    if character_mcut_enabled and len(character_names) >= 2:
-        character_probs = _np.array([x[1] for x in character_names], dtype=_np.float32)
-        character_mcut_min = get_tagger_config_value("character_mcut_min", 0.15)
-        character_thresh = max(character_mcut_min, self._mcut_threshold(character_probs))
+        return []
+    cfg = cfg if cfg is not None else _load_enh_config_with_defaults()
+    views = ["flip"] if tta_horizontal_flip else []
+    if not extra_views:
+        return views
+    if cfg.get("tta_center_crop", False):
+        ratio = float(cfg.get("tta_crop_ratio", 0.875))
+        if 0.0 < ratio < 1.0:
+            views.append(f"crop:{ratio:g}")
+    if cfg.get("tta_multiscale", False):
+        scales = cfg.get("tta_scales", [0.75])
+        for scale in (scales if isinstance(scales, (list, tuple)) else [scales]):
+            scale = float(scale)
+            if 0.0 < scale < 1.0 and f"scale:{scale:g}" not in views:
+                views.append(f"scale:{scale:g}")
+    return views
+
+def _tta_view_tensor(self, base, name, pad_rgb=None):
+    """
+    Derive one TTA view from the already-prepared (1,H,W,3) BGR tensor (no re-decode/re-pad).
+      flip      : mirror along the width axis
+      crop:r    : center crop of r × side, resized back to the input size
+      scale:r   : shrink to r × side and pad (pad_rgb) back to the input size
+    """
+    if name == "flip":
+        return base[:, :, ::-1, :]
+    kind, _, ratio = name.partition(":")
+    ratio = float(ratio)
+    target = base.shape[1]
+    side = max(1, int(round(target * ratio)))
+    offset = (target - side) // 2
+    # prepared tensor holds exact 0~255 integers (from a PIL RGB image), so uint8 round-trips losslessly
+    img = _PILImage.fromarray(base[0, :, :, ::-1].astype(_np.uint8))
+    if kind == "crop":
+        img = img.crop((offset, offset, offset + side, offset + side)).resize((target, target), _PILImage.BICUBIC)
+    elif kind == "scale":
+        canvas = _PILImage.new("RGB", (target, target), tuple(self.pad_rgb if pad_rgb is None else pad_rgb))
+        canvas.paste(img.resize((side, side), _PILImage.BICUBIC), (offset, offset))
+        img = canvas
     else:
-        character_thresh = self.character_threshold
-    character_res = {t: float(s) for (t, s) in character_names if s > character_thresh}
+        raise ValueError(f"unknown TTA view: {name}")
+    return _np.asarray(img, dtype=_np.float32)[:, :, ::-1][None, ...]
+
+def _enh_prepare_views(self, image_path, tta_views=(), pad_rgb=None):
+    """
+    Build the view stack (V,H,W,3) for one image: the original tensor, plus
+    TTA views derived from it (one decode/pad per image; all views go into the same batch).
+    """
+    base = self._prepare_tensor_reference(_PILImage.open(image_path), pad_rgb)
+    if not tta_views:
+        return base
+    return _np.concatenate([base] + [_tta_view_tensor(self, base, name, pad_rgb) for name in tta_views], axis=0)
+
+def _enh_view_spec(opts):
+    """Picklable view settings for process-pool workers (same meaning as prepare/merge)."""
+    return {k: opts[k] for k in ("apply_sigmoid", "tta_views", "tta_merge_mode")}
+
+def _enh_merge_views(raw, apply_sigmoid=False, tta_merge_mode="mean"):
+    """(V,num_tags) raw outputs → (num_tags,) scores (sigmoid per view, then merge)."""
+    scores = raw.astype(_np.float32)  # baseline: as-is (reference behavior)
+    if apply_sigmoid:
+        scores = _safe_sigmoid(scores)
+    if scores.shape[0] == 1:
+        return scores[0]
+    return _merge_scores(scores, mode=tta_merge_mode).astype(_np.float32)
+
+def predict_tags_enhanced(
+    self,
+    image_path: str,
+    use_config: bool = True,
+    # Explicit overrides; if None, values come from JSON
+    general_mcut_enabled: bool = None,
+    character_mcut_enabled: bool = None,
+    apply_sigmoid: bool = None,
+    tta_enabled: bool = None,
+    tta_horizontal_flip: bool = None,
+    tta_merge_mode: str = None,
+    max_tags: int = None,
+    exclude_tags: list = None,
+    general_threshold: float = None,
+    character_threshold: float = None,
+):
+    """
+    Enhanced prediction:
+    - Optional sigmoid on raw outputs.
+    - Optional TTA (currently: horizontal flip) with mean/max merge.
+    - Thresholding identical to reference (including MCut when enabled).
+    NOTE: This is an additive API; existing methods remain untouched.
+    """
+    if not self.is_loaded:
+        self.load_model()
 
-    ex = set(exclude_tags or [])
-    picked = [(t, sc) for (t, sc) in {**general_res, **character_res}.items() if t not in ex]
-    picked.sort(key=lambda x: x[1], reverse=True)
-    if max_tags > 0:
-        picked = picked[:max_tags]
-    return picked
+    opts = _resolve_enh_options(
+        use_config,
+        general_mcut_enabled=general_mcut_enabled,
+        character_mcut_enabled=character_mcut_enabled,
+        apply_sigmoid=apply_sigmoid,
+        tta_enabled=tta_enabled,
+        tta_horizontal_flip=tta_horizontal_flip,
+        tta_merge_mode=tta_merge_mode,
+        max_tags=max_tags,
+    )
+
+    # Inference (original + TTA views in one session.run)
+    views = _enh_prepare_views(self, image_path, opts["tta_views"])
+    scores = _enh_merge_views(self._run_batch([views]), opts["apply_sigmoid"], opts["tta_merge_mode"])
+
+    # Thresholding (exactly as in reference predict_tags; character floor via character_mcut_min)
+    return self._select_tags(
+        scores,
+        general_mcut_enabled=opts["general_mcut_enabled"],
+        character_mcut_enabled=opts["character_mcut_enabled"],
+        max_tags=opts["max_tags"],
+        exclude_tags=exclude_tags,
+        character_mcut_min=get_tagger_config_value("character_mcut_min", 0.15),
+        general_threshold=general_threshold,
+        character_threshold=character_threshold,
+    )
 
 def batch_predict_enhanced(
     self,
@@ -1447,40 +2515,53 @@ def batch_predict_enhanced(
     tta_merge_mode: str = None,
     max_tags: int = None,
     exclude_tags=None,
+    general_threshold: float = None,
+    character_threshold: float = None,
+    tta_extra_views: bool = True,
+    pad_rgb=None,
 ):
     if not self.is_loaded:
         self.load_model()
 
-    if max_tags is None:
-        max_tags = get_tagger_config_value("max_tags", 30)
-
-    total = len(image_paths)
-    
-    # 태그 결과 수집
-    tag_results = []
-    
-    for i, p in enumerate(image_paths):
-        try:
-            tags = predict_tags_enhanced(
-                self,
-                p,
-                use_config=use_config,
-                general_mcut_enabled=general_mcut_enabled,
-                character_mcut_enabled=character_mcut_enabled,
-                apply_sigmoid=apply_sigmoid,
-                tta_enabled=tta_enabled,
-                tta_horizontal_flip=tta_horizontal_flip,
-                tta_merge_mode=tta_merge_mode,
-                max_tags=max_tags,
-                exclude_tags=exclude_tags,
-            )
-            tag_results.append(tags)
-            self.tag_generated.emit(p, tags)
-        except Exception as e:
-            self.error_occurred.emit(f"태그 예측 실패: {e}")
-            tag_results.append([])  # 실패한 경우 빈 리스트
-        finally:
-            self.progress_updated.emit(i + 1, total)
+    # Resolve toggles once per batch (not per image)
+    opts = _resolve_enh_options(
+        use_config,
+        general_mcut_enabled=general_mcut_enabled,
+        character_mcut_enabled=character_mcut_enabled,
+        apply_sigmoid=apply_sigmoid,
+        tta_enabled=tta_enabled,
+        tta_horizontal_flip=tta_horizontal_flip,
+        tta_merge_mode=tta_merge_mode,
+        max_tags=max_tags,
+        tta_extra_views=tta_extra_views,
+    )
+    character_mcut_min = get_tagger_config_value("character_mcut_min", 0.15)
+
+    # 배치 추론 (batch_size 장 × TTA 뷰를 session.run 한 번)
+    tag_results = self._predict_batched(
+        image_paths,
+        prepare_views=lambda p: _enh_prepare_views(self, p, opts["tta_views"], pad_rgb),
+        merge_views=lambda raw: _enh_merge_views(raw, opts["apply_sigmoid"], opts["tta_merge_mode"]),
+        select=lambda scores: self._select_tags_batch(
+            scores,
+            general_mcut_enabled=opts["general_mcut_enabled"],
+            character_mcut_enabled=opts["character_mcut_enabled"],
+            max_tags=opts["max_tags"],
+            exclude_tags=exclude_tags,
+            character_mcut_min=character_mcut_min,
+            general_threshold=general_threshold,
+            character_threshold=character_threshold,
+        ),
+        error_fmt="태그 예측 실패: {error}",
+        cache_variant=self._score_cache_variant(
+            apply_sigmoid=opts["apply_sigmoid"],
+            tta_views=opts["tta_views"],
+            tta_merge_mode=opts["tta_merge_mode"],
+            pad_rgb=pad_rgb,
+        ),
+        view_spec=_enh_view_spec(opts),
+        pad_rgb=pad_rgb,
+    )
     
     # 타임머신 로그 기록 (공통 함수 사용)
     try:
@@ -1570,6 +2651,8 @@ def predict_tags_enhanced_v2(
     tta_merge_mode: str = None,
     max_tags: int = None,
     exclude_tags: list = None,
+    general_threshold: float = None,
+    character_threshold: float = None,
 ):
     """
     Enhanced V2 prediction:
@@ -1620,61 +2703,22 @@ def predict_tags_enhanced_v2(
     if max_tags is None:
         max_tags = get_tagger_config_value("max_tags", 30)
 
-    # Load image
-    pil = PILImage.open(image_path)
-
-    # Inference (reuse helpers from first enhancement block if present)
-    try:
-        scores = _predict_scores_single_pass(self, pil, apply_sigmoid=apply_sigmoid)
-        if tta_enabled:
-            _scores = [scores]
-            if tta_horizontal_flip:
-                pil_flip = pil.transpose(PILImage.FLIP_LEFT_RIGHT)
-                _scores.append(_predict_scores_single_pass(self, pil_flip, apply_sigmoid=apply_sigmoid))
-            scores = __np.mean(__np.stack(_scores, axis=0), axis=0).astype(__np.float32) if tta_merge_mode != "max" else __np.max(__np.stack(_scores, axis=0), axis=0).astype(__np.float32)
-    except NameError:
-        # If helper not available, do single pass baseline
-        tensor = self._prepare_tensor_reference(pil)
-        input_name = self.session.get_inputs()[0].name
-        out_name = self.session.get_outputs()[0].name
-        preds = self.session.run([out_name], {input_name: tensor})[0]
-        scores = preds[0].astype(__np.float32)
-
-    labels = list(zip(self.tag_names, scores))
-
-    # rating (not returned; parity only)
-    rating_names = [labels[i] for i in self.rating_indexes]
-    _ = dict(rating_names)
-
-    # ---- general with MCut + optional floor ----
-    general_names = [labels[i] for i in self.general_indexes]
-    if general_mcut_enabled and len(general_names) >= 2:
-        general_probs = __np.array([x[1] for x in general_names], dtype=__np.float32)
-        mcut_val = self._mcut_threshold(general_probs)
-        if general_mcut_min_enabled:
-            general_thresh = max(float(general_mcut_min), mcut_val)
-        else:
-            general_thresh = mcut_val
-    else:
-        general_thresh = self.general_threshold
-    general_res = {t: float(s) for (t, s) in general_names if s > general_thresh}
-
-    # ---- character (unchanged from reference/enhanced) ----
-    character_names = [labels[i] for i in self.character_indexes]
-    if character_mcut_enabled and len(character_names) >= 2:
-        character_probs = __np.array([x[1] for x in character_names], dtype=__np.float32)
-        character_mcut_min = get_tagger_config_value("character_mcut_min", 0.15)
-        character_thresh = max(character_mcut_min, self._mcut_threshold(character_probs))
-    else:
-        character_thresh = self.character_threshold
-    character_res = {t: float(s) for (t, s) in character_names if s > character_thresh}
-
-    ex = set(exclude_tags or [])
-    picked = [(t, sc) for (t, sc) in {**general_res, **character_res}.items() if t not in ex]
-    picked.sort(key=lambda x: x[1], reverse=True)
-    if max_tags > 0:
-        picked = picked[:max_tags]
-    return picked
+    # Inference (original + TTA views in one session.run)
+    views = _enh_prepare_views(self, image_path, _enh_tta_views(tta_enabled, tta_horizontal_flip, base_cfg))
+    scores = _enh_merge_views(self._run_batch([views]), apply_sigmoid, tta_merge_mode)
+
+    # general with MCut + optional floor / character unchanged from reference/enhanced
+    return self._select_tags(
+        scores,
+        general_mcut_enabled=general_mcut_enabled,
+        character_mcut_enabled=character_mcut_enabled,
+        max_tags=max_tags,
+        exclude_tags=exclude_tags,
+        general_mcut_min=float(general_mcut_min) if general_mcut_min_enabled else None,
+        character_mcut_min=get_tagger_config_value("character_mcut_min", 0.15),
+        general_threshold=general_threshold,
+        character_threshold=character_threshold,
+    )
 
 def batch_predict_enhanced_v2(
     self,
@@ -1690,42 +2734,60 @@ def batch_predict_enhanced_v2(
     tta_merge_mode: str = None,
     max_tags: int = None,
     exclude_tags=None,
+    general_threshold: float = None,
+    character_threshold: float = None,
+    tta_extra_views: bool = True,
+    pad_rgb=None,
 ):
     if not self.is_loaded:
         self.load_model()
 
-    if max_tags is None:
-        max_tags = get_tagger_config_value("max_tags", 30)
-
-    total = len(image_paths)
-    
-    # 태그 결과 수집
-    tag_results = []
-    
-    for i, p in enumerate(image_paths):
-        try:
-            tags = predict_tags_enhanced_v2(
-                self,
-                p,
-                use_config=use_config,
-                general_mcut_enabled=general_mcut_enabled,
-                character_mcut_enabled=character_mcut_enabled,
-                general_mcut_min_enabled=general_mcut_min_enabled,
-                general_mcut_min=general_mcut_min,
-                apply_sigmoid=apply_sigmoid,
-                tta_enabled=tta_enabled,
-                tta_horizontal_flip=tta_horizontal_flip,
-                tta_merge_mode=tta_merge_mode,
-                max_tags=max_tags,
-                exclude_tags=exclude_tags,
-            )
-            tag_results.append(tags)
-            self.tag_generated.emit(p, tags)
-        except Exception as e:
-            self.error_occurred.emit(f"태그 예측 실패(v2): {e}")
-            tag_results.append([])  # 실패한 경우 빈 리스트
-        finally:
-            self.progress_updated.emit(i + 1, total)
+    # Resolve toggles once per batch (not per image)
+    opts = _resolve_enh_options(
+        use_config,
+        general_mcut_enabled=general_mcut_enabled,
+        character_mcut_enabled=character_mcut_enabled,
+        apply_sigmoid=apply_sigmoid,
+        tta_enabled=tta_enabled,
+        tta_horizontal_flip=tta_horizontal_flip,
+        tta_merge_mode=tta_merge_mode,
+        max_tags=max_tags,
+        tta_extra_views=tta_extra_views,
+    )
+    v2_cfg = _load_enh_v2_config_with_defaults() if use_config else _enh_v2_default_config()
+    if general_mcut_min_enabled is None:
+        general_mcut_min_enabled = bool(v2_cfg.get("general_mcut_min_enabled", False))
+    if general_mcut_min is None:
+        general_mcut_min = float(v2_cfg.get("general_mcut_min", 0.15))
+    general_floor = float(general_mcut_min) if general_mcut_min_enabled else None
+    character_mcut_min = get_tagger_config_value("character_mcut_min", 0.15)
+
+    # 배치 추론 (batch_size 장 × TTA 뷰를 session.run 한 번)
+    tag_results = self._predict_batched(
+        image_paths,
+        prepare_views=lambda p: _enh_prepare_views(self, p, opts["tta_views"], pad_rgb),
+        merge_views=lambda raw: _enh_merge_views(raw, opts["apply_sigmoid"], opts["tta_merge_mode"]),
+        select=lambda scores: self._select_tags_batch(
+            scores,
+            general_mcut_enabled=opts["general_mcut_enabled"],
+            character_mcut_enabled=opts["character_mcut_enabled"],
+            max_tags=opts["max_tags"],
+            exclude_tags=exclude_tags,
+            general_mcut_min=general_floor,
+            character_mcut_min=character_mcut_min,
+            general_threshold=general_threshold,
+            character_threshold=character_threshold,
+        ),
+        error_fmt="태그 예측 실패(v2): {error}",
+        cache_variant=self._score_cache_variant(
+            apply_sigmoid=opts["apply_sigmoid"],
+            tta_views=opts["tta_views"],
+            tta_merge_mode=opts["tta_merge_mode"],
+            pad_rgb=pad_rgb,
+        ),
+        view_spec=_enh_view_spec(opts),
+        pad_rgb=pad_rgb,
+    )
     
     # 타임머신 로그 기록 (공통 함수 사용)
     try:
@@ -9,12 +9,21 @@
 - ^/$: 문자열 시작/끝 앵커 (정규식과 동일 의미)
 
 대소문자 구분 없이 매칭합니다.
+
+검색어는 한 번만 해석/컴파일하고 재사용합니다.
+- compile_query(query) → CompiledQuery (match_or_contains 와 같은 의미, LRU 캐시)
+- 와일드카드/앵커/따옴표가 없는 검색어는 정규식 없이 부분 문자열 검사 (리터럴 고속 경로)
+- filter_matches / filter_list / expand_tag_patterns(_advanced) 는 어휘 전체를 한 번의 컴파일로 일괄 매칭
+- CompiledQuery.fragments: 일치하는 텍스트에 반드시 들어 있는 리터럴 조각 (n-gram 색인 후보 좁히기용)
 """
 
 from __future__ import annotations
 
 import re
-from typing import Iterable, List
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+QUERY_CACHE_SIZE = 256  # 컴파일된 검색어/패턴 LRU 크기
 
 
 _WILDCARD_SIGNS = set(["*", "?", "[", "]", "{", "}", "^", "$"])
@@ -27,6 +36,7 @@ def is_wildcard(pattern: str) -> bool:
     return any(ch in pattern for ch in _WILDCARD_SIGNS)
 
 
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
 def _compile_wildcard_to_regex(pattern: str) -> re.Pattern:
     """와일드카드 패턴을 정규식으로 컴파일 (대소문자 무시).
 
@@ -95,25 +105,86 @@ def matches(text: str, pattern: str) -> bool:
 
 
 def filter_list(items: Iterable[str], pattern: str) -> List[str]:
-    """리스트에서 와일드카드 패턴에 매칭되는 항목만 반환"""
-    rx = _compile_wildcard_to_regex(pattern)
-    return [it for it in items if rx.search(it or '')]
+    """리스트에서 와일드카드 패턴에 매칭되는 항목만 반환 (패턴은 한 번만 컴파일)"""
+    search = _compile_wildcard_to_regex(pattern).search
+    return [it for it in items if search(it or '')]
 
 
-# ---------- High-level helpers (for minimal hooks) ----------
-def match_or_contains(text: str, query: str) -> bool:
-    """코어 모듈에서 한 줄로 쓰기 위한 매칭 헬퍼.
-    - query에 와일드카드 문자가 있으면 와일드카드 매칭
-    - 없으면 단순 부분 문자열 포함(in)
-    모두 대소문자 무시
+# ---------- Compiled queries (parse once, match many) ----------
+def _required_fragments(pattern: str) -> Tuple[str, ...]:
+    """와일드카드 패턴에서 일치 시 반드시 나타나는 리터럴 조각 (_compile_wildcard_to_regex 와 같은 해석).
+    *, ?, [..], {..}, ^, $ 에서 끊기며, 닫히지 않은 [ / { 와 빈 {} 는 리터럴로 이어 붙임"""
+    fragments: List[str] = []
+    run: List[str] = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        ch = pattern[i]
+        end = pattern.find(']' if ch == '[' else '}', i + 1) if ch in ('[', '{') else -1
+        if ch in ('*', '?', '^', '$') or (ch == '[' and end != -1) \
+                or (ch == '{' and end != -1 and any(p.strip() for p in pattern[i+1:end].split(','))):
+            if run:
+                fragments.append(''.join(run))
+                run = []
+            i = end + 1 if end != -1 else i + 1
+        elif ch == '{' and end != -1:
+            run.append(pattern[i:end+1])
+            i = end + 1
+        else:
+            run.append(ch)
+            i += 1
+    if run:
+        fragments.append(''.join(run))
+    return tuple(fragments)
+
+
+class CompiledQuery:
+    """match_or_contains 검색어를 미리 해석한 결과.
+    - literal: 와일드카드/앵커/따옴표가 없는 검색어 → 소문자 부분 문자열 검사
+    - regex  : 그 외 (따옴표 리터럴, 와일드카드, 앵커) → 컴파일된 정규식 (대소문자 무시)
+    - fragments: 일치하는 텍스트(소문자)에 반드시 포함되는 조각들 (소문자)
     """
-    if text is None or query is None:
-        return False
-    t = text.lower()
-    q = query.strip()
-    if not q:
-        return False
 
+    __slots__ = ("query", "literal", "regex", "fragments")
+
+    def __init__(self, query: str, literal: Optional[str] = None, regex: Optional[re.Pattern] = None,
+                 fragments: Tuple[str, ...] = ()):
+        self.query = query
+        self.literal = literal
+        self.regex = regex
+        self.fragments = (literal,) if literal is not None else fragments
+
+    @property
+    def is_literal(self) -> bool:
+        return self.literal is not None
+
+    def matches(self, text: str) -> bool:
+        """match_or_contains(text, query) 와 같은 결과"""
+        if text is None:
+            return False
+        if self.literal is not None:
+            return self.literal in text.lower()
+        return self.regex.search(text.lower()) is not None
+
+    def filter(self, items: Iterable[str]) -> List[str]:
+        """items 중 일치하는 항목 (순서 유지, None 제외)"""
+        literal = self.literal
+        if literal is not None:
+            return [it for it in items if it is not None and literal in it.lower()]
+        search = self.regex.search
+        return [it for it in items if it is not None and search(it.lower()) is not None]
+
+
+def _anchored(pat: str, anchor_start: bool, anchor_end: bool) -> re.Pattern:
+    if anchor_start:
+        pat = '^' + pat
+    if anchor_end:
+        pat = pat + '$'
+    return re.compile(pat, flags=re.IGNORECASE)
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _compile_query_cached(q: str) -> CompiledQuery:
     # 앵커 감지 (외곽의 ^, $만 처리)
     anchor_start = q.startswith('^')
     anchor_end = q.endswith('$')
@@ -122,39 +193,51 @@ def match_or_contains(text: str, query: str) -> bool:
     if anchor_end and len(q) > 0:
         q = q[:-1]
 
-    # 따옴표로 감싸인 경우는 리터럴로 처리
+    # 따옴표로 감싸인 경우는 리터럴로 처리 (정규식 이스케이프 후 앵커 적용)
     is_quoted = len(q) >= 2 and q[0] == '"' and q[-1] == '"'
     if is_quoted:
         inner = q[1:-1]
-        # 리터럴은 정규식 이스케이프 후 앵커 적용
-        pat = re.escape(inner)
-        if anchor_start:
-            pat = '^' + pat
-        if anchor_end:
-            pat = pat + '$'
-        rx = re.compile(pat, flags=re.IGNORECASE)
-        return rx.search(t) is not None
-
-    # 비인용: 와일드카드/문자클래스/중괄호/앵커 지원
+        return CompiledQuery(q, regex=_anchored(re.escape(inner), anchor_start, anchor_end), fragments=(inner.lower(),))
+
+    # 비인용: 와일드카드/문자클래스/중괄호/앵커 지원, 없으면 단순 포함
     q_low = q.lower()
-    # 와일드카드가 포함되면 변환, 없으면 단순 포함
     if is_wildcard(q_low) or anchor_start or anchor_end:
-        # 내부를 와일드카드 규칙으로 컴파일한 뒤 앵커 추가
-        # _compile_wildcard_to_regex는 앵커를 그대로 두므로, q에 남은 ^/$도 포함 가능
-        # 이미 여기서 외곽 앵커는 제거했으므로 직접 붙인다
-        # 내부를 정규식 문자열로 만들기 위해 동일 로직 재사용
-        # 구현 단순화를 위해: 내부를 변환하여 패턴 문자열을 얻기 위해 임시 컴파일 후 pattern 추출 대신 직접 변환 함수를 사용
-        # 아래는 내부 변환을 다시 구현하지 않고 search에 맡김: '^'/'$'는 이미 제거했으므로 직접 붙여줌
-        rx_inner = _compile_wildcard_to_regex(q_low)
-        pat = rx_inner.pattern
-        if anchor_start:
-            pat = '^' + pat
-        if anchor_end:
-            pat = pat + '$'
-        rx = re.compile(pat, flags=re.IGNORECASE)
-        return rx.search(t) is not None
-    else:
-        return q_low in t
+        return CompiledQuery(q, regex=_anchored(_compile_wildcard_to_regex(q_low).pattern, anchor_start, anchor_end),
+                             fragments=_required_fragments(q_low))
+    return CompiledQuery(q, literal=q_low)
+
+
+def compile_query(query: str) -> Optional[CompiledQuery]:
+    """검색어 → CompiledQuery (빈 검색어/None 은 None = 아무것도 일치하지 않음)"""
+    if query is None:
+        return None
+    q = query.strip()
+    if not q:
+        return None
+    return _compile_query_cached(q)
+
+
+def filter_matches(items: Iterable[str], query: str) -> List[str]:
+    """items(어휘 전체 등) 중 match_or_contains 기준으로 일치하는 항목 (검색어는 한 번만 컴파일)"""
+    compiled = compile_query(query)
+    if compiled is None:
+        return []
+    return compiled.filter(items)
+
+
+# ---------- High-level helpers (for minimal hooks) ----------
+def match_or_contains(text: str, query: str) -> bool:
+    """코어 모듈에서 한 줄로 쓰기 위한 매칭 헬퍼.
+    - query에 와일드카드 문자가 있으면 와일드카드 매칭
+    - 없으면 단순 부분 문자열 포함(in)
+    모두 대소문자 무시 (검색어 해석/컴파일은 compile_query 캐시 재사용)
+    """
+    if text is None or query is None:
+        return False
+    compiled = compile_query(query)
+    if compiled is None:
+        return False
+    return compiled.matches(text)
 
 
 def expand_tag_patterns(patterns: Iterable[str], all_known_tags: Iterable[str]) -> List[str]:
@@ -170,7 +253,7 @@ def expand_tag_patterns(patterns: Iterable[str], all_known_tags: Iterable[str])
         if not pat:
             continue
         if is_wildcard(pat):
-            for hit in filter_list(all_list, pat):
+            for hit in filter_list(all_list, pat):  # 패턴별 한 번 컴파일 (캐시) 후 어휘 일괄 매칭
                 if hit not in seen:
                     seen.add(hit)
                     result.append(hit)
@@ -196,37 +279,29 @@ def expand_tag_patterns_advanced(patterns: Iterable[str], all_known_tags: Iterab
         token = raw.strip()
         if not token:
             continue
-        anchor_start = token.startswith('^')
-        anchor_end = token.endswith('$')
-        if anchor_start:
-            token = token[1:]
-        if anchor_end and len(token) > 0:
-            token = token[:-1]
-
-        # 인용 리터럴?
-        is_quoted = len(token) >= 2 and token[0] == '"' and token[-1] == '"'
-        if is_quoted:
-            inner = token[1:-1]
-            pat = re.escape(inner)
-            if anchor_start:
-                pat = '^' + pat
-            if anchor_end:
-                pat = pat + '$'
-            rx = re.compile(pat, flags=re.IGNORECASE)
-        else:
-            # 비인용: 와일드카드/문자클래스/중괄호 처리 후 앵커 적용
-            rx_inner = _compile_wildcard_to_regex(token)
-            pat = rx_inner.pattern
-            if anchor_start:
-                pat = '^' + pat
-            if anchor_end:
-                pat = pat + '$'
-            rx = re.compile(pat, flags=re.IGNORECASE)
-
+        search = _compile_advanced_token(token).search
         for tag in tag_list:
-            if rx.search(tag or '') and tag not in seen:
+            if tag not in seen and search(tag or ''):
                 seen.add(tag)
                 result.append(tag)
     return result
 
 
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _compile_advanced_token(token: str) -> re.Pattern:
+    """expand_tag_patterns_advanced 토큰 → 정규식 (외곽 앵커, 인용 리터럴, 와일드카드)"""
+    anchor_start = token.startswith('^')
+    anchor_end = token.endswith('$')
+    if anchor_start:
+        token = token[1:]
+    if anchor_end and len(token) > 0:
+        token = token[:-1]
+
+    # 인용 리터럴?
+    is_quoted = len(token) >= 2 and token[0] == '"' and token[-1] == '"'
+    if is_quoted:
+        return _anchored(re.escape(token[1:-1]), anchor_start, anchor_end)
+    # 비인용: 와일드카드/문자클래스/중괄호 처리 후 앵커 적용
+    return _anchored(_compile_wildcard_to_regex(token).pattern, anchor_start, anchor_end)
+
+